@@ -1,2 +1,4 @@
 import api.auth.auth_service
+import api.auth.jwt_backend
 import api.auth.models
+import api.auth.password_hasher
@@ -1,12 +1,17 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
-import httpx
-from jose import jwt
+from jose import JWTError
 
+from api.auth.jwt_backend import jwt_backend
 from api.auth.models import TokenData, TokenPair
 from api.common.utils import Utils
 from api.config import settings
+from api.services.http_client import http_client
 from api.storage.storage_service import StorageService
 
 JWT_SECRET_KEY = settings.jwt_secret_key
@@ -15,15 +20,22 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 REFRESH_TOKEN_SECRET_KEY = settings.refresh_token_secret_key
 REFRESH_TOKEN_EXPIRE_MINUTES = settings.refresh_token_expire_minutes
 
-GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
-GOOGLE_USER_INFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+GOOGLE_TOKEN_URL = settings.google_token_url
+GOOGLE_USER_INFO_URL = settings.google_user_info_url
 
 
 class AuthService:
+    # Claims of verified tokens by token digest, with the token's expiry,
+    # least recently used first
+    _token_cache: OrderedDict[str, tuple[TokenData, float]] = OrderedDict()
+    _token_cache_lock = threading.Lock()
+
     @staticmethod
     def hash_password(password: str) -> str:
         Utils.validate_non_empty(password=password)
-        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode()
+        return bcrypt.hashpw(
+            password.encode("utf-8"), bcrypt.gensalt(settings.bcrypt_rounds)
+        ).decode()
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -46,7 +58,7 @@ class AuthService:
                 "type": "access",
             }
         )
-        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        return jwt_backend.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
     @staticmethod
     def create_refresh_token(
@@ -62,7 +74,9 @@ class AuthService:
                 "type": "refresh",
             }
         )
-        return jwt.encode(to_encode, REFRESH_TOKEN_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        return jwt_backend.encode(
+            to_encode, REFRESH_TOKEN_SECRET_KEY, algorithm=JWT_ALGORITHM
+        )
 
     @staticmethod
     def create_token_pair(token_data: TokenData) -> TokenPair:
@@ -73,9 +87,27 @@ class AuthService:
 
     @staticmethod
     def verify_token(token: str, is_refresh: bool = False) -> TokenData:
+        """
+        Verify an access or refresh token and return its claims.
+
+        The same token is presented on every request until it expires, so
+        verified claims are cached (keyed by a digest of the token) until the
+        token's expiry. Token versions are still checked against the user by
+        the caller, so revoked tokens are rejected as before.
+        """
         Utils.validate_non_empty(token=token)
+        cache_key = hashlib.sha256(f"{int(is_refresh)}:{token}".encode()).digest()
+        with AuthService._token_cache_lock:
+            cached = AuthService._token_cache.get(cache_key)
+            if cached is not None:
+                if cached[1] > time.time():
+                    AuthService._token_cache.move_to_end(cache_key)
+                    return cached[0].model_copy()
+                # Expired: decode again so the usual error is raised
+                del AuthService._token_cache[cache_key]
+
         secret_key = REFRESH_TOKEN_SECRET_KEY if is_refresh else JWT_SECRET_KEY
-        payload = jwt.decode(token, secret_key, algorithms=[JWT_ALGORITHM])
+        payload = jwt_backend.decode(token, secret_key, algorithms=[JWT_ALGORITHM])
 
         # Optional: Add type validation if needed
         if is_refresh and payload.get("type") != "refresh":
@@ -87,10 +119,24 @@ class AuthService:
         token_payload = payload.copy()
 
         # Remove time-related fields
-        token_payload.pop("exp")
+        expires_at = token_payload.pop("exp")
         token_payload.pop("type")
 
-        return TokenData(**token_payload)
+        token_data = TokenData(**token_payload)
+        if settings.token_cache_size > 0:
+            with AuthService._token_cache_lock:
+                AuthService._token_cache[cache_key] = (token_data, expires_at)
+                while len(AuthService._token_cache) > settings.token_cache_size:
+                    AuthService._token_cache.popitem(last=False)
+        return token_data.model_copy()
+
+    @staticmethod
+    def clear_token_cache() -> None:
+        """
+        Forget cached token claims.
+        """
+        with AuthService._token_cache_lock:
+            AuthService._token_cache.clear()
 
     @staticmethod
     def create_password_reset_token(
@@ -107,7 +153,7 @@ class AuthService:
         to_encode.update(
             {"exp": expire, "type": "password_reset", "token_version": token_version}
         )
-        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        return jwt_backend.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
     @staticmethod
     def verify_password_reset_token(token: str) -> TokenData:
@@ -116,7 +162,9 @@ class AuthService:
         """
         Utils.validate_non_empty(token=token)
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = jwt_backend.decode(
+                token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM]
+            )
 
             # Validate token type
             if payload.get("type") != "password_reset":
@@ -131,7 +179,7 @@ class AuthService:
 
             # Preserve any additional fields like token_version if present
             return TokenData(**token_payload)
-        except jwt.JWTError:
+        except JWTError:
             raise ValueError("Invalid or expired password reset token")
 
     @staticmethod
@@ -142,11 +190,8 @@ class AuthService:
         """
         Utils.validate_non_empty(token=token)
         try:
-            payload = jwt.decode(
-                token,
-                JWT_SECRET_KEY,
-                algorithms=[JWT_ALGORITHM],
-                options={"verify_exp": False},
+            payload = jwt_backend.decode(
+                token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], verify_exp=False
             )
 
             # Validate token type
@@ -162,7 +207,7 @@ class AuthService:
 
             # Preserve any additional fields like token_version if present
             return TokenData(**token_payload)
-        except jwt.JWTError:
+        except JWTError:
             raise ValueError("Invalid password reset token format or signature")
 
     @staticmethod
@@ -184,7 +229,7 @@ class AuthService:
                 "token_version": token_version,
             }
         )
-        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        return jwt_backend.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
     @staticmethod
     def verify_email_confirmation_token(token: str) -> TokenData:
@@ -193,7 +238,9 @@ class AuthService:
         """
         Utils.validate_non_empty(token=token)
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = jwt_backend.decode(
+                token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM]
+            )
 
             # Validate token type
             if payload.get("type") != "email_confirmation":
@@ -208,13 +255,13 @@ class AuthService:
 
             # Preserve any additional fields like token_version if present
             return TokenData(**token_payload)
-        except jwt.JWTError:
+        except JWTError:
             raise ValueError("Invalid or expired email confirmation token")
 
     @staticmethod
     async def authenticate_google_user(code: str) -> TokenPair:
         # Exchange authorization code for tokens
-        token_response = await httpx.AsyncClient().post(
+        token_response = await http_client.client.post(
             GOOGLE_TOKEN_URL,
             data={
                 "code": code,
@@ -229,7 +276,7 @@ class AuthService:
         access_token = google_tokens["access_token"]
 
         # Fetch user info from Google
-        user_info_response = await httpx.AsyncClient().get(
+        user_info_response = await http_client.client.get(
             GOOGLE_USER_INFO_URL,
             headers={"Authorization": f"Bearer {access_token}"},
         )
@@ -0,0 +1,70 @@
+from jose import JWTError
+from jose import jwt as jose_jwt
+from jose.exceptions import ExpiredSignatureError
+
+from api.config import settings
+
+
+class JoseBackend:
+    """
+    Signs and verifies JWTs with python-jose.
+    """
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(
+        self, token: str, key: str, algorithms: list[str], verify_exp: bool = True
+    ) -> dict:
+        return jose_jwt.decode(
+            token, key, algorithms=algorithms, options={"verify_exp": verify_exp}
+        )
+
+
+class PyJWTBackend:
+    """
+    Signs and verifies JWTs with PyJWT, which is faster than python-jose.
+    Requires the `PyJWT` package. Errors are raised as python-jose's
+    `JWTError`, so callers don't depend on the backend in use.
+    """
+
+    def __init__(self):
+        try:
+            import jwt
+        except ImportError:
+            raise RuntimeError(
+                "JWT_BACKEND=pyjwt requires the 'PyJWT' package to be installed."
+            )
+        self.jwt = jwt
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self.jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(
+        self, token: str, key: str, algorithms: list[str], verify_exp: bool = True
+    ) -> dict:
+        try:
+            return self.jwt.decode(
+                token, key, algorithms=algorithms, options={"verify_exp": verify_exp}
+            )
+        except self.jwt.ExpiredSignatureError as e:
+            raise ExpiredSignatureError(str(e))
+        except self.jwt.PyJWTError as e:
+            raise JWTError(str(e))
+
+
+def make_jwt_backend(backend: str = None):
+    """
+    Build the backend selected by JWT_BACKEND: jose or pyjwt.
+    """
+    backend = backend or settings.jwt_backend
+    if backend == "jose":
+        return JoseBackend()
+    if backend == "pyjwt":
+        return PyJWTBackend()
+    raise ValueError(
+        f"Unknown JWT backend: {backend}. Please set JWT_BACKEND to 'jose' or 'pyjwt'."
+    )
+
+
+jwt_backend = make_jwt_backend()
@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+from api.common.utils import Utils
+from api.config import settings
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop, in a bounded pool of worker processes.
+
+    Each hash or check takes hundreds of milliseconds of CPU, so running it in
+    an `async def` route stalls every request and websocket on the worker.
+    At most `max_pending` operations are queued or running at once; callers
+    beyond that wait up to `queue_timeout` seconds for a slot and then get a
+    503, rather than piling up behind a burst of logins.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        max_pending: int = None,
+        queue_timeout: float = None,
+        rounds: int = None,
+    ):
+        # 0 workers runs bcrypt in a thread pool instead (bcrypt releases the GIL)
+        self.workers = settings.password_hash_workers if workers is None else workers
+        self.max_pending = max_pending or settings.password_hash_max_pending
+        self.queue_timeout = (
+            settings.password_hash_queue_timeout
+            if queue_timeout is None
+            else queue_timeout
+        )
+        self.rounds = rounds or settings.bcrypt_rounds
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                # Forking a process that already runs threads can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _run(self, func, *args):
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-in attempts right now. Please try again shortly.",
+            )
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            slots.release()
+
+    async def hash(self, password: str) -> str:
+        Utils.validate_non_empty(password=password)
+        # Workers get bcrypt's own functions, so they only need to import bcrypt
+        hashed = await self._run(
+            bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds)
+        )
+        return hashed.decode()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        Utils.validate_non_empty(
+            plain_password=plain_password, hashed_password=hashed_password
+        )
+        return await self._run(
+            bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+        )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Whether a stored hash was made with a different cost than configured.
+        """
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
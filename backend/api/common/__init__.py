@@ -1,2 +1,5 @@
 import api.common.constants
+import api.common.lazy_import
+import api.common.metrics
+import api.common.tracing
 import api.common.utils
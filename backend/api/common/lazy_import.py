@@ -0,0 +1,59 @@
+import importlib
+import threading
+from typing import Any, Callable, Optional
+
+
+class LazyProxy:
+    """
+    Stands in for an object that is expensive to create, such as a third party
+    SDK or a client built from one, and creates it on first attribute access.
+
+    Modules that only need an SDK on some requests hold a proxy instead of
+    importing it at module level, so `import api.index` (and every worker
+    cold start) doesn't pay for SDKs that may never be used.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            with object.__getattribute__(self, "_lock"):
+                target = object.__getattribute__(self, "_target")
+                if target is None:
+                    target = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            return f"<LazyProxy (not loaded) at {id(self):#x}>"
+        return repr(target)
+
+
+def lazy_module(name: str, on_import: Optional[Callable[[Any], None]] = None):
+    """
+    Return a proxy for the module `name` that imports it on first use.
+    `on_import` is called with the module once, e.g. to configure an API key.
+    """
+
+    def load():
+        module = importlib.import_module(name)
+        if on_import is not None:
+            on_import(module)
+        return module
+
+    return LazyProxy(load)
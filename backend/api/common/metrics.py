@@ -0,0 +1,336 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+from api.common.tracing import CLIENT, tracer
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = (
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """
+    A metric family: one time series per combination of label values.
+
+    Children are created on first use, e.g.
+    `requests.labels(method="GET", route="/api/ping").inc()`. Updates take a
+    lock, so metrics can be recorded from the threadpool as well as the loop.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children: Dict[LabelValues, "Metric"] = {}
+        # Unlabelled metrics report zero until they are first updated
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values: str, **kwargs: str):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        values = tuple(str(value) for value in values)
+        with self.lock:
+            child = self.children.get(values)
+            if child is None:
+                child = self.children[values] = self._child()
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        # Metrics without labels have a single, unlabelled child
+        return self.labels()
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """
+        Yield (suffix, formatted labels, value) for every time series.
+        """
+        with self.lock:
+            children = list(self.children.items())
+        for values, child in children:
+            yield from child._samples(self.labelnames, values)
+
+
+class _Value:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self.lock:
+            self.value = value
+
+    def _samples(self, names, values):
+        yield "", _format_labels(names, values), self.value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def samples(self):
+        for suffix, labels, value in super().samples():
+            yield "_total", labels, value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        with self.lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def _samples(self, names, values):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels((*names, "le"), (*values, _format_value(bound)))
+            yield "_bucket", labels, cumulative
+        yield "_bucket", _format_labels((*names, "le"), (*values, "+Inf")), count
+        yield "_sum", _format_labels(names, values), total
+        yield "_count", _format_labels(names, values), count
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class GaugeCallback:
+    """
+    A gauge read when metrics are scraped, for values that already live
+    elsewhere (pool sizes, open websockets). The callback returns a number,
+    or a dict of label values to numbers for labelled gauges.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], object],
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        result = self.callback()
+        if not isinstance(result, dict):
+            result = {(): result}
+        for values, value in result.items():
+            if not isinstance(values, tuple):
+                values = (values,)
+            yield "", _format_labels(self.labelnames, values), value
+
+
+class MetricsRegistry:
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+
+    Every worker process has its own registry, so with several web workers
+    each scrape of /metrics reports the worker that answered it; scrape the
+    workers individually (or run one per container) to see all of them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Union[Metric, GaugeCallback]] = {}
+
+    def register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        with self.lock:
+            self.metrics.pop(name, None)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self, name: str, documentation: str, callback, labelnames=()
+    ) -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # A failing callback must not take the other metrics down with it
+                lines.append(f"# {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request, by route template and status code.",
+    ["method", "route", "status"],
+)
+http_requests_in_progress = metrics.gauge(
+    "http_requests_in_progress", "HTTP requests being handled."
+)
+external_call_duration = metrics.histogram(
+    "external_call_duration_seconds",
+    "Time spent in calls to external services (LLM providers, Gmail, Google OAuth).",
+    ["service", "operation", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+@contextmanager
+def observe_external_call(service: str, operation: str):
+    """
+    Time a call to an external service, and trace it as a client span. The
+    outcome label is "error" if the block raises, otherwise "ok".
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracer.start_as_current_span(
+            f"{service} {operation}",
+            CLIENT,
+            {"peer.service": service, "operation": operation},
+        ):
+            yield
+        outcome = "ok"
+    finally:
+        external_call_duration.labels(
+            service=service, operation=operation, outcome=outcome
+        ).observe(time.perf_counter() - start)
+
+
+def _asyncio_tasks() -> int:
+    try:
+        return len(asyncio.all_tasks())
+    except RuntimeError:
+        return 0  # Scraped outside the event loop
+
+
+metrics.gauge_callback(
+    "asyncio_tasks", "Tasks alive on this worker's event loop.", _asyncio_tasks
+)
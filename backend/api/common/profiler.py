@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from api.config import settings
+
+# (function, file, first line) of one frame, outermost first in a stack
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+# Sample taken while the profiled request had no code running on the event
+# loop: it was awaiting I/O, a worker thread (asyncio.to_thread) or a lock
+OFF_LOOP: Stack = (("(waiting off the event loop)", "", 0),)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# The event loop runs every task step from here; frames above it are the loop's
+_HANDLE_RUN = asyncio.events.Handle._run.__code__
+
+_active_profile: ContextVar[Optional["Profile"]] = ContextVar(
+    "active_profile", default=None
+)
+
+
+def _loop_stack(frame) -> Stack:
+    """
+    The frames of the task step running in `frame`'s thread, from the
+    outermost coroutine frame inwards; the event loop's own frames are dropped.
+    """
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        if code is _HANDLE_RUN:
+            break
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+class Profile:
+    """
+    Stack samples of one request: the task's stack while it runs on the event
+    loop, OFF_LOOP while it waits. Each sample is weighted by the wall time
+    since the previous one, as the sampler wakes late while code holds the
+    GIL, so the flame graph adds up to the request's duration.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.created_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.samples: Dict[Stack, float] = {}  # Seconds per distinct stack
+        self.sample_count = 0
+        self.last_sample = self.start
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+
+    def add(self, stack: Stack, now: float) -> None:
+        self.samples[stack] = self.samples.get(stack, 0.0) + now - self.last_sample
+        self.sample_count += 1
+        self.last_sample = now
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.sample_count,
+        }
+
+    def collapsed(self) -> str:
+        """
+        Folded stacks ("outer;inner weight" per line, weights in microseconds),
+        as read by flamegraph.pl, speedscope and most flame graph tools.
+        """
+        lines = []
+        for stack, seconds in sorted(self.samples.items()):
+            names = ";".join(
+                name if not file else f"{name} ({file}:{line})"
+                for name, file, line in stack
+            )
+            lines.append(f"{names or '(idle)'} {round(seconds * 1_000_000)}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """
+        The profile in speedscope's file format; open it at https://www.speedscope.app.
+        """
+        frames: List[dict] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, seconds in self.samples.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, file, line = frame
+                    frames.append(
+                        {"name": name, "file": file, "line": line}
+                        if file
+                        else {"name": name}
+                    )
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(seconds)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": settings.tracing_service_name,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for individual requests.
+
+    While any profile is active a sampler thread wakes every `interval`, reads
+    the event loop thread's stack and credits it to the profile whose request
+    is running there. A task belongs to a profile if it started the profile or
+    was created while it was active, which a task factory installed for the
+    duration records. Nothing runs when no request is being profiled.
+    Finished profiles are kept in memory, newest first, up to `max_profiles`.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+        max_profiles: Optional[int] = None,
+    ):
+        self.interval = (
+            interval if interval is not None else settings.profiler_interval_ms / 1000
+        )
+        self.sample_rate = (
+            sample_rate if sample_rate is not None else settings.profiler_sample_rate
+        )
+        self.profiles: Deque[Profile] = deque(
+            maxlen=max_profiles or settings.profiler_max_profiles
+        )
+        self._active: List[Profile] = []
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.Task, Profile]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Task factory each loop had before profiling started on it
+        self._factories: Dict[asyncio.AbstractEventLoop, Optional[Callable]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _tick(self) -> None:
+        frames = sys._current_frames()
+        now = time.perf_counter()
+        for profile in self._active:
+            task = asyncio.current_task(profile.loop)
+            frame = frames.get(profile.thread_id)
+            if (
+                task is not None
+                and frame is not None
+                and self._tasks.get(task) is profile
+            ):
+                profile.add(_loop_stack(frame), now)
+            else:
+                profile.add(OFF_LOOP, now)
+
+    def _sample(self) -> None:
+        try:
+            while True:
+                time.sleep(self.interval)
+                # Under the lock, so a finished profile never gets another sample
+                with self._lock:
+                    if not self._active:
+                        self._thread = None
+                        return
+                    self._tick()
+        except Exception as e:
+            logging.error(f"Profiler sampling failed: {e}")
+        finally:
+            # Let the next profile start a new sampler after a failure
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _task_factory(self, loop, coro, **kwargs):
+        previous = self._factories.get(loop)
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        # Runs in the creating task, whose profile the new task joins
+        profile = _active_profile.get()
+        if profile is not None:
+            with self._lock:
+                self._tasks[task] = profile
+        return task
+
+    def _install_task_factory(self, loop: asyncio.AbstractEventLoop) -> None:
+        if loop.get_task_factory() != self._task_factory:
+            self._factories[loop] = loop.get_task_factory()
+            loop.set_task_factory(self._task_factory)
+
+    def _remove_task_factory(self, loop: asyncio.AbstractEventLoop) -> None:
+        if any(profile.loop is loop for profile in self._active):
+            return
+        if loop.get_task_factory() == self._task_factory:
+            loop.set_task_factory(self._factories.pop(loop, None))
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[Profile]:
+        """
+        Profile the code run in this context, including tasks it creates.
+        """
+        profile = Profile(name)
+        token = _active_profile.set(profile)
+        task = asyncio.current_task()
+        with self._lock:
+            outer = self._tasks.get(task) if task is not None else None
+            if task is not None:
+                self._tasks[task] = profile
+            self._active.append(profile)
+            self._install_task_factory(profile.loop)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sample, name="profiler", daemon=True
+                )
+                self._thread.start()
+        try:
+            yield profile
+        finally:
+            _active_profile.reset(token)
+            profile.duration = time.perf_counter() - profile.start
+            with self._lock:
+                if outer is not None:
+                    self._tasks[task] = outer
+                elif task is not None:
+                    self._tasks.pop(task, None)
+                self._active.remove(profile)
+                self._remove_task_factory(profile.loop)
+                self.profiles.appendleft(profile)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in list(self.profiles):
+            if profile.id == profile_id:
+                return profile
+        return None
+
+
+profiler = SamplingProfiler()
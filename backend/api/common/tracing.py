@@ -0,0 +1,532 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from api.config import settings
+
+# Span kinds, as in OpenTelemetry
+INTERNAL = "internal"
+SERVER = "server"
+CLIENT = "client"
+PRODUCER = "producer"
+CONSUMER = "consumer"
+
+# W3C Trace Context header carrying the caller's trace
+TRACEPARENT = "traceparent"
+
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3, PRODUCER: 4, CONSUMER: 5}
+_OTLP_STATUS = {"unset": 0, "ok": 1, "error": 2}
+
+
+class SpanContext(NamedTuple):
+    trace_id: str  # 32 hex digits
+    span_id: str  # 16 hex digits
+    sampled: bool = True
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @staticmethod
+    def parse(header: Optional[str]) -> Optional["SpanContext"]:
+        """
+        Parse a W3C `traceparent` header; returns None if it is missing or invalid.
+        """
+        if not header or not isinstance(header, str):
+            return None
+        parts = header.strip().split("-")
+        if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            flags = int(parts[3][:2], 16)
+            int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None
+        if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+            return None
+        return SpanContext(parts[1], parts[2], bool(flags & 1))
+
+
+def _new_id(digits: int) -> str:
+    return f"{random.getrandbits(digits * 4):0{digits}x}"
+
+
+class Span:
+    """
+    A timed operation in a trace. Follows the OpenTelemetry data model, so
+    exported spans can be sent to any OpenTelemetry collector.
+    """
+
+    is_recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        kind: str,
+        attributes: Optional[Dict[str, Any]],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[dict] = []
+        self.status = "unset"
+        self.status_description = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds between start and end (or now, if the span is still open).
+        """
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.events.append(
+            {"name": name, "time_ns": time.time_ns(), "attributes": attributes or {}}
+        )
+
+    def set_status(self, status: str, description: str = "") -> None:
+        self.status = status
+        self.status_description = description
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.add_event(
+            "exception",
+            {
+                "exception.type": type(exception).__name__,
+                "exception.message": str(exception),
+            },
+        )
+        self.set_status("error", f"{type(exception).__name__}: {exception}")
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+    def to_otlp(self) -> dict:
+        """
+        The span in OTLP/JSON form.
+        """
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": _OTLP_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"]),
+                }
+                for event in self.events
+            ],
+            "status": {
+                "code": _OTLP_STATUS[self.status],
+                "message": self.status_description,
+            },
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+    def __repr__(self) -> str:
+        return (
+            f"<Span {self.name!r} {self.context.trace_id[:8]}/{self.context.span_id}>"
+        )
+
+
+class NonRecordingSpan:
+    """
+    Stands in for a span that isn't recorded, because tracing is off or the
+    trace wasn't sampled. It still carries the trace context, so an
+    unsampled trace stays unsampled downstream.
+    """
+
+    is_recording = False
+
+    def __init__(self, context: Optional[SpanContext] = None):
+        self.context = context
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def set_status(self, status: str, description: str = "") -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+INVALID_SPAN = NonRecordingSpan()
+
+_current_span: ContextVar[Any] = ContextVar("current_span", default=INVALID_SPAN)
+# Innermost @traced function running, kept even when tracing is off so slow
+# queries can still name the logic method that issued them
+_current_operation: ContextVar[Optional[str]] = ContextVar(
+    "current_operation", default=None
+)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+class InMemorySpanExporter:
+    """
+    Keeps finished spans in memory, for tests.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        with self.lock:
+            return list(self.spans)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.spans.clear()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter:
+    """
+    Prints one line per finished span, for local runs.
+    """
+
+    def export(self, span: Span) -> None:
+        status = " ERROR" if span.status == "error" else ""
+        print(
+            f"[trace {span.context.trace_id[:8]}] {span.name} "
+            f"{span.duration * 1000:.1f}ms{status} {span.attributes or ''}"
+        )
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OtlpHttpSpanExporter:
+    """
+    Sends spans to an OpenTelemetry collector as OTLP/JSON over HTTP.
+
+    Spans are queued and posted in batches from a background thread, so
+    requests never wait on the collector. If the queue fills up (the
+    collector is down or too slow), new spans are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        batch_size: int = 512,
+        interval: float = 5.0,
+        max_queue_size: int = 2048,
+    ):
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.resource = {
+            "attributes": _otlp_attributes(
+                {"service.name": service_name, "process.pid": os.getpid()}
+            )
+        }
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: queue.Queue = queue.Queue(max_queue_size)
+        self.dropped = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        import httpx
+
+        with httpx.Client(timeout=10) as client:
+            while not self.stopped.is_set() or not self.queue.empty():
+                batch = self._next_batch()
+                if batch:
+                    self._post(client, batch)
+
+    def _next_batch(self) -> List[Span]:
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self.stopped.is_set() and self.queue.empty()):
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _post(self, client, batch: List[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "api"},
+                            "spans": [span.to_otlp() for span in batch],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            response = client.post(
+                self.url,
+                content=json.dumps(body),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logging.error(f"Failed to export {len(batch)} spans: {e}")
+
+    def shutdown(self) -> None:
+        self.stopped.set()
+        self.thread.join(timeout=self.interval + 10)
+
+
+class Tracer:
+    """
+    Creates spans and tracks the current one.
+
+    The current span lives in a context variable, so it follows the code
+    into `asyncio.create_task`, `asyncio.to_thread` and Starlette's
+    threadpool, and spans started there become its children. With no
+    exporter configured (the default), tracing is off and spans cost one
+    attribute check.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter, sample_rate: float = 1.0) -> None:
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+    def _on_end(self, span: Span) -> None:
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export(span)
+
+    @staticmethod
+    def current_span():
+        return _current_span.get()
+
+    @staticmethod
+    def current_operation() -> Optional[str]:
+        return _current_operation.get()
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ):
+        """
+        Start a span without making it current; call `end()` when done.
+        The parent is `parent` if given, otherwise the current span.
+        """
+        if self.exporter is None:
+            return INVALID_SPAN
+        if parent is None:
+            parent = _current_span.get().context
+        if parent is None:
+            context = SpanContext(
+                _new_id(32), _new_id(16), random.random() < self.sample_rate
+            )
+            parent_id = None
+        else:
+            context = SpanContext(parent.trace_id, _new_id(16), parent.sampled)
+            parent_id = parent.span_id
+        if not context.sampled:
+            return NonRecordingSpan(context)
+        return Span(self, name, context, parent_id, kind, attributes)
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> Iterator[Any]:
+        """
+        Start a span, make it current for the block, and end it afterwards.
+        An exception escaping the block is recorded on the span.
+        """
+        if self.exporter is None:
+            yield INVALID_SPAN
+            return
+        span = self.start_span(name, kind, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def inject(self, carrier: Dict[str, str]) -> Dict[str, str]:
+        """
+        Add the current trace context to `carrier` (headers, a job payload).
+        """
+        context = _current_span.get().context
+        if context is not None:
+            carrier[TRACEPARENT] = context.traceparent
+        return carrier
+
+    @staticmethod
+    def extract(carrier) -> Optional[SpanContext]:
+        return SpanContext.parse(carrier.get(TRACEPARENT))
+
+    def traced(self, name: Optional[str] = None, kind: str = INTERNAL):
+        """
+        Decorator running the function, sync or async, in its own span.
+        """
+
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    token = _current_operation.set(span_name)
+                    try:
+                        if self.exporter is None:
+                            return await func(*args, **kwargs)
+                        with self.start_as_current_span(span_name, kind):
+                            return await func(*args, **kwargs)
+                    finally:
+                        _current_operation.reset(token)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                token = _current_operation.set(span_name)
+                try:
+                    if self.exporter is None:
+                        return func(*args, **kwargs)
+                    with self.start_as_current_span(span_name, kind):
+                        return func(*args, **kwargs)
+                finally:
+                    _current_operation.reset(token)
+
+            return wrapper
+
+        return decorator
+
+
+def create_exporter(name: str):
+    """
+    Build the exporter named by settings.tracing_exporter.
+    """
+    if name == "none":
+        return None
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "otlp":
+        return OtlpHttpSpanExporter(
+            settings.tracing_otlp_endpoint, settings.tracing_service_name
+        )
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+tracer = Tracer(
+    create_exporter(settings.tracing_exporter), settings.tracing_sample_rate
+)
+
+
+def traced_class(cls):
+    """
+    Class decorator giving every static method of `cls` its own span, named
+    e.g. "ChatLogic.send_message".
+    """
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not attr.startswith("__"):
+            func = value.__func__
+            setattr(cls, attr, staticmethod(tracer.traced(func.__qualname__)(func)))
+    return cls
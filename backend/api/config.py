@@ -25,16 +25,31 @@ match ENV:
 # Define the settings model
 class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
+    jwt_backend: str = "jose"  # "jose", or "pyjwt" (faster; needs the PyJWT package)
+    token_cache_size: int = 10000  # Verified tokens kept in memory; 0 disables
     jwt_secret_key: str
+    bcrypt_rounds: int = 12  # Changing this rehashes passwords as users log in
+    password_hash_workers: int = 2  # Processes for bcrypt; 0 uses threads instead
+    password_hash_max_pending: int = 32  # Hashes queued or running at once
+    password_hash_queue_timeout: float = 5.0  # Seconds to wait before a 503
     refresh_token_secret_key: str
     access_token_expire_minutes: int = 30  # Token expiry time
     refresh_token_expire_minutes: int = 60 * 24 * 7  # 7 days
     database_url: str
+    # Comma-separated read replica URLs; read-only logic methods query these
+    database_replica_urls: str = ""
+    # Seconds a user's reads stay on the primary after they write, so they see
+    # their own changes while the replicas catch up
+    read_your_writes_seconds: float = 5.0
     is_use_mock: bool = False
     db_populate_check: bool = False
     stripe_api_key: str
     stripe_product_name: str
     stripe_webhook_secret: str
+    # Seconds a checkout session is reused for; between 1800 and 43200 (Stripe
+    # sessions must expire 30 minutes to 24 hours after creation)
+    stripe_checkout_session_ttl: int = 3600
+    stripe_api_base: str = ""  # Overrides Stripe's API URL, e.g. for a local fake
     r2_endpoint: str
     r2_access_key_id: str
     r2_secret_key: str
@@ -45,33 +60,113 @@ class Settings(BaseSettings):
     gmail_client_id: str  # OAuth client ID for Gmail
     gmail_client_secret: str  # OAuth client secret for Gmail
     gmail_startup_notification_email: str = ""
+    gmail_api_url: str = ""  # Overrides the Gmail API URL, e.g. for a local fake
     google_client_id: str
     google_client_secret: str
     google_redirect_uri: str = "http://localhost:8000/api/auth/google/callback"
+    google_token_url: str = "https://oauth2.googleapis.com/token"
+    google_user_info_url: str = "https://www.googleapis.com/oauth2/v3/userinfo"
     frontend_domain: str = "https://teachhonourexcel.com"
     groq_api_key: str
     gemini_api_key: str
     hf_token: str
     mistral_api_key: str
+    # Override the LLM vendors' API URLs, e.g. to point them at a local fake
+    # (benchmarks/fake_services.py) when load testing; empty uses the vendor's own
+    groq_base_url: str = ""
+    gemini_base_url: str = ""
+    hf_base_url: str = ""
+    mistral_base_url: str = ""
+    # Shared outbound HTTP client
+    http_timeout: float = 10.0  # Seconds for reads, writes and pool waits
+    http_connect_timeout: float = 5.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    websocket_send_queue_size: int = 100  # Pending messages per connection
+    websocket_send_timeout: float = 10.0  # Seconds before a send counts as stuck
+    # What to do when a connection's queue is full: "drop_oldest" or "disconnect"
+    websocket_slow_consumer_policy: str = "drop_oldest"
+    # Cross-worker delivery of chat messages and notifications:
+    # "memory" (single worker), "redis" or "postgres"
+    message_bus_backend: str = "memory"
+    message_bus_url: str = ""  # Redis URL, or Postgres DSN (defaults to database_url)
+    chat_notification_delay: int = 1800  # Seconds before emailing about unread messages
+    chat_notification_sweep_interval: float = 60.0  # Seconds between due-check sweeps
+    chat_notification_batch_size: int = 100  # Due checks claimed per sweep
+    # Seconds a claimed check is held before another sweep retries it, e.g.
+    # after the worker running it crashed; must cover sending a whole batch
+    chat_notification_lease: float = 600.0
+    # "per_chat" (one email per unread chat) or "digest" (one email per user)
+    chat_notification_mode: str = "per_chat"
+    # Background jobs: run a worker inside the web process, or only in `python -m api.worker`
+    job_worker_enabled: bool = True
+    job_concurrency: int = 4  # Jobs a worker runs at once
+    job_email_concurrency: int = 2  # Email jobs a worker runs at once
+    job_poll_interval: float = 1.0  # Seconds between polls when the queue is empty
+    job_max_attempts: int = 5
+    job_backoff_base: float = 10.0  # Seconds before first retry, doubled per retry
+    job_backoff_max: float = 3600.0
+    job_lock_timeout: int = 600  # Seconds before a RUNNING job is assumed crashed
+    job_drain_timeout: float = 30.0  # Seconds shutdown waits for running jobs
+    # Bearer token Prometheus must send to scrape /metrics; when empty, /metrics
+    # is open in the local and test environments and disabled everywhere else
+    metrics_token: str = ""
+    # Tracing: "none", "console" (local runs), "memory" (tests) or "otlp"
+    tracing_exporter: str = "none"
+    tracing_sample_rate: float = 1.0  # Share of new traces recorded
+    tracing_otlp_endpoint: str = "http://localhost:4318"  # OpenTelemetry collector
+    tracing_service_name: str = "the-website-backend"
+    # Per-statement timing, aggregated by fingerprint for /api/admin/query-stats
+    query_stats_enabled: bool = True
+    query_stats_max_fingerprints: int = 1000  # Beyond this, counted as "other"
+    slow_query_threshold_ms: float = 200.0  # Statements slower than this are logged
+    # Watchdog logging the stack whenever sync code blocks the event loop
+    loop_watchdog_enabled: bool = False
+    loop_watchdog_threshold_ms: float = 100.0  # Blocking longer than this is logged
+    loop_watchdog_interval_ms: float = 50.0  # Heartbeat period
+    # Request profiling: admins add "X-Profile: 1" or "?__profile=1" to a request;
+    # a share of all requests can also be sampled (changeable via /api/admin/profiler)
+    profiler_sample_rate: float = 0.0
+    profiler_interval_ms: float = 5.0  # Time between stack samples
+    profiler_max_profiles: int = 20  # Finished profiles kept in memory
+    tracemalloc_frames: int = 10  # Stack depth recorded per allocation
+    # Comma-separated emails of users allowed to use the /api/admin endpoints
+    admin_emails: str = ""
 
     @property
     def env(self):
         return ENV
 
+    @property
+    def admin_email_set(self) -> set[str]:
+        return {
+            email.strip().lower()
+            for email in self.admin_emails.split(",")
+            if email.strip()
+        }
+
     @property
     def is_database_local(self):
         return self.database_url.split("@")[-1].startswith("localhost")
 
-    def make_engine(self, create_engine: callable):
-        if self.database_url == "":
+    @property
+    def replica_urls(self) -> list[str]:
+        return [
+            url.strip() for url in self.database_replica_urls.split(",") if url.strip()
+        ]
+
+    def make_engine(self, create_engine: callable, url: str | None = None):
+        url = self.database_url if url is None else url
+        if url == "":
             raise ValueError(
                 "Database URL is not set. Please check your configuration."
             )
-        if self.is_database_local:
-            return create_engine(self.database_url)
+        if url.split("@")[-1].startswith("localhost"):
+            return create_engine(url)
         else:
             return create_engine(
-                self.database_url,
+                url,
                 client_encoding="utf8",
                 pool_size=5,  # Persistent connections
                 max_overflow=10,  # Extra connections when needed
@@ -30,3 +30,13 @@ class ConsecutiveMessageError(Exception):
         super().__init__(
             "You cannot send more than 3 consecutive messages in a locked chat."
         )
+
+
+class ReadOnlySessionError(Exception):
+    """Exception raised when a session opened for reading tries to write."""
+
+    def __init__(self):
+        super().__init__(
+            "This session is read-only and may be routed to a replica; "
+            "open a session on StorageService.engine to write."
+        )
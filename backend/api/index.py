@@ -1,28 +1,87 @@
+import asyncio
+import hmac
+import logging
 import time
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 
-from fastapi import Depends, FastAPI, Request, WebSocket
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from api.auth.password_hasher import password_hasher
+from api.common.metrics import (
+    CONTENT_TYPE,
+    http_request_duration,
+    http_requests_in_progress,
+    metrics,
+)
+from api.common.profiler import profiler
+from api.common.tracing import SERVER, tracer
 from api.config import settings
 from api.router.auth_utils import RouterAuthUtils
 from api.router.routers import routers
+from api.router.websocket import WebSocketManager
+from api.services.http_client import http_client
+from api.services.job_queue import job_queue
+from api.services.loop_watchdog import loop_watchdog
+from api.services.message_bus import CHAT_CHANNEL, NOTIFICATION_CHANNEL, message_bus
+from api.services.notification_scheduler import notification_scheduler
 from api.startup_email import send_startup_notification_email
 from api.storage.models import User
+from api.storage.routing import PIN_COOKIE, pin_cookie_value, track_request
 from api.storage.storage_service import StorageService
 
-StorageService.init_db()
+
+async def run_startup_checks() -> None:
+    """
+    Prepare the database, start the background pollers and send the startup
+    email without holding up startup. None of this is needed to serve
+    requests, as StorageService.engine is usable before the check.
+
+    init_db creates the database and its tables only when they do not exist
+    yet (a fresh local setup); existing databases are managed by migrations.
+    The notification scheduler and job queue poll their tables, so they are
+    started once init_db has finished, even if it failed, as they retry.
+    """
+    # Imported here to avoid circular imports with the routers
+    from api.logic.chat_logic import ChatLogic
+
+    try:
+        await asyncio.to_thread(StorageService.init_db)
+    except Exception as e:
+        logging.error(f"Database check failed: {e}")
+    notification_scheduler.start(ChatLogic.notify_unread)
+    if settings.job_worker_enabled:
+        job_queue.start()
+    await asyncio.to_thread(send_startup_notification_email)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    send_startup_notification_email()
+    if settings.loop_watchdog_enabled:
+        loop_watchdog.start()
+    await http_client.start()
+    # Imported here to avoid circular imports with the routers
+    from api.jobs import register_jobs
+    from api.logic.chat_logic import ChatLogic
+
+    register_jobs()
+    startup_checks = asyncio.create_task(run_startup_checks())
+    message_bus.subscribe(CHAT_CHANNEL, ChatLogic.deliver_chat_message)
+    message_bus.subscribe(NOTIFICATION_CHANNEL, WebSocketManager.deliver_notification)
+    await message_bus.start()
     yield
     # Shutdown
-    pass
+    startup_checks.cancel()
+    await job_queue.stop()
+    await notification_scheduler.stop()
+    await message_bus.stop()
+    password_hasher.shutdown()
+    await http_client.stop()
+    tracer.shutdown()
+    await loop_watchdog.stop()
 
 
 app = FastAPI(
@@ -30,11 +89,79 @@ app = FastAPI(
 )
 
 
+def _route_template(request: Request) -> str:
+    # Label by route template so /api/tutors/1 and /api/tutors/2 share a
+    # series; paths that match no route are grouped together
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+def _profile_request(request: Request):
+    """
+    Profile the request if an admin asked for it with an "X-Profile" header
+    or "__profile" query parameter, or if it falls in the sampled share.
+    """
+    flag = request.headers.get("x-profile") or request.query_params.get("__profile")
+    if flag is not None and flag.lower() not in ("", "0", "false"):
+        RouterAuthUtils.get_current_admin(request)
+    elif not profiler.should_sample():
+        return nullcontext()
+    return profiler.profile(f"{request.method} {request.url.path}")
+
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
+    try:
+        profiling = _profile_request(request)
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"message": e.detail})
+    with (
+        profiling as profile,
+        track_request(pin_cookie=request.cookies.get(PIN_COOKIE)) as db_state,
+    ):
+        response = await _observe_request(request, call_next)
+    if db_state.wrote and StorageService.replica_engines:
+        # Keep this client's reads on the primary until the replicas catch up
+        response.set_cookie(
+            PIN_COOKIE,
+            pin_cookie_value(),
+            max_age=max(1, round(settings.read_your_writes_seconds)),
+            httponly=True,
+            secure=request.url.scheme == "https",
+            samesite="lax",
+        )
+    if profile is not None:
+        profile.name = f"{request.method} {_route_template(request)}"
+        profile.status = response.status_code
+        response.headers["X-Profile-Id"] = profile.id
+    return response
+
+
+async def _observe_request(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    status = 500
+    http_requests_in_progress.inc()
+    # Continues the caller's trace when it sends a traceparent header
+    with tracer.start_as_current_span(
+        request.method,
+        SERVER,
+        {"http.method": request.method, "http.target": request.url.path},
+        parent=tracer.extract(request.headers),
+    ) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            http_requests_in_progress.dec()
+            process_time = time.time() - start_time
+            route = _route_template(request)
+            http_request_duration.labels(
+                method=request.method, route=route, status=status
+            ).observe(process_time)
+            span.update_name(f"{request.method} {route}")
+            span.set_attributes({"http.route": route, "http.status_code": status})
+            if span.is_recording and status >= 500:
+                span.set_status("error")
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
@@ -73,6 +200,21 @@ async def ping_head():
     return {"message": "pong"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if settings.metrics_token:
+        expected = f"Bearer {settings.metrics_token}"
+        given = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(given.encode(), expected.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif settings.env not in ("local", "test"):
+        # Route names, load and pool sizes are not for the public internet
+        raise HTTPException(
+            status_code=403, detail="Set METRICS_TOKEN to enable /metrics"
+        )
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.websocket("/ws/ping")
 async def websocket_ping(websocket: WebSocket):
     await websocket.accept()
@@ -0,0 +1,29 @@
+from api.config import settings
+from api.logic.assignment_logic import AssignmentLogic
+from api.logic.chat_logic import ChatLogic
+from api.logic.payment_logic import PaymentLogic
+from api.services.job_queue import (
+    ASSIGNMENT_REQUEST_EMAIL,
+    CHAT_MESSAGE_DELIVERY,
+    PAYMENT_ACCEPTED_EMAIL,
+    STRIPE_EVENT,
+    job_queue,
+)
+
+
+def register_jobs() -> None:
+    """
+    Register the handler of every kind of background job.
+    """
+    job_queue.register(
+        ASSIGNMENT_REQUEST_EMAIL,
+        AssignmentLogic.send_assignment_request_email,
+        concurrency=settings.job_email_concurrency,
+    )
+    job_queue.register(
+        PAYMENT_ACCEPTED_EMAIL,
+        PaymentLogic.send_payment_accepted_email,
+        concurrency=settings.job_email_concurrency,
+    )
+    job_queue.register(CHAT_MESSAGE_DELIVERY, ChatLogic.deliver_stored_message)
+    job_queue.register(STRIPE_EVENT, PaymentLogic.process_stripe_event)
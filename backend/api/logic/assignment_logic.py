@@ -1,4 +1,3 @@
-import asyncio
 import enum
 import json
 import math
@@ -10,6 +9,7 @@ from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, aliased, joinedload
 
+from api.common.tracing import traced_class
 from api.logic.chat_logic import ChatLogic
 from api.logic.filter_logic import FilterLogic
 from api.logic.sort_logic import SortLogic
@@ -26,6 +26,11 @@ from api.router.models import (
     SearchQuery,
 )
 from api.services.email_service import GmailEmailService
+from api.services.job_queue import (
+    ASSIGNMENT_REQUEST_EMAIL,
+    CHAT_MESSAGE_DELIVERY,
+    job_queue,
+)
 from api.storage.models import (
     Assignment,
     AssignmentRequest,
@@ -39,6 +44,7 @@ from api.storage.models import (
     Tutor,
     User,
 )
+from api.storage.routing import READ_ONLY
 from api.storage.storage_service import StorageService
 
 
@@ -47,6 +53,7 @@ class ViewType(enum.Enum):
     PUBLIC = "public"
 
 
+@traced_class
 class AssignmentLogic:
     @staticmethod
     def convert_assignment_to_view(
@@ -128,7 +135,7 @@ class AssignmentLogic:
 
     @staticmethod
     def search_assignments(search_query: SearchQuery, user_id: int = None) -> dict:
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             filters = []
 
             tutor_alias = aliased(Tutor)
@@ -269,7 +276,7 @@ class AssignmentLogic:
     def get_assignment_by_id(
         id: int, user_id: int = None
     ) -> AssignmentOwnerView | AssignmentPublicView:
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             assignment = StorageService.find(
                 session, {"id": id}, Assignment, find_one=True
             )
@@ -398,14 +405,15 @@ class AssignmentLogic:
                         assignment_request_id=assignment_request.id,
                     )
                     session.add(assignment_slot)
-                session.commit()
 
-                # Send an email notification to the assignment owner
-                GmailEmailService.notify_new_assignment_request(
-                    recipient_email=assignment.owner.email,
-                    assignment=assignment,
-                    origin=origin,
+                # Email the assignment owner from a background job, committed
+                # together with the request
+                job_queue.enqueue(
+                    ASSIGNMENT_REQUEST_EMAIL,
+                    {"assignment_id": assignment.id, "origin": origin},
+                    session=session,
                 )
+                session.commit()
 
             except IntegrityError as e:
                 if isinstance(e.orig, ForeignKeyViolation):
@@ -420,6 +428,29 @@ class AssignmentLogic:
                 else:
                     raise e
 
+    @staticmethod
+    def send_assignment_request_email(payload: dict) -> None:
+        """
+        Job handler: email the assignment owner about a new request.
+        """
+        with Session(StorageService.engine) as session:
+            assignment = (
+                session.query(Assignment)
+                .filter_by(id=payload["assignment_id"])
+                .options(joinedload(Assignment.owner))
+                .first()
+            )
+            if not assignment:
+                return  # Assignment was deleted in the meantime
+
+            result = GmailEmailService.notify_new_assignment_request(
+                recipient_email=assignment.owner.email,
+                assignment=assignment,
+                origin=payload["origin"],
+            )
+            if not result.get("success"):
+                raise RuntimeError(result.get("error"))
+
     @staticmethod
     def change_assignment_request_status(
         assignment_request_id: str | int,
@@ -540,18 +571,25 @@ class AssignmentLogic:
                     detail="Assignment request is not pending. Cannot accept.",
                 )
 
-            assignment = assignment_request.assignment
-            assignment.status = AssignmentStatus.FILLED
-            assignment.tutor_id = assignment_request.tutor_id
+            AssignmentLogic.mark_request_accepted(assignment_request)
+            session.commit()
 
-            for request in assignment.assignment_requests:
-                request.status = AssignmentRequestStatus.REJECTED
+            return (assignment_request.assignment.owner_id, assignment_request.tutor_id)
 
-            assignment_request.status = AssignmentRequestStatus.ACCEPTED
+    @staticmethod
+    def mark_request_accepted(assignment_request: AssignmentRequest) -> None:
+        """
+        Fill the assignment with the request's tutor and reject the other requests.
+        The caller commits.
+        """
+        assignment = assignment_request.assignment
+        assignment.status = AssignmentStatus.FILLED
+        assignment.tutor_id = assignment_request.tutor_id
 
-            session.commit()
+        for request in assignment.assignment_requests:
+            request.status = AssignmentRequestStatus.REJECTED
 
-            return (assignment.owner_id, assignment_request.tutor_id)
+        assignment_request.status = AssignmentRequestStatus.ACCEPTED
 
     @staticmethod
     def get_assignment_owner_id(assignment_request_id: int) -> User:
@@ -573,6 +611,32 @@ class AssignmentLogic:
                 )
             return assignment.owner_id
 
+    @staticmethod
+    def get_payment_details(assignment_request_id: int) -> tuple[int, int, int]:
+        """
+        Fetch everything a checkout needs for an assignment request in one query.
+
+        Returns:
+            tuple: (owner_id, lesson_duration, requested_rate_hourly)
+        """
+        with Session(StorageService.engine) as session:
+            details = (
+                session.query(
+                    Assignment.owner_id,
+                    Assignment.lesson_duration,
+                    AssignmentRequest.requested_rate_hourly,
+                )
+                .select_from(AssignmentRequest)
+                .join(Assignment, AssignmentRequest.assignment_id == Assignment.id)
+                .filter(AssignmentRequest.id == assignment_request_id)
+                .first()
+            )
+            if not details:
+                raise HTTPException(
+                    status_code=404, detail="Assignment request not found"
+                )
+            return tuple(details)
+
     @staticmethod
     def get_lesson_duration(assignment_request_id: int) -> int:
         with Session(StorageService.engine) as session:
@@ -702,15 +766,15 @@ class AssignmentLogic:
                 session, assignment_request
             )
 
-            # Update the assigment request with the chat message ID
+            # Update the assigment request with the chat message ID and deliver
+            # the message from a background job
             assignment_request.chat_message_id = chat_message.id
-            session.commit()
-            session.refresh(chat_message, ["chat", "sender", "assignment_request"])
-
-            # Handle the private message asynchronously
-            asyncio.create_task(
-                ChatLogic.send_private_message(chat_message=chat_message)
+            job_queue.enqueue(
+                CHAT_MESSAGE_DELIVERY,
+                {"chat_message_id": chat_message.id},
+                session=session,
             )
+            session.commit()
 
             return AssignmentLogic.get_assignment_request_by_id(
                 assignment_request.id, assert_user_authorized
@@ -4,13 +4,15 @@ from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from jose import JWTError
 from pydantic import ValidationError
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from api.auth.auth_service import AuthService
 from api.auth.models import TokenData, TokenPair
+from api.auth.password_hasher import password_hasher
 from api.common.constants import AUTONOMOUS_UNIVERSITIES_EMAIL_DOMAINS
+from api.common.tracing import traced_class
 from api.router.models import (
     EmailConfirmationRequest,
     ForgotPasswordRequest,
@@ -24,54 +26,67 @@ from api.storage.models import EmailVerificationStatus, User
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class AuthLogic:
     @staticmethod
-    def handle_login(login_data: LoginRequest) -> TokenPair:
+    async def handle_login(login_data: LoginRequest) -> TokenPair:
+        # The session is closed before hashing, so a login never holds a pooled
+        # connection while it waits for bcrypt
         with Session(StorageService.engine) as session:
             # Check if user exists
             user = session.execute(
                 select(User).filter_by(email=login_data.email)
             ).scalar_one_or_none()
-            if (
-                not user
-                or not user.password_hash
-                or not AuthService.verify_password(
-                    login_data.password, user.password_hash
-                )
-            ):
-                raise HTTPException(
-                    status_code=401,
-                    detail="Incorrect email or password. Did you previously sign in with Google?",
-                )
+        if (
+            not user
+            or not user.password_hash
+            or not await password_hasher.verify(login_data.password, user.password_hash)
+        ):
+            raise HTTPException(
+                status_code=401,
+                detail="Incorrect email or password. Did you previously sign in with Google?",
+            )
 
-            # Check email verification status
-            if user.email_verification_status == EmailVerificationStatus.PENDING:
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "code": "EMAIL_NOT_VERIFIED",
-                        "message": "Please verify your email address before logging in. Check your inbox for a confirmation link.",
-                    },
-                )
-            elif user.email_verification_status == EmailVerificationStatus.WAITLISTED:
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "code": "USER_WAITLISTED",
-                        "message": "You are currently on our waitlist. We will notify you once we expand to more universities.",
-                    },
+        # Upgrade the stored hash if the configured bcrypt cost has changed
+        if password_hasher.needs_rehash(user.password_hash):
+            new_hash = await password_hasher.hash(login_data.password)
+            with Session(StorageService.engine) as session:
+                # Unless the password was changed while we were hashing
+                session.execute(
+                    update(User)
+                    .where(User.id == user.id, User.password_hash == user.password_hash)
+                    .values(password_hash=new_hash)
                 )
+                session.commit()
+
+        # Check email verification status
+        if user.email_verification_status == EmailVerificationStatus.PENDING:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "code": "EMAIL_NOT_VERIFIED",
+                    "message": "Please verify your email address before logging in. Check your inbox for a confirmation link.",
+                },
+            )
+        elif user.email_verification_status == EmailVerificationStatus.WAITLISTED:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "code": "USER_WAITLISTED",
+                    "message": "You are currently on our waitlist. We will notify you once we expand to more universities.",
+                },
+            )
 
         token_data = TokenData(email=login_data.email, token_version=user.token_version)
 
         return AuthService.create_token_pair(token_data=token_data)
 
     @staticmethod
-    def handle_signup(signup_data: SignupRequest, origin: str) -> TokenPair:
+    async def handle_signup(signup_data: SignupRequest, origin: str) -> TokenPair:
         signup_data_dict = signup_data.model_dump()
         signup_data_dict.pop("password")
 
-        hashed_password = AuthService.hash_password(signup_data.password)
+        hashed_password = await password_hasher.hash(signup_data.password)
         signup_data_dict["password_hash"] = hashed_password
 
         with Session(StorageService.engine) as session:
@@ -291,7 +306,7 @@ class AuthLogic:
             }
 
     @staticmethod
-    def reset_password(reset_password_request: ResetPasswordRequest) -> dict:
+    async def reset_password(reset_password_request: ResetPasswordRequest) -> dict:
         """
         Complete password reset by validating reset token and updating password
         """
@@ -319,7 +334,7 @@ class AuthLogic:
                     )
 
                 # Update user's password
-                user.password_hash = AuthService.hash_password(
+                user.password_hash = await password_hasher.hash(
                     reset_password_request.new_password
                 )
 
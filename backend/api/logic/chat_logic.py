@@ -1,19 +1,27 @@
-import asyncio
 import json
 import logging
 from collections.abc import Callable
 from datetime import datetime, timezone
 
-from fastapi import HTTPException, WebSocket
+from fastapi import HTTPException
 from psycopg2.errors import ForeignKeyViolation
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
+from api.common.tracing import traced_class
+from api.config import settings
 from api.exceptions import ConsecutiveMessageError
 from api.router.models import ChatPreview, NewChatMessage
+from api.services.connection_registry import connection_registry
 from api.services.content_filter_service import content_filter_service
 from api.services.email_service import GmailEmailService
+from api.services.message_bus import (
+    CHAT_CHANNEL,
+    NOTIFICATION_CHANNEL,
+    message_bus,
+)
+from api.services.notification_scheduler import notification_scheduler
 from api.storage.models import (
     ChatMessage,
     ChatMessageType,
@@ -23,13 +31,12 @@ from api.storage.models import (
     TutorRequestStatus,
     User,
 )
+from api.storage.routing import READ_ONLY
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class ChatLogic:
-    active_connections: dict[str | int, WebSocket] = {}
-    mutex = asyncio.Lock()
-
     @staticmethod
     def get_chat_preview(
         session: Session, user_id: int, chat: PrivateChat
@@ -222,12 +229,10 @@ class ChatLogic:
                     .limit(20)
                     .all()
                 )
-                # Prepend the new message to the list of messages to be filtered
-                all_messages = [new_chat_message.content] + [
-                    message.content for message in last_20_messages
-                ]
+                # Filter the new message in the context of the recent history
                 filter_result = await content_filter_service.filter_message(
-                    " ".join(all_messages)
+                    new_chat_message.content,
+                    history=[message.content for message in last_20_messages],
                 )
 
                 if filter_result["filtered"]:
@@ -236,7 +241,7 @@ class ChatLogic:
                         f"Message filtered in chat {chat_id}: {filter_result['reasoning']}"
                     )
 
-                    # Replace the message content with the filtered version
+                    # Replace the message content with the redacted version
                     chat_message.filtered_content = filter_result["content"]
                     chat_message.is_flagged = True
 
@@ -291,6 +296,26 @@ class ChatLogic:
         except Exception as e:
             print(f"Failed to send notification to user {user_id}: {e}")
 
+    @staticmethod
+    def _new_message_notification(chat_message: ChatMessage) -> dict:
+        """
+        The "new message" notification shown to a receiver who is not in the chat.
+        """
+        sender = chat_message.sender
+        sender_name = sender.name if sender else "Unknown User"
+        return {
+            "type": "new_message",
+            "message": f"New message from {sender_name}",
+            "chat_id": chat_message.chat_id,
+            "sender_id": chat_message.sender_id,
+            "sender_name": sender_name,
+            "content_preview": chat_message.content[:50] + "..."
+            if len(chat_message.content) > 50
+            else chat_message.content,
+            "message_type": chat_message.message_type.value,
+            "timestamp": chat_message.created_at.isoformat(),
+        }
+
     @staticmethod
     async def send_private_message(chat_message: ChatMessage) -> None:
         """
@@ -301,64 +326,60 @@ class ChatLogic:
         receiver_id = chat_message.receiver_id
         sender_id = chat_message.sender_id
 
-        # Send the message to the receiver via WebSocket
-        if receiver_id in ChatLogic.active_connections and not (
-            chat_message.is_flagged and chat_message.chat.is_locked
-        ):
-            # Send the message to the receiver's WebSocket
-            # Ensure that the receiver is connected
-            try:
-                to_send = json.dumps(ChatLogic.get_convert_message(-1)(chat_message))
-                print(f"Sending message to receiver {receiver_id}: {to_send}")
-                await ChatLogic.active_connections[receiver_id].send_text(to_send)
-            except RuntimeError:
-                async with ChatLogic.mutex:
-                    ChatLogic.active_connections.pop(receiver_id, None)
-
-        if sender_id in ChatLogic.active_connections:
-            # Send the message to the sender's WebSocket
-            try:
-                to_send = json.dumps(
-                    ChatLogic.get_convert_message(sender_id)(chat_message)
-                )
-                print(f"Sending message to sender {sender_id}: {to_send}")
-                await ChatLogic.active_connections[sender_id].send_text(to_send)
-            except RuntimeError:
-                async with ChatLogic.mutex:
-                    ChatLogic.active_connections.pop(sender_id, None)
-
-        # Send notification to receiver via root WebSocket if they're not connected to chat
-        if receiver_id not in ChatLogic.active_connections and not (
-            chat_message.is_flagged and chat_message.chat.is_locked
-        ):
-            with Session(StorageService.engine) as session:
-                # Get the chat to check if it's locked
-                chat = (
-                    session.query(PrivateChat)
-                    .filter(PrivateChat.id == chat_message.chat_id)
-                    .first()
-                )
+        # Send the message to the receiver's and sender's chat sockets, here
+        # and (via the message bus) on any other worker. Each worker where the
+        # receiver has no chat socket open shows the notification instead.
+        if not (chat_message.is_flagged and chat_message.chat.is_locked):
+            payload = {
+                "user_id": receiver_id,
+                "message": json.dumps(ChatLogic.get_convert_message(-1)(chat_message)),
+                "notification": json.dumps(
+                    ChatLogic._new_message_notification(chat_message)
+                ),
+            }
+            await ChatLogic.deliver_chat_message(payload)
+            await message_bus.publish(CHAT_CHANNEL, payload)
+
+        to_send = json.dumps(ChatLogic.get_convert_message(sender_id)(chat_message))
+        await ChatLogic.deliver_chat_message({"user_id": sender_id, "message": to_send})
+        await message_bus.publish(
+            CHAT_CHANNEL, {"user_id": sender_id, "message": to_send}
+        )
 
-                # Show real sender name for unlocked chats
-                sender = session.query(User).filter(User.id == sender_id).first()
-                sender_name = sender.name if sender else "Unknown User"
-                display_message = f"New message from {sender_name}"
-
-                notification_data = {
-                    "type": "new_message",
-                    "message": display_message,
-                    "chat_id": chat_message.chat_id,
-                    "sender_id": sender_id,
-                    "sender_name": sender_name,
-                    "content_preview": chat_message.content[:50] + "..."
-                    if len(chat_message.content) > 50
-                    else chat_message.content,
-                    "message_type": chat_message.message_type.value,
-                    "timestamp": chat_message.created_at.isoformat(),
-                }
-                await ChatLogic.send_notification_to_user(
-                    receiver_id, notification_data
+    @staticmethod
+    async def deliver_stored_message(payload: dict) -> None:
+        """
+        Job handler: send an already stored chat message to both participants.
+        """
+        with Session(StorageService.engine, expire_on_commit=False) as session:
+            chat_message = (
+                session.query(ChatMessage)
+                .filter_by(id=payload["chat_message_id"])
+                .options(
+                    joinedload(ChatMessage.chat),
+                    joinedload(ChatMessage.sender),
+                    joinedload(ChatMessage.assignment_request),
                 )
+                .first()
+            )
+            if not chat_message:
+                return  # Message was deleted in the meantime
+            await ChatLogic.send_private_message(chat_message)
+
+    @staticmethod
+    async def deliver_chat_message(payload: dict) -> None:
+        """
+        Queue a chat message for the user's chat sockets on this worker, or its
+        "notification", if any, when the user has no chat socket here.
+        Also the message bus handler for messages published by other workers.
+        """
+        user_id = payload["user_id"]
+        if connection_registry.is_connected(user_id, CHAT_CHANNEL):
+            connection_registry.send(user_id, CHAT_CHANNEL, payload["message"])
+        elif payload.get("notification"):
+            connection_registry.send(
+                user_id, NOTIFICATION_CHANNEL, payload["notification"]
+            )
 
     @staticmethod
     async def check_and_send_delayed_notification(
@@ -391,13 +412,7 @@ class ChatLogic:
             )
 
             # Check daily notification limit
-            now = datetime.now(timezone.utc)
-            if (
-                notification_tracker
-                and notification_tracker.notification_count >= 2
-                and notification_tracker.last_notification_timestamp
-                and (now - notification_tracker.last_notification_timestamp).days < 1
-            ):
+            if ChatLogic._notification_limit_reached(notification_tracker):
                 return  # Already sent 2 notifications today
 
             # Get sender and last message details
@@ -428,37 +443,161 @@ class ChatLogic:
             )
 
             # Update or create notification tracker
-            if not notification_tracker:
-                notification_tracker = ChatNotificationTracker(
+            ChatLogic._record_notification(session, chat_id, notification_tracker)
+            session.commit()
+
+    @staticmethod
+    def _notification_limit_reached(
+        notification_tracker: ChatNotificationTracker | None,
+    ) -> bool:
+        """
+        Whether a chat has already had 2 unread-message emails within the last day.
+        """
+        if not notification_tracker or notification_tracker.notification_count < 2:
+            return False
+        last_sent = notification_tracker.last_notification_timestamp
+        if not last_sent:
+            return False
+        if last_sent.tzinfo is None:  # SQLite drops the timezone
+            last_sent = last_sent.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - last_sent).days < 1
+
+    @staticmethod
+    def _record_notification(
+        session: Session,
+        chat_id: int,
+        notification_tracker: ChatNotificationTracker | None,
+    ) -> None:
+        if not notification_tracker:
+            session.add(
+                ChatNotificationTracker(
                     chat_id=chat_id,
                     notification_count=1,
                     last_notification_timestamp=datetime.now(timezone.utc),
                 )
-                session.add(notification_tracker)
-            else:
-                notification_tracker.notification_count += 1
-                notification_tracker.last_notification_timestamp = datetime.now(
-                    timezone.utc
-                )
+            )
+        else:
+            notification_tracker.notification_count += 1
+            notification_tracker.last_notification_timestamp = datetime.now(
+                timezone.utc
+            )
 
-            session.commit()
+    @staticmethod
+    def get_unread_chat_summaries(session: Session, receiver_id: int) -> list:
+        """
+        Fetch every chat the user has unread, with the latest message sent to them,
+        its sender's name and the chat's notification tracker, in one query.
+
+        Returns rows of (chat_id, sender_name, message_preview, notification_tracker).
+        """
+        # The receiver sees the filtered version of flagged messages
+        preview = case(
+            (ChatMessage.is_flagged == True, ChatMessage.filtered_content),
+            else_=ChatMessage.content,
+        )
+        latest = (
+            select(
+                ChatMessage.chat_id,
+                ChatMessage.sender_id,
+                preview.label("preview"),
+                func.row_number()
+                .over(
+                    partition_by=ChatMessage.chat_id,
+                    order_by=(ChatMessage.created_at.desc(), ChatMessage.id.desc()),
+                )
+                .label("rank"),
+            )
+            .join(PrivateChat, PrivateChat.id == ChatMessage.chat_id)
+            .join(
+                ChatReadStatus,
+                and_(
+                    ChatReadStatus.chat_id == ChatMessage.chat_id,
+                    ChatReadStatus.user_id == receiver_id,
+                    ChatReadStatus.is_read == False,
+                ),
+            )
+            .where(
+                ChatMessage.sender_id != receiver_id,
+                # Flagged messages in locked chats are hidden from the receiver
+                ~and_(ChatMessage.is_flagged == True, PrivateChat.is_locked == True),
+            )
+            .subquery()
+        )
+        statement = (
+            select(
+                latest.c.chat_id,
+                User.name,
+                latest.c.preview,
+                ChatNotificationTracker,
+            )
+            .join(User, User.id == latest.c.sender_id)
+            .outerjoin(
+                ChatNotificationTracker,
+                ChatNotificationTracker.chat_id == latest.c.chat_id,
+            )
+            .where(latest.c.rank == 1)
+            .order_by(latest.c.chat_id)
+        )
+        return session.execute(statement).all()
 
     @staticmethod
-    async def schedule_delayed_notification(
+    async def check_and_send_unread_digest(
         chat_id: int, receiver_id: int, origin: str
     ) -> None:
         """
-        Schedule a delayed notification check after 30 minutes.
+        Send one email listing all of the receiver's unread chats, skipping chats
+        that have reached their daily notification limit.
 
         Args:
-            chat_id (int): The ID of the chat
+            chat_id (int): The ID of the chat whose check triggered the digest
             receiver_id (int): The ID of the message receiver
             origin (str): The origin of the request
         """
-        await asyncio.sleep(1800)  # 30 minutes
-        await ChatLogic.check_and_send_delayed_notification(
-            chat_id, receiver_id, origin
-        )
+        with Session(StorageService.engine) as session:
+            summaries = [
+                row
+                for row in ChatLogic.get_unread_chat_summaries(session, receiver_id)
+                if not ChatLogic._notification_limit_reached(row[3])
+            ]
+            if not summaries:
+                return
+
+            receiver = session.get(User, receiver_id)
+            if not receiver:
+                return  # User not found
+
+            GmailEmailService.send_unread_digest_email(
+                recipient_email=receiver.email,
+                chats=[
+                    {
+                        "sender_name": sender_name,
+                        "message_preview": message_preview,
+                        "chat_url": f"{origin}/chat?chatId={summary_chat_id}",
+                    }
+                    for summary_chat_id, sender_name, message_preview, _ in summaries
+                ],
+            )
+            # The digest covers the receiver's other pending checks as well
+            notification_scheduler.cancel_for_receiver(receiver_id)
+
+            for summary_chat_id, _, _, notification_tracker in summaries:
+                ChatLogic._record_notification(
+                    session, summary_chat_id, notification_tracker
+                )
+            session.commit()
+
+    @staticmethod
+    async def notify_unread(chat_id: int, receiver_id: int, origin: str) -> None:
+        """
+        Handler for due unread-message checks: one email per chat, or a single
+        digest per user when CHAT_NOTIFICATION_MODE is "digest".
+        """
+        if settings.chat_notification_mode == "digest":
+            await ChatLogic.check_and_send_unread_digest(chat_id, receiver_id, origin)
+        else:
+            await ChatLogic.check_and_send_delayed_notification(
+                chat_id, receiver_id, origin
+            )
 
     @staticmethod
     async def handle_private_message(
@@ -483,11 +622,8 @@ class ChatLogic:
 
             # Schedule delayed notification only if the message is not flagged
             if not (chat_message.is_flagged and chat_message.chat.is_locked):
-                receiver_id = chat_message.receiver_id
-                asyncio.create_task(
-                    ChatLogic.schedule_delayed_notification(
-                        chat_message.chat_id, receiver_id, origin
-                    )
+                notification_scheduler.schedule(
+                    chat_message.chat_id, chat_message.receiver_id, origin
                 )
 
     @staticmethod
@@ -496,7 +632,7 @@ class ChatLogic:
     ) -> dict:
         convert_message = ChatLogic.get_convert_message(user_id)
 
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             chatroom = StorageService.find(
                 session, {"id": chat_id}, PrivateChat, find_one=True
             )
@@ -575,7 +711,7 @@ class ChatLogic:
             list[PrivateChat]: List of private chatrooms.
         """
 
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             chats = (
                 session.query(PrivateChat)
                 .filter(
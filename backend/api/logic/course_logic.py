@@ -1,6 +1,8 @@
+from api.common.tracing import traced_class
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class CourseLogic:
     @staticmethod
     def get_public_summaries():
@@ -3,11 +3,14 @@ from typing import Type
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 
+from api.common.tracing import traced_class
 from api.router.models import FilterChoice
 from api.storage.models import Assignment, Level, Location, Subject, Tutor
+from api.storage.routing import READ_ONLY
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class FilterLogic:
     """
     Logic class for filtering tutors based on various criteria.
@@ -32,7 +35,7 @@ class FilterLogic:
         """
         Returns a list of available filters and their values for a given filter name.
         """
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             rows = StorageService.find(
                 session=session, query={}, TableClass=TableClass, find_one=False
             )
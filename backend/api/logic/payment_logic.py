@@ -1,21 +1,103 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
 from typing import Callable
 
-import stripe
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 
+from api.common.lazy_import import lazy_module
+from api.common.metrics import observe_external_call
+from api.common.tracing import traced_class
 from api.config import settings
 from api.logic.assignment_logic import AssignmentLogic
-from api.logic.chat_logic import ChatLogic
 from api.router.models import PaymentRequest
 from api.services.email_service import GmailEmailService
-from api.storage.models import AssignmentRequest, Tutor
+from api.services.job_queue import PAYMENT_ACCEPTED_EMAIL, STRIPE_EVENT, job_queue
+from api.storage.models import (
+    AssignmentRequest,
+    AssignmentRequestStatus,
+    PrivateChat,
+    StripeEvent,
+    Tutor,
+)
 from api.storage.storage_service import StorageService
 
-stripe.api_key = settings.stripe_api_key
 
+def _configure_stripe(module) -> None:
+    if module.api_key is None:
+        module.api_key = settings.stripe_api_key
+    if settings.stripe_api_base:
+        module.api_base = settings.stripe_api_base
 
+
+# The Stripe SDK takes most of a second to import, so it is loaded on first use
+stripe = lazy_module("stripe", on_import=_configure_stripe)
+
+# Stripe event types that are processed; other events are only recorded
+HANDLED_STRIPE_EVENTS = {"payment_intent.succeeded"}
+
+
+@traced_class
 class PaymentLogic:
+    # Open checkout sessions by idempotency key: (session id, url, expires_at)
+    _checkout_sessions: dict[str, tuple[str, str, int]] = {}
+    _checkout_sessions_lock = threading.Lock()
+
+    @staticmethod
+    def checkout_idempotency_key(
+        payment_request: PaymentRequest, fee: int, now: float = None
+    ) -> tuple[str, int]:
+        """
+        Build the Stripe idempotency key for a checkout and the session's expiry.
+
+        The key covers everything sent to Stripe, so a repeated click within the
+        same time window gets the same checkout session back, while a change in
+        price or URLs gets a new one. Sessions outlive their window by at least
+        one window, so a reused session is never about to expire.
+        """
+        ttl = settings.stripe_checkout_session_ttl
+        window = int((time.time() if now is None else now) // ttl)
+        params = json.dumps(
+            [
+                payment_request.assignment_request_id,
+                fee,
+                payment_request.mode,
+                payment_request.success_url,
+                payment_request.cancel_url,
+                payment_request.tutor_id,
+                payment_request.chat_id,
+            ]
+        )
+        digest = hashlib.sha256(params.encode()).hexdigest()[:16]
+        key = f"checkout-{payment_request.assignment_request_id}-{window}-{digest}"
+        return key, (window + 2) * ttl
+
+    @staticmethod
+    def clear_checkout_cache() -> None:
+        """
+        Forget cached checkout sessions.
+        """
+        with PaymentLogic._checkout_sessions_lock:
+            PaymentLogic._checkout_sessions.clear()
+
+    @staticmethod
+    def evict_checkout_sessions(assignment_request_id: int) -> None:
+        """
+        Forget cached checkout sessions for an assignment request, e.g. once
+        it has been paid for.
+        """
+        prefix = f"checkout-{assignment_request_id}-"
+        with PaymentLogic._checkout_sessions_lock:
+            for key in [
+                key for key in PaymentLogic._checkout_sessions if key.startswith(prefix)
+            ]:
+                del PaymentLogic._checkout_sessions[key]
+
     @staticmethod
     def handle_payment_request(
         payment_request: PaymentRequest, assert_user_authorized: Callable[[int], None]
@@ -31,45 +113,69 @@ class PaymentLogic:
         """
 
         try:
-            assert_user_authorized(
-                AssignmentLogic.get_assignment_owner_id(
+            owner_id, lesson_duration, hourly_rate = (
+                AssignmentLogic.get_payment_details(
                     payment_request.assignment_request_id
                 )
             )
+            assert_user_authorized(owner_id)
 
-            lesson_duration = AssignmentLogic.get_lesson_duration(
-                payment_request.assignment_request_id
-            )
+            num_hours = lesson_duration / 60  # Convert minutes to hours
+            hourly_rate_cents = hourly_rate * 100  # Convert dollars to cents
+            fee = int(num_hours * hourly_rate_cents)  # Total fee in cents
 
-            hourly_rate = AssignmentLogic.get_request_hourly_rate(
-                payment_request.assignment_request_id
+            # Reuse the session from an earlier click instead of calling Stripe
+            key, expires_at = PaymentLogic.checkout_idempotency_key(
+                payment_request, fee
             )
+            with PaymentLogic._checkout_sessions_lock:
+                cached = PaymentLogic._checkout_sessions.get(key)
+            if cached:
+                return {"session_id": cached[0], "url": cached[1]}
 
-            num_hours = lesson_duration / 60  # Convert minutes to hours
-            hourly_rate_cents = hourly_rate * 100  # Convert dollars to cents
-            fee = num_hours * hourly_rate_cents  # Total fee in cents
-            checkout_session = stripe.checkout.Session.create(
-                line_items=[
-                    {
-                        "price_data": {
-                            "currency": "sgd",
-                            "product_data": {
-                                "name": settings.stripe_product_name,  # Product name from settings
+            with observe_external_call("stripe", "create_checkout_session"):
+                checkout_session = stripe.checkout.Session.create(
+                    line_items=[
+                        {
+                            "price_data": {
+                                "currency": "sgd",
+                                "product_data": {
+                                    "name": settings.stripe_product_name,  # Product name from settings
+                                },
+                                "unit_amount": fee,  # Final price in cents
                             },
-                            "unit_amount": int(fee),  # Final price in cents
-                        },
-                        "quantity": 1,
-                    }
-                ],
-                payment_intent_data={
-                    "metadata": {
-                        "assignment_request_id": payment_request.assignment_request_id,
-                    }
-                },
-                mode=payment_request.mode,  # 'payment' or 'subscription'
-                success_url=f"{payment_request.success_url}?session_id={{CHECKOUT_SESSION_ID}}&tutor_id={payment_request.tutor_id}&chat_id={payment_request.chat_id}",
-                cancel_url=payment_request.cancel_url,
-            )
+                            "quantity": 1,
+                        }
+                    ],
+                    payment_intent_data={
+                        "metadata": {
+                            "assignment_request_id": payment_request.assignment_request_id,
+                        }
+                    },
+                    mode=payment_request.mode,  # 'payment' or 'subscription'
+                    success_url=f"{payment_request.success_url}?session_id={{CHECKOUT_SESSION_ID}}&tutor_id={payment_request.tutor_id}&chat_id={payment_request.chat_id}",
+                    cancel_url=payment_request.cancel_url,
+                    expires_at=expires_at,
+                    # Other workers asking for the same checkout get the same session
+                    idempotency_key=key,
+                )
+
+            with PaymentLogic._checkout_sessions_lock:
+                now = time.time()
+                # Drop sessions from past windows
+                for stale in [
+                    cached_key
+                    for cached_key, (_, _, cached_expiry) in (
+                        PaymentLogic._checkout_sessions.items()
+                    )
+                    if cached_expiry - settings.stripe_checkout_session_ttl <= now
+                ]:
+                    del PaymentLogic._checkout_sessions[stale]
+                PaymentLogic._checkout_sessions[key] = (
+                    checkout_session["id"],
+                    checkout_session["url"],
+                    expires_at,
+                )
             return {
                 "session_id": checkout_session["id"],
                 "url": checkout_session["url"],
@@ -83,76 +189,171 @@ class PaymentLogic:
         except Exception as e:
             raise e
 
+    @staticmethod
+    def send_payment_accepted_email(payload: dict) -> None:
+        """
+        Job handler: email the tutor that their assignment request was paid for.
+        """
+        with Session(StorageService.engine) as session:
+            # Fetch the tutor's details
+            tutor = session.query(Tutor).filter_by(id=payload["tutor_id"]).first()
+
+            # Fetch the assignment details
+            assignment_request = (
+                session.query(AssignmentRequest)
+                .filter_by(id=payload["assignment_request_id"])
+                .first()
+            )
+            assignment = assignment_request.assignment if assignment_request else None
+
+            if tutor and tutor.user and assignment:
+                # Compose email content
+                email_content = f"""
+                Congratulations! Your assignment request for "{assignment.title}" has been accepted and paid for.
+
+                Assignment Details:
+                - Title: {assignment.title}
+                - Hourly Rate: ${assignment_request.requested_rate_hourly}
+                - Lesson Duration: {assignment_request.requested_duration} minutes
+
+                You can now view the details in your dashboard.
+                """
+                # Send email to tutor
+                result = GmailEmailService.send_email(
+                    recipient_email=tutor.user.email,
+                    subject=f"Assignment Accepted: {assignment.title}",
+                    content=email_content,
+                )
+                if not result.get("success"):
+                    raise RuntimeError(result.get("error"))
+                print(
+                    f"Email sent to tutor {tutor.user.email} about assignment acceptance."
+                )
+
     @staticmethod
     def handle_stripe_webhook(payload, sig_header: str) -> dict:
+        """
+        Verify a Stripe webhook, store the event and acknowledge it straight away.
+
+        Events are stored by their Stripe event id, so redeliveries are ignored.
+        Events we act on are processed by a background job
+        (see process_stripe_event).
+        """
         try:
             # Verify the webhook signature
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.stripe_webhook_secret
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+        except stripe.error.SignatureVerificationError as e:
+            raise HTTPException(
+                status_code=400, detail=f"Signature verification failed: {e}"
+            )
 
-            # Handle the payment_intent successful
-            print(event["type"])
-            print(event.keys())
+        print(event["type"])
 
-            if event["type"] == "payment_intent.succeeded":
-                payment_intent = event["data"][
-                    "object"
-                ]  # contains a stripe.PaymentIntent
+        with Session(StorageService.engine) as session:
+            if session.get(StripeEvent, event["id"]) is not None:
+                print(f"Ignoring duplicate Stripe event {event['id']}")
+                return {"status": "success"}
+
+            handled = event["type"] in HANDLED_STRIPE_EVENTS
+            session.add(
+                StripeEvent(
+                    id=event["id"],
+                    type=event["type"],
+                    payload=json.loads(payload),
+                    processed_at=None if handled else datetime.now(timezone.utc),
+                )
+            )
+            if handled:
+                job_queue.enqueue(
+                    STRIPE_EVENT, {"event_id": event["id"]}, session=session
+                )
+            try:
+                session.commit()
+            except IntegrityError:
+                # The same event was delivered concurrently and stored first
+                session.rollback()
 
-                # Example: extract details
-                metadata = payment_intent.get("metadata", {})
+        return {"status": "success"}
 
-                # Change status of assignment request to accepted
-                owner_id, requester_id = AssignmentLogic.accept_assignment_request(
-                    int(metadata["assignment_request_id"])
+    @staticmethod
+    def process_stripe_event(payload: dict) -> None:
+        """
+        Job handler: act on a stored Stripe event exactly once.
+        """
+        with Session(StorageService.engine) as session:
+            event = session.get(StripeEvent, payload["event_id"], with_for_update=True)
+            if event is None or event.processed_at is not None:
+                return  # Unknown or already processed
+
+            paid_request_id = None
+            if event.type == "payment_intent.succeeded":
+                paid_request_id = PaymentLogic._handle_payment_succeeded(
+                    session, event.payload
                 )
 
-                preview = ChatLogic.get_or_create_private_chat(owner_id, requester_id)
+            event.processed_at = datetime.now(timezone.utc)
+            session.commit()
 
-                ChatLogic.unlock_chat(preview.id, owner_id)
+        # A paid request's checkout session must not be handed out again
+        if paid_request_id is not None:
+            PaymentLogic.evict_checkout_sessions(paid_request_id)
 
-                # Send email to tutor about successful payment
-                with Session(StorageService.engine) as session:
-                    # Fetch the tutor's details
-                    tutor = session.query(Tutor).filter_by(id=requester_id).first()
+    @staticmethod
+    def _handle_payment_succeeded(session: Session, event_payload: dict) -> int:
+        """
+        Accept the paid assignment request, unlock the chat between the owner
+        and the tutor, and queue the tutor's email, all in the caller's session.
+        Returns the ID of the paid assignment request.
+        """
+        payment_intent = event_payload["data"]["object"]
+        metadata = payment_intent.get("metadata", {})
+        assignment_request_id = int(metadata["assignment_request_id"])
 
-                    # Fetch the assignment details
-                    assignment_request = (
-                        session.query(AssignmentRequest)
-                        .filter_by(id=int(metadata["assignment_request_id"]))
-                        .first()
-                    )
-                    assignment = assignment_request.assignment
-
-                    if tutor and tutor.user and assignment:
-                        # Compose email content
-                        email_content = f"""
-                        Congratulations! Your assignment request for "{assignment.title}" has been accepted and paid for.
-
-                        Assignment Details:
-                        - Title: {assignment.title}
-                        - Hourly Rate: ${assignment_request.requested_rate_hourly}
-                        - Lesson Duration: {assignment_request.requested_duration} minutes
-
-                        You can now view the details in your dashboard.
-                        """
-                        print(email_content)
-                        # Send email to tutor
-                        GmailEmailService.send_email(
-                            recipient_email=tutor.user.email,
-                            subject=f"Assignment Accepted: {assignment.title}",
-                            content=email_content,
-                        )
-                        print(
-                            f"Email sent to tutor {tutor.user.email} about assignment acceptance."
-                        )
+        assignment_request = (
+            session.query(AssignmentRequest)
+            .options(joinedload(AssignmentRequest.assignment))
+            .filter_by(id=assignment_request_id)
+            .first()
+        )
+        if not assignment_request:
+            logging.warning(
+                f"Payment for unknown assignment request {assignment_request_id}"
+            )
+            return assignment_request_id
 
-                return {"status": "success"}
+        newly_accepted = assignment_request.status == AssignmentRequestStatus.PENDING
+        if newly_accepted:
+            AssignmentLogic.mark_request_accepted(assignment_request)
+        elif assignment_request.status != AssignmentRequestStatus.ACCEPTED:
+            logging.warning(
+                f"Payment for assignment request {assignment_request_id} "
+                f"with status {assignment_request.status}; not accepting it"
+            )
+            return assignment_request_id
 
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
-        except stripe.error.SignatureVerificationError as e:
-            raise HTTPException(
-                status_code=400, detail=f"Signature verification failed: {e}"
+        # Unlock (or create) the chat between the owner and the tutor
+        owner_id = assignment_request.assignment.owner_id
+        tutor_id = assignment_request.tutor_id
+        user1_id, user2_id = min(owner_id, tutor_id), max(owner_id, tutor_id)
+        chat = (
+            session.query(PrivateChat)
+            .filter_by(user1_id=user1_id, user2_id=user2_id)
+            .first()
+        )
+        if not chat:
+            chat = PrivateChat(user1_id=user1_id, user2_id=user2_id)
+            session.add(chat)
+        chat.is_locked = False
+
+        if newly_accepted:
+            # Email the tutor about the successful payment from a background job
+            job_queue.enqueue(
+                PAYMENT_ACCEPTED_EMAIL,
+                {"assignment_request_id": assignment_request_id, "tutor_id": tutor_id},
+                session=session,
             )
+        return assignment_request_id
@@ -1,9 +1,11 @@
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 
+from api.common.tracing import traced_class
 from api.router.models import AssignmentSortField, SortChoice, SortOrder
 from api.storage.models import Assignment, Level, Tutor
 
 
+@traced_class
 class SortLogic:
     @staticmethod
     def parse_sort_id(sort_id: str) -> tuple[str, SortOrder]:
@@ -6,6 +6,7 @@ from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, aliased, selectinload
 
+from api.common.tracing import traced_class
 from api.logic.filter_logic import FilterLogic
 from api.logic.user_logic import UserLogic
 from api.router.models import (
@@ -15,9 +16,11 @@ from api.router.models import (
     TutorPublicSummary,
 )
 from api.storage.models import Level, SpecialSkill, Subject, Tutor, User
+from api.storage.routing import READ_ONLY
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class TutorLogic:
     @staticmethod
     def convert_tutor_to_public_summary(
@@ -106,7 +109,7 @@ class TutorLogic:
 
     @staticmethod
     def search_tutors(search_query: SearchQuery) -> list[TutorPublicSummary]:
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             filters = []
 
             user_alias = aliased(User)  # You'll need to import your User model
@@ -222,7 +225,7 @@ class TutorLogic:
     def find_profile_by_id(
         id: str | int, is_self: bool = False
     ) -> TutorPublicSummary | TutorProfile | None:
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             tutor = StorageService.find(session, {"id": id}, Tutor, find_one=True)
 
             if not tutor:
@@ -1,14 +1,18 @@
-import botocore
+import botocore.exceptions
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from api.common.metrics import observe_external_call
+from api.common.tracing import traced_class
 from api.config import settings
 from api.router.models import UserView
 from api.storage.models import User
 from api.storage.object_storage import s3_client
+from api.storage.routing import READ_ONLY
 from api.storage.storage_service import StorageService
 
 
+@traced_class
 class UserLogic:
     @staticmethod
     def convert_user_to_view(user: User) -> UserView:
@@ -37,12 +41,13 @@ class UserLogic:
             object_key = f"profile_photos/{user_id}"
 
             # Upload to R2
-            s3_client.put_object(
-                Bucket=settings.r2_bucket_name,
-                Key=object_key,
-                Body=file_data,
-                ContentType=content_type,
-            )
+            with observe_external_call("s3", "put_object"):
+                s3_client.put_object(
+                    Bucket=settings.r2_bucket_name,
+                    Key=object_key,
+                    Body=file_data,
+                    ContentType=content_type,
+                )
 
             # Return R2 object path or URL (optional)
             return {
@@ -66,7 +71,8 @@ class UserLogic:
             object_key = f"profile_photos/{user_id}"
 
             # Check if the object exists
-            s3_client.head_object(Bucket=settings.r2_bucket_name, Key=object_key)
+            with observe_external_call("s3", "head_object"):
+                s3_client.head_object(Bucket=settings.r2_bucket_name, Key=object_key)
 
             # Generate a pre-signed URL for the object
             url = s3_client.generate_presigned_url(
@@ -87,7 +93,7 @@ class UserLogic:
 
     @staticmethod
     def get_user_by_id(user_id: int) -> UserView:
-        with Session(StorageService.engine) as session:
+        with Session(StorageService.read_engine(), info=READ_ONLY) as session:
             user = StorageService.find(session, {"id": user_id}, User, find_one=True)
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
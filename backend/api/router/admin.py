@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from api.common.profiler import profiler
+from api.router.auth_utils import RouterAuthUtils
+from api.router.models import (
+    LoopStallView,
+    MemoryGrouping,
+    MemorySnapshotView,
+    ProfileFormat,
+    ProfilerConfig,
+    ProfileSummaryView,
+    QueryStatsOrder,
+    QueryStatsView,
+)
+from api.services.loop_watchdog import loop_watchdog
+from api.services.memory_diagnostics import memory_diagnostics
+from api.storage.models import User
+from api.storage.query_stats import query_stats
+
+router = APIRouter()
+
+
+@router.get("/api/admin/query-stats")
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: QueryStatsOrder = QueryStatsOrder.TOTAL,
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> list[QueryStatsView]:
+    return query_stats.top(limit, order_by.value)
+
+
+@router.delete("/api/admin/query-stats")
+async def reset_query_stats(
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> dict[str, str]:
+    query_stats.reset()
+    return {"message": "Query statistics reset"}
+
+
+@router.get("/api/admin/loop-stalls")
+async def get_loop_stalls(
+    limit: int = Query(20, ge=1, le=500),
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> list[LoopStallView]:
+    return loop_watchdog.stalls(limit)
+
+
+@router.delete("/api/admin/loop-stalls")
+async def reset_loop_stalls(
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> dict[str, str]:
+    loop_watchdog.reset()
+    return {"message": "Event loop stalls reset"}
+
+
+@router.get("/api/admin/profiles")
+async def get_profiles(
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> list[ProfileSummaryView]:
+    return [profile.summary() for profile in list(profiler.profiles)]
+
+
+@router.get("/api/admin/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: ProfileFormat = ProfileFormat.SPEEDSCOPE,
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> Response:
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == ProfileFormat.COLLAPSED:
+        content, media_type, suffix = profile.collapsed(), "text/plain", "folded"
+    else:
+        content = json.dumps(profile.speedscope())
+        media_type, suffix = "application/json", "speedscope.json"
+    return Response(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.{suffix}"'
+        },
+    )
+
+
+@router.get("/api/admin/profiler")
+async def get_profiler_config(
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> ProfilerConfig:
+    return ProfilerConfig(sample_rate=profiler.sample_rate)
+
+
+@router.put("/api/admin/profiler")
+async def update_profiler_config(
+    config: ProfilerConfig,
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> ProfilerConfig:
+    # Applies to this worker only, until it restarts
+    profiler.sample_rate = config.sample_rate
+    return config
+
+
+@router.post("/api/admin/memory/tracing")
+async def start_memory_tracing(
+    frames: int | None = Query(None, ge=1, le=100),
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> dict[str, str]:
+    memory_diagnostics.start(frames)
+    return {"message": "Memory tracing started"}
+
+
+@router.delete("/api/admin/memory/tracing")
+async def stop_memory_tracing(
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> dict[str, str]:
+    memory_diagnostics.stop()
+    return {"message": "Memory tracing stopped"}
+
+
+@router.get("/api/admin/memory")
+async def get_memory_snapshot(
+    limit: int = Query(25, ge=1, le=500),
+    group_by: MemoryGrouping = MemoryGrouping.LINENO,
+    compare: bool = False,
+    _: User = Depends(RouterAuthUtils.get_current_admin),
+) -> MemorySnapshotView:
+    return await asyncio.to_thread(
+        memory_diagnostics.snapshot, limit, group_by.value, compare
+    )
@@ -135,7 +135,7 @@ async def login(
                         fails, an HTTP error is raised with an appropriate status code.
     """
 
-    tokens = AuthLogic.handle_login(login_data=login_request)
+    tokens = await AuthLogic.handle_login(login_data=login_request)
     origin = (
         request.headers.get("origin")
         or request.headers.get("referer")
@@ -175,7 +175,7 @@ async def signup(
         or request.headers.get("referer")
         or settings.frontend_domain
     )
-    result = AuthLogic.handle_signup(signup_request, origin)
+    result = await AuthLogic.handle_signup(signup_request, origin)
 
     # Check if result is a token pair (for verified users)
     if isinstance(result, TokenPair):
@@ -279,7 +279,7 @@ async def reset_password(
     Returns:
         dict: A message indicating the success of the password reset.
     """
-    return AuthLogic.reset_password(reset_password_request)
+    return await AuthLogic.reset_password(reset_password_request)
 
 
 @router.post("/api/auth/verify-password-reset-token")
@@ -4,6 +4,7 @@ from api.auth.models import TokenPair
 from api.config import settings
 from api.logic.auth_logic import AuthLogic
 from api.storage.models import User
+from api.storage.routing import set_request_user
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 REFRESH_TOKEN_EXPIRE_MINUTES = settings.refresh_token_expire_minutes
@@ -132,7 +133,24 @@ class RouterAuthUtils:
     @staticmethod
     def get_current_user(request: Request) -> User:
         access_token = RouterAuthUtils.get_jwt(request)
-        return RouterAuthUtils.get_user_from_jwt(access_token)
+        user = RouterAuthUtils.get_user_from_jwt(access_token)
+        # Lets replica routing keep this user's reads on the primary after a write
+        set_request_user(user.id)
+        return user
+
+    @staticmethod
+    def get_current_admin(request: Request) -> User:
+        """
+        Get the current user, who must be listed in settings.admin_emails.
+        Args:
+            request (Request): The request object containing the user's tokens.
+        Returns:
+            User: The logged-in admin.
+        """
+        user = RouterAuthUtils.get_current_user(request)
+        if user.email.lower() not in settings.admin_email_set:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        return user
 
     @staticmethod
     def get_user_from_jwt(token: str) -> User:
@@ -1,5 +1,7 @@
 import json
+from collections.abc import Callable
 from datetime import datetime, timezone
+from typing import Any
 
 from fastapi import Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
@@ -14,14 +16,13 @@ from api.router.models import (
     MessagePacket,
     NewChatMessage,
 )
+from api.services.connection_registry import connection_registry
+from api.services.message_bus import CHAT_CHANNEL
 from api.storage.models import ChatMessageType, User
+from api.storage.routing import track_request
 
 router = APIRouter()
 
-# No longer needed as they are static members of ChatLogic
-# mutex = asyncio.Lock()
-# active_connections = {}
-
 
 # Route for getting jwt for websocket purposes
 @router.get("/api/chat/jwt")
@@ -41,60 +42,83 @@ async def get_jwt(
     }
 
 
+def _error_message(chat_id, content: str) -> str:
+    return json.dumps(
+        {
+            "id": -1,
+            "chat_id": chat_id,
+            "sender": "System",
+            "content": content,
+            "message_type": "text_message",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "sent_by_user": False,
+            "is_flagged": False,
+            "is_error": True,
+        }
+    )
+
+
+async def handle_chat_frame(
+    data_dict: Any, user_id: int, origin: str, reply: Callable[[str], None]
+) -> None:
+    """
+    Handle one chat message sent by a client, on /ws/chat or a multiplexed socket.
+
+    Args:
+        data_dict (Any): The decoded JSON the client sent; anything other than
+            an object with chat_id and content gets an error reply.
+        user_id (int): The sender.
+        origin (str): The origin of the websocket request.
+        reply (Callable): Sends an error message back to the client's socket.
+    """
+    chat_id = data_dict.get("chat_id") if isinstance(data_dict, dict) else None
+    try:
+        if not isinstance(data_dict, dict):
+            raise ValueError("Expected a JSON object")
+        message = NewChatMessage(
+            content=data_dict.get("content"),
+            chat_id=chat_id,
+            message_type=data_dict.get("message_type", ChatMessageType.TEXT_MESSAGE),
+        )
+    except ValueError:
+        reply(
+            _error_message(chat_id, "Invalid message: chat_id and content are required")
+        )
+        return
+
+    try:
+        # Websockets bypass the HTTP middleware, so track the sender's write here
+        with track_request(user_id=user_id):
+            await ChatLogic.handle_private_message(message, user_id, origin)
+    except ConsecutiveMessageError as e:
+        reply(_error_message(chat_id, str(e)))
+    except Exception as e:
+        reply(_error_message(chat_id, f"An error occurred: {str(e)}"))
+
+
 @router.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket, access_token: str = ""):
     user = RouterAuthUtils.get_user_from_jwt(access_token)
     origin = websocket.headers.get("origin")
     await websocket.accept()
-    async with ChatLogic.mutex:
-        ChatLogic.active_connections[user.id] = websocket
+    await connection_registry.connect(websocket, user.id, [CHAT_CHANNEL])
+
+    def reply(message: str):
+        connection_registry.send_to(websocket, user.id, CHAT_CHANNEL, message)
+
     try:
         while True:
             data = await websocket.receive_text()
-            data_dict = json.loads(data)
-            chat_id = data_dict["chat_id"]
-            content = data_dict["content"]
-            message_type = data_dict.get("message_type", ChatMessageType.TEXT_MESSAGE)
-
-            message = NewChatMessage(
-                content=content, chat_id=chat_id, message_type=message_type
-            )
-
             try:
-                await ChatLogic.handle_private_message(message, user.id, origin)
-            except ConsecutiveMessageError as e:
-                error_message = {
-                    "id": -1,
-                    "chat_id": chat_id,
-                    "sender": "System",
-                    "content": str(e),
-                    "message_type": "text_message",
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                    "sent_by_user": False,
-                    "is_flagged": False,
-                    "is_error": True,
-                }
-                await websocket.send_text(json.dumps(error_message))
-            except Exception as e:
-                error_message = {
-                    "id": -1,
-                    "chat_id": chat_id,
-                    "sender": "System",
-                    "content": f"An error occurred: {str(e)}",
-                    "message_type": "text_message",
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                    "sent_by_user": False,
-                    "is_flagged": False,
-                    "is_error": True,
-                }
-                await websocket.send_text(json.dumps(error_message))
+                data_dict = json.loads(data)
+            except json.JSONDecodeError:
+                data_dict = None
+            await handle_chat_frame(data_dict, user.id, origin, reply)
     except WebSocketDisconnect:
-        async with ChatLogic.mutex:
-            if user.id in ChatLogic.active_connections:
-                del ChatLogic.active_connections[user.id]
         print(f"WebSocket connection closed for user {user.id}")
+    finally:
+        await connection_registry.disconnect(websocket, user.id)
 
 
 @router.post("/api/chat/get-or-create")
@@ -159,6 +183,7 @@ async def get_chats(
 @router.post("/api/chat/send-message-to-user")
 async def send_message_to_user(
     message_packet: MessagePacket,
+    request: Request,
     user: User = Depends(RouterAuthUtils.get_current_user),
 ) -> dict[str, str]:
     """
@@ -179,7 +204,8 @@ async def send_message_to_user(
         content=message_packet.content,
         message_type=message_packet.message_type,
     )
-    await ChatLogic.handle_private_message(message, user.id)
+    origin = request.headers.get("origin", "http://localhost:3000")
+    await ChatLogic.handle_private_message(message, user.id, origin)
     return {"status": "success", "message": "Message sent."}
 
 
@@ -380,3 +380,70 @@ class ResetPasswordRequest(BaseModel):
         #     raise ValueError("Password must contain at least one special character")
 
         return password
+
+
+class QueryStatsOrder(str, enum.Enum):
+    TOTAL = "total"  # Total time spent in the statement
+    COUNT = "count"
+    MAX = "max"  # Slowest single execution
+    MEAN = "mean"
+
+
+class QueryStatsView(BaseModel):
+    fingerprint: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    origins: list[str]  # Logic methods that issued the statement
+    sample: str  # The slowest execution's SQL, without parameter values
+
+
+class LoopStallView(BaseModel):
+    site: str  # Deepest frame of our code in the blocked stack, "file:line in func"
+    count: int
+    total_ms: float
+    max_ms: float
+    task: str  # The task that was running during the longest stall
+    stack: str  # The loop thread's stack during the longest stall
+
+
+class ProfileSummaryView(BaseModel):
+    id: str  # Also sent back on the profiled response as X-Profile-Id
+    name: str  # "METHOD /route"
+    status: int | None
+    created_at: float
+    duration_ms: float
+    samples: int
+
+
+class ProfileFormat(str, enum.Enum):
+    SPEEDSCOPE = "speedscope"  # Open at https://www.speedscope.app
+    COLLAPSED = "collapsed"  # Folded stacks for flamegraph.pl
+
+
+class ProfilerConfig(BaseModel):
+    sample_rate: float = Field(..., ge=0.0, le=1.0)  # Share of requests profiled
+
+
+class MemoryGrouping(str, enum.Enum):
+    LINENO = "lineno"
+    FILENAME = "filename"
+    TRACEBACK = "traceback"
+
+
+class MemoryStatView(BaseModel):
+    location: str
+    size_kb: float
+    count: int
+    size_diff_kb: float  # Since the previous snapshot, when compared
+    count_diff: int
+
+
+class MemorySnapshotView(BaseModel):
+    tracing: bool  # False until tracing is started at /api/admin/memory/tracing
+    traced_kb: float
+    peak_kb: float
+    compared: bool
+    top: list[MemoryStatView]
+    objects: dict[str, int]  # Live websocket and ORM object counts
@@ -1,4 +1,5 @@
 from api.router import (
+    admin,
     assignment,
     auth,
     chat,
@@ -23,4 +24,5 @@ routers = [
     me.router,
     payment.router,
     websocket.router,
+    admin.router,
 ]
@@ -1,48 +1,74 @@
-import asyncio
 import json
-from typing import Dict, List
 
-from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi import (
+    APIRouter,
+    Depends,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 
 from api.router.auth_utils import RouterAuthUtils
+from api.router.chat import handle_chat_frame
+from api.services.connection_registry import connection_registry
+from api.services.message_bus import CHAT_CHANNEL, NOTIFICATION_CHANNEL, message_bus
 from api.storage.models import User
 
 router = APIRouter()
 
+CHANNELS = (CHAT_CHANNEL, NOTIFICATION_CHANNEL)
+# Channel of the replies to frames a multiplexed socket could not handle
+ERROR_CHANNEL = "error"
+
 
 class WebSocketManager:
-    mutex = asyncio.Lock()
-    active_connections: Dict[int, List[WebSocket]] = {}
+    """
+    Notification channel of the shared connection registry.
+    """
 
     @classmethod
     async def connect(cls, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        async with cls.mutex:
-            if user_id not in cls.active_connections:
-                cls.active_connections[user_id] = []
-            cls.active_connections[user_id].append(websocket)
+        await connection_registry.connect(websocket, user_id, [NOTIFICATION_CHANNEL])
 
     @classmethod
     async def disconnect(cls, websocket: WebSocket, user_id: int):
-        async with cls.mutex:
-            if user_id in cls.active_connections:
-                cls.active_connections[user_id].remove(websocket)
-                if not cls.active_connections[user_id]:
-                    del cls.active_connections[user_id]
+        await connection_registry.disconnect(websocket, user_id)
 
     @classmethod
     async def send_personal_notification(cls, user_id: int, message: str):
-        async with cls.mutex:
-            if user_id in cls.active_connections:
-                for connection in cls.active_connections[user_id]:
-                    await connection.send_text(message)
+        connection_registry.send(user_id, NOTIFICATION_CHANNEL, message)
+        await message_bus.publish(
+            NOTIFICATION_CHANNEL, {"user_id": user_id, "message": message}
+        )
 
     @classmethod
     async def broadcast_notification(cls, message: str):
-        async with cls.mutex:
-            for user_connections in cls.active_connections.values():
-                for connection in user_connections:
-                    await connection.send_text(message)
+        connection_registry.broadcast(NOTIFICATION_CHANNEL, message)
+        await message_bus.publish(
+            NOTIFICATION_CHANNEL, {"user_id": None, "message": message}
+        )
+
+    @classmethod
+    async def deliver_notification(cls, payload: dict):
+        """
+        Message bus handler for notifications published by other workers.
+        A `user_id` of None means a broadcast.
+        """
+        if payload["user_id"] is None:
+            connection_registry.broadcast(NOTIFICATION_CHANNEL, payload["message"])
+        else:
+            connection_registry.send(
+                payload["user_id"], NOTIFICATION_CHANNEL, payload["message"]
+            )
+
+    @classmethod
+    async def flush(cls):
+        """
+        Wait until every queued message has been sent (or dropped).
+        """
+        await connection_registry.flush()
 
 
 # Route for getting jwt for websocket purposes
@@ -80,5 +106,60 @@ async def websocket_notifications(websocket: WebSocket, access_token: str = ""):
                 # Handle non-JSON messages or log an error
                 pass
     except WebSocketDisconnect:
-        await WebSocketManager.disconnect(websocket, user.id)
         print(f"WebSocket connection closed for user {user.id}")
+    finally:
+        await WebSocketManager.disconnect(websocket, user.id)
+
+
+@router.websocket("/ws/connect")
+async def websocket_multiplexed(
+    websocket: WebSocket, access_token: str = "", channels: str = ",".join(CHANNELS)
+):
+    """
+    Single socket carrying several channels. Every frame in either direction is
+    `{"channel": ..., "data": ...}`; `channels` selects what the client receives.
+    Frames that cannot be handled get a reply on the "error" channel.
+    """
+    user = RouterAuthUtils.get_user_from_jwt(access_token)
+    origin = websocket.headers.get("origin")
+    subscribed = [c for c in channels.split(",") if c in CHANNELS]
+    if not subscribed:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"channels must include one of {', '.join(CHANNELS)}",
+        )
+        return
+    await websocket.accept()
+    await connection_registry.connect(websocket, user.id, subscribed, multiplexed=True)
+
+    def reply(channel: str):
+        def send(message: str):
+            connection_registry.send_to(websocket, user.id, channel, message)
+
+        return send
+
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                frame = json.loads(data)
+            except json.JSONDecodeError:
+                frame = None
+            if not isinstance(frame, dict) or frame.get("channel") not in CHANNELS:
+                reply(ERROR_CHANNEL)(
+                    json.dumps(
+                        {
+                            "error": "Frames must be JSON objects with a channel "
+                            f"({', '.join(CHANNELS)}) and data"
+                        }
+                    )
+                )
+                continue
+            if frame["channel"] == CHAT_CHANNEL:
+                await handle_chat_frame(
+                    frame.get("data"), user.id, origin, reply(CHAT_CHANNEL)
+                )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await connection_registry.disconnect(websocket, user.id)
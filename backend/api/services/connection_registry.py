@@ -0,0 +1,274 @@
+import asyncio
+import json
+import logging
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from api.common.metrics import metrics
+from api.common.tracing import PRODUCER, tracer
+from api.config import settings
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+messages_dropped = metrics.counter(
+    "websocket_messages_dropped",
+    "Messages dropped because a websocket's send queue was full.",
+)
+evictions = metrics.counter(
+    "websocket_evictions", "Websockets closed for being too slow or failing a send."
+)
+
+
+class Connection:
+    """
+    One registered websocket and the channels it receives.
+
+    Outbound messages go through a bounded queue drained by the connection's
+    own writer task, so a slow client only ever delays its own messages.
+    Each queued message carries the trace context it was sent from, so its
+    send shows up in the trace of the request or job that produced it.
+    Multiplexed connections receive every message wrapped as
+    `{"channel": ..., "data": ...}`; dedicated ones receive the raw text.
+    """
+
+    def __init__(
+        self,
+        registry: "ConnectionRegistry",
+        websocket: WebSocket,
+        user_id: int,
+        channels: Iterable[str],
+        multiplexed: bool = False,
+    ):
+        self.registry = registry
+        self.websocket = websocket
+        self.user_id = user_id
+        self.channels = frozenset(channels)
+        self.multiplexed = multiplexed
+        self.queue: asyncio.Queue = asyncio.Queue(settings.websocket_send_queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.writer = asyncio.create_task(self._write())
+
+    def frame(self, channel: str, message: str) -> str:
+        if not self.multiplexed:
+            return message
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            data = message
+        return json.dumps({"channel": channel, "data": data})
+
+    def put(self, channel: str, message: str) -> bool:
+        """
+        Queue a message without waiting. Returns False if the connection is
+        too slow to keep up and should be evicted.
+        """
+        if self.closed:
+            return False
+        item = (
+            self.frame(channel, message),
+            channel,
+            tracer.current_span().context,
+        )
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            if settings.websocket_slow_consumer_policy == DISCONNECT:
+                return False
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(item)
+            self.dropped += 1
+            messages_dropped.inc()
+            return True
+
+    async def _write(self):
+        while True:
+            message, channel, trace_context = await self.queue.get()
+            # Sends are only traced as part of the trace that queued them
+            span = (
+                tracer.start_as_current_span(
+                    "websocket send",
+                    PRODUCER,
+                    {"messaging.destination": channel, "user_id": self.user_id},
+                    parent=trace_context,
+                )
+                if trace_context is not None
+                else nullcontext()
+            )
+            try:
+                with span:
+                    await asyncio.wait_for(
+                        self.websocket.send_text(message),
+                        settings.websocket_send_timeout,
+                    )
+            except Exception as e:
+                logging.warning(
+                    f"Evicting websocket for user {self.user_id} after failed send: {e}"
+                )
+                asyncio.create_task(self.registry.evict(self.websocket, self.user_id))
+                return
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """
+        Stop the writer and discard any messages still queued.
+        """
+        self.closed = True
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+
+
+class ConnectionRegistry:
+    """
+    Every websocket on this worker, for chat and notifications alike.
+
+    A user may hold any number of sockets, each subscribed to one or more
+    channels. The registry is copy-on-write: it is only replaced (never
+    mutated) under the mutex, so senders read it without taking the lock.
+    """
+
+    def __init__(self):
+        self.mutex = asyncio.Lock()
+        self.connections: Dict[int, Tuple[Connection, ...]] = {}
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        channels: Iterable[str],
+        multiplexed: bool = False,
+    ) -> Connection:
+        """
+        Register an accepted websocket for the given channels.
+        """
+        connection = Connection(self, websocket, user_id, channels, multiplexed)
+        async with self.mutex:
+            connections = dict(self.connections)
+            connections[user_id] = connections.get(user_id, ()) + (connection,)
+            self.connections = connections
+        return connection
+
+    async def disconnect(self, websocket: WebSocket, user_id: int) -> None:
+        async with self.mutex:
+            current = self.connections.get(user_id, ())
+            removed = [c for c in current if c.websocket is websocket]
+            if not removed:
+                return
+            connections = dict(self.connections)
+            remaining = tuple(c for c in current if c.websocket is not websocket)
+            if remaining:
+                connections[user_id] = remaining
+            else:
+                del connections[user_id]
+            self.connections = connections
+        for connection in removed:
+            connection.close()
+
+    async def evict(self, websocket: WebSocket, user_id: int) -> None:
+        """
+        Drop a connection that cannot keep up and close it so the client reconnects.
+        """
+        evictions.inc()
+        await self.disconnect(websocket, user_id)
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def sockets(self, user_id: int, channel: Optional[str] = None) -> List[WebSocket]:
+        return [
+            c.websocket
+            for c in self.connections.get(user_id, ())
+            if channel is None or channel in c.channels
+        ]
+
+    def is_connected(self, user_id: int, channel: str) -> bool:
+        return any(channel in c.channels for c in self.connections.get(user_id, ()))
+
+    def _enqueue(self, connection: Connection, channel: str, message: str) -> None:
+        if not connection.put(channel, message):
+            logging.warning(f"Evicting slow websocket for user {connection.user_id}")
+            connection.close()
+            asyncio.create_task(self.evict(connection.websocket, connection.user_id))
+
+    def send(self, user_id: int, channel: str, message: str) -> int:
+        """
+        Queue a message for every socket of the user subscribed to the channel.
+        Returns the number of sockets it was queued for.
+        """
+        sent = 0
+        for connection in self.connections.get(user_id, ()):
+            if channel in connection.channels:
+                self._enqueue(connection, channel, message)
+                sent += 1
+        return sent
+
+    def send_to(self, websocket: WebSocket, user_id: int, channel: str, message: str):
+        """
+        Queue a message for one specific socket, e.g. an error reply.
+        """
+        for connection in self.connections.get(user_id, ()):
+            if connection.websocket is websocket:
+                self._enqueue(connection, channel, message)
+
+    def broadcast(self, channel: str, message: str) -> None:
+        for user_connections in self.connections.values():
+            for connection in user_connections:
+                if channel in connection.channels:
+                    self._enqueue(connection, channel, message)
+
+    async def flush(self) -> None:
+        """
+        Wait until every queued message has been sent (or dropped).
+        """
+        await asyncio.gather(
+            *(
+                connection.queue.join()
+                for user_connections in self.connections.values()
+                for connection in user_connections
+            )
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Open connections per channel; a multiplexed socket counts once per channel.
+        """
+        counts: Dict[str, int] = {}
+        for user_connections in self.connections.values():
+            for connection in user_connections:
+                for channel in connection.channels:
+                    counts[channel] = counts.get(channel, 0) + 1
+        return counts
+
+    def clear(self) -> None:
+        """
+        Close every connection's writer and empty the registry.
+        """
+        for user_connections in self.connections.values():
+            for connection in user_connections:
+                connection.close()
+        self.connections = {}
+
+
+connection_registry = ConnectionRegistry()
+
+metrics.gauge_callback(
+    "websocket_connections",
+    "Open websockets on this worker, per channel (chat, notifications).",
+    connection_registry.counts,
+    ["channel"],
+)
+metrics.gauge_callback(
+    "websocket_users",
+    "Users with at least one open websocket on this worker.",
+    lambda: len(connection_registry.connections),
+)
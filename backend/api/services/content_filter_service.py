@@ -1,14 +1,11 @@
 import json
 import random
 import re
-from typing import Dict, List
-
-import google.generativeai as genai
-from groq import Groq
-from huggingface_hub import InferenceClient
-from mistralai import Mistral
+from typing import Dict, List, Optional
 
+from api.common.metrics import observe_external_call
 from api.config import settings
+from api.services.redaction import find_pii_spans, locate_spans, redact
 from api.services.social_media_filter import extract_social_shares
 
 
@@ -21,6 +18,7 @@ class PIIDetection:
         filtered_message: str,
         reasoning: str,
         provider: str,
+        pii_spans: Optional[List[str]] = None,
     ):
         self.has_pii = has_pii
         self.detected_types = detected_types
@@ -28,6 +26,7 @@ class PIIDetection:
         self.filtered_message = filtered_message
         self.reasoning = reasoning
         self.provider = provider
+        self.pii_spans = pii_spans or []
 
 
 class ContentFilterService:
@@ -94,19 +93,37 @@ class ContentFilterService:
             return {"filtered": True, "reason": "ADDRESS"}
         return {"filtered": False}
 
-    async def filter_message(self, message: str, threshold: float = 0.7) -> Dict:
-        manual_filter_result = self._manual_filter(message)
+    async def filter_message(
+        self,
+        message: str,
+        threshold: float = 0.7,
+        history: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Check `message` for PII, together with the conversation `history` it is
+        sent in (most recent first), and return the filter result.
+
+        When flagged, `content` is `message` with only the offending substrings
+        masked, or a placeholder if they can't be located in `message`.
+        """
+        if history:
+            full_text = " ".join([message] + history)
+        else:
+            full_text = message
+
+        manual_filter_result = self._manual_filter(full_text)
         if manual_filter_result["filtered"]:
+            reason = manual_filter_result["reason"]
             return {
                 "filtered": True,
-                "content": f"Message filtered due to potential PII: {manual_filter_result['reason']}",
-                "detected": [manual_filter_result["reason"]],
+                "content": self._redact(message, [reason.split()[0]], []),
+                "detected": [reason],
                 "confidence": 1.0,
                 "reasoning": "Message flagged by manual filter.",
                 "provider": "manual_filter",
             }
 
-        if len(message) < 10:
+        if len(full_text) < 10:
             return {
                 "filtered": False,
                 "content": message,
@@ -116,17 +133,22 @@ class ContentFilterService:
                 "provider": "manual_filter",
             }
 
-        random.shuffle(self.llm_providers)
-
         last_exception = None
-        for provider in self.llm_providers:
+        for provider in self._order_providers():
             try:
-                result = await provider(message, threshold)
+                result = await provider(full_text, threshold)
                 if "Failed to parse" in result.get("reasoning", ""):
                     last_exception = Exception(
                         f"Provider {result.get('provider')} failed to parse output."
                     )
                     continue
+                hints = result.pop("pii_spans", [])
+                if result["filtered"]:
+                    result["content"] = self._redact(
+                        message, result.get("detected", []), hints
+                    )
+                else:
+                    result["content"] = message
                 return result
             except Exception as e:
                 last_exception = e
@@ -137,27 +159,76 @@ class ContentFilterService:
 
         raise Exception("All LLM providers failed to filter the message.")
 
+    def _redact(self, message: str, detected: List[str], hints: List[str]) -> str:
+        """
+        Mask the PII in `message` using locally detected spans plus the exact
+        substrings reported by the LLM. Falls back to a placeholder when no
+        span of a detected type can be found in `message`, e.g. when the PII
+        only appears once combined with earlier messages.
+        """
+        hint_kind = detected[0] if len(detected) == 1 else "PII"
+        local_spans = find_pii_spans(message)
+        hinted_spans = locate_spans(message, hints, hint_kind)
+        found_kinds = {span.kind for span in local_spans}
+        if not hinted_spans and not (
+            local_spans and all(kind in found_kinds for kind in detected)
+        ):
+            return f"Message filtered due to potential PII: {', '.join(detected)}"
+        return redact(message, local_spans + hinted_spans)
+
+    def _order_providers(self) -> List:
+        """
+        Return the providers in the order they should be tried.
+        Providers are shuffled to spread load across vendors.
+        """
+        random.shuffle(self.llm_providers)
+        return self.llm_providers
+
+    # The LLM SDKs are imported by the provider that uses them: together they
+    # take most of a second to import and most messages never reach an LLM.
     async def _groq_provider(self, message: str, threshold: float) -> Dict:
-        client = Groq(api_key=settings.groq_api_key)
+        from groq import Groq
+
+        client = Groq(
+            api_key=settings.groq_api_key, base_url=settings.groq_base_url or None
+        )
         return self._get_llm_response(
             client, message, "llama-3.1-8b-instant", threshold, message
         )
 
     async def _gemini_provider(self, message: str, threshold: float) -> Dict:
-        genai.configure(api_key=settings.gemini_api_key)
+        import google.generativeai as genai
+
+        if settings.gemini_base_url:
+            genai.configure(
+                api_key=settings.gemini_api_key,
+                transport="rest",
+                client_options={"api_endpoint": settings.gemini_base_url},
+            )
+        else:
+            genai.configure(api_key=settings.gemini_api_key)
         model = genai.GenerativeModel("gemini-1.5-flash")
         return self._get_llm_response(
             model, message, "gemini-1.5-flash", threshold, message
         )
 
     async def _huggingface_provider(self, message: str, threshold: float) -> Dict:
-        client = InferenceClient(token=settings.hf_token)
+        from huggingface_hub import InferenceClient
+
+        client = InferenceClient(
+            token=settings.hf_token, base_url=settings.hf_base_url or None
+        )
         return self._get_llm_response(
             client, message, "meta-llama/Llama-3.1-8B-Instruct", threshold, message
         )
 
     async def _mistral_provider(self, message: str, threshold: float) -> Dict:
-        client = Mistral(api_key=settings.mistral_api_key)
+        from mistralai import Mistral
+
+        client = Mistral(
+            api_key=settings.mistral_api_key,
+            server_url=settings.mistral_base_url or None,
+        )
         return self._get_llm_response(
             client, message, "mistral-small-latest", threshold, message
         )
@@ -166,32 +237,42 @@ class ContentFilterService:
         self, client, message: str, model: str, threshold: float, new_message: str
     ) -> Dict:
         prompt = self._build_prompt(message)
+        content = self._complete(client, prompt, model)
+        return self._parse_llm_output(content, new_message, model, threshold)
 
-        if isinstance(client, Groq):
-            response = client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=model,
-            )
-            content = response.choices[0].message.content
-        elif isinstance(client, genai.GenerativeModel):
-            response = client.generate_content(prompt)
-            content = response.text
-        elif isinstance(client, InferenceClient):
-            response = client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=model,
-            )
-            content = response.choices[0].message.content
-        elif isinstance(client, Mistral):
-            response = client.chat(
-                messages=[{"role": "user", "content": prompt}],
-                model=model,
-            )
-            content = response.choices[0].message.content
-        else:
-            raise Exception("Unknown LLM client type.")
+    def _complete(self, client, prompt: str, model: str) -> str:
+        """
+        Send the prompt to the given LLM client and return the raw text response.
+        Clients are told apart by the SDK that defines them, so no SDK has to be
+        imported just to check the type.
+        """
+        sdk = type(client).__module__.split(".")[0]
+        with observe_external_call("llm", sdk):
+            if sdk == "groq":
+                response = client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=model,
+                )
+                content = response.choices[0].message.content
+            elif sdk == "google":
+                response = client.generate_content(prompt)
+                content = response.text
+            elif sdk == "huggingface_hub":
+                response = client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=model,
+                )
+                content = response.choices[0].message.content
+            elif sdk == "mistralai":
+                response = client.chat.complete(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=model,
+                )
+                content = response.choices[0].message.content
+            else:
+                raise Exception("Unknown LLM client type.")
 
-        return self._parse_llm_output(content, new_message, model, threshold)
+        return content
 
     def _build_prompt(self, message: str) -> str:
         return f"""
@@ -207,7 +288,7 @@ class ContentFilterService:
             "has_pii": boolean,
             "detected_types": ["type1", "type2", ...],
             "confidence": float (0.0 to 1.0),
-            "filtered_message": "The message with PII replaced by placeholders like [EMAIL_ADDRESS]",
+            "pii_spans": ["exact substring of the user's message containing PII", ...],
             "reasoning": "Your reasoning for the detection."
         }}
 
@@ -225,9 +306,10 @@ class ContentFilterService:
                 has_pii=data.get("has_pii", False),
                 detected_types=data.get("detected_types", []),
                 confidence=data.get("confidence", 0.0),
-                filtered_message=data.get("filtered_message", original_message),
+                filtered_message=original_message,
                 reasoning=data.get("reasoning", ""),
                 provider=provider,
+                pii_spans=[s for s in data.get("pii_spans", []) if isinstance(s, str)],
             )
 
             if pii_detection.has_pii and pii_detection.confidence >= threshold:
@@ -238,6 +320,7 @@ class ContentFilterService:
                     "confidence": pii_detection.confidence,
                     "reasoning": pii_detection.reasoning,
                     "provider": pii_detection.provider,
+                    "pii_spans": pii_detection.pii_spans,
                 }
             else:
                 return {
@@ -1,23 +1,42 @@
 import base64
+import copy
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 from email.mime.application import MIMEApplication
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from dotenv import load_dotenv
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, Template
 
+from api.common.metrics import observe_external_call
 from api.config import settings
 from api.storage.models import Assignment
 
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
 load_dotenv()
 
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+BANNER_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "static", "images", "banner.png"
+)
+
+
+def build(*args, **kwargs):
+    """
+    Build a Google API client. The discovery client and google-auth are slow
+    to import, so they are only loaded once the first email is sent.
+    """
+    from googleapiclient.discovery import build as discovery_build
+
+    return discovery_build(*args, **kwargs)
+
 
 class GmailEmailService:
     """
@@ -31,76 +50,157 @@ class GmailEmailService:
     # Gmail API scopes for sending emails
     SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 
+    # Access tokens are refreshed this long before they expire
+    TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+    # Credentials are shared process-wide; refreshing them is serialised by the lock
+    _credentials_lock = threading.Lock()
+    _credentials_cache: Dict[tuple, "Credentials"] = {}
+    # The Gmail client's HTTP transport is not thread-safe, so each thread
+    # (e.g. the threadpool running sync endpoints) keeps its own service object
+    _local = threading.local()
+
     @staticmethod
     def _get_credentials(
         refresh_token: str,
         client_id: str,
         client_secret: str,
-        token_uri: str = "https://oauth2.googleapis.com/token",
-    ) -> Credentials:
+        token_uri: Optional[str] = None,
+    ) -> "Credentials":
         """
         Obtain OAuth 2.0 credentials using refresh token
 
+        Credentials are cached per refresh token and only refreshed when the
+        access token is missing or about to expire.
+
         :param refresh_token: OAuth refresh token
         :param client_id: OAuth client ID
         :param client_secret: OAuth client secret
-        :param token_uri: Token endpoint URL
+        :param token_uri: Token endpoint URL (defaults to settings.google_token_url)
         :return: Google OAuth Credentials
         """
-        credentials = Credentials(
-            None,
-            refresh_token=refresh_token,
-            token_uri=token_uri,
-            client_id=client_id,
-            client_secret=client_secret,
-        )
-
-        # Refresh the credentials to get a new access token
-        credentials.refresh(Request())
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
+        token_uri = token_uri or settings.google_token_url
+        key = (refresh_token, client_id, client_secret, token_uri)
+        with GmailEmailService._credentials_lock:
+            credentials = GmailEmailService._credentials_cache.get(key)
+            if credentials is None:
+                credentials = Credentials(
+                    None,
+                    refresh_token=refresh_token,
+                    token_uri=token_uri,
+                    client_id=client_id,
+                    client_secret=client_secret,
+                )
+                GmailEmailService._credentials_cache[key] = credentials
+
+            if GmailEmailService._needs_refresh(credentials):
+                # Refresh the credentials to get a new access token
+                with observe_external_call("google_oauth", "refresh_token"):
+                    credentials.refresh(Request())
 
         return credentials
 
     @staticmethod
-    def _get_gmail_service(credentials: Credentials):
+    def _needs_refresh(credentials: "Credentials") -> bool:
+        if not credentials.token or credentials.expiry is None:
+            return True
+        # google-auth stores expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return credentials.expiry - GmailEmailService.TOKEN_REFRESH_MARGIN <= now
+
+    @staticmethod
+    def _get_gmail_service(credentials: "Credentials"):
         """
-        Create Gmail service from credentials
+        Create Gmail service from credentials, reusing this thread's service
 
         :param credentials: Google OAuth Credentials
         :return: Gmail service object
         """
-        return build("gmail", "v1", credentials=credentials)
+        services = GmailEmailService._local.__dict__.setdefault("services", {})
+        service = services.get(id(credentials))
+        if service is None or service[0] is not credentials:
+            client_options = (
+                {"api_endpoint": settings.gmail_api_url}
+                if settings.gmail_api_url
+                else None
+            )
+            service = (
+                credentials,
+                build(
+                    "gmail",
+                    "v1",
+                    credentials=credentials,
+                    client_options=client_options,
+                ),
+            )
+            services[id(credentials)] = service
+        return service[1]
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Forget cached credentials and this thread's service objects.
+        """
+        with GmailEmailService._credentials_lock:
+            GmailEmailService._credentials_cache.clear()
+        GmailEmailService._local.__dict__.pop("services", None)
+
+    @staticmethod
+    def _send(service, sender: str, raw_message: str, operation: str) -> dict:
+        """
+        Send an encoded message through the Gmail API, timing the call
+
+        :param service: Gmail service object
+        :param sender: Sender address, or "me"
+        :param raw_message: Base64url encoded MIME message
+        :param operation: Kind of email, used to label the call's metrics
+        :return: Gmail API response
+        """
+        with observe_external_call("gmail", operation):
+            return (
+                service.users()
+                .messages()
+                .send(userId=sender, body={"raw": raw_message})
+                .execute()
+            )
+
+    # Templates are compiled once; in local/development they are reloaded when
+    # the file changes
+    _template_env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        auto_reload=settings.env in ("local", "development"),
+    )
+    # Banner MIME part, built on first use and copied into each message
+    _banner_part: Optional[MIMEImage] = None
 
     @staticmethod
     def _read_template(template_name: str) -> Template:
         """
-        Read and compile a Jinja2 template from the templates directory.
+        Get a compiled Jinja2 template from the templates directory.
         """
-        template_path = os.path.join(
-            os.path.dirname(__file__), "..", "templates", template_name
-        )
-        with open(template_path, "r") as f:
-            template_string = f.read()
-        return Template(template_string)
+        return GmailEmailService._template_env.get_template(template_name)
 
     @staticmethod
     def _attach_banner_image(message: MIMEMultipart) -> None:
         """
-        Load and attach banner image from local filesystem to email message
+        Attach the banner image to an email message
 
         :param message: MIMEMultipart message to attach image to
         """
-        # Get path to banner image relative to this file
-        banner_path = os.path.join(
-            os.path.dirname(__file__), "..", "static", "images", "banner.png"
-        )
+        if GmailEmailService._banner_part is None:
+            with open(BANNER_PATH, "rb") as f:
+                image_data = f.read()
 
-        with open(banner_path, "rb") as f:
-            image_data = f.read()
+            image = MIMEImage(image_data)
+            image.add_header("Content-ID", "<banner>")
+            image.add_header("Content-Disposition", "inline", filename="banner.png")
+            GmailEmailService._banner_part = image
 
-        image = MIMEImage(image_data)
-        image.add_header("Content-ID", "<banner>")
-        image.add_header("Content-Disposition", "inline", filename="banner.png")
-        message.attach(image)
+        # The base64 payload string is shared, only the headers are copied
+        message.attach(copy.deepcopy(GmailEmailService._banner_part))
 
     @staticmethod
     def send_password_reset_email(
@@ -159,11 +259,8 @@ class GmailEmailService:
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
 
             # Send message
-            result = (
-                service.users()
-                .messages()
-                .send(userId=sender, body={"raw": raw_message})
-                .execute()
+            result = GmailEmailService._send(
+                service, sender, raw_message, "password_reset"
             )
 
             return {
@@ -240,11 +337,84 @@ class GmailEmailService:
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
 
             # Send message
-            result = (
-                service.users()
-                .messages()
-                .send(userId=sender, body={"raw": raw_message})
-                .execute()
+            result = GmailEmailService._send(
+                service, sender, raw_message, "unread_message"
+            )
+
+            return {
+                "success": True,
+                "message_id": result.get("id"),
+                "thread_id": result.get("threadId"),
+            }
+
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            return {"success": False, "error": str(error)}
+
+    @staticmethod
+    def send_unread_digest_email(
+        recipient_email: str,
+        chats: List[Dict[str, str]],
+        sender_email: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a single email summarising all of a user's unread chats via Gmail API
+
+        :param recipient_email: Email address of the recipient
+        :param chats: One dict per unread chat with sender_name, message_preview and chat_url
+        :param sender_email: Optional sender email (defaults to authenticated user)
+        :param refresh_token: OAuth refresh token
+        :param client_id: OAuth client ID
+        :param client_secret: OAuth client secret
+        :return: Email sending result
+        """
+        try:
+            # Use settings credentials if not provided
+            refresh_token = refresh_token or settings.gmail_refresh_token
+            client_id = client_id or settings.gmail_client_id
+            client_secret = client_secret or settings.gmail_client_secret
+
+            if not (refresh_token and client_id and client_secret):
+                raise ValueError("Gmail OAuth credentials must be provided")
+
+            # Get credentials and service
+            credentials = GmailEmailService._get_credentials(
+                refresh_token=refresh_token,
+                client_id=client_id,
+                client_secret=client_secret,
+            )
+            service = GmailEmailService._get_gmail_service(credentials)
+
+            sender = sender_email or "me"  # 'me' refers to authenticated user
+
+            # Create multipart message with related content for embedded images
+            message = MIMEMultipart("related")
+            message["to"] = recipient_email
+            if len(chats) == 1:
+                message["subject"] = (
+                    f"You have a new message from {chats[0]['sender_name']}"
+                )
+            else:
+                message["subject"] = f"You have unread messages in {len(chats)} chats"
+
+            # Generate and attach HTML content FIRST
+            template = GmailEmailService._read_template("unread_digest.html")
+            html_content = template.render(chats=chats)
+            html_part = MIMEText(html_content, "html")
+            message.attach(html_part)
+
+            # Then attach banner image
+            GmailEmailService._attach_banner_image(message)
+
+            # Encode message
+            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+
+            # Send message
+            result = GmailEmailService._send(
+                service, sender, raw_message, "unread_digest"
             )
 
             return {
@@ -344,11 +514,8 @@ class GmailEmailService:
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
 
             # Send message
-            result = (
-                service.users()
-                .messages()
-                .send(userId=sender, body={"raw": raw_message})
-                .execute()
+            result = GmailEmailService._send(
+                service, sender, raw_message, "email_confirmation"
             )
 
             return {
@@ -463,12 +630,7 @@ class GmailEmailService:
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
 
             # Send message
-            result = (
-                service.users()
-                .messages()
-                .send(userId=sender, body={"raw": raw_message})
-                .execute()
-            )
+            result = GmailEmailService._send(service, sender, raw_message, "email")
 
             return {
                 "success": True,
@@ -536,11 +698,8 @@ class GmailEmailService:
             raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
 
             # Send message
-            result = (
-                service.users()
-                .messages()
-                .send(userId=sender, body={"raw": raw_message})
-                .execute()
+            result = GmailEmailService._send(
+                service, sender, raw_message, "notify_new_assignment_request"
             )
 
             return {
@@ -0,0 +1,49 @@
+import httpx
+
+from api.config import settings
+
+
+class HttpClient:
+    """
+    The application's shared client for outbound HTTP.
+
+    One `httpx.AsyncClient` is opened in the FastAPI lifespan and reused by
+    every request, so calls to the same host share kept-alive connections
+    instead of paying a new TLS handshake each time. Connection counts and
+    timeouts come from settings.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    @staticmethod
+    def _create() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.http_timeout, connect=settings.http_connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+
+    async def start(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create()
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Opened on first use when running outside the app (scripts, workers)
+        if self._client is None or self._client.is_closed:
+            self._client = self._create()
+        return self._client
+
+
+http_client = HttpClient()
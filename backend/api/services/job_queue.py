@@ -0,0 +1,327 @@
+import asyncio
+import inspect
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from api.common.metrics import metrics
+from api.common.tracing import CONSUMER, SpanContext, tracer
+from api.config import settings
+from api.storage.models import Job, JobStatus
+from api.storage.storage_service import StorageService
+
+ASSIGNMENT_REQUEST_EMAIL = "assignment_request_email"
+CHAT_MESSAGE_DELIVERY = "chat_message_delivery"
+PAYMENT_ACCEPTED_EMAIL = "payment_accepted_email"
+STRIPE_EVENT = "stripe_event"
+
+# A job handler takes the job's payload; it may be sync (run in a thread) or async
+JobHandler = Callable[[dict], Any]
+
+# Payload key carrying the enqueuing request's trace into the job
+TRACE_KEY = "_traceparent"
+
+job_duration = metrics.histogram(
+    "background_job_duration_seconds",
+    "Time to run a background job, by kind and outcome (ok or error).",
+    ["kind", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class JobQueue:
+    """
+    Durable background job queue stored in the Job table.
+
+    Request handlers enqueue side effects (emails, chat delivery) instead of
+    running them inline. Workers claim due jobs with FOR UPDATE SKIP LOCKED, so
+    any number of worker processes can share the table, and failed jobs are
+    retried with exponential backoff until they run out of attempts. Jobs left
+    RUNNING by a crashed worker are claimed again after `job_lock_timeout`;
+    a live worker keeps refreshing the lock of the jobs it is running, so a
+    slow job is never claimed twice, and a job cancelled at shutdown goes
+    straight back to the queue.
+    A worker only claims a job once it has a free slot for the job's kind, so
+    a claimed job never sits RUNNING while it waits behind other jobs.
+    """
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self.handlers: Dict[str, JobHandler] = {}
+        self.limits: Dict[str, int] = {}
+        self.active: Dict[str, int] = {}  # Running jobs per kind
+        self.running: set = set()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self):
+        return self._engine or StorageService.engine
+
+    def register(
+        self, kind: str, handler: JobHandler, concurrency: Optional[int] = None
+    ) -> None:
+        """
+        Register the handler for a kind of job, optionally limiting how many
+        jobs of that kind a worker runs at once (e.g. to respect API quotas).
+        """
+        self.handlers[kind] = handler
+        if concurrency:
+            self.limits[kind] = concurrency
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        session: Optional[Session] = None,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job to the queue.
+
+        When `session` is given the job is only added to it, so it is committed
+        (or rolled back) together with the caller's own changes.
+        """
+        trace_context = tracer.current_span().context
+        if trace_context is not None:
+            payload = {**payload, TRACE_KEY: trace_context.traceparent}
+        job = Job(
+            kind=kind,
+            payload=payload,
+            status=JobStatus.PENDING,
+            attempts=0,
+            max_attempts=max_attempts or settings.job_max_attempts,
+            run_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+        )
+        if session is not None:
+            session.add(job)
+            return job
+        with Session(self.engine, expire_on_commit=False) as own_session:
+            own_session.add(job)
+            own_session.commit()
+        return job
+
+    def _free_slots(self) -> Dict[str, int]:
+        """
+        How many more jobs of each concurrency-limited kind may start now.
+        """
+        return {
+            kind: limit - self.active.get(kind, 0)
+            for kind, limit in self.limits.items()
+        }
+
+    def _claim(
+        self, limit: int, free_slots: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[int, str, dict]]:
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=settings.job_lock_timeout)
+        free_slots = dict(free_slots or {})
+        full = [kind for kind, free in free_slots.items() if free <= 0]
+        with Session(self.engine) as session:
+            jobs = (
+                session.execute(
+                    select(Job)
+                    .where(
+                        or_(
+                            and_(Job.status == JobStatus.PENDING, Job.run_at <= now),
+                            and_(
+                                Job.status == JobStatus.RUNNING, Job.locked_at < stale
+                            ),
+                        ),
+                        Job.kind.not_in(full),
+                    )
+                    .order_by(Job.run_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            claimed = []
+            for job in jobs:
+                if job.kind in free_slots:
+                    # Left for a later poll, once a job of this kind has finished
+                    if free_slots[job.kind] <= 0:
+                        continue
+                    free_slots[job.kind] -= 1
+                job.status = JobStatus.RUNNING
+                job.locked_at = now
+                job.attempts += 1
+                claimed.append((job.id, job.kind, job.payload))
+            session.commit()
+        return claimed
+
+    def _finish(self, job_id: int, error: Optional[Exception] = None) -> None:
+        with Session(self.engine) as session:
+            job = session.get(Job, job_id)
+            if job is None:
+                return
+            job.locked_at = None
+            if error is None:
+                job.status = JobStatus.DONE
+                job.last_error = None
+            elif job.attempts >= job.max_attempts:
+                job.status = JobStatus.FAILED
+                job.last_error = repr(error)
+            else:
+                job.status = JobStatus.PENDING
+                job.last_error = repr(error)
+                job.run_at = datetime.now(timezone.utc) + self.backoff(job.attempts)
+            session.commit()
+
+    def _touch(self, job_id: int) -> None:
+        with Session(self.engine) as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.RUNNING)
+                .values(locked_at=datetime.now(timezone.utc))
+            )
+            session.commit()
+
+    def _requeue(self, job_id: int) -> None:
+        """
+        Return an interrupted job to the queue without counting the attempt.
+        """
+        with Session(self.engine) as session:
+            job = session.get(Job, job_id)
+            if job is None or job.status != JobStatus.RUNNING:
+                return
+            job.status = JobStatus.PENDING
+            job.locked_at = None
+            job.attempts = max(job.attempts - 1, 0)
+            job.run_at = datetime.now(timezone.utc)
+            session.commit()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """
+        Refresh the job's lock well before `job_lock_timeout` runs out.
+        """
+        while True:
+            await asyncio.sleep(settings.job_lock_timeout / 3)
+            try:
+                await asyncio.to_thread(self._touch, job_id)
+            except Exception as e:
+                logging.error(f"Failed to refresh the lock of job {job_id}: {e}")
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        """
+        Delay before retrying a job that has failed `attempts` times.
+        """
+        delay = settings.job_backoff_base * 2 ** (attempts - 1)
+        return timedelta(seconds=min(delay, settings.job_backoff_max))
+
+    async def _execute(self, job_id: int, kind: str, payload: dict) -> None:
+        handler = self.handlers.get(kind)
+        payload = dict(payload)
+        parent = SpanContext.parse(payload.pop(TRACE_KEY, None))
+        error = None
+        start = time.perf_counter()
+        with tracer.start_as_current_span(
+            f"job {kind}",
+            CONSUMER,
+            {"job.id": job_id, "job.kind": kind},
+            parent=parent,
+        ) as span:
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind '{kind}'")
+                if inspect.iscoroutinefunction(handler):
+                    await handler(payload)
+                else:
+                    await asyncio.to_thread(handler, payload)
+            except asyncio.CancelledError:
+                heartbeat.cancel()
+                logging.warning(f"Job {job_id} ({kind}) interrupted, requeueing it")
+                await asyncio.to_thread(self._requeue, job_id)
+                raise
+            except Exception as e:
+                logging.error(f"Job {job_id} ({kind}) failed: {e}")
+                span.record_exception(e)
+                error = e
+            finally:
+                heartbeat.cancel()
+        job_duration.labels(
+            kind=kind, outcome="ok" if error is None else "error"
+        ).observe(time.perf_counter() - start)
+        await asyncio.to_thread(self._finish, job_id, error)
+
+    def _release(self, kind: str) -> None:
+        self.active[kind] -= 1
+
+    async def run_once(self) -> int:
+        """
+        Claim as many due jobs as there are free worker slots and start them.
+        Returns the number of jobs started.
+        """
+        free = settings.job_concurrency - len(self.running)
+        if free <= 0:
+            return 0
+        claimed = await asyncio.to_thread(self._claim, free, self._free_slots())
+        for job in claimed:
+            kind = job[1]
+            self.active[kind] = self.active.get(kind, 0) + 1
+            task = asyncio.create_task(self._execute(*job))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+            task.add_done_callback(lambda _, kind=kind: self._release(kind))
+        return len(claimed)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to `timeout` seconds for the jobs this worker has started to
+        finish. Returns whether they all did.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.running:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.wait(set(self.running), timeout=remaining)
+        return True
+
+    async def run(self) -> None:
+        while True:
+            try:
+                started = await self.run_once()
+            except Exception as e:
+                logging.error(f"Job queue poll failed: {e}")
+                started = 0
+            if not started:
+                await asyncio.sleep(settings.job_poll_interval)
+            else:
+                # Yield so started jobs can make progress before polling again
+                await asyncio.sleep(0)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        if await self.drain(settings.job_drain_timeout):
+            return
+        unfinished = list(self.running)
+        logging.warning(
+            f"{len(unfinished)} jobs still running after "
+            f"{settings.job_drain_timeout}s, cancelling them"
+        )
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+
+job_queue = JobQueue()
+
+metrics.gauge_callback(
+    "background_jobs_running",
+    "Background jobs this worker is running.",
+    lambda: len(job_queue.running),
+)
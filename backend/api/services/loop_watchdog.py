@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from api.common.metrics import metrics
+from api.config import settings
+
+# Frames from files under this directory are "ours"; the deepest one in a
+# blocked stack is the call site a stall is attributed to
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+loop_lag = metrics.histogram(
+    "event_loop_lag_seconds",
+    "How late the watchdog's heartbeat woke up, i.e. how long callbacks waited.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+loop_stalls = metrics.counter(
+    "event_loop_stalls",
+    "Times the event loop was blocked for longer than the watchdog threshold.",
+)
+
+
+def _is_project_frame(filename: str) -> bool:
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+
+class StallSite:
+    __slots__ = ("site", "count", "total", "max", "task", "stack")
+
+    def __init__(self, site: str):
+        self.site = site
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.task = ""
+        self.stack = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "site": self.site,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "task": self.task,
+            "stack": self.stack,
+        }
+
+
+class LoopWatchdog:
+    """
+    Detects when synchronous work blocks the event loop.
+
+    A heartbeat task on the loop records when it last ran and how late each
+    wake-up was. A monitor thread checks the heartbeat; once it is older than
+    the threshold the loop is stuck in a callback, so the thread captures the
+    loop thread's stack, logs it and attributes the stall to the deepest frame
+    in our own code (e.g. the handler line calling bcrypt or boto3).
+    """
+
+    def __init__(
+        self, threshold: Optional[float] = None, interval: Optional[float] = None
+    ):
+        self._threshold = threshold
+        self._interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._beat = 0.0
+        self._sites: Dict[str, StallSite] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def threshold(self) -> float:
+        if self._threshold is not None:
+            return self._threshold
+        return settings.loop_watchdog_threshold_ms / 1000
+
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return settings.loop_watchdog_interval_ms / 1000
+
+    async def _heartbeat(self) -> None:
+        interval = self.interval
+        while True:
+            before = time.monotonic()
+            self._beat = before
+            await asyncio.sleep(interval)
+            loop_lag.observe(max(time.monotonic() - before - interval, 0.0))
+
+    def _capture(self) -> tuple[str, str, str]:
+        """
+        The blocked call site, the running task's name and the loop thread's stack.
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "unknown", "", ""
+        stack = traceback.extract_stack(frame)
+        ours = [entry for entry in stack if _is_project_frame(entry.filename)]
+        entry = (ours or stack)[-1]
+        site = (
+            f"{os.path.relpath(entry.filename, PROJECT_ROOT)}:{entry.lineno} "
+            f"in {entry.name}"
+        )
+        task = asyncio.current_task(self._loop)
+        task_name = ""
+        if task is not None:
+            task_name = f"{task.get_name()} ({task.get_coro().__qualname__})"
+        return site, task_name, "".join(traceback.format_list(stack))
+
+    def _record(self, site: str, task: str, stack: str, duration: float) -> None:
+        with self._lock:
+            stats = self._sites.get(site)
+            if stats is None:
+                stats = self._sites[site] = StallSite(site)
+            stats.count += 1
+            stats.total += duration
+            if duration >= stats.max:
+                stats.max = duration
+                stats.task, stats.stack = task, stack
+
+    def _monitor(self) -> None:
+        # [heartbeat time, site, task, stack, blocked so far] for the current stall
+        stall = None
+        while not self._stopping.wait(self.interval / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if stall is not None and stall[0] != beat:
+                # The heartbeat ran again: the stall ended when it woke up
+                stall[4] = max(stall[4], beat - stall[0] - self.interval)
+                self._record(*stall[1:])
+                stall = None
+            if blocked < self.threshold:
+                continue
+            if stall is None:
+                site, task, stack = self._capture()
+                loop_stalls.inc()
+                logging.warning(
+                    f"Event loop blocked for {blocked * 1000:.0f} ms at {site}"
+                    f"{f' in task {task}' if task else ''}:\n{stack}"
+                )
+                stall = [beat, site, task, stack, blocked]
+            stall[4] = blocked
+        if stall is not None:
+            self._record(*stall[1:])
+
+    def start(self) -> None:
+        """
+        Start watching the running event loop.
+        """
+        if self.task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self.task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        self.task = None
+        self._stopping.set()
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    def stalls(self, limit: int = 20) -> List[dict]:
+        """
+        The `limit` call sites that blocked the loop for longest in total.
+        """
+        with self._lock:
+            ranked = sorted(
+                self._sites.values(), key=lambda stats: stats.total, reverse=True
+            )[:limit]
+            return [stats.to_dict() for stats in ranked]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,124 @@
+import gc
+import tracemalloc
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.services.connection_registry import connection_registry
+from api.storage.models import Base
+
+GROUPINGS = ("lineno", "filename", "traceback")
+
+# Allocations made by tracemalloc itself or the import machinery are noise
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryDiagnostics:
+    """
+    tracemalloc snapshots for finding memory growth in a live process.
+
+    Each snapshot is kept as the baseline for the next one, so comparing two
+    snapshots taken some time apart shows which lines allocated the memory
+    that was not freed in between. Tracing slows allocations down, so it is
+    only on between start() and stop().
+    """
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: Optional[int] = None) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or settings.tracemalloc_frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.baseline = None
+
+    @staticmethod
+    def object_counts() -> Dict[str, int]:
+        """
+        Live websocket state and ORM objects, the usual suspects for growth.
+        Walks every object the garbage collector tracks, so it takes a moment.
+        """
+        connections = [
+            connection
+            for user_connections in connection_registry.connections.values()
+            for connection in user_connections
+        ]
+        counts = {
+            "websocket_users": len(connection_registry.connections),
+            "websocket_connections": len(connections),
+            "websocket_queued_messages": sum(
+                connection.queue.qsize() for connection in connections
+            ),
+            "orm_sessions": 0,
+        }
+        for obj in gc.get_objects():
+            if isinstance(obj, Base):
+                name = f"orm:{type(obj).__name__}"
+                counts[name] = counts.get(name, 0) + 1
+            elif isinstance(obj, Session):
+                counts["orm_sessions"] += 1
+        return counts
+
+    def snapshot(
+        self, limit: int = 25, group_by: str = "lineno", compare: bool = False
+    ) -> dict:
+        """
+        The `limit` biggest allocation sites, or the biggest changes since the
+        previous snapshot when `compare` is set, plus object_counts().
+        """
+        if group_by not in GROUPINGS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPINGS)}")
+        result = {
+            "tracing": self.tracing,
+            "traced_kb": 0.0,
+            "peak_kb": 0.0,
+            "compared": False,
+            "top": [],
+            "objects": self.object_counts(),
+        }
+        if not self.tracing:
+            return result
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE)
+        if compare and self.baseline is not None:
+            stats = snapshot.compare_to(self.baseline, group_by)
+            result["compared"] = True
+        else:
+            stats = snapshot.statistics(group_by)
+        self.baseline = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        result["traced_kb"] = round(current / 1024, 1)
+        result["peak_kb"] = round(peak / 1024, 1)
+        for stat in stats[:limit]:
+            frames = stat.traceback if group_by == "traceback" else stat.traceback[:1]
+            result["top"].append(
+                {
+                    "location": "\n".join(
+                        frame.filename
+                        if group_by == "filename"
+                        else f"{frame.filename}:{frame.lineno}"
+                        for frame in frames
+                    ),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                    "size_diff_kb": round(getattr(stat, "size_diff", 0) / 1024, 1),
+                    "count_diff": getattr(stat, "count_diff", 0),
+                }
+            )
+        return result
+
+
+memory_diagnostics = MemoryDiagnostics()
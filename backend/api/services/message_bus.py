@@ -0,0 +1,301 @@
+import abc
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from api.config import settings
+
+CHAT_CHANNEL = "chat"
+NOTIFICATION_CHANNEL = "notifications"
+CHANNEL_PREFIX = "bus_"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+POSTGRES_MAX_PAYLOAD_BYTES = 7999
+
+# Seconds between attempts to re-subscribe after losing the connection,
+# doubling from the first to the second after every failed attempt
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class MessageBus(abc.ABC):
+    """
+    Routes chat messages and notifications to whichever worker holds the
+    receiver's websocket.
+
+    A user may have sockets on several workers, so every worker publishes each
+    message after delivering it to its own sockets, and subscribes to the same
+    channels; envelopes published by the worker itself are ignored, as it has
+    already delivered them. If the subscription's connection drops it is
+    re-established with exponential backoff.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        # The app may start more than once per process (e.g. in tests), so
+        # subscribing the same handler again must not deliver twice
+        handlers = self.handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, payload: dict) -> None:
+        envelope = {"origin": self.worker_id, "payload": payload}
+        try:
+            await self._send(channel, json.dumps(envelope))
+        except Exception as e:
+            logging.error(f"Failed to publish to {channel}: {e}")
+
+    @abc.abstractmethod
+    async def _send(self, channel: str, data: str) -> None:
+        pass
+
+    async def _reconnect(self, subscribe: Callable[[], Awaitable[None]]) -> None:
+        """
+        Call `subscribe` until it succeeds, backing off between attempts.
+        """
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await subscribe()
+                logging.info("Message bus subscription restored")
+                return
+            except Exception as e:
+                logging.error(
+                    f"Message bus reconnect failed: {e}; retrying in {delay:.0f}s"
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _dispatch(self, channel: str, data: str) -> None:
+        envelope = json.loads(data)
+        if envelope.get("origin") == self.worker_id:
+            return
+        for handler in self.handlers.get(channel, []):
+            try:
+                await handler(envelope["payload"])
+            except Exception as e:
+                logging.error(f"Message bus handler for {channel} failed: {e}")
+
+
+class InMemoryMessageBus(MessageBus):
+    """
+    In-process bus. Buses sharing a broker list behave like workers sharing a
+    Redis/Postgres server, which lets tests simulate several workers.
+    """
+
+    default_broker: List["InMemoryMessageBus"] = []
+
+    def __init__(self, broker: Optional[List["InMemoryMessageBus"]] = None):
+        super().__init__()
+        self.broker = self.default_broker if broker is None else broker
+
+    async def start(self) -> None:
+        if self not in self.broker:
+            self.broker.append(self)
+
+    async def stop(self) -> None:
+        if self in self.broker:
+            self.broker.remove(self)
+
+    async def _send(self, channel: str, data: str) -> None:
+        for bus in list(self.broker):
+            await bus._dispatch(channel, data)
+
+
+class RedisMessageBus(MessageBus):
+    """
+    Bus backed by Redis pub/sub. Requires the `redis` package.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self.client = None
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "MESSAGE_BUS_BACKEND=redis requires the 'redis' package to be installed."
+            ) from e
+
+        self.client = redis.from_url(self.url)
+        await self._subscribe()
+        self.reader = asyncio.create_task(self._read())
+
+    async def stop(self) -> None:
+        if self.reader:
+            self.reader.cancel()
+        await self._close_pubsub()
+        if self.client:
+            await self.client.close()
+
+    async def _subscribe(self) -> None:
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(
+                *(CHANNEL_PREFIX + channel for channel in self.handlers)
+            )
+        except Exception:
+            await pubsub.close()
+            raise
+        self.pubsub = pubsub
+
+    async def _close_pubsub(self) -> None:
+        if self.pubsub:
+            try:
+                await self.pubsub.close()
+            except Exception:
+                pass
+            self.pubsub = None
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    channel = message["channel"]
+                    data = message["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    await self._dispatch(channel.removeprefix(CHANNEL_PREFIX), data)
+                raise ConnectionError("the subscription ended")
+            except Exception as e:
+                logging.error(f"Lost the Redis message bus subscription: {e}")
+            await self._close_pubsub()
+            await self._reconnect(self._subscribe)
+
+    async def _send(self, channel: str, data: str) -> None:
+        await self.client.publish(CHANNEL_PREFIX + channel, data)
+
+
+class PostgresMessageBus(MessageBus):
+    """
+    Bus backed by Postgres LISTEN/NOTIFY, so no extra infrastructure is needed.
+    Payloads are limited to 8000 bytes; larger ones are only delivered locally.
+    """
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn.replace("postgresql+psycopg2://", "postgresql://")
+        self.listen_connection = None
+        self.listen_fd: Optional[int] = None
+        self.publish_connection = None
+        self.publish_lock = threading.Lock()
+        self.reconnecting: Optional[asyncio.Task] = None
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    async def start(self) -> None:
+        await self._listen()
+
+    async def stop(self) -> None:
+        if self.reconnecting:
+            self.reconnecting.cancel()
+            self.reconnecting = None
+        self._close_listen_connection()
+        if self.publish_connection:
+            self.publish_connection.close()
+
+    async def _listen(self) -> None:
+        connection = await asyncio.to_thread(self._connect)
+        try:
+            with connection.cursor() as cursor:
+                for channel in self.handlers:
+                    cursor.execute(f"LISTEN {CHANNEL_PREFIX}{channel}")
+        except Exception:
+            connection.close()
+            raise
+        self.listen_connection = connection
+        self.listen_fd = connection.fileno()
+        asyncio.get_running_loop().add_reader(self.listen_fd, self._on_notify)
+
+    def _close_listen_connection(self) -> None:
+        if self.listen_fd is not None:
+            asyncio.get_running_loop().remove_reader(self.listen_fd)
+            self.listen_fd = None
+        if self.listen_connection:
+            try:
+                self.listen_connection.close()
+            except Exception:
+                pass
+            self.listen_connection = None
+
+    def _on_notify(self) -> None:
+        try:
+            self.listen_connection.poll()
+        except Exception as e:
+            # The server closed the connection or it broke; listen on a new one
+            logging.error(f"Lost the Postgres message bus connection: {e}")
+            self._close_listen_connection()
+            self.reconnecting = asyncio.create_task(self._reconnect(self._listen))
+            return
+        while self.listen_connection.notifies:
+            notify = self.listen_connection.notifies.pop(0)
+            asyncio.create_task(
+                self._dispatch(
+                    notify.channel.removeprefix(CHANNEL_PREFIX), notify.payload
+                )
+            )
+
+    def _notify(self, channel: str, data: str) -> None:
+        with self.publish_lock:
+            if self.publish_connection is None or self.publish_connection.closed:
+                self.publish_connection = self._connect()
+            with self.publish_connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", (channel, data))
+
+    async def _send(self, channel: str, data: str) -> None:
+        if len(data.encode("utf-8")) > POSTGRES_MAX_PAYLOAD_BYTES:
+            logging.warning(
+                f"Message bus payload for {channel} is too large for NOTIFY; "
+                "it will only be delivered on this worker."
+            )
+            return
+        await asyncio.to_thread(self._notify, CHANNEL_PREFIX + channel, data)
+
+
+def create_message_bus() -> MessageBus:
+    """
+    Build the bus selected by MESSAGE_BUS_BACKEND: memory, redis or postgres.
+    """
+    backend = settings.message_bus_backend
+    if backend == "memory":
+        return InMemoryMessageBus()
+    if backend == "redis":
+        return RedisMessageBus(settings.message_bus_url)
+    if backend == "postgres":
+        return PostgresMessageBus(settings.message_bus_url or settings.database_url)
+    raise ValueError(
+        f"Unknown message bus backend: {backend}. "
+        "Please set MESSAGE_BUS_BACKEND to 'memory', 'redis' or 'postgres'."
+    )
+
+
+message_bus = create_message_bus()
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.storage.models import PendingChatNotification
+from api.storage.storage_service import StorageService
+
+Handler = Callable[[int, int, str], Awaitable[None]]
+
+
+class NotificationScheduler:
+    """
+    Durable scheduler for delayed unread-message emails.
+
+    Pending checks are rows in PendingChatNotification, one per (chat, receiver),
+    so a busy conversation never queues more than one check and pending checks
+    survive restarts. A background task sweeps the table for due rows and
+    claims them with FOR UPDATE SKIP LOCKED by pushing their due time out by
+    the lease; a row is deleted only once its check has run. If the worker
+    dies mid-send the lease runs out and the next sweep runs the check again,
+    so each check runs at least once, and once unless a worker crashes.
+    """
+
+    def __init__(self, engine=None):
+        self._engine = engine
+        self.handler: Optional[Handler] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self):
+        return self._engine or StorageService.engine
+
+    def schedule(
+        self,
+        chat_id: int,
+        receiver_id: int,
+        origin: str,
+        delay: Optional[float] = None,
+    ) -> bool:
+        """
+        Schedule a check for the receiver's unread messages in the chat.
+
+        If a check is already pending for the pair it is kept as is, so the
+        email goes out `delay` seconds after the first unread message.
+        Returns True if a new check was scheduled.
+        """
+        if delay is None:
+            delay = settings.chat_notification_delay
+        due_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        with Session(self.engine) as session:
+            pending = (
+                session.query(PendingChatNotification)
+                .filter_by(chat_id=chat_id, receiver_id=receiver_id)
+                .first()
+            )
+            if pending:
+                return False
+            session.add(
+                PendingChatNotification(
+                    chat_id=chat_id,
+                    receiver_id=receiver_id,
+                    origin=origin,
+                    due_at=due_at,
+                )
+            )
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker scheduled the same pair first
+                session.rollback()
+                return False
+        return True
+
+    def cancel_for_receiver(self, receiver_id: int) -> None:
+        """
+        Drop every pending check for the receiver, e.g. once a digest covered them.
+        """
+        with Session(self.engine) as session:
+            session.query(PendingChatNotification).filter_by(
+                receiver_id=receiver_id
+            ).delete()
+            session.commit()
+
+    def _claim_due(self, now: datetime) -> List[Tuple[int, int, int, str]]:
+        with Session(self.engine) as session:
+            rows = (
+                session.execute(
+                    select(PendingChatNotification)
+                    .where(PendingChatNotification.due_at <= now)
+                    .order_by(PendingChatNotification.due_at)
+                    .limit(settings.chat_notification_batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            lease_until = now + timedelta(seconds=settings.chat_notification_lease)
+            due = []
+            for row in rows:
+                due.append((row.id, row.chat_id, row.receiver_id, row.origin))
+                row.due_at = lease_until
+            session.commit()
+        return due
+
+    def _complete(self, pending_id: int) -> None:
+        with Session(self.engine) as session:
+            session.query(PendingChatNotification).filter_by(id=pending_id).delete()
+            session.commit()
+
+    def _run_check(self, chat_id: int, receiver_id: int, origin: str) -> None:
+        # Checks make blocking Gmail and database calls, so each one runs on
+        # its own event loop in a worker thread instead of the server's loop
+        asyncio.run(self.handler(chat_id, receiver_id, origin))
+
+    async def sweep(self) -> int:
+        """
+        Run every check that is due. Returns the number of checks run.
+
+        A check that raises is logged and dropped rather than retried, as the
+        email may already have gone out.
+        """
+        due = await asyncio.to_thread(self._claim_due, datetime.now(timezone.utc))
+        for pending_id, chat_id, receiver_id, origin in due:
+            try:
+                await asyncio.to_thread(self._run_check, chat_id, receiver_id, origin)
+            except Exception as e:
+                logging.error(
+                    f"Delayed notification for chat {chat_id} "
+                    f"and user {receiver_id} failed: {e}"
+                )
+            await asyncio.to_thread(self._complete, pending_id)
+        return len(due)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logging.error(f"Notification sweep failed: {e}")
+            await asyncio.sleep(settings.chat_notification_sweep_interval)
+
+    def start(self, handler: Handler) -> None:
+        self.handler = handler
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+
+notification_scheduler = NotificationScheduler()
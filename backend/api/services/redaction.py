@@ -0,0 +1,143 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+
+from api.services.social_media_filter import extract_social_shares
+
+
+@dataclass(frozen=True)
+class Span:
+    start: int
+    end: int
+    kind: str
+
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+\s*@\s*(?:[A-Za-z0-9-]+\s*\.\s*)+[A-Za-z]{2,}")
+
+# Numeric patterns applied to the message with all whitespace removed, mirroring
+# ContentFilterService._manual_filter so that "9123 4567" is caught as a phone.
+COMPACT_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("PHONE_NUMBER", re.compile(r"(\+65)?[689]\d{7}")),
+    ("UNIT_NUMBER", re.compile(r"#\d{2,}-\d{2,}")),
+    ("SG_NRIC", re.compile(r"[STFGstfg]\d{7}[A-Za-z]")),
+    ("POSTAL_CODE", re.compile(r"\d{6}")),
+    ("PHONE_NUMBER", re.compile(r"\d{8}")),
+]
+
+ADDRESS_KEYWORD_RE = re.compile(r"\b(road|rd|blk|block|street|st)\b", re.IGNORECASE)
+CLAUSE_BOUNDARY_RE = re.compile(r"[.,;!?\n]")
+
+# Evidence kinds from extract_social_shares that point at the handle/link itself
+# (platform cues and context triggers are just words like "insta" or "dm me").
+SOCIAL_EVIDENCE_KINDS = {"url", "at"}
+# Bare and discord tokens near a platform cue are only masked when they look like
+# a handle, so that ordinary words in the same sentence are left alone.
+HANDLE_LIKE_RE = re.compile(r"[\d._#]")
+
+
+def _compact(text: str) -> Tuple[str, List[int]]:
+    """
+    Remove whitespace from `text`, returning the compact string and, for each
+    compact character, its index in the original text.
+    """
+    chars = []
+    positions = []
+    for i, char in enumerate(text):
+        if not char.isspace():
+            chars.append(char)
+            positions.append(i)
+    return "".join(chars), positions
+
+
+def _regex_spans(text: str) -> List[Span]:
+    compact, positions = _compact(text)
+    spans = [Span(m.start(), m.end(), "EMAIL_ADDRESS") for m in EMAIL_RE.finditer(text)]
+    for kind, pattern in COMPACT_PATTERNS:
+        for m in pattern.finditer(compact):
+            spans.append(Span(positions[m.start()], positions[m.end() - 1] + 1, kind))
+    return spans
+
+
+def _address_spans(text: str) -> List[Span]:
+    """
+    Mask the whole clause around an address keyword when it contains a number,
+    since street names and block numbers can't be told apart reliably.
+    """
+    spans = []
+    for m in ADDRESS_KEYWORD_RE.finditer(text):
+        start = 0
+        for boundary in CLAUSE_BOUNDARY_RE.finditer(text, 0, m.start()):
+            start = boundary.end()
+        boundary = CLAUSE_BOUNDARY_RE.search(text, m.end())
+        end = boundary.start() if boundary else len(text)
+        while start < end and text[start].isspace():
+            start += 1
+        if re.search(r"\d", text[start:end]):
+            spans.append(Span(start, end, "ADDRESS"))
+    return spans
+
+
+def _social_spans(text: str) -> List[Span]:
+    result = extract_social_shares(text, use_phone_guard=True)
+    if not result.blocked:
+        return []
+    values = {
+        e.value
+        for e in result.evidence
+        if e.kind in SOCIAL_EVIDENCE_KINDS
+        or (e.kind in ("bare", "discord") and HANDLE_LIKE_RE.search(e.value))
+    }
+    return locate_spans(text, values, "SOCIAL_MEDIA_SHARE")
+
+
+def locate_spans(text: str, values: Iterable[str], kind: str) -> List[Span]:
+    """
+    Find every occurrence of each value in `text`, ignoring case and whitespace
+    differences. Values that can't be found are skipped.
+    """
+    spans = []
+    for value in values:
+        tokens = value.split()
+        if not tokens:
+            continue
+        pattern = r"\s*".join(
+            r"\s*".join(re.escape(char) for char in token) for token in tokens
+        )
+        for m in re.finditer(pattern, text, re.IGNORECASE):
+            spans.append(Span(m.start(), m.end(), kind))
+    return spans
+
+
+def find_pii_spans(text: str) -> List[Span]:
+    """
+    Locate PII in `text` with the same rules as the manual filter.
+    """
+    return _regex_spans(text) + _address_spans(text) + _social_spans(text)
+
+
+def merge_spans(spans: Iterable[Span]) -> List[Span]:
+    """
+    Sort spans and merge overlapping ones; the earlier span's kind wins.
+    """
+    merged: List[Span] = []
+    for span in sorted(spans, key=lambda s: (s.start, -s.end)):
+        if merged and span.start < merged[-1].end:
+            last = merged[-1]
+            merged[-1] = Span(last.start, max(last.end, span.end), last.kind)
+        else:
+            merged.append(span)
+    return merged
+
+
+def redact(text: str, spans: Iterable[Span]) -> str:
+    """
+    Replace each span of `text` with a placeholder like [EMAIL_ADDRESS].
+    """
+    parts = []
+    cursor = 0
+    for span in merge_spans(spans):
+        parts.append(text[cursor : span.start])
+        parts.append(f"[{span.kind}]")
+        cursor = span.end
+    parts.append(text[cursor:])
+    return "".join(parts)
@@ -1,5 +1,197 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from functools import partial
 
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from api.common.metrics import metrics
+from api.common.tracing import CLIENT, tracer
 from api.config import settings
+from api.storage.query_stats import query_stats
+
+# Longest statement text recorded on a SQL span
+MAX_TRACED_STATEMENT = 2000
+
+# Pool metrics are labelled with the engine they belong to: "primary" or
+# "replica-<n>", set as the pool's logging name when the engine is created
+pool_checkout_duration = metrics.histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting for a free one.",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+pool_checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts",
+    "Checkouts that gave up waiting for a free connection.",
+    ["engine"],
+)
+pool_connections_opened = metrics.counter(
+    "db_pool_connections_opened",
+    "Database connections opened by the pool.",
+    ["engine"],
+)
+slow_statements = metrics.counter(
+    "db_slow_statements",
+    "Statements that took longer than settings.slow_query_threshold_ms.",
+)
+pool_connections_invalidated = metrics.counter(
+    "db_pool_connections_invalidated",
+    "Pooled connections discarded as broken, e.g. after a failed pre-ping.",
+    ["engine"],
+)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout takes. A checkout waits when
+    all `pool_size + max_overflow` connections are in use, so this is the
+    first number to grow when the pool is too small for the load.
+    """
+
+    @property
+    def engine_name(self) -> str:
+        return self.logging_name or "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.labels(engine=self.engine_name).inc()
+            raise
+        finally:
+            pool_checkout_duration.labels(engine=self.engine_name).observe(
+                time.perf_counter() - start
+            )
+
+
+def _make_engine(name: str, url: str | None = None) -> Engine:
+    db_engine = settings.make_engine(
+        partial(create_engine, poolclass=TimedQueuePool, pool_logging_name=name),
+        url,
+    )
+
+    @event.listens_for(db_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_connections_opened.labels(engine=name).inc()
+
+    @event.listens_for(db_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_connections_invalidated.labels(engine=name).inc()
+
+    return db_engine
+
+
+engine = _make_engine("primary")
+# Read replicas, for sessions opened with StorageService.read_engine()
+replica_engines = [
+    _make_engine(f"replica-{index}", url)
+    for index, url in enumerate(settings.replica_urls, start=1)
+]
+
+
+# Every statement on every engine gets a span, a child of whatever span is
+# current (a request, a *Logic method, a background job)
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    if not tracer.enabled:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    span = tracer.start_span(
+        operation or "SQL",
+        CLIENT,
+        {
+            "db.system": conn.dialect.name,
+            "db.operation": operation,
+            "db.statement": statement[:MAX_TRACED_STATEMENT],
+            "db.executemany": executemany,
+        },
+    )
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_statement_span(exception_context):
+    connection = exception_context.connection
+    spans = connection.info.get("trace_spans") if connection is not None else None
+    if spans:
+        span = spans.pop()
+        span.record_exception(exception_context.original_exception)
+        span.end()
+
+
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_starts", []).append(time.perf_counter())
+
+
+def _record_statement(conn, statement: str) -> None:
+    starts = conn.info.get("statement_starts")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    origin = tracer.current_operation()
+    query_stats.record(statement, duration, origin)
+    if duration * 1000 >= settings.slow_query_threshold_ms:
+        slow_statements.inc()
+        logging.warning(
+            f"Slow query ({duration * 1000:.0f} ms) from {origin or 'unknown'}: "
+            f"{statement[:MAX_TRACED_STATEMENT]}"
+        )
+
+
+def _end_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(conn, statement)
+
+
+def _fail_statement_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and exception_context.statement:
+        _record_statement(connection, exception_context.statement)
+
+
+# Aggregate time per statement fingerprint and log slow statements; cheap
+# enough (a clock read and a cached fingerprint lookup) to leave on in production
+if settings.query_stats_enabled:
+    event.listen(Engine, "before_cursor_execute", _start_statement_timer)
+    event.listen(Engine, "after_cursor_execute", _end_statement_timer)
+    event.listen(Engine, "handle_error", _fail_statement_timer)
+
+
+def _pool_connections() -> dict:
+    connections = {}
+    for db_engine in [engine, *replica_engines]:
+        pool = db_engine.pool
+        name = pool.engine_name
+        connections[(name, "checked_out")] = pool.checkedout()
+        connections[(name, "idle")] = pool.checkedin()
+        connections[(name, "overflow")] = max(pool.overflow(), 0)
+    return connections
+
 
-engine = settings.make_engine(create_engine)
+metrics.gauge_callback(
+    "db_pool_connections",
+    "Connections in each pool: checked out, idle, and opened beyond pool_size.",
+    _pool_connections,
+    ["engine", "state"],
+)
+metrics.gauge_callback(
+    "db_pool_size",
+    "Connections each pool keeps open.",
+    lambda: {
+        db_engine.pool.engine_name: db_engine.pool.size()
+        for db_engine in [engine, *replica_engines]
+    },
+    ["engine"],
+)
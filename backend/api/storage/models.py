@@ -1,6 +1,7 @@
 import enum
 
 from sqlalchemy import (
+    JSON,
     Boolean,
     CheckConstraint,
     Column,
@@ -525,3 +526,67 @@ class ChatNotificationTracker(Base):
     __table_args__ = (
         UniqueConstraint("chat_id", name="uix_chat_notification_tracker"),
     )
+
+
+class PendingChatNotification(Base):
+    """
+    An unread-message email check waiting to run for a chat's receiver.
+    At most one is pending per (chat, receiver); later messages reuse it.
+    """
+
+    __tablename__ = "PendingChatNotification"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Integer, ForeignKey("PrivateChat.id"), nullable=False)
+    receiver_id = Column(Integer, ForeignKey("User.id"), nullable=False)
+    origin = Column(String, nullable=True)
+    due_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "chat_id", "receiver_id", name="uix_pending_chat_notification"
+        ),
+    )
+
+
+class JobStatus(enum.Enum):
+    """
+    Enum for background job status
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class Job(Base):
+    """
+    A background job (email, chat delivery, ...) waiting to be run by a worker.
+    """
+
+    __tablename__ = "Job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(ENUM(JobStatus), nullable=False, default=JobStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+
+
+class StripeEvent(Base):
+    """
+    A verified Stripe webhook event, stored by its Stripe event id so that
+    redeliveries of the same event are recognised and ignored.
+    """
+
+    __tablename__ = "StripeEvent"
+
+    id = Column(String, primary_key=True)  # Stripe event id, e.g. evt_...
+    type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
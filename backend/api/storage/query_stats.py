@@ -0,0 +1,123 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from api.config import settings
+
+# Longest statement text kept as a fingerprint's example
+MAX_SAMPLE_LENGTH = 2000
+# Distinct logic methods remembered per fingerprint
+MAX_ORIGINS = 5
+# Fingerprint that statements are counted under once the table is full
+OVERFLOW_FINGERPRINT = "(other statements)"
+
+ORDERINGS = ("total", "count", "max", "mean")
+
+_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(
+    r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?|\b\d+(?:\.\d+)?\b|\b(?:true|false)\b",
+    re.I,
+)
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_ROWS = re.compile(
+    r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Reduce a statement to its shape, so the same query with different values,
+    IN-list lengths or multi-row VALUES counts is aggregated together.
+    Cached, as SQLAlchemy repeats the same compiled SQL text.
+    """
+    text = _COMMENT.sub(" ", statement)
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _VALUES_ROWS.sub(r"\1, ...", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class StatementStats:
+    __slots__ = ("fingerprint", "count", "total", "max", "origins", "sample")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.origins: Dict[str, None] = {}
+        self.sample = ""
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "origins": list(self.origins),
+            "sample": self.sample,
+        }
+
+
+class QueryStats:
+    """
+    Count, total and max execution time per statement fingerprint. Only the
+    SQL text is kept, never the bound parameters, so no user data is stored.
+    """
+
+    def __init__(self, max_fingerprints: int = 1000):
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, statement: str, duration: float, origin: Optional[str] = None
+    ) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = OVERFLOW_FINGERPRINT
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = StatementStats(key)
+            stats.count += 1
+            stats.total += duration
+            if duration >= stats.max:
+                stats.max = duration
+                stats.sample = statement[:MAX_SAMPLE_LENGTH]
+            if origin and origin not in stats.origins:
+                if len(stats.origins) < MAX_ORIGINS:
+                    stats.origins[origin] = None
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[dict]:
+        """
+        The `limit` fingerprints with the highest total, count, max or mean time.
+        """
+        if order_by not in ORDERINGS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDERINGS)}")
+        with self._lock:
+            ranked = sorted(
+                self._stats.values(),
+                key=lambda stats: getattr(stats, order_by),
+                reverse=True,
+            )[:limit]
+            return [stats.to_dict() for stats in ranked]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats(settings.query_stats_max_fingerprints)
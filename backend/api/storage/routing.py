@@ -0,0 +1,142 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.exceptions import ReadOnlySessionError
+
+# Session(..., info=READ_ONLY) marks a session that only reads, so it may be
+# bound to a replica; flushing changes from it raises ReadOnlySessionError
+READ_ONLY = {"read_only": True}
+
+# Cookie holding the time until which a client's reads stay on the primary;
+# set on responses to requests that wrote
+PIN_COOKIE = "read_primary_until"
+
+_WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+class RequestState:
+    """
+    What replica routing needs to know about the request or websocket frame
+    being handled. Mutated in place, so writes made in worker threads
+    (which run in a copy of the request's context) are still seen.
+    """
+
+    __slots__ = ("user_id", "pinned", "wrote")
+
+    def __init__(self, user_id: Optional[int] = None, pinned: bool = False):
+        self.user_id = user_id
+        self.pinned = pinned
+        self.wrote = False
+
+
+_request_state: ContextVar[Optional[RequestState]] = ContextVar(
+    "request_state", default=None
+)
+
+
+class RecentWriters:
+    """
+    When each user last wrote, on this worker. Covers writes that cannot set
+    the pin cookie, e.g. chat messages sent over a websocket.
+    """
+
+    def __init__(self):
+        self._last_write: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            if len(self._last_write) > 10000:
+                cutoff = now - settings.read_your_writes_seconds
+                self._last_write = {
+                    user: at for user, at in self._last_write.items() if at > cutoff
+                }
+
+    def wrote_recently(self, user_id: int) -> bool:
+        at = self._last_write.get(user_id)
+        return (
+            at is not None and time.monotonic() - at < settings.read_your_writes_seconds
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last_write.clear()
+
+
+recent_writers = RecentWriters()
+
+
+@contextmanager
+def track_request(
+    user_id: Optional[int] = None, pin_cookie: Optional[str] = None
+) -> Iterator[RequestState]:
+    """
+    Track the writes of the code run in this context, and keep its reads on
+    the primary if the client's pin cookie has not expired yet.
+    """
+    try:
+        pinned = pin_cookie is not None and float(pin_cookie) > time.time()
+    except (TypeError, ValueError):
+        pinned = False
+    state = RequestState(user_id, pinned)
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+def set_request_user(user_id: int) -> None:
+    """
+    Note who the current request is for, once they have been authenticated.
+    """
+    state = _request_state.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+def pinned_to_primary() -> bool:
+    """
+    Whether reads in this context must see the primary's latest data.
+    """
+    state = _request_state.get()
+    if state is None:
+        return False
+    return state.pinned or (
+        state.user_id is not None and recent_writers.wrote_recently(state.user_id)
+    )
+
+
+def pin_cookie_value() -> str:
+    return f"{time.time() + settings.read_your_writes_seconds:.3f}"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _note_write(conn, cursor, statement, parameters, context, executemany):
+    state = _request_state.get()
+    if state is None or state.wrote:
+        return
+    if statement.lstrip()[:6].upper() in _WRITES:
+        state.wrote = True
+        if state.user_id is not None:
+            recent_writers.record(state.user_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _refuse_read_only_flush(session, flush_context, instances):
+    # session.dirty also lists objects with no net change, e.g. after merge()
+    if session.info.get("read_only") and (
+        session.new
+        or session.deleted
+        or any(session.is_modified(obj) for obj in session.dirty)
+    ):
+        raise ReadOnlySessionError()
@@ -1,3 +1,4 @@
+import itertools
 from typing import Type
 
 from sqlalchemy import ColumnElement, Engine, and_, inspect, or_, select, update
@@ -8,11 +9,38 @@ from sqlalchemy_utils import create_database, database_exists
 from api.common.utils import Utils
 from api.exceptions import TableEmptyError
 from api.storage.connection import engine as default_engine
+from api.storage.connection import replica_engines as default_replica_engines
 from api.storage.models import Base, User
+from api.storage.routing import READ_ONLY, pinned_to_primary
+
+_next_replica = itertools.count()
 
 
 class StorageService:
-    engine: Engine = None
+    # Engines connect lazily, so this costs nothing until the first query
+    engine: Engine = default_engine
+    # Read replicas; empty sends every read to `engine`
+    replica_engines: list[Engine] = default_replica_engines
+
+    @staticmethod
+    def read_engine() -> Engine:
+        """
+        Engine for a read-only session: the replicas in turn, or the primary
+        while the current user's own recent writes may not have reached them.
+        Open the session with `info=READ_ONLY` so a stray write fails loudly.
+        """
+        replicas = StorageService.replica_engines
+        if not replicas or pinned_to_primary():
+            return StorageService.engine
+        return replicas[next(_next_replica) % len(replicas)]
+
+    @staticmethod
+    def _session_for(session: Session) -> Session:
+        # find() runs in its own session; a read-only caller's stays on its engine
+        info = getattr(session, "info", None)
+        if isinstance(info, dict) and info.get("read_only"):
+            return Session(session.get_bind(), info=READ_ONLY)
+        return Session(StorageService.engine)
 
     @staticmethod
     def init_db(db_engine=default_engine):
@@ -37,7 +65,7 @@ class StorageService:
         TableClass: Type[DeclarativeMeta],
         find_one: bool = False,
     ) -> list[DeclarativeMeta] | DeclarativeMeta:
-        with Session(StorageService.engine) as session:
+        with StorageService._session_for(session) as session:
             statement = select(TableClass)
             if isinstance(query, Query):
                 statement = query
@@ -70,7 +98,7 @@ class StorageService:
         TableClass: Type[DeclarativeMeta],
         find_one: bool = False,
     ) -> list[DeclarativeMeta] | DeclarativeMeta:
-        with Session(StorageService.engine) as session:
+        with StorageService._session_for(session) as session:
             # Build OR conditions
             conditions = [
                 and_(
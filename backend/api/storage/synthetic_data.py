@@ -0,0 +1,777 @@
+"""
+Bulk synthetic data for load testing and for reproducing production-scale query
+plans locally.
+
+    poetry run python -m api.storage.synthetic_data --users 200000 --assignments 100000 --chats 300000 --messages 1000000
+
+Generates users, tutors (with their subjects and levels), assignments (with
+slots and subjects), tutor requests, chats, read statuses and chat messages with
+skewed, production-like distributions: a few parents post most assignments,
+popular assignments draw many requests and a minority of chats carry most of the
+messages. Output is deterministic for a given seed and `now`.
+
+Rows are streamed into the database with COPY on PostgreSQL and batched
+multi-row inserts elsewhere, without building ORM objects, so millions of rows
+take minutes. Data is added next to whatever is already in the database; the
+subjects, levels and locations are seeded first if missing.
+"""
+
+import argparse
+import bisect
+import csv
+import datetime
+import enum
+import io
+import itertools
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Connection, Engine, Table, func, select, text
+from sqlalchemy.orm import Session
+
+from api.storage.models import (
+    Assignment,
+    AssignmentRequest,
+    AssignmentRequestStatus,
+    AssignmentSlot,
+    AssignmentStatus,
+    AssignmentSubject,
+    ChatMessage,
+    ChatMessageType,
+    ChatReadStatus,
+    EmailVerificationStatus,
+    Gender,
+    Level,
+    Location,
+    PrivateChat,
+    Subject,
+    Tutor,
+    TutorLevel,
+    TutorSubject,
+    User,
+)
+from api.storage.seed import seed_database
+
+# bcrypt hash of "password", shared by every synthetic user
+PASSWORD_HASH = "$2b$12$mZzAAXmyGtilH5mlwosyNuz5v56iacPnXAfo0v6XPhNLCgzAQBsTC"
+
+FIRST_NAMES = [
+    "Wei Ling",
+    "Jun Jie",
+    "Siti",
+    "Arjun",
+    "Mei Xin",
+    "Hafiz",
+    "Priya",
+    "Ethan",
+    "Chloe",
+    "Ryan",
+    "Nur Aisyah",
+    "Darren",
+    "Kavya",
+    "Marcus",
+    "Hui Min",
+    "Farid",
+]
+LAST_NAMES = [
+    "Tan",
+    "Lim",
+    "Lee",
+    "Ng",
+    "Wong",
+    "Goh",
+    "Chua",
+    "Koh",
+    "Rahman",
+    "Ismail",
+    "Kumar",
+    "Nair",
+    "Pillai",
+    "Teo",
+    "Ong",
+    "Yeo",
+]
+EDUCATION = [
+    "A Levels",
+    "Polytechnic Diploma",
+    "Undergraduate",
+    "Bachelor's Degree",
+    "Master's Degree",
+    "PhD",
+]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIME_SLOTS = [
+    ("10:00", "12:00"),
+    ("14:00", "16:00"),
+    ("16:00", "18:00"),
+    ("18:00", "20:00"),
+]
+SPECIAL_REQUESTS = [
+    "Need help with exam preparation",
+    "Looking for long-term tutoring",
+    "Flexible schedule preferred",
+    "Homework help needed",
+    "Prefer online sessions",
+    "Looking for weekend availability",
+    "No special requests",
+]
+MESSAGES = [
+    "Hi, is this slot still available?",
+    "Could we do {day} at {hour} instead?",
+    "Thanks, see you on {day}!",
+    "My child has a test next {day}, could we focus on revision?",
+    "I've uploaded the worksheet for {day}.",
+    "Sorry, running about {minutes} minutes late today.",
+    "How did the lesson go?",
+    "Can we reschedule to {hour}?",
+    "Noted, thank you!",
+    "What topics should we cover next week?",
+]
+
+
+@dataclass(frozen=True)
+class SyntheticDataConfig:
+    users: int = 10000
+    tutor_fraction: float = 0.3  # Share of users who are tutors
+    assignments: int = 5000
+    requests_per_assignment: float = 2.0  # Mean; most get fewer, a few many more
+    chats: int = 10000
+    messages: int = 100000
+    days: int = 365  # Span of history the timestamps are spread over
+    seed: int = 42
+    batch_size: int = 10000  # Rows per insert batch (non-PostgreSQL)
+
+
+def _copy_value(value):
+    # Formats values the way PostgreSQL's COPY ... CSV expects them
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+class CsvStream:
+    """
+    A file-like object that renders rows as CSV on demand, so COPY can stream
+    millions of rows without holding them all in memory.
+    """
+
+    def __init__(self, rows: Iterable[Sequence], chunk_rows: int = 1000):
+        self._rows = iter(rows)
+        self._chunk_rows = chunk_rows
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            chunk = list(itertools.islice(self._rows, self._chunk_rows))
+            if not chunk:
+                break
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows(
+                [_copy_value(value) for value in row] for row in chunk
+            )
+            self._buffer += out.getvalue()
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class _Counter:
+    # Counts the rows drawn from an iterable as they are consumed
+    def __init__(self, rows: Iterable):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        self.count += 1
+        return row
+
+
+def _insert_rows(
+    connection: Connection,
+    table: Table,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    batch_size: int,
+) -> int:
+    """
+    Insert `rows` (tuples ordered as `columns`) and return how many there were.
+    """
+    counted = _Counter(rows)
+    if connection.dialect.name == "postgresql":
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv)',
+                CsvStream(counted),
+            )
+        finally:
+            cursor.close()
+    else:
+        statement = table.insert()
+        while batch := list(itertools.islice(counted, batch_size)):
+            connection.execute(statement, [dict(zip(columns, row)) for row in batch])
+    return counted.count
+
+
+class SyntheticDataGenerator:
+    def __init__(
+        self,
+        engine: Engine,
+        config: SyntheticDataConfig = SyntheticDataConfig(),
+        now: Optional[datetime.datetime] = None,
+    ):
+        self.engine = engine
+        self.config = config
+        self.end = now or datetime.datetime.now(datetime.timezone.utc)
+        self.start = self.end - datetime.timedelta(days=config.days)
+        self.window = (self.end - self.start).total_seconds()
+
+    def _rng(self, name: str) -> random.Random:
+        # One stream per table, so changing one count doesn't reshuffle the rest
+        return random.Random(f"{self.config.seed}:{name}")
+
+    def _spread(self, index: int, count: int, rng: random.Random) -> datetime.datetime:
+        # Timestamps grow with the id and get denser towards the present
+        fraction = ((index + rng.random()) / max(count, 1)) ** 0.5
+        return self.start + datetime.timedelta(seconds=self.window * fraction)
+
+    @staticmethod
+    def _next_id(connection: Connection, model) -> int:
+        return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def generate(self) -> Dict[str, int]:
+        """
+        Generate and insert all tables. Returns the rows inserted per table.
+        """
+        with Session(self.engine) as session:
+            seed_database(session)
+        counts: Dict[str, int] = {}
+        with self.engine.begin() as connection:
+            subject_ids = connection.execute(select(Subject.id)).scalars().all()
+            level_ids = connection.execute(select(Level.id)).scalars().all()
+            location_ids = connection.execute(select(Location.id)).scalars().all()
+            next_ids = {
+                model: self._next_id(connection, model)
+                for model in (
+                    User,
+                    TutorSubject,
+                    TutorLevel,
+                    Assignment,
+                    AssignmentSlot,
+                    AssignmentSubject,
+                    AssignmentRequest,
+                    PrivateChat,
+                    ChatReadStatus,
+                    ChatMessage,
+                )
+            }
+
+            def insert(model, columns, rows):
+                started = time.perf_counter()
+                count = _insert_rows(
+                    connection, model.__table__, columns, rows, self.config.batch_size
+                )
+                elapsed = time.perf_counter() - started
+                counts[model.__tablename__] = counts.get(model.__tablename__, 0) + count
+                print(
+                    f"{model.__tablename__:>20}: {count} rows in {elapsed:.1f}s "
+                    f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+                )
+
+            tutor_ids: List[int] = []
+            parent_ids: List[int] = []
+            insert(*self._users(next_ids[User], tutor_ids, parent_ids))
+            insert(*self._tutors(tutor_ids))
+            insert(
+                *self._tutor_links(
+                    TutorSubject, "subjectId", tutor_ids, subject_ids, next_ids
+                )
+            )
+            insert(
+                *self._tutor_links(
+                    TutorLevel, "level_id", tutor_ids, level_ids, next_ids
+                )
+            )
+
+            assignments: List[Tuple] = []
+            insert(
+                *self._assignments(
+                    next_ids[Assignment],
+                    parent_ids,
+                    tutor_ids,
+                    level_ids,
+                    location_ids,
+                    assignments,
+                )
+            )
+            insert(*self._assignment_slots(next_ids[AssignmentSlot], assignments))
+            insert(
+                *self._assignment_subjects(
+                    next_ids[AssignmentSubject], assignments, subject_ids
+                )
+            )
+            pairs: Dict[Tuple[int, int], None] = {}
+            insert(
+                *self._requests(
+                    next_ids[AssignmentRequest], assignments, tutor_ids, pairs
+                )
+            )
+
+            chats: List[Tuple[int, int, int]] = []
+            insert(
+                *self._chats(next_ids[PrivateChat], pairs, parent_ids, tutor_ids, chats)
+            )
+            insert(*self._read_statuses(next_ids[ChatReadStatus], chats))
+            insert(*self._messages(next_ids[ChatMessage], chats))
+
+            if connection.dialect.name == "postgresql":
+                # Ids were set explicitly, so move the sequences past them
+                for model in next_ids:
+                    table = model.__tablename__
+                    connection.execute(
+                        text(
+                            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                            f'(SELECT MAX(id) FROM "{table}"))'
+                        )
+                    )
+        return counts
+
+    def _users(self, first_id: int, tutor_ids: List[int], parent_ids: List[int]):
+        rng = self._rng("users")
+        count = self.config.users
+        genders = [Gender.MALE, Gender.FEMALE, Gender.OTHER, Gender.PREFER_NOT_TO_SAY]
+        statuses = [
+            EmailVerificationStatus.VERIFIED,
+            EmailVerificationStatus.PENDING,
+            EmailVerificationStatus.WAITLISTED,
+        ]
+
+        def rows():
+            for i in range(count):
+                user_id = first_id + i
+                is_tutor = rng.random() < self.config.tutor_fraction
+                (tutor_ids if is_tutor else parent_ids).append(user_id)
+                created_at = self._spread(i, count, rng)
+                yield (
+                    user_id,
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    f"user{user_id}@synthetic.example.com",
+                    PASSWORD_HASH,
+                    0,
+                    is_tutor,
+                    rng.choices(genders, weights=[45, 45, 2, 8])[0],
+                    rng.choices(statuses, weights=[90, 8, 2])[0],
+                    created_at,
+                    created_at,
+                )
+
+        columns = [
+            "id",
+            "name",
+            "email",
+            "password_hash",
+            "token_version",
+            "intends_to_be_tutor",
+            "gender",
+            "email_verification_status",
+            "created_at",
+            "updated_at",
+        ]
+        return User, columns, rows()
+
+    def _tutors(self, tutor_ids: List[int]):
+        rng = self._rng("tutors")
+
+        def rows():
+            for tutor_id in tutor_ids:
+                min_rate = rng.choice(range(20, 80, 5))
+                rating = None
+                if rng.random() < 0.6:
+                    rating = round(min(5.0, max(1.0, rng.gauss(4.3, 0.5))), 1)
+                created_at = self.start + datetime.timedelta(
+                    seconds=self.window * rng.random()
+                )
+                yield (
+                    tutor_id,
+                    rng.choice(EDUCATION),
+                    rng.choice(DAYS),
+                    f"https://example.com/resumes/{tutor_id}.pdf",
+                    min_rate,
+                    min_rate + rng.choice([5, 10, 20]),
+                    rng.choice(["North", "South", "East", "West", "Central"]),
+                    rating,
+                    "Patient and experienced tutor.",
+                    f"{rng.randint(1, 15)} years",
+                    created_at,
+                    created_at,
+                )
+
+        columns = [
+            "id",
+            "highest_education",
+            "availability",
+            "resume_url",
+            "min_rate",
+            "max_rate",
+            "location",
+            "rating",
+            "about_me",
+            "experience",
+            "created_at",
+            "updated_at",
+        ]
+        return Tutor, columns, rows()
+
+    def _tutor_links(
+        self,
+        model,
+        column: str,
+        tutor_ids: List[int],
+        target_ids: Sequence[int],
+        next_ids: Dict,
+    ):
+        rng = self._rng(model.__tablename__)
+
+        def rows():
+            link_id = next_ids[model]
+            for tutor_id in tutor_ids:
+                k = min(len(target_ids), rng.choice([1, 1, 2, 2, 3, 4]))
+                for target_id in rng.sample(target_ids, k):
+                    yield (link_id, tutor_id, target_id)
+                    link_id += 1
+
+        return model, ["id", "tutor_id", column], rows()
+
+    def _assignments(
+        self,
+        first_id: int,
+        parent_ids: List[int],
+        tutor_ids: List[int],
+        level_ids: Sequence[int],
+        location_ids: Sequence[int],
+        assignments: List[Tuple],
+    ):
+        rng = self._rng("assignments")
+        count = self.config.assignments
+        # A few parents post most of the assignments
+        owner_weights = list(
+            itertools.accumulate(min(rng.paretovariate(1.5), 20.0) for _ in parent_ids)
+        )
+
+        def rows():
+            if not parent_ids or not level_ids or not location_ids:
+                return
+            for i in range(count):
+                assignment_id = first_id + i
+                owner_id = rng.choices(parent_ids, cum_weights=owner_weights)[0]
+                filled = bool(tutor_ids) and rng.random() < 0.35
+                tutor_id = rng.choice(tutor_ids) if filled else None
+                rate = int(min(120, max(15, rng.gauss(40, 10)))) // 5 * 5
+                duration = rng.choices([60, 90, 120], weights=[50, 35, 15])[0]
+                created_at = self._spread(i, count, rng)
+                assignments.append(
+                    (assignment_id, owner_id, tutor_id, rate, duration, created_at)
+                )
+                yield (
+                    assignment_id,
+                    f"Assignment #{assignment_id}",
+                    owner_id,
+                    tutor_id,
+                    rng.choice(level_ids),
+                    rate,
+                    duration,
+                    rng.choices([1, 2, 3], weights=[70, 25, 5])[0],
+                    rng.choice(SPECIAL_REQUESTS),
+                    rng.choice(location_ids),
+                    AssignmentStatus.FILLED if filled else AssignmentStatus.OPEN,
+                    created_at,
+                    created_at,
+                )
+
+        columns = [
+            "id",
+            "title",
+            "owner_id",
+            "tutor_id",
+            "level_id",
+            "estimated_rate_hourly",
+            "lesson_duration",
+            "weekly_frequency",
+            "special_requests",
+            "location_id",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+        return Assignment, columns, rows()
+
+    def _assignment_slots(self, first_id: int, assignments: List[Tuple]):
+        rng = self._rng("slots")
+
+        def rows():
+            slot_id = first_id
+            for assignment_id, *_ in assignments:
+                for day in rng.sample(DAYS, rng.choice([1, 1, 2, 3])):
+                    start, end = rng.choice(TIME_SLOTS)
+                    yield (slot_id, assignment_id, day, start, end)
+                    slot_id += 1
+
+        columns = ["id", "assignment_id", "day", "start_time", "end_time"]
+        return AssignmentSlot, columns, rows()
+
+    def _assignment_subjects(
+        self, first_id: int, assignments: List[Tuple], subject_ids: Sequence[int]
+    ):
+        rng = self._rng("assignment_subjects")
+
+        def rows():
+            link_id = first_id
+            for assignment_id, *_ in assignments:
+                k = min(len(subject_ids), rng.choice([1, 1, 1, 2]))
+                for subject_id in rng.sample(subject_ids, k):
+                    yield (link_id, assignment_id, subject_id)
+                    link_id += 1
+
+        return AssignmentSubject, ["id", "assignment_id", "subjectId"], rows()
+
+    def _requests(
+        self,
+        first_id: int,
+        assignments: List[Tuple],
+        tutor_ids: List[int],
+        pairs: Dict[Tuple[int, int], None],
+    ):
+        rng = self._rng("requests")
+        mean = self.config.requests_per_assignment
+
+        def rows():
+            request_id = first_id
+            for (
+                assignment_id,
+                owner_id,
+                tutor_id,
+                rate,
+                duration,
+                created,
+            ) in assignments:
+                # Exponentially distributed: most get a few requests, some many
+                count = (
+                    min(len(tutor_ids), int(rng.expovariate(1 / mean) + 0.5))
+                    if mean > 0
+                    else 0
+                )
+                requesters = rng.sample(tutor_ids, count)
+                if tutor_id is not None:
+                    # The tutor who filled the assignment was accepted
+                    requesters = [tutor_id] + [t for t in requesters if t != tutor_id]
+                for requester in requesters:
+                    if tutor_id is not None:
+                        status = (
+                            AssignmentRequestStatus.ACCEPTED
+                            if requester == tutor_id
+                            else AssignmentRequestStatus.REJECTED
+                        )
+                    else:
+                        status = rng.choices(
+                            [
+                                AssignmentRequestStatus.PENDING,
+                                AssignmentRequestStatus.REJECTED,
+                            ],
+                            weights=[80, 20],
+                        )[0]
+                    requested_at = created + datetime.timedelta(
+                        hours=rng.expovariate(1 / 24)
+                    )
+                    pairs[(min(owner_id, requester), max(owner_id, requester))] = None
+                    yield (
+                        request_id,
+                        assignment_id,
+                        requester,
+                        rate + rng.choice([-5, 0, 0, 5]),
+                        duration,
+                        status,
+                        requested_at,
+                        requested_at,
+                    )
+                    request_id += 1
+
+        columns = [
+            "id",
+            "assignment_id",
+            "tutor_id",
+            "requested_rate_hourly",
+            "requested_duration",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+        return AssignmentRequest, columns, rows()
+
+    def _chats(
+        self,
+        first_id: int,
+        pairs: Dict[Tuple[int, int], None],
+        parent_ids: List[int],
+        tutor_ids: List[int],
+        chats: List[Tuple[int, int, int]],
+    ):
+        rng = self._rng("chats")
+        count = self.config.chats
+        # Chats come from tutor requests first, then from direct enquiries
+        chosen = list(itertools.islice(pairs, count))
+        seen = set(chosen)
+        attempts = 0
+        while (
+            len(chosen) < count and parent_ids and tutor_ids and attempts < count * 10
+        ):
+            attempts += 1
+            pair = tuple(sorted((rng.choice(parent_ids), rng.choice(tutor_ids))))
+            if pair not in seen:
+                seen.add(pair)
+                chosen.append(pair)
+        rng.shuffle(chosen)
+
+        def rows():
+            for i, (user1_id, user2_id) in enumerate(chosen):
+                chat_id = first_id + i
+                created_at = self._spread(i, len(chosen), rng)
+                chats.append((chat_id, user1_id, user2_id, created_at))
+                yield (
+                    chat_id,
+                    user1_id,
+                    user2_id,
+                    rng.random() < 0.7,
+                    created_at,
+                    created_at,
+                )
+
+        columns = [
+            "id",
+            "user1_id",
+            "user2_id",
+            "is_locked",
+            "created_at",
+            "updated_at",
+        ]
+        return PrivateChat, columns, rows()
+
+    def _read_statuses(self, first_id: int, chats: List[Tuple]):
+        rng = self._rng("read_statuses")
+
+        def rows():
+            status_id = first_id
+            for chat_id, user1_id, user2_id, _ in chats:
+                for user_id in (user1_id, user2_id):
+                    yield (status_id, chat_id, user_id, rng.random() < 0.8)
+                    status_id += 1
+
+        return ChatReadStatus, ["id", "chat_id", "user_id", "is_read"], rows()
+
+    def _messages(self, first_id: int, chats: List[Tuple]):
+        rng = self._rng("messages")
+        count = self.config.messages
+        # A minority of chats carry most of the messages
+        cum_weights = list(
+            itertools.accumulate(min(rng.paretovariate(1.16), 200.0) for _ in chats)
+        )
+        created = [chat[3] for chat in chats]  # Ascending, like the chat ids
+
+        def rows():
+            if not chats:
+                return
+            # Messages arrive as a Poisson process from the first chat onwards,
+            # each going to a chat that exists by then
+            at = created[0]
+            span = (self.end - at).total_seconds()
+            open_chats = 0
+            for i in range(count):
+                at += datetime.timedelta(seconds=rng.expovariate(count / span))
+                while open_chats < len(chats) and created[open_chats] <= at:
+                    open_chats += 1
+                index = bisect.bisect(
+                    cum_weights, rng.random() * cum_weights[max(open_chats, 1) - 1]
+                )
+                chat_id, user1_id, user2_id, _ = chats[min(index, len(chats) - 1)]
+                content = rng.choice(MESSAGES).format(
+                    day=rng.choice(DAYS),
+                    hour=f"{rng.randint(9, 20)}:00",
+                    minutes=rng.choice([5, 10, 15]),
+                )
+                yield (
+                    first_id + i,
+                    content,
+                    rng.random() < 0.01,
+                    ChatMessageType.TEXT_MESSAGE,
+                    rng.choice((user1_id, user2_id)),
+                    chat_id,
+                    at,
+                    at,
+                )
+
+        columns = [
+            "id",
+            "content",
+            "is_flagged",
+            "message_type",
+            "sender_id",
+            "chat_id",
+            "created_at",
+            "updated_at",
+        ]
+        return ChatMessage, columns, rows()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = SyntheticDataConfig()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    for field, help_text in [
+        ("users", "Users to create."),
+        ("tutor_fraction", "Share of users who are tutors."),
+        ("assignments", "Assignments to create."),
+        ("requests_per_assignment", "Mean tutor requests per assignment."),
+        ("chats", "Private chats to create."),
+        ("messages", "Chat messages to create."),
+        ("days", "Days of history to spread timestamps over."),
+        ("seed", "Random seed; the same seed gives the same data."),
+        ("batch_size", "Rows per insert batch when COPY is not available."),
+    ]:
+        default = getattr(defaults, field)
+        parser.add_argument(
+            f"--{field.replace('_', '-')}",
+            type=type(default),
+            default=default,
+            help=help_text,
+        )
+    return parser
+
+
+def main() -> None:
+    from api.storage.connection import engine
+
+    args = build_parser().parse_args()
+    config = SyntheticDataConfig(**vars(args))
+    started = time.perf_counter()
+    counts = SyntheticDataGenerator(engine, config).generate()
+    print(
+        f"Inserted {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s "
+        f"with seed={config.seed}."
+    )
+
+
+if __name__ == "__main__":
+    main()
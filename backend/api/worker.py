@@ -0,0 +1,32 @@
+"""
+Standalone background job worker.
+
+    poetry run python -m api.worker
+
+Run any number of these next to the web server (and set JOB_WORKER_ENABLED=false
+on the web server to keep jobs off its event loop). Workers publish chat
+messages to the web workers' sockets, so MESSAGE_BUS_BACKEND must be redis or
+postgres when they run as separate processes.
+"""
+
+import asyncio
+import logging
+
+from api.jobs import register_jobs
+from api.services.job_queue import job_queue
+from api.services.message_bus import message_bus
+
+
+async def main() -> None:
+    register_jobs()
+    await message_bus.start()
+    try:
+        await job_queue.run()
+    finally:
+        await job_queue.stop()
+        await message_bus.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Auth overhead benchmark: cost of verifying the access token on each request.
+
+Replays requests from a pool of users, each presenting their own access token,
+through AuthService.verify_token and reports per-request latency:
+
+    poetry run python -m benchmarks.auth_overhead --requests 20000 --users 200
+
+Each JWT backend is measured with the verified-token cache disabled (every
+request decodes the token, as before) and enabled.
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+from unittest.mock import patch
+
+from api.auth import auth_service
+from api.auth.auth_service import AuthService
+from api.auth.jwt_backend import make_jwt_backend
+from api.auth.models import TokenData
+from api.config import settings
+from benchmarks.stats import Timer, build_report, summarize, write_report
+
+
+def _run_design(backend_name: str, cached: bool, args: argparse.Namespace) -> Dict:
+    rng = random.Random(args.seed)
+    backend = make_jwt_backend(backend_name)
+    with (
+        patch.object(auth_service, "jwt_backend", backend),
+        patch.object(settings, "token_cache_size", args.cache_size if cached else 0),
+    ):
+        AuthService.clear_token_cache()
+        tokens = [
+            AuthService.create_access_token(
+                TokenData(email=f"user{i}@example.com", token_version=0)
+            )
+            for i in range(args.users)
+        ]
+        samples: List[float] = []
+        with Timer() as timer:
+            for _ in range(args.requests):
+                token = rng.choice(tokens)
+                start = time.perf_counter()
+                AuthService.verify_token(token)
+                samples.append(time.perf_counter() - start)
+        AuthService.clear_token_cache()
+    return summarize(samples, timer.elapsed)
+
+
+def run(args: argparse.Namespace) -> Dict:
+    results = {}
+    for backend_name in args.backends:
+        try:
+            make_jwt_backend(backend_name)
+        except RuntimeError as e:
+            print(f"Skipping {backend_name}: {e}")
+            continue
+        results[f"{backend_name}.uncached"] = _run_design(backend_name, False, args)
+        results[f"{backend_name}.cached"] = _run_design(backend_name, True, args)
+    config = {
+        key: getattr(args, key)
+        for key in ("requests", "users", "cache_size", "backends", "seed")
+    }
+    return build_report("auth_overhead", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument(
+        "--backends",
+        type=lambda v: v.split(","),
+        default=["jose", "pyjwt"],
+        help="Comma separated JWT backends to run: jose, pyjwt.",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for stage, summary in report["results"].items():
+        print(
+            f"{stage:>16}: p50={summary['p50_ms']:.4f}ms "
+            f"p99={summary['p99_ms']:.4f}ms "
+            f"({summary['messages_per_sec']:.0f} requests/sec)"
+        )
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Compare two benchmark JSON reports, e.g. from two different commits:
+
+    poetry run python -m benchmarks.compare results/a.json results/b.json
+"""
+
+import argparse
+import json
+
+from benchmarks.stats import compare_reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise SystemExit(
+            f"Cannot compare '{baseline['benchmark']}' with '{candidate['benchmark']}'"
+        )
+
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+    for row in compare_reports(baseline, candidate):
+        print(
+            f"{row['stage']:>14} {row['metric']:>16}: "
+            f"{row['baseline']:>12} -> {row['candidate']:>12} "
+            f"({row['change_pct']:+.1f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Content-filter throughput and latency benchmark.
+
+Measures the three stages of ContentFilterService against a synthetic chat
+corpus and writes a JSON report that can be compared across commits:
+
+    poetry run python -m benchmarks.content_filter --messages 2000
+    poetry run python -m benchmarks.compare baseline.json candidate.json
+
+The LLM path uses in-process fake providers (see benchmarks/fake_llm.py), so no
+network access or API keys are needed.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from api.services.content_filter_service import ContentFilterService
+from api.services.social_media_filter import extract_social_shares
+from benchmarks.corpus import CorpusMessage, generate_corpus
+from benchmarks.fake_llm import make_fake_providers
+from benchmarks.stats import Timer, build_report, summarize, write_report
+
+
+def _summarize_by_category(
+    corpus: List[CorpusMessage], samples: List[float]
+) -> Dict[str, Dict]:
+    by_category = defaultdict(list)
+    for message, sample in zip(corpus, samples):
+        by_category[message.category].append(sample)
+    return {category: summarize(s) for category, s in sorted(by_category.items())}
+
+
+def _confusion(corpus: List[CorpusMessage], flags: List[bool]) -> Dict[str, int]:
+    """
+    Count flagged messages against the corpus ground truth.
+    """
+    counts = {"flagged": 0, "false_positives": 0, "false_negatives": 0}
+    for message, flagged in zip(corpus, flags):
+        counts["flagged"] += flagged
+        if flagged and not message.expected_pii:
+            counts["false_positives"] += 1
+        elif not flagged and message.expected_pii:
+            counts["false_negatives"] += 1
+    return counts
+
+
+def bench_manual_filter(
+    service: ContentFilterService, corpus: List[CorpusMessage]
+) -> Dict:
+    samples = []
+    flags = []
+    for message in corpus:
+        text = message.as_filter_input()
+        start = time.perf_counter()
+        result = service._manual_filter(text)
+        samples.append(time.perf_counter() - start)
+        flags.append(result["filtered"])
+    summary = summarize(samples)
+    summary.update(_confusion(corpus, flags))
+    summary["by_category"] = _summarize_by_category(corpus, samples)
+    return summary
+
+
+def bench_social_shares(corpus: List[CorpusMessage]) -> Dict:
+    samples = []
+    flags = []
+    for message in corpus:
+        text = message.as_filter_input()
+        start = time.perf_counter()
+        result = extract_social_shares(text, use_phone_guard=True)
+        samples.append(time.perf_counter() - start)
+        flags.append(result.blocked)
+    summary = summarize(samples)
+    summary.update(_confusion(corpus, flags))
+    summary["by_category"] = _summarize_by_category(corpus, samples)
+    return summary
+
+
+async def bench_llm_path(
+    service: ContentFilterService,
+    corpus: List[CorpusMessage],
+    concurrency: int,
+    providers: list,
+) -> Dict:
+    """
+    Run the full `filter_message` path with fake providers, `concurrency`
+    messages at a time, as concurrent websocket senders would.
+    """
+    original_providers = service.llm_providers
+    service.llm_providers = list(providers)
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = [0.0] * len(corpus)
+    flags: List[bool] = [False] * len(corpus)
+    outcomes = {"errors": 0, "llm_calls": 0}
+
+    async def run_one(index: int, message: CorpusMessage) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await service.filter_message(
+                    message.text, history=message.history
+                )
+                flags[index] = result["filtered"]
+            except Exception:
+                outcomes["errors"] += 1
+            samples[index] = time.perf_counter() - start
+
+    try:
+        with Timer() as timer:
+            await asyncio.gather(
+                *(run_one(i, message) for i, message in enumerate(corpus))
+            )
+    finally:
+        service.llm_providers = original_providers
+
+    outcomes["llm_calls"] = sum(p.calls for p in providers)
+    summary = summarize(samples, wall_time=timer.elapsed)
+    summary.update(outcomes)
+    summary.update(_confusion(corpus, flags))
+    summary["by_category"] = _summarize_by_category(corpus, samples)
+    return summary
+
+
+def run(args: argparse.Namespace) -> Dict:
+    corpus = generate_corpus(args.messages, seed=args.seed)
+    service = ContentFilterService()
+    providers = make_fake_providers(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        parse_failure_rate=args.parse_failure_rate,
+        blocking=args.blocking,
+        seed=args.seed,
+    )
+
+    results = {
+        "manual_filter": bench_manual_filter(service, corpus),
+        "social_shares": bench_social_shares(corpus),
+        "llm_path": asyncio.run(
+            bench_llm_path(service, corpus, args.concurrency, providers)
+        ),
+    }
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "messages",
+            "seed",
+            "concurrency",
+            "latency_ms",
+            "jitter_ms",
+            "failure_rate",
+            "parse_failure_rate",
+            "blocking",
+        )
+    }
+    return build_report("content_filter", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--parse-failure-rate", type=float, default=0.02)
+    parser.add_argument(
+        "--blocking",
+        action="store_true",
+        help="Simulate synchronous vendor SDK calls that block the event loop.",
+    )
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for stage, summary in report["results"].items():
+        print(
+            f"{stage:>14}: p50={summary['p50_ms']:.3f}ms "
+            f"p99={summary['p99_ms']:.3f}ms "
+            f"{summary['messages_per_sec']:.1f} msg/s"
+        )
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
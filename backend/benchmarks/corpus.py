@@ -0,0 +1,180 @@
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+BENIGN = "benign"
+PII = "pii"
+OBFUSCATED_HANDLE = "obfuscated_handle"
+LONG_CONVERSATION = "long_conversation"
+
+CATEGORIES = (BENIGN, PII, OBFUSCATED_HANDLE, LONG_CONVERSATION)
+
+# Default share of each category in a generated corpus
+DEFAULT_MIX: Dict[str, float] = {
+    BENIGN: 0.55,
+    PII: 0.2,
+    OBFUSCATED_HANDLE: 0.1,
+    LONG_CONVERSATION: 0.15,
+}
+
+SUBJECTS = [
+    "A Math",
+    "E Math",
+    "Chemistry",
+    "Physics",
+    "Biology",
+    "English",
+    "Chinese",
+    "General Paper",
+    "Economics",
+    "Primary Science",
+]
+LEVELS = ["P5", "P6", "Sec 2", "Sec 3", "Sec 4", "JC1", "JC2"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+NAMES = ["Jia Hui", "Wei Ming", "Priya", "Marcus", "Aisyah", "Ethan", "Mei Ling"]
+TOWNS = ["Tampines", "Ang Mo Kio", "Bishan", "Jurong West", "Punggol", "Clementi"]
+
+BENIGN_TEMPLATES = [
+    "Hi! I saw your assignment for {level} {subject}, is it still available?",
+    "My child is struggling with {subject}, especially the recent topics.",
+    "Can we do the lessons on {day} afternoons instead?",
+    "I have taught {subject} for {years} years, mostly {level} students.",
+    "Thanks for accepting, looking forward to the first lesson!",
+    "Would 1.5 hours per lesson work for you?",
+    "The exams are in {months} months so we should start soon.",
+    "Sure, I can bring some past year papers for practice.",
+    "Ok noted, see you then :)",
+    "Is the rate negotiable? I was hoping for something closer to {rate}/hr.",
+    "We prefer lessons near {town} if possible.",
+    "She did quite well for the last test but needs help with problem sums.",
+]
+
+PII_TEMPLATES = [
+    "You can email me at {first}.{last}{num}@gmail.com",
+    "Just call me at 9{d7} anytime after 6pm",
+    "My number is +65 8{d3} {d4}",
+    "We stay at Blk {blk} {town} Ave {ave} #{unit}",
+    "The address is {blk} {town} Road, Singapore {postal}",
+    "Postal code is {postal}, the lobby near the playground",
+    "For the form my NRIC is S{d7}D",
+    "Send the invoice to {first}{num}@hotmail.com please",
+]
+
+OBFUSCATED_TEMPLATES = [
+    "add me on insta: {handle}",
+    "dm me on tele {handle} easier to coordinate",
+    "my tg is {handle} hit me up",
+    "follow me @{handle} for notes",
+    "reach me on snap {handle}",
+    "contact me on discord {handle}#{d4}",
+    "{first} dot {last} at gmail dot com",
+    "whats\u200bapp me wa.me/65{d7}9",
+    "https://instagram.com/{handle} check it out",
+]
+
+
+@dataclass
+class CorpusMessage:
+    """
+    A single synthetic chat message plus the conversation history it is sent in.
+
+    `expected_pii` is the ground-truth label used when evaluating filter accuracy.
+    """
+
+    category: str
+    text: str
+    history: List[str] = field(default_factory=list)
+    expected_pii: bool = False
+
+    def as_filter_input(self) -> str:
+        """
+        Build the string ChatLogic.store_private_message passes to the filter:
+        the new message followed by the (unflagged) history, space separated.
+        """
+        return " ".join([self.text] + self.history)
+
+
+def _digits(rng: random.Random, n: int) -> str:
+    return "".join(str(rng.randint(0, 9)) for _ in range(n))
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    first = rng.choice(NAMES).split()[0].lower()
+    return template.format(
+        level=rng.choice(LEVELS),
+        subject=rng.choice(SUBJECTS),
+        day=rng.choice(DAYS),
+        years=rng.randint(1, 8),
+        months=rng.randint(1, 6),
+        rate=rng.choice([30, 35, 40, 45, 50, 60]),
+        town=rng.choice(TOWNS),
+        first=first,
+        last=rng.choice(["tan", "lim", "lee", "ng", "wong", "kumar"]),
+        num=rng.randint(1, 99),
+        d3=_digits(rng, 3),
+        d4=_digits(rng, 4),
+        d7=_digits(rng, 7),
+        blk=rng.randint(100, 999),
+        ave=rng.randint(1, 10),
+        unit=f"{rng.randint(2, 20):02d}-{rng.randint(1, 400):03d}",
+        postal=f"{rng.randint(10, 82):02d}{_digits(rng, 4)}",
+        handle=f"{first}_{rng.choice(['tutor', 'study', 'sg', 'notes'])}{rng.randint(1, 99)}",
+    )
+
+
+def _benign(rng: random.Random) -> str:
+    return _fill(rng.choice(BENIGN_TEMPLATES), rng)
+
+
+def generate_message(category: str, rng: random.Random) -> CorpusMessage:
+    """
+    Generate one message of the given category.
+    """
+    history_length = rng.randint(0, 6)
+    if category == LONG_CONVERSATION:
+        # ChatLogic sends the new message together with the last 20 messages
+        history_length = 20
+
+    history = [_benign(rng) for _ in range(history_length)]
+
+    if category == BENIGN:
+        return CorpusMessage(category, _benign(rng), history, expected_pii=False)
+    if category == PII:
+        return CorpusMessage(
+            category, _fill(rng.choice(PII_TEMPLATES), rng), history, expected_pii=True
+        )
+    if category == OBFUSCATED_HANDLE:
+        return CorpusMessage(
+            category,
+            _fill(rng.choice(OBFUSCATED_TEMPLATES), rng),
+            history,
+            expected_pii=True,
+        )
+    if category == LONG_CONVERSATION:
+        # Mostly benign long conversations, occasionally with PII at the end
+        if rng.random() < 0.25:
+            text = _fill(rng.choice(PII_TEMPLATES + OBFUSCATED_TEMPLATES), rng)
+            return CorpusMessage(category, text, history, expected_pii=True)
+        return CorpusMessage(category, _benign(rng), history, expected_pii=False)
+    raise ValueError(f"Unknown corpus category: {category}")
+
+
+def generate_corpus(
+    size: int, seed: int = 42, mix: Dict[str, float] = None
+) -> List[CorpusMessage]:
+    """
+    Generate a deterministic synthetic chat corpus.
+
+    Args:
+        size: Number of messages to generate.
+        seed: Random seed; the same seed always produces the same corpus.
+        mix: Share of each category, defaults to DEFAULT_MIX.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    categories = list(mix.keys())
+    weights = [mix[c] for c in categories]
+    return [
+        generate_message(rng.choices(categories, weights=weights)[0], rng)
+        for _ in range(size)
+    ]
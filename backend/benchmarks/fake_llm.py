@@ -0,0 +1,119 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Optional
+
+from api.services.content_filter_service import ContentFilterService
+
+
+class FakeLLMProviderError(Exception):
+    """Raised by FakeLLMProvider to simulate a provider/network failure."""
+
+
+class FakeLLMProvider:
+    """
+    In-process stand-in for one of ContentFilterService's LLM providers.
+
+    Instances are async callables with the same `(message, threshold)` signature
+    as `ContentFilterService._groq_provider` and friends, so they can be dropped
+    straight into `ContentFilterService.llm_providers`.
+
+    Args:
+        name: Model name reported as the provider.
+        latency_ms: Mean simulated latency per call.
+        jitter_ms: Uniform jitter added to/subtracted from the latency.
+        failure_rate: Probability of raising FakeLLMProviderError.
+        parse_failure_rate: Probability of returning output that cannot be parsed.
+        pii_rate: Probability of reporting PII for a message.
+        blocking: Sleep with time.sleep instead of asyncio.sleep, mimicking the
+            synchronous vendor SDK calls made inside the real async providers.
+        seed: Random seed for reproducible behaviour.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency_ms: float = 300.0,
+        jitter_ms: float = 100.0,
+        failure_rate: float = 0.0,
+        parse_failure_rate: float = 0.0,
+        pii_rate: float = 0.1,
+        blocking: bool = False,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.parse_failure_rate = parse_failure_rate
+        self.pii_rate = pii_rate
+        self.blocking = blocking
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _latency(self) -> float:
+        jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _content(self, message: str) -> str:
+        if self.rng.random() < self.parse_failure_rate:
+            return "Sorry, I cannot help with that request."
+        has_pii = self.rng.random() < self.pii_rate
+        return json.dumps(
+            {
+                "has_pii": has_pii,
+                "detected_types": ["ADDRESS"] if has_pii else [],
+                "confidence": 0.9 if has_pii else 0.1,
+                "pii_spans": [],
+                "reasoning": "Simulated response.",
+            }
+        )
+
+    async def __call__(self, message: str, threshold: float) -> Dict:
+        self.calls += 1
+        latency = self._latency()
+        if self.blocking:
+            time.sleep(latency)
+        else:
+            await asyncio.sleep(latency)
+
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeLLMProviderError(f"{self.name} simulated failure")
+
+        return ContentFilterService()._parse_llm_output(
+            self._content(message), message, self.name, threshold
+        )
+
+
+def make_fake_providers(
+    latency_ms: float = 300.0,
+    jitter_ms: float = 100.0,
+    failure_rate: float = 0.0,
+    parse_failure_rate: float = 0.0,
+    blocking: bool = False,
+    seed: int = 42,
+) -> list[FakeLLMProvider]:
+    """
+    Build one fake per real provider, with slightly different latency profiles.
+    """
+    profiles = [
+        ("llama-3.1-8b-instant", 0.6),
+        ("gemini-1.5-flash", 1.0),
+        ("meta-llama/Llama-3.1-8B-Instruct", 1.5),
+        ("mistral-small-latest", 1.2),
+    ]
+    return [
+        FakeLLMProvider(
+            name,
+            latency_ms=latency_ms * factor,
+            jitter_ms=jitter_ms * factor,
+            failure_rate=failure_rate,
+            parse_failure_rate=parse_failure_rate,
+            blocking=blocking,
+            seed=seed + i,
+        )
+        for i, (name, factor) in enumerate(profiles)
+    ]
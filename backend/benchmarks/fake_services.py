@@ -0,0 +1,324 @@
+"""
+Local stand-ins for the external services the backend calls: R2 (S3), Gmail and
+Google OAuth, Stripe, and the Groq, Gemini, Hugging Face and Mistral LLM APIs.
+
+One HTTP server answers for all of them, with a configurable latency per
+service, so the app can be load tested without touching a real vendor:
+
+    poetry run python -m benchmarks.fake_services --port 9100 --latency-ms stripe=300,llm=400
+
+It prints the environment variables that point the app at it (all of them are
+Settings fields); export them before starting the server under test.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from benchmarks.fake_llm import FakeLLMProvider
+
+SERVICES = ("s3", "gmail", "google", "stripe", "llm")
+
+# Mean latencies (ms) roughly matching what the real services take
+DEFAULT_LATENCY_MS = {"s3": 40, "gmail": 150, "google": 80, "stripe": 300, "llm": 400}
+
+
+class FakeServices:
+    """
+    Runs the fake services on a background thread.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free one.
+        latency_ms: Mean latency per service, see SERVICES.
+        jitter: Uniform jitter as a fraction of each service's latency.
+        pii_rate: Probability of an LLM reporting PII for a message.
+        seed: Random seed for reproducible latencies and LLM answers.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: Optional[Dict[str, float]] = None,
+        jitter: float = 0.25,
+        pii_rate: float = 0.1,
+        seed: int = 42,
+    ):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.llm = FakeLLMProvider("fake", pii_rate=pii_rate, seed=seed)
+        self.lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.objects: Dict[str, bytes] = {}
+        self.checkout_sessions: Dict[str, dict] = {}
+        self.ids = itertools.count(1)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """
+        Environment variables (Settings fields) that send the app's outbound
+        calls here instead of to the real services.
+        """
+        return {
+            "R2_ENDPOINT": self.url,
+            "R2_ACCESS_KEY_ID": "fake",
+            "R2_SECRET_KEY": "fake",
+            "R2_BUCKET_NAME": "fake-bucket",
+            "GMAIL_API_URL": self.url,
+            "GOOGLE_TOKEN_URL": f"{self.url}/token",
+            "GOOGLE_USER_INFO_URL": f"{self.url}/userinfo",
+            "STRIPE_API_BASE": self.url,
+            "GROQ_BASE_URL": self.url,
+            "GEMINI_BASE_URL": self.url,
+            "HF_BASE_URL": self.url,
+            "MISTRAL_BASE_URL": self.url,
+        }
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _wait(self, service: str) -> None:
+        with self.lock:
+            self.calls[service] += 1
+            mean = self.latency_ms[service]
+            latency = mean * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, latency) / 1000)
+
+    def _llm_answer(self, prompt: str) -> str:
+        with self.lock:
+            return self.llm._content(prompt)
+
+    def _checkout_session(self, form: Dict[str, str], key: Optional[str]) -> dict:
+        with self.lock:
+            if key and key in self.checkout_sessions:
+                return self.checkout_sessions[key]
+            session_id = f"cs_test_{next(self.ids)}"
+            session = {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"{self.url}/checkout/{session_id}",
+                "expires_at": int(form.get("expires_at", time.time() + 3600)),
+                "metadata": {},
+            }
+            if key:
+                self.checkout_sessions[key] = session
+            return session
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _reply(self, status: int, body=None, content_type="application/json"):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode()
+                body = body or b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_POST(self):
+                body = self._body()
+                path = self.path.split("?")[0]
+                if path == "/token":
+                    services._wait("google")
+                    self._reply(
+                        200,
+                        {
+                            "access_token": f"fake-google-token-{next(services.ids)}",
+                            "expires_in": 3600,
+                            "token_type": "Bearer",
+                        },
+                    )
+                elif path.endswith("/messages/send"):
+                    services._wait("gmail")
+                    message_id = f"fake-message-{next(services.ids)}"
+                    self._reply(200, {"id": message_id, "threadId": message_id})
+                elif path == "/v1/checkout/sessions":
+                    services._wait("stripe")
+                    form = dict(
+                        pair.split("=", 1)
+                        for pair in body.decode().split("&")
+                        if "=" in pair
+                    )
+                    session = services._checkout_session(
+                        form, self.headers.get("Idempotency-Key")
+                    )
+                    self._reply(200, session)
+                elif path.endswith("/chat/completions"):
+                    services._wait("llm")
+                    request = json.loads(body or b"{}")
+                    prompt = request["messages"][-1]["content"]
+                    self._reply(
+                        200, _chat_completion(request, services._llm_answer(prompt))
+                    )
+                elif path.endswith(":generateContent"):
+                    services._wait("llm")
+                    request = json.loads(body or b"{}")
+                    prompt = request["contents"][-1]["parts"][-1]["text"]
+                    self._reply(200, _gemini_response(services._llm_answer(prompt)))
+                else:
+                    self._reply(404, {"error": f"No fake for POST {path}"})
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/userinfo":
+                    services._wait("google")
+                    self._reply(
+                        200,
+                        {
+                            "sub": "fake-google-id",
+                            "email": "fake@gmail.com",
+                            "name": "Fake",
+                        },
+                    )
+                    return
+                services._wait("s3")
+                data = services.objects.get(path)
+                if data is None:
+                    self._reply(404, _s3_error("NoSuchKey"), "application/xml")
+                else:
+                    self._reply(200, data, "application/octet-stream")
+
+            def do_HEAD(self):
+                services._wait("s3")
+                data = services.objects.get(self.path.split("?")[0])
+                if data is None:
+                    self._reply(404)
+                else:
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.send_header("ETag", '"fake"')
+                    self.end_headers()
+
+            def do_PUT(self):
+                body = self._body()
+                services._wait("s3")
+                services.objects[self.path.split("?")[0]] = body
+                self.send_response(200)
+                self.send_header("ETag", '"fake"')
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _chat_completion(request: dict, content: str) -> dict:
+    # OpenAI-style response, as returned by Groq, Hugging Face and Mistral
+    return {
+        "id": "fake-completion",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def _gemini_response(content: str) -> dict:
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": [{"text": content}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ],
+        "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 1},
+    }
+
+
+def _s3_error(code: str) -> bytes:
+    return f"<Error><Code>{code}</Code></Error>".encode()
+
+
+def parse_latencies(value: str) -> Dict[str, float]:
+    """
+    Parse "stripe=300,llm=400" into per-service latencies in ms.
+    """
+    latencies = {}
+    for item in filter(None, value.split(",")):
+        service, _, ms = item.partition("=")
+        if service not in SERVICES:
+            raise argparse.ArgumentTypeError(
+                f"Unknown service {service!r}; expected one of {', '.join(SERVICES)}."
+            )
+        latencies[service] = float(ms)
+    return latencies
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument(
+        "--latency-ms",
+        type=parse_latencies,
+        default={},
+        help="Mean latency per service, e.g. stripe=300,llm=400 "
+        f"(services: {', '.join(SERVICES)}).",
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.25, help="Jitter as a fraction of latency."
+    )
+    parser.add_argument("--pii-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    services = FakeServices(
+        args.host, args.port, args.latency_ms, args.jitter, args.pii_rate, args.seed
+    )
+    for name, value in services.env().items():
+        print(f"export {name}={value}")
+    print(f"# Fake services listening on {services.url}", flush=True)
+    try:
+        services.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"# Calls: {dict(services.calls)}")
+        services.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Import time benchmark: how long a fresh process takes to import the app.
+
+Imports each module in a new interpreter with `python -X importtime`, the way
+a web or job worker cold starts, and reports the process wall time, the time
+spent importing, the packages that account for it, and which heavy SDKs were
+imported eagerly:
+
+    poetry run python -m benchmarks.import_time --runs 5 --modules api.index,api.worker
+
+Nothing is started: the lifespan (database check, startup email) does not run.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.stats import Timer, build_report, summarize, write_report
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that should only be imported by the code paths that use them
+HEAVY_SDKS = (
+    "stripe",
+    "boto3",
+    "googleapiclient.discovery",
+    "google.oauth2.credentials",
+    "google.generativeai",
+    "groq",
+    "huggingface_hub",
+    "mistralai",
+)
+
+
+def parse_importtime(output: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Parse `-X importtime` output into the total import time in seconds, the
+    self time per top-level package in seconds, and the modules imported.
+    """
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        module = name.strip()
+        modules.append(module)
+        packages[module.split(".")[0]] += int(self_us) / 1_000_000
+        # Top-level imports are not indented; their cumulative times add up
+        if not name.startswith("  ", 1):
+            total += int(cumulative_us) / 1_000_000
+    return total, dict(packages), modules
+
+
+def _import_once(module: str) -> Tuple[float, str]:
+    with Timer() as timer:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return timer.elapsed, result.stderr
+
+
+def run(args: argparse.Namespace) -> Dict:
+    results = {}
+    for module in args.modules:
+        process_samples, import_samples = [], []
+        packages: Dict[str, float] = defaultdict(float)
+        loaded = set()
+        for _ in range(args.runs):
+            elapsed, output = _import_once(module)
+            total, run_packages, modules = parse_importtime(output)
+            process_samples.append(elapsed)
+            import_samples.append(total)
+            for package, seconds in run_packages.items():
+                packages[package] += seconds / args.runs
+            loaded.update(sdk for sdk in HEAVY_SDKS if sdk in modules)
+        top = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        results[f"{module}.process"] = summarize(process_samples)
+        results[f"{module}.imports"] = summarize(import_samples)
+        results[f"{module}.top_packages_ms"] = {
+            package: round(seconds * 1000, 2) for package, seconds in top[: args.top]
+        }
+        results[f"{module}.sdks_loaded"] = sorted(loaded)
+    config = {key: getattr(args, key) for key in ("modules", "runs", "top")}
+    return build_report("import_time", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--modules",
+        type=lambda v: v.split(","),
+        default=["api.index", "api.worker"],
+        help="Comma separated modules to import, one process per run.",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=15, help="Packages to list by import time."
+    )
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for module in args.modules:
+        process = report["results"][f"{module}.process"]
+        imports = report["results"][f"{module}.imports"]
+        print(
+            f"{module}: process p50={process['p50_ms']:.0f}ms "
+            f"imports p50={imports['p50_ms']:.0f}ms"
+        )
+        for package, ms in report["results"][f"{module}.top_packages_ms"].items():
+            print(f"{package:>28}: {ms:.1f}ms")
+        loaded = report["results"][f"{module}.sdks_loaded"]
+        print(f"  SDKs imported eagerly: {', '.join(loaded) or 'none'}")
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
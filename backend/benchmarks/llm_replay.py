@@ -0,0 +1,487 @@
+"""
+Offline record/replay harness for the LLM content-filter providers.
+
+Capture raw provider responses (with timings) once, using the real vendor APIs:
+
+    poetry run python -m benchmarks.llm_replay capture --cassette cassette.jsonl
+
+Then replay them deterministically, without network access, to compare routing
+strategies and confidence thresholds:
+
+    poetry run python -m benchmarks.llm_replay replay --cassette cassette.jsonl \\
+        --strategies random,fixed,fastest_first,most_reliable --thresholds 0.5,0.7,0.9
+
+Replay runs the real `ContentFilterService.filter_message` (manual filter,
+fallback loop and `_parse_llm_output`), only swapping the providers for
+recorded responses and the provider order for the strategy under test.
+Provider latency is simulated on a virtual clock, so replays finish instantly.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from api.services.content_filter_service import ContentFilterService
+from benchmarks.corpus import CorpusMessage, generate_corpus
+from benchmarks.stats import build_report, summarize, write_report
+
+PARSE_FAILURE_REASONING = "Failed to parse LLM output."
+
+
+def message_key(message: str) -> str:
+    return hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class CassetteMissError(Exception):
+    """Raised when a provider/message pair was never recorded."""
+
+    def __init__(self, provider: str, message: str):
+        super().__init__(
+            f"No recording for provider '{provider}' and message '{message[:40]}'"
+        )
+
+
+class ReplayedProviderError(Exception):
+    """Raised when replaying a call that failed while recording."""
+
+
+@dataclass
+class Recording:
+    """One recorded provider call."""
+
+    provider: str
+    message: str
+    prompt_hash: str
+    latency_ms: float
+    content: Optional[str] = None
+    error: Optional[str] = None
+    category: str = ""
+    expected_pii: Optional[bool] = None
+
+
+class Cassette:
+    """
+    A set of recordings, keyed by (provider, message).
+    Stored as JSON lines, one recording per line.
+    """
+
+    def __init__(self, recordings: Optional[List[Recording]] = None):
+        self.recordings: Dict[tuple, Recording] = {}
+        self.messages: Dict[str, Recording] = {}
+        self.providers: List[str] = []
+        for recording in recordings or []:
+            self.add(recording)
+
+    def add(self, recording: Recording) -> None:
+        key = message_key(recording.message)
+        self.recordings[(recording.provider, key)] = recording
+        self.messages.setdefault(key, recording)
+        if recording.provider not in self.providers:
+            self.providers.append(recording.provider)
+
+    def get(self, provider: str, message: str) -> Recording:
+        recording = self.recordings.get((provider, message_key(message)))
+        if recording is None:
+            raise CassetteMissError(provider, message)
+        return recording
+
+    def provider_recordings(self, provider: str) -> List[Recording]:
+        return [r for (p, _), r in self.recordings.items() if p == provider]
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            for recording in self.recordings.values():
+                f.write(json.dumps(asdict(recording)) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with open(path) as f:
+            return cls([Recording(**json.loads(line)) for line in f if line.strip()])
+
+
+###############################################################################
+# Capture
+###############################################################################
+
+
+class Recorder:
+    """
+    Context manager that wraps `ContentFilterService._complete` so every raw
+    provider response is recorded, with its latency, into a cassette.
+    """
+
+    def __init__(self, service: ContentFilterService, cassette: Cassette):
+        self.service = service
+        self.cassette = cassette
+        self.current: Optional[CorpusMessage] = None
+
+    def __enter__(self) -> "Recorder":
+        self.original_complete = self.service._complete
+        self.service._complete = self._complete
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.service._complete = self.original_complete
+
+    def _record(self, model: str, prompt: str, latency: float, **kwargs) -> None:
+        self.cassette.add(
+            Recording(
+                provider=model,
+                message=self.current.as_filter_input(),
+                prompt_hash=prompt_hash(prompt),
+                latency_ms=round(latency * 1000, 3),
+                category=self.current.category,
+                expected_pii=self.current.expected_pii,
+                **kwargs,
+            )
+        )
+
+    def _complete(self, client, prompt: str, model: str) -> str:
+        start = time.perf_counter()
+        try:
+            content = self.original_complete(client, prompt, model)
+        except Exception as e:
+            self._record(model, prompt, time.perf_counter() - start, error=str(e))
+            raise
+        self._record(model, prompt, time.perf_counter() - start, content=content)
+        return content
+
+
+async def capture(
+    service: ContentFilterService,
+    corpus: List[CorpusMessage],
+    providers: Optional[List[Callable]] = None,
+) -> Cassette:
+    """
+    Call every provider for every corpus message and record the raw responses.
+    Needs network access and real API keys when using the real providers.
+    """
+    cassette = Cassette()
+    providers = providers or [
+        service._groq_provider,
+        service._gemini_provider,
+        service._huggingface_provider,
+        service._mistral_provider,
+    ]
+    with Recorder(service, cassette) as recorder:
+        for message in corpus:
+            recorder.current = message
+            for provider in providers:
+                try:
+                    await provider(message.as_filter_input(), 0.0)
+                except Exception as e:
+                    print(f"Provider {provider.__name__} failed: {e}")
+    return cassette
+
+
+###############################################################################
+# Replay
+###############################################################################
+
+
+class VirtualClock:
+    """Accumulates simulated provider latency for the message being replayed."""
+
+    def __init__(self):
+        self.elapsed_ms = 0.0
+
+    def advance(self, ms: float) -> None:
+        self.elapsed_ms += ms
+
+    def reset(self) -> None:
+        self.elapsed_ms = 0.0
+
+
+class ReplayProvider:
+    """
+    Async callable standing in for one LLM provider, answering from a cassette.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cassette: Cassette,
+        clock: VirtualClock,
+        service: ContentFilterService,
+    ):
+        self.name = name
+        self.cassette = cassette
+        self.clock = clock
+        self.service = service
+        self.calls = 0
+        self.errors = 0
+        self.parse_failures = 0
+        self.misses = 0
+        self.prompt_mismatches = 0
+
+    async def __call__(self, message: str, threshold: float) -> Dict:
+        self.calls += 1
+        try:
+            recording = self.cassette.get(self.name, message)
+        except CassetteMissError:
+            self.misses += 1
+            raise
+        if recording.prompt_hash != prompt_hash(self.service._build_prompt(message)):
+            self.prompt_mismatches += 1
+
+        self.clock.advance(recording.latency_ms)
+        if recording.error is not None:
+            self.errors += 1
+            raise ReplayedProviderError(recording.error)
+
+        result = self.service._parse_llm_output(
+            recording.content, message, self.name, threshold
+        )
+        if result["reasoning"] == PARSE_FAILURE_REASONING:
+            self.parse_failures += 1
+        return result
+
+
+def _median_latency(cassette: Cassette, provider: str) -> float:
+    latencies = [r.latency_ms for r in cassette.provider_recordings(provider)]
+    return statistics.median(latencies) if latencies else float("inf")
+
+
+def _success_rate(cassette: Cassette, provider: str) -> float:
+    recordings = cassette.provider_recordings(provider)
+    if not recordings:
+        return 0.0
+    ok = [
+        r
+        for r in recordings
+        if r.error is None and PARSE_FAILURE_REASONING not in _parse_probe(r)
+    ]
+    return len(ok) / len(recordings)
+
+
+def _parse_probe(recording: Recording) -> str:
+    result = ContentFilterService()._parse_llm_output(
+        recording.content, recording.message, recording.provider, 1.0
+    )
+    return result["reasoning"]
+
+
+def _random_strategy(providers, cassette, seed):
+    rng = random.Random(seed)
+
+    def order():
+        ordered = list(providers)
+        rng.shuffle(ordered)
+        return ordered
+
+    return order
+
+
+def _fixed_strategy(providers, cassette, seed):
+    return lambda: list(providers)
+
+
+def _fastest_first_strategy(providers, cassette, seed):
+    ordered = sorted(providers, key=lambda p: _median_latency(cassette, p.name))
+    return lambda: list(ordered)
+
+
+def _most_reliable_strategy(providers, cassette, seed):
+    ordered = sorted(
+        providers,
+        key=lambda p: (
+            -_success_rate(cassette, p.name),
+            _median_latency(cassette, p.name),
+        ),
+    )
+    return lambda: list(ordered)
+
+
+# Routing strategies: (providers, cassette, seed) -> callable returning an order
+STRATEGIES: Dict[str, Callable] = {
+    "random": _random_strategy,
+    "fixed": _fixed_strategy,
+    "fastest_first": _fastest_first_strategy,
+    "most_reliable": _most_reliable_strategy,
+}
+
+
+async def replay(
+    service: ContentFilterService,
+    cassette: Cassette,
+    strategy: str,
+    threshold: float,
+    seed: int = 42,
+) -> Dict:
+    """
+    Replay every recorded message through `filter_message` with the given
+    routing strategy and threshold, and score the outcome.
+    """
+    clock = VirtualClock()
+    providers = [
+        ReplayProvider(name, cassette, clock, service) for name in cassette.providers
+    ]
+    original_providers = service.llm_providers
+    service.llm_providers = providers
+    service._order_providers = STRATEGIES[strategy](providers, cassette, seed)
+
+    latencies: List[float] = []
+    served_by: Counter = Counter()
+    counts = Counter()
+    try:
+        for recording in cassette.messages.values():
+            clock.reset()
+            start = time.perf_counter()
+            try:
+                result = await service.filter_message(recording.message, threshold)
+                flagged = result["filtered"]
+                served_by[result["provider"]] += 1
+            except Exception:
+                # ChatLogic lets the message through when filtering fails
+                flagged = False
+                counts["filter_errors"] += 1
+            local_time = time.perf_counter() - start
+            latencies.append(local_time + clock.elapsed_ms / 1000)
+
+            if recording.expected_pii is not None:
+                counts["labelled"] += 1
+                if flagged and recording.expected_pii:
+                    counts["true_positives"] += 1
+                elif flagged:
+                    counts["false_positives"] += 1
+                elif recording.expected_pii:
+                    counts["false_negatives"] += 1
+                else:
+                    counts["true_negatives"] += 1
+    finally:
+        service.llm_providers = original_providers
+        del service._order_providers
+
+    llm_calls = sum(p.calls for p in providers)
+    parse_failures = sum(p.parse_failures for p in providers)
+    provider_errors = sum(p.errors for p in providers)
+    tp, fp, fn = (
+        counts["true_positives"],
+        counts["false_positives"],
+        counts["false_negatives"],
+    )
+
+    summary = summarize(latencies)
+    summary.update(
+        {
+            "strategy": strategy,
+            "threshold": threshold,
+            "accuracy": round((tp + counts["true_negatives"]) / counts["labelled"], 4)
+            if counts["labelled"]
+            else None,
+            "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+            "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "filter_errors": counts["filter_errors"],
+            "llm_calls": llm_calls,
+            "llm_calls_per_message": round(llm_calls / len(latencies), 3)
+            if latencies
+            else 0.0,
+            "parse_failure_rate": round(parse_failures / llm_calls, 4)
+            if llm_calls
+            else 0.0,
+            "provider_error_rate": round(provider_errors / llm_calls, 4)
+            if llm_calls
+            else 0.0,
+            "cassette_misses": sum(p.misses for p in providers),
+            "prompt_mismatches": sum(p.prompt_mismatches for p in providers),
+            "served_by": dict(served_by),
+        }
+    )
+    return summary
+
+
+###############################################################################
+# CLI
+###############################################################################
+
+
+def _csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser(
+        "capture", help="Record real provider responses (needs network access)."
+    )
+    capture_parser.add_argument("--cassette", required=True)
+    capture_parser.add_argument("--messages", type=int, default=200)
+    capture_parser.add_argument("--seed", type=int, default=42)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="Replay a cassette offline and compare strategies."
+    )
+    replay_parser.add_argument("--cassette", required=True)
+    replay_parser.add_argument(
+        "--strategies", type=_csv, default=["random", "fixed", "fastest_first"]
+    )
+    replay_parser.add_argument(
+        "--thresholds", type=lambda v: [float(t) for t in _csv(v)], default=[0.7]
+    )
+    replay_parser.add_argument("--seed", type=int, default=42)
+    replay_parser.add_argument("--output", help="Path of the JSON report to write.")
+
+    args = parser.parse_args()
+    service = ContentFilterService()
+
+    if args.command == "capture":
+        corpus = generate_corpus(args.messages, seed=args.seed)
+        cassette = asyncio.run(capture(service, corpus))
+        cassette.save(args.cassette)
+        print(f"Recorded {len(cassette.recordings)} responses to {args.cassette}")
+        return
+
+    cassette = Cassette.load(args.cassette)
+    for strategy in args.strategies:
+        if strategy not in STRATEGIES:
+            raise SystemExit(
+                f"Unknown strategy '{strategy}'. Choose from: {', '.join(STRATEGIES)}"
+            )
+
+    results = {}
+    for strategy in args.strategies:
+        for threshold in args.thresholds:
+            summary = asyncio.run(
+                replay(service, cassette, strategy, threshold, args.seed)
+            )
+            results[f"{strategy}@{threshold}"] = summary
+            print(
+                f"{strategy:>14} @ {threshold:.2f}: accuracy={summary['accuracy']} "
+                f"parse_failures={summary['parse_failure_rate']:.2%} "
+                f"p50={summary['p50_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms"
+            )
+    if any(r["prompt_mismatches"] for r in results.values()):
+        print(
+            "Warning: _build_prompt has changed since this cassette was "
+            "recorded; re-capture to evaluate the new prompt."
+        )
+
+    config = {
+        "cassette": args.cassette,
+        "providers": cassette.providers,
+        "messages": len(cassette.messages),
+        "strategies": args.strategies,
+        "thresholds": args.thresholds,
+        "seed": args.seed,
+    }
+    path = write_report(build_report("llm_replay", config, results), args.output)
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+End-to-end load test: scripted user journeys against a running backend.
+
+    poetry run python -m benchmarks.load_test --base-url http://localhost:8000 --users 50 --duration 60
+
+Each virtual user logs in as an existing account and loops through its journey
+until the time is up:
+
+- parents search assignments, view one, view a tutor who applied, read and reply
+  in a chat, then open a checkout session for a pending request;
+- tutors search assignments, view one, apply to it, then read and reply in a chat.
+
+Accounts are read from the database the backend uses (DATABASE_URL), so fill it
+with `api.storage.synthetic_data` first; its users share the password
+"password". Point the backend at `benchmarks.fake_services` so that no real
+vendor is called (scripts/run_load_test.sh starts both). Reports throughput,
+latency percentiles and status codes per endpoint.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import Engine, select
+
+from benchmarks.stats import build_report, summarize, write_report
+
+ORIGIN = "http://localhost:3000"
+
+
+@dataclass
+class Account:
+    user_id: int
+    email: str
+    is_tutor: bool
+    # (chat id, other user id)
+    chats: List[Tuple[int, int]] = field(default_factory=list)
+    # (assignment request id, tutor id) of requests awaiting this parent
+    pending_requests: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def load_accounts(
+    engine: Engine, parents: int, tutors: int, email_domain: str
+) -> List[Account]:
+    """
+    Pick verified parents who have pending tutor requests and verified tutors,
+    along with their chats and pending requests.
+    """
+    from api.storage.models import (
+        Assignment,
+        AssignmentRequest,
+        AssignmentRequestStatus,
+        EmailVerificationStatus,
+        PrivateChat,
+        User,
+    )
+
+    verified = (
+        User.email_verification_status == EmailVerificationStatus.VERIFIED,
+        User.email.endswith(f"@{email_domain}"),
+    )
+    with engine.connect() as connection:
+        parent_rows = connection.execute(
+            select(User.id, User.email)
+            .where(
+                *verified,
+                User.intends_to_be_tutor.is_(False),
+                User.id.in_(
+                    select(Assignment.owner_id)
+                    .join(AssignmentRequest)
+                    .where(AssignmentRequest.status == AssignmentRequestStatus.PENDING)
+                ),
+            )
+            .order_by(User.id)
+            .limit(parents)
+        ).all()
+        tutor_rows = connection.execute(
+            select(User.id, User.email)
+            .where(*verified, User.intends_to_be_tutor.is_(True))
+            .order_by(User.id)
+            .limit(tutors)
+        ).all()
+        accounts = {
+            user_id: Account(user_id, email, is_tutor=False)
+            for user_id, email in parent_rows
+        }
+        accounts.update(
+            {
+                user_id: Account(user_id, email, is_tutor=True)
+                for user_id, email in tutor_rows
+            }
+        )
+        ids = list(accounts)
+        for request_id, tutor_id, owner_id in connection.execute(
+            select(
+                AssignmentRequest.id, AssignmentRequest.tutor_id, Assignment.owner_id
+            )
+            .join(Assignment)
+            .where(
+                Assignment.owner_id.in_(ids),
+                AssignmentRequest.status == AssignmentRequestStatus.PENDING,
+            )
+        ):
+            accounts[owner_id].pending_requests.append((request_id, tutor_id))
+        for chat_id, user1_id, user2_id in connection.execute(
+            select(PrivateChat.id, PrivateChat.user1_id, PrivateChat.user2_id).where(
+                PrivateChat.user1_id.in_(ids) | PrivateChat.user2_id.in_(ids)
+            )
+        ):
+            if user1_id in accounts:
+                accounts[user1_id].chats.append((chat_id, user2_id))
+            if user2_id in accounts:
+                accounts[user2_id].chats.append((chat_id, user1_id))
+    return list(accounts.values())
+
+
+class Recorder:
+    """Collects latencies and status codes per endpoint."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, elapsed: float, status: str) -> None:
+        self.samples[endpoint].append(elapsed)
+        self.statuses[endpoint][status] += 1
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        account: Account,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        rng: random.Random,
+        think_time: float,
+    ):
+        self.account = account
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+
+    async def request(
+        self, method: str, route: str, path: Optional[str] = None, **kwargs
+    ) -> Optional[httpx.Response]:
+        """
+        Send a request and record it under its route template, e.g.
+        "GET /api/assignments/{id}".
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path or route, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.recorder.record(f"{method} {route}", time.perf_counter() - start, status)
+        if self.think_time:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.think_time))
+        return response if response is not None and response.is_success else None
+
+    async def login(self, password: str) -> bool:
+        response = await self.request(
+            "POST",
+            "/api/auth/login",
+            json={"email": self.account.email, "password": password},
+        )
+        return response is not None
+
+    async def browse(self) -> Optional[dict]:
+        page = await self.request(
+            "GET",
+            "/api/assignments",
+            params={"page_size": 10, "page_number": self.rng.randint(1, 5)},
+        )
+        results = page.json()["results"] if page is not None else []
+        if not results:
+            return None
+        assignment = self.rng.choice(results)
+        await self.request(
+            "GET", "/api/assignments/{id}", f"/api/assignments/{assignment['id']}"
+        )
+        return assignment
+
+    async def chat(self) -> None:
+        await self.request("GET", "/api/chats")
+        if not self.account.chats:
+            return
+        chat_id, other_user_id = self.rng.choice(self.account.chats)
+        await self.request("GET", "/api/chat/{id}", f"/api/chat/{chat_id}")
+        await self.request(
+            "POST",
+            "/api/chat/send-message-to-user",
+            json={
+                "to_user_id": other_user_id,
+                "content": self.rng.choice(
+                    ["Sounds good!", "Can we move to 5pm?", "See you on Saturday."]
+                ),
+            },
+        )
+
+    async def parent_journey(self) -> None:
+        await self.browse()
+        if self.account.pending_requests:
+            request_id, tutor_id = self.rng.choice(self.account.pending_requests)
+            await self.request("GET", "/api/tutors/{id}", f"/api/tutors/{tutor_id}")
+        await self.chat()
+        if self.account.pending_requests:
+            await self.request(
+                "POST",
+                "/api/payment/create-checkout-session",
+                json={
+                    "mode": "payment",
+                    "success_url": f"{ORIGIN}/payment/success",
+                    "cancel_url": f"{ORIGIN}/payment/cancel",
+                    "assignment_request_id": request_id,
+                    "tutor_id": tutor_id,
+                },
+            )
+
+    async def tutor_journey(self) -> None:
+        assignment = await self.browse()
+        if assignment is not None and not assignment.get("applied"):
+            # Applying twice is rejected by the API; both outcomes are recorded
+            await self.request(
+                "POST",
+                "/api/assignment-requests/new",
+                json={
+                    "assignment_id": assignment["id"],
+                    "available_slots": [
+                        {"day": "Saturday", "start_time": "10:00", "end_time": "12:00"}
+                    ],
+                },
+            )
+        await self.chat()
+
+    async def run(self, deadline: float, iterations: int) -> None:
+        done = 0
+        while time.perf_counter() < deadline and (not iterations or done < iterations):
+            if self.account.is_tutor:
+                await self.tutor_journey()
+            else:
+                await self.parent_journey()
+            done += 1
+
+
+async def _run_users(
+    args: argparse.Namespace,
+    accounts: List[Account],
+    recorder: Recorder,
+    transport: Optional[httpx.AsyncBaseTransport],
+) -> None:
+    async def run_user(index: int, account: Account) -> None:
+        rng = random.Random(f"{args.seed}:{index}")
+        # Stagger arrivals over the ramp-up so logins don't all land at once
+        await asyncio.sleep(args.ramp_up * index / max(len(accounts), 1))
+        async with httpx.AsyncClient(
+            base_url=args.base_url,
+            transport=transport,
+            headers={"Origin": ORIGIN},
+            timeout=args.timeout,
+        ) as client:
+            user = VirtualUser(account, client, recorder, rng, args.think_ms / 1000)
+            if await user.login(args.password):
+                await user.run(deadline, args.iterations)
+
+    deadline = time.perf_counter() + args.ramp_up + args.duration
+    await asyncio.gather(*(run_user(i, a) for i, a in enumerate(accounts)))
+
+
+def run(
+    args: argparse.Namespace,
+    engine: Optional[Engine] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict:
+    if engine is None:
+        from api.storage.storage_service import StorageService
+
+        engine = StorageService.engine
+    tutors = round(args.users * args.tutor_share)
+    accounts = load_accounts(engine, args.users - tutors, tutors, args.email_domain)
+    if not accounts:
+        raise RuntimeError(
+            "No accounts to log in as; generate data with api.storage.synthetic_data."
+        )
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    asyncio.run(_run_users(args, accounts, recorder, transport))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in sorted(recorder.samples):
+        results[endpoint] = {
+            **summarize(recorder.samples[endpoint], elapsed),
+            "status_codes": dict(recorder.statuses[endpoint]),
+        }
+    results["total"] = summarize(
+        [sample for samples in recorder.samples.values() for sample in samples],
+        elapsed,
+    )
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "base_url",
+            "users",
+            "tutor_share",
+            "duration",
+            "iterations",
+            "ramp_up",
+            "think_ms",
+            "seed",
+        )
+    }
+    config["accounts"] = len(accounts)
+    return build_report("load_test", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Virtual users.")
+    parser.add_argument(
+        "--tutor-share", type=float, default=0.5, help="Share of users who are tutors."
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60.0, help="Seconds to run after ramp-up."
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=0,
+        help="Stop each user after this many journeys (0 runs until --duration).",
+    )
+    parser.add_argument(
+        "--ramp-up", type=float, default=5.0, help="Seconds over which users start."
+    )
+    parser.add_argument(
+        "--think-ms", type=float, default=200.0, help="Mean pause between requests."
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--email-domain", default="synthetic.example.com")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for endpoint, summary in report["results"].items():
+        codes = summary.get("status_codes", {})
+        print(
+            f"{endpoint:>45}: {summary['messages_per_sec']:8.1f} req/s "
+            f"p50={summary['p50_ms']:.0f}ms p90={summary['p90_ms']:.0f}ms "
+            f"p99={summary['p99_ms']:.0f}ms {codes or ''}"
+        )
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
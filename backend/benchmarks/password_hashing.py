@@ -0,0 +1,139 @@
+"""
+Password hashing benchmark: concurrent logins vs chat latency on one event loop.
+
+Runs bursts of concurrent bcrypt verifications while a simulated chat relay
+passes messages through the same event loop, and reports login latency and how
+long chat messages wait:
+
+    poetry run python -m benchmarks.password_hashing --logins 32 --rounds 12
+
+`inline` replays the previous design (bcrypt called directly inside the async
+route); `threads` and `processes` run it through PasswordHasher.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import bcrypt
+
+from api.auth.password_hasher import PasswordHasher
+from benchmarks.stats import Timer, build_report, summarize, write_report
+
+PASSWORD = "benchmark-password-123"
+
+
+class InlineHasher:
+    """
+    The previous login path: bcrypt runs on the event loop itself.
+    """
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+    def shutdown(self) -> None:
+        pass
+
+
+async def _chat_relay(interval: float, latencies: List[float], stop: asyncio.Event):
+    """
+    Send a chat message every `interval` seconds through a queue and record
+    how long each one waits before it is delivered.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            sent_at = await queue.get()
+            latencies.append(time.perf_counter() - sent_at)
+
+    delivery = asyncio.create_task(deliver())
+    while not stop.is_set():
+        queue.put_nowait(time.perf_counter())
+        await asyncio.sleep(interval)
+    await asyncio.sleep(interval)
+    delivery.cancel()
+
+
+async def _run_design(design: str, args: argparse.Namespace, hashed: str) -> Dict:
+    if design == "inline":
+        hasher = InlineHasher()
+    else:
+        hasher = PasswordHasher(
+            workers=args.workers if design == "processes" else 0,
+            max_pending=args.logins * args.bursts,
+            rounds=args.rounds,
+        )
+        # Start the pool outside the measured window
+        await hasher.verify(PASSWORD, hashed)
+
+    logins: List[float] = []
+    chat: List[float] = []
+    stop = asyncio.Event()
+
+    async def login():
+        start = time.perf_counter()
+        await hasher.verify(PASSWORD, hashed)
+        logins.append(time.perf_counter() - start)
+
+    relay = asyncio.create_task(_chat_relay(args.chat_interval_ms / 1000, chat, stop))
+    with Timer() as timer:
+        for _ in range(args.bursts):
+            await asyncio.gather(*(login() for _ in range(args.logins)))
+    stop.set()
+    await relay
+    hasher.shutdown()
+
+    return {
+        "login": summarize(logins, timer.elapsed),
+        "chat_delivery": summarize(chat),
+        "wall_time_s": round(timer.elapsed, 3),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(args.rounds)).decode()
+    results = {}
+    for design in args.designs:
+        for stage, summary in asyncio.run(_run_design(design, args, hashed)).items():
+            results[f"{design}.{stage}"] = summary
+    config = {
+        key: getattr(args, key)
+        for key in ("logins", "bursts", "rounds", "workers", "chat_interval_ms")
+    }
+    return build_report("password_hashing", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32, help="Logins per burst.")
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chat-interval-ms", type=float, default=5.0)
+    parser.add_argument(
+        "--designs",
+        type=lambda v: v.split(","),
+        default=["inline", "threads", "processes"],
+        help="Comma separated designs to run: inline, threads, processes.",
+    )
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for stage, summary in report["results"].items():
+        if isinstance(summary, dict):
+            print(
+                f"{stage:>28}: p50={summary['p50_ms']:.3f}ms "
+                f"p99={summary['p99_ms']:.3f}ms"
+            )
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
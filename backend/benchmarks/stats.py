@@ -0,0 +1,140 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Return the q-th percentile (0-100) of `samples` using linear interpolation.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * (q / 100)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = rank - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def summarize(samples: Sequence[float], wall_time: Optional[float] = None) -> Dict:
+    """
+    Summarize latency samples (in seconds) as milliseconds plus throughput.
+
+    `wall_time` is the elapsed time for the whole batch. When omitted the
+    samples are assumed to have run back to back, so throughput is derived from
+    their sum.
+    """
+    count = len(samples)
+    total = sum(samples)
+    elapsed = wall_time if wall_time is not None else total
+    return {
+        "count": count,
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p90_ms": round(percentile(samples, 90) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+        "mean_ms": round((total / count) * 1000, 4) if count else 0.0,
+        "max_ms": round(max(samples) * 1000, 4) if count else 0.0,
+        "messages_per_sec": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+class Timer:
+    """Context manager recording the elapsed wall time in seconds."""
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self.start
+
+
+def _git_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(__file__),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_report(name: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict:
+    """
+    Wrap benchmark results with the metadata needed to compare runs across commits.
+    """
+    return {
+        "benchmark": name,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+
+
+def write_report(report: Dict, output: Optional[str] = None) -> str:
+    """
+    Write a report as JSON and return the path it was written to.
+
+    Defaults to `benchmarks/results/<benchmark>-<commit>.json`.
+    """
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR, f"{report['benchmark']}-{report['commit']}.json"
+        )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return output
+
+
+def compare_reports(baseline: Dict, candidate: Dict) -> List[Dict]:
+    """
+    Compare two reports of the same benchmark, stage by stage.
+
+    Returns one row per (stage, metric) with the relative change, where a
+    positive `change_pct` means the candidate got slower (or lower throughput).
+    """
+    rows = []
+    for stage, base_summary in baseline["results"].items():
+        cand_summary = candidate["results"].get(stage)
+        if not isinstance(base_summary, dict) or not isinstance(cand_summary, dict):
+            continue
+        for metric in ("p50_ms", "p99_ms", "messages_per_sec"):
+            if metric not in base_summary or metric not in cand_summary:
+                continue
+            before = base_summary[metric]
+            after = cand_summary[metric]
+            if before == 0:
+                change = 0.0
+            elif metric == "messages_per_sec":
+                change = (before - after) / before * 100
+            else:
+                change = (after - before) / before * 100
+            rows.append(
+                {
+                    "stage": stage,
+                    "metric": metric,
+                    "baseline": before,
+                    "candidate": after,
+                    "change_pct": round(change, 2),
+                }
+            )
+    return rows
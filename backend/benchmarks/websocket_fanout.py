@@ -0,0 +1,200 @@
+"""
+WebSocket notification fan-out benchmark.
+
+Connects thousands of simulated sockets to WebSocketManager, a few of which are
+slow, then measures broadcast and personal-notification delivery latency:
+
+    poetry run python -m benchmarks.websocket_fanout --sockets 5000 --slow-fraction 0.01
+
+`serial` replays the previous design (global lock held while awaiting every
+send in turn) as a baseline; `queued` is the current WebSocketManager with
+per-connection send queues.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from api.router.websocket import WebSocketManager
+from api.services.connection_registry import connection_registry
+from benchmarks.stats import Timer, build_report, summarize, write_report
+
+
+class SimulatedSocket:
+    """
+    Stand-in for a starlette WebSocket that records when each message arrives.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.received: Dict[str, float] = {}
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, message: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received[message] = time.perf_counter()
+
+
+class SerialFanout:
+    """
+    The previous WebSocketManager send path: one lock, sends awaited in turn.
+    """
+
+    def __init__(self, connections: Dict[int, List[SimulatedSocket]]):
+        self.mutex = asyncio.Lock()
+        self.active_connections = connections
+
+    async def send_personal_notification(self, user_id: int, message: str):
+        async with self.mutex:
+            for connection in self.active_connections.get(user_id, []):
+                await connection.send_text(message)
+
+    async def broadcast_notification(self, message: str):
+        async with self.mutex:
+            for user_connections in self.active_connections.values():
+                for connection in user_connections:
+                    await connection.send_text(message)
+
+    async def flush(self):
+        pass
+
+
+def _make_sockets(args: argparse.Namespace) -> Dict[int, List[SimulatedSocket]]:
+    rng = random.Random(args.seed)
+    connections: Dict[int, List[SimulatedSocket]] = {}
+    for i in range(args.sockets):
+        user_id = i % args.users
+        slow = rng.random() < args.slow_fraction
+        latency = args.slow_latency_ms if slow else args.latency_ms
+        connections.setdefault(user_id, []).append(SimulatedSocket(latency))
+    return connections
+
+
+async def _run_design(design: str, args: argparse.Namespace) -> Dict:
+    connections = _make_sockets(args)
+    if design == "serial":
+        manager = SerialFanout(connections)
+    else:
+        manager = WebSocketManager
+        connection_registry.clear()
+        for user_id, sockets in connections.items():
+            for socket in sockets:
+                await WebSocketManager.connect(socket, user_id)
+
+    fast_sockets = [
+        s for sockets in connections.values() for s in sockets if s.latency == 0
+    ] or [s for sockets in connections.values() for s in sockets]
+    probe_user = next(
+        user_id
+        for user_id, sockets in connections.items()
+        if all(s.latency == 0 for s in sockets)
+    )
+
+    broadcast_returns = []
+    delivery = []
+    personal = []
+    with Timer() as timer:
+        for n in range(args.broadcasts):
+            message = f"broadcast-{n}"
+            start = time.perf_counter()
+            broadcast = asyncio.create_task(manager.broadcast_notification(message))
+            # A chat notification for one (fast) user sent while the broadcast runs
+            await asyncio.sleep(0)
+            personal_message = f"personal-{n}"
+            personal_start = time.perf_counter()
+            await manager.send_personal_notification(probe_user, personal_message)
+            await broadcast
+            broadcast_returns.append(time.perf_counter() - start)
+
+            deadline = time.perf_counter() + args.timeout
+            while time.perf_counter() < deadline and not all(
+                message in s.received for s in fast_sockets
+            ):
+                await asyncio.sleep(0.001)
+            delivery.extend(
+                s.received.get(message, deadline) - start for s in fast_sockets
+            )
+            probe = connections[probe_user][0]
+            personal.append(
+                probe.received.get(personal_message, deadline) - personal_start
+            )
+
+    if design == "queued":
+        connection_registry.clear()
+
+    return {
+        "broadcast_call": summarize(broadcast_returns),
+        "fast_client_delivery": summarize(delivery),
+        "personal_notification": summarize(personal),
+        "wall_time_s": round(timer.elapsed, 3),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    results = {}
+    for design in args.designs:
+        for stage, summary in asyncio.run(_run_design(design, args)).items():
+            results[f"{design}.{stage}"] = summary
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "sockets",
+            "users",
+            "broadcasts",
+            "latency_ms",
+            "slow_fraction",
+            "slow_latency_ms",
+            "seed",
+        )
+    }
+    return build_report("websocket_fanout", config, results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=4000)
+    parser.add_argument("--broadcasts", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.01)
+    parser.add_argument("--slow-latency-ms", type=float, default=200.0)
+    parser.add_argument(
+        "--designs",
+        type=lambda v: v.split(","),
+        default=["serial", "queued"],
+        help="Comma separated designs to run: serial, queued.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to wait for fast clients to receive each broadcast.",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Path of the JSON report to write.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    report = run(args)
+    path = write_report(report, args.output)
+    for stage, summary in report["results"].items():
+        if isinstance(summary, dict):
+            print(
+                f"{stage:>36}: p50={summary['p50_ms']:.3f}ms "
+                f"p99={summary['p99_ms']:.3f}ms"
+            )
+    print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""add_pending_chat_notification
+
+Revision ID: 5a2d9e61b7c4
+Revises: c3bf7a0349b1
+Create Date: 2026-10-19 10:12:41.204318
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a2d9e61b7c4"
+down_revision: Union[str, Sequence[str], None] = "c3bf7a0349b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "PendingChatNotification",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("receiver_id", sa.Integer(), nullable=False),
+        sa.Column("origin", sa.String(), nullable=True),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["chat_id"], ["PrivateChat.id"]),
+        sa.ForeignKeyConstraint(["receiver_id"], ["User.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "chat_id", "receiver_id", name="uix_pending_chat_notification"
+        ),
+    )
+    op.create_index(
+        op.f("ix_PendingChatNotification_due_at"),
+        "PendingChatNotification",
+        ["due_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_PendingChatNotification_due_at"),
+        table_name="PendingChatNotification",
+    )
+    op.drop_table("PendingChatNotification")
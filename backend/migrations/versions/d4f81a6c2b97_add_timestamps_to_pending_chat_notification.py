@@ -0,0 +1,53 @@
+"""add_timestamps_to_pending_chat_notification
+
+Revision ID: d4f81a6c2b97
+Revises: b71f3c8a2e05
+Create Date: 2026-10-20 09:41:17.602853
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4f81a6c2b97"
+down_revision: Union[str, Sequence[str], None] = "b71f3c8a2e05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("created_at", "updated_at")
+
+
+def _existing_columns() -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {
+        column["name"] for column in inspector.get_columns("PendingChatNotification")
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Some databases were migrated with a version of 5a2d9e61b7c4 that
+    # already created these columns
+    existing = _existing_columns()
+    for name in COLUMNS:
+        if name not in existing:
+            op.add_column(
+                "PendingChatNotification",
+                sa.Column(
+                    name,
+                    sa.DateTime(timezone=True),
+                    server_default=sa.text("now()"),
+                    nullable=True,
+                ),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing_columns()
+    for name in COLUMNS:
+        if name in existing:
+            op.drop_column("PendingChatNotification", name)
@@ -11,7 +11,7 @@ export TESTING=true
 
 # Format all Python files in the backend directory
 echo "Formatting Python files with Ruff..."
-poetry run ruff format api/ tests/ --check
+poetry run ruff format api/ tests/ benchmarks/ --check
 
 # Capture the exit code from ruff format
 FORMAT_EXIT_CODE=$?
@@ -20,13 +20,13 @@ if [ $FORMAT_EXIT_CODE -eq 0 ]; then
     echo "✅ All Python files are properly formatted!"
 else
     echo "❌ Some Python files need formatting. Running format..."
-    poetry run ruff format api/ tests/
+    poetry run ruff format api/ tests/ benchmarks/
     echo "✅ Python files have been formatted!"
 fi
 
 # Also run Ruff linting to fix any auto-fixable issues
 echo "🔧 Running Ruff linting with auto-fix..."
-poetry run ruff check api/ tests/ --fix
+poetry run ruff check api/ tests/ benchmarks/ --fix
 
 # Capture the exit code from ruff check
 LINT_EXIT_CODE=$?
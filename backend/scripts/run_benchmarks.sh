@@ -0,0 +1,25 @@
+#!/bin/bash
+
+# Benchmark runner script for the backend
+# Writes JSON reports to benchmarks/results/ (named after the current commit)
+
+echo "⏱️  Running Backend Benchmarks"
+echo "============================="
+
+# Set environment variables for benchmarking
+export TESTING=true
+
+echo "Running content filter benchmark..."
+poetry run python -m benchmarks.content_filter "$@"
+
+BENCH_EXIT_CODE=$?
+
+echo ""
+if [ $BENCH_EXIT_CODE -eq 0 ]; then
+    echo "✅ Benchmarks completed!"
+    echo "📊 Compare runs with: poetry run python -m benchmarks.compare <baseline.json> <candidate.json>"
+else
+    echo "❌ Benchmarks failed with exit code $BENCH_EXIT_CODE"
+fi
+
+exit $BENCH_EXIT_CODE
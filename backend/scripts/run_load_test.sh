@@ -0,0 +1,42 @@
+#!/bin/bash
+
+# Load test runner script for the backend
+# Starts the fake external services and the app pointed at them, then runs the
+# scripted user journeys against it. Fill the database first with
+#   poetry run python -m api.storage.synthetic_data
+# Extra arguments are passed to benchmarks.load_test, e.g. --users 100 --duration 120
+
+echo "🚦 Running Backend Load Test"
+echo "============================"
+
+PORT=${PORT:-8000}
+FAKES_PORT=${FAKES_PORT:-9100}
+WORKERS=${WORKERS:-1}
+
+ENV_FILE=$(mktemp)
+trap 'kill $FAKES_PID $APP_PID 2>/dev/null; rm -f "$ENV_FILE"' EXIT
+
+echo "Starting fake services on port $FAKES_PORT..."
+poetry run python -m benchmarks.fake_services --port "$FAKES_PORT" ${FAKE_LATENCY_MS:+--latency-ms "$FAKE_LATENCY_MS"} > "$ENV_FILE" &
+FAKES_PID=$!
+until grep -q "listening" "$ENV_FILE" 2>/dev/null; do sleep 0.2; done
+source <(grep "^export" "$ENV_FILE")
+
+echo "Starting the app on port $PORT with $WORKERS worker(s)..."
+poetry run uvicorn api.index:app --port "$PORT" --workers "$WORKERS" --log-level warning &
+APP_PID=$!
+until curl -sf "http://localhost:$PORT/api/ping" > /dev/null; do sleep 0.5; done
+
+poetry run python -m benchmarks.load_test --base-url "http://localhost:$PORT" "$@"
+
+LOAD_EXIT_CODE=$?
+
+echo ""
+if [ $LOAD_EXIT_CODE -eq 0 ]; then
+    echo "✅ Load test completed!"
+    echo "📊 Compare runs with: poetry run python -m benchmarks.compare <baseline.json> <candidate.json>"
+else
+    echo "❌ Load test failed with exit code $LOAD_EXIT_CODE"
+fi
+
+exit $LOAD_EXIT_CODE
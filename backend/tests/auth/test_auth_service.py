@@ -1,9 +1,11 @@
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
 import httpx
 import pytest
 from api.auth.auth_service import AuthService
+from api.auth.jwt_backend import jwt_backend
 from api.auth.models import TokenData, TokenPair
 from api.storage.models import User
 from jose import JWTError
@@ -174,8 +176,8 @@ class TestAuthService:
     @pytest.mark.unit
     @pytest.mark.auth
     @pytest.mark.asyncio
-    @patch("httpx.AsyncClient")
-    async def test_authenticate_google_user_success(self, mock_client):
+    @patch("api.auth.auth_service.http_client")
+    async def test_authenticate_google_user_success(self, mock_http_client):
         """Test successful Google authentication"""
         # Mock the responses
         mock_token_response = Mock()
@@ -201,7 +203,7 @@ class TestAuthService:
 
         mock_client_instance.post = mock_post
         mock_client_instance.get = mock_get
-        mock_client.return_value = mock_client_instance
+        mock_http_client.client = mock_client_instance
 
         # Mock StorageService methods
         with patch("api.auth.auth_service.StorageService") as mock_storage:
@@ -223,8 +225,10 @@ class TestAuthService:
     @pytest.mark.unit
     @pytest.mark.auth
     @pytest.mark.asyncio
-    @patch("httpx.AsyncClient")
-    async def test_authenticate_google_user_token_exchange_failure(self, mock_client):
+    @patch("api.auth.auth_service.http_client")
+    async def test_authenticate_google_user_token_exchange_failure(
+        self, mock_http_client
+    ):
         """Test Google authentication with token exchange failure"""
         # Mock the responses
         mock_client_instance = Mock()
@@ -233,7 +237,7 @@ class TestAuthService:
             raise httpx.HTTPError("Token exchange failed")
 
         mock_client_instance.post = mock_post
-        mock_client.return_value = mock_client_instance
+        mock_http_client.client = mock_client_instance
 
         with pytest.raises(httpx.HTTPError):
             await AuthService.authenticate_google_user("mock_auth_code")
@@ -266,3 +270,88 @@ class TestAuthService:
 
         assert token_pair.access_token == "mock_access_token"
         assert token_pair.refresh_token == "mock_refresh_token"
+
+
+class TestTokenCache:
+    """Test cases for caching verified token claims"""
+
+    def setup_method(self):
+        AuthService.clear_token_cache()
+
+    def teardown_method(self):
+        AuthService.clear_token_cache()
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_repeated_verification_skips_decode(self):
+        """Test a token is only decoded the first time it is presented"""
+        token_data = TokenData(email="test@example.com", token_version=3)
+        access_token = AuthService.create_access_token(token_data)
+
+        with patch(
+            "api.auth.auth_service.jwt_backend.decode",
+            wraps=jwt_backend.decode,
+        ) as mock_decode:
+            first = AuthService.verify_token(access_token)
+            second = AuthService.verify_token(access_token)
+
+        assert first == second == token_data
+        assert first is not second
+        mock_decode.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_access_and_refresh_are_cached_separately(self):
+        """Test a cached access token is not accepted as a refresh token"""
+        token_data = TokenData(email="test@example.com", token_version=0)
+        access_token = AuthService.create_access_token(token_data)
+        AuthService.verify_token(access_token)
+
+        with pytest.raises(JWTError):
+            AuthService.verify_token(access_token, is_refresh=True)
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_cached_token_expires_with_the_token(self):
+        """Test a cached token is rejected once its exp has passed"""
+        token_data = TokenData(email="test@example.com", token_version=0)
+        access_token = AuthService.create_access_token(
+            token_data, expires_delta=timedelta(seconds=30)
+        )
+        AuthService.verify_token(access_token)
+
+        with (
+            patch("api.auth.auth_service.time.time", return_value=time.time() + 60),
+            patch("jose.jwt.datetime") as mock_datetime,
+        ):
+            mock_datetime.now.return_value = datetime.now(timezone.utc) + timedelta(
+                seconds=60
+            )
+            with pytest.raises(JWTError):
+                AuthService.verify_token(access_token)
+
+        assert len(AuthService._token_cache) == 0
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_cache_is_bounded(self):
+        """Test the least recently used tokens are evicted past the size limit"""
+        tokens = [
+            AuthService.create_access_token(
+                TokenData(email=f"user{i}@example.com", token_version=0)
+            )
+            for i in range(3)
+        ]
+        with patch("api.auth.auth_service.settings") as mock_settings:
+            mock_settings.token_cache_size = 2
+            for token in tokens:
+                AuthService.verify_token(token)
+            # Touch the oldest so the second token is evicted next
+            AuthService.verify_token(tokens[1])
+            AuthService.verify_token(tokens[0])
+
+        assert len(AuthService._token_cache) == 2
+        cached_emails = {
+            claims.email for claims, _ in AuthService._token_cache.values()
+        }
+        assert cached_emails == {"user0@example.com", "user1@example.com"}
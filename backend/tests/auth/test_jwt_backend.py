@@ -0,0 +1,59 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from api.auth.jwt_backend import JoseBackend, PyJWTBackend, make_jwt_backend
+from jose import JWTError
+from jose.exceptions import ExpiredSignatureError
+
+
+class TestJwtBackend:
+    """Test cases for the pluggable JWT backends"""
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_jose_round_trip(self):
+        """Test claims survive encoding and decoding"""
+        backend = JoseBackend()
+        token = backend.encode({"email": "test@example.com"}, "secret", "HS256")
+
+        assert backend.decode(token, "secret", ["HS256"]) == {
+            "email": "test@example.com"
+        }
+        with pytest.raises(JWTError):
+            backend.decode(token, "other-secret", ["HS256"])
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_pyjwt_matches_jose(self):
+        """Test PyJWT reads jose tokens and raises jose's errors"""
+        pytest.importorskip("jwt")
+        backend = PyJWTBackend()
+        expired = {"exp": datetime.now(timezone.utc) - timedelta(minutes=1)}
+        token = JoseBackend().encode({"email": "test@example.com"}, "secret", "HS256")
+
+        assert backend.decode(token, "secret", ["HS256"]) == {
+            "email": "test@example.com"
+        }
+        with pytest.raises(JWTError):
+            backend.decode(token, "other-secret", ["HS256"])
+        with pytest.raises(ExpiredSignatureError):
+            backend.decode(
+                backend.encode(expired, "secret", "HS256"), "secret", ["HS256"]
+            )
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_pyjwt_requires_the_package(self):
+        """Test selecting PyJWT without it installed gives a clear error"""
+        with patch.dict(sys.modules, {"jwt": None}):
+            with pytest.raises(RuntimeError, match="PyJWT"):
+                make_jwt_backend("pyjwt")
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_unknown_backend(self):
+        """Test an unknown JWT_BACKEND is rejected"""
+        with pytest.raises(ValueError, match="Unknown JWT backend"):
+            make_jwt_backend("fastest")
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import bcrypt
+import pytest
+from api.auth.password_hasher import PasswordHasher
+from api.logic.auth_logic import AuthLogic
+from api.router.models import LoginRequest
+from api.storage.models import EmailVerificationStatus, User
+from api.storage.storage_service import StorageService
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+
+class TestPasswordHasher:
+    """Test cases for hashing passwords off the event loop"""
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_in_worker_processes(self):
+        """Test bcrypt runs in the process pool and round-trips"""
+        hasher = PasswordHasher(workers=1, rounds=4)
+        try:
+            hashed = await hasher.hash("testpassword123")
+
+            assert hashed.startswith("$2b$04$")
+            assert await hasher.verify("testpassword123", hashed) is True
+            assert await hasher.verify("wrongpassword", hashed) is False
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_empty_password_is_rejected(self):
+        """Test validation happens before anything is queued"""
+        hasher = PasswordHasher(workers=0, rounds=4)
+
+        with pytest.raises(ValueError):
+            await hasher.hash("")
+        with pytest.raises(ValueError):
+            await hasher.verify("password", "")
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_while_hashing(self):
+        """Test other coroutines run while a hash is being computed"""
+        hasher = PasswordHasher(workers=0, rounds=10)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticking = asyncio.create_task(ticker())
+        await hasher.hash("testpassword123")
+        ticking.cancel()
+        hasher.shutdown()
+
+        assert ticks > 5
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_full_queue_returns_503(self):
+        """Test callers beyond the pending limit are turned away after a wait"""
+        hasher = PasswordHasher(workers=0, max_pending=1, queue_timeout=0.05)
+        release = threading.Event()
+
+        with patch(
+            "api.auth.password_hasher.bcrypt.hashpw",
+            side_effect=lambda *args: release.wait(5) and b"hashed",
+        ):
+            first = asyncio.create_task(hasher.hash("first-password"))
+            await asyncio.sleep(0.01)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await hasher.hash("second-password")
+
+            release.set()
+            assert await first == "hashed"
+        hasher.shutdown()
+
+        assert exc_info.value.status_code == 503
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    def test_needs_rehash_compares_cost(self):
+        """Test hashes made with another cost are flagged for rehashing"""
+        hasher = PasswordHasher(workers=0, rounds=12)
+
+        assert hasher.needs_rehash("$2b$10$" + "a" * 53) is True
+        assert hasher.needs_rehash("$2b$12$" + "a" * 53) is False
+        assert hasher.needs_rehash("not-a-bcrypt-hash") is False
+
+
+class TestRehashOnLogin:
+    """Test cases for upgrading stored hashes when users log in"""
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_login_rehashes_with_configured_cost(self, test_engine):
+        """Test a hash made with an old cost is replaced after a good login"""
+        old_hash = bcrypt.hashpw(b"testpassword123", bcrypt.gensalt(4)).decode()
+        with Session(test_engine) as session:
+            user = User(
+                name="Rehash",
+                email="rehash@test.com",
+                password_hash=old_hash,
+                email_verification_status=EmailVerificationStatus.VERIFIED,
+            )
+            session.add(user)
+            session.commit()
+            user_id = user.id
+
+        hasher = PasswordHasher(workers=0, rounds=5)
+        try:
+            with (
+                patch.object(StorageService, "engine", test_engine),
+                patch("api.logic.auth_logic.password_hasher", hasher),
+            ):
+                await AuthLogic.handle_login(
+                    LoginRequest(email="rehash@test.com", password="testpassword123")
+                )
+
+            with Session(test_engine) as session:
+                new_hash = session.get(User, user_id).password_hash
+            assert new_hash.startswith("$2b$05$")
+            assert bcrypt.checkpw(b"testpassword123", new_hash.encode())
+        finally:
+            hasher.shutdown()
+            with Session(test_engine) as session:
+                session.query(User).filter_by(id=user_id).delete()
+                session.commit()
+
+    @pytest.mark.unit
+    @pytest.mark.auth
+    @pytest.mark.asyncio
+    async def test_login_holds_no_connection_while_hashing(self, test_engine):
+        """Test bcrypt runs after the login's session has given its connection back"""
+        old_hash = bcrypt.hashpw(b"testpassword123", bcrypt.gensalt(4)).decode()
+        with Session(test_engine) as session:
+            user = User(
+                name="Pool",
+                email="pool@test.com",
+                password_hash=old_hash,
+                email_verification_status=EmailVerificationStatus.VERIFIED,
+            )
+            session.add(user)
+            session.commit()
+            user_id = user.id
+
+        hasher = PasswordHasher(workers=0, rounds=5)
+        checked_out = []
+
+        def counting(method):
+            async def wrapper(*args):
+                checked_out.append(test_engine.pool.checkedout())
+                return await method(*args)
+
+            return wrapper
+
+        try:
+            with (
+                patch.object(StorageService, "engine", test_engine),
+                patch("api.logic.auth_logic.password_hasher", hasher),
+                patch.object(hasher, "verify", counting(hasher.verify)),
+                patch.object(hasher, "hash", counting(hasher.hash)),
+            ):
+                await AuthLogic.handle_login(
+                    LoginRequest(email="pool@test.com", password="testpassword123")
+                )
+
+            assert checked_out == [0, 0]
+        finally:
+            hasher.shutdown()
+            with Session(test_engine) as session:
+                session.query(User).filter_by(id=user_id).delete()
+                session.commit()
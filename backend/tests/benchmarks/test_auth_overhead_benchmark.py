@@ -0,0 +1,21 @@
+import pytest
+from api.auth.auth_service import AuthService
+from benchmarks.auth_overhead import build_parser, run
+
+
+class TestAuthOverheadBenchmark:
+    """Test cases for the auth overhead benchmark runner"""
+
+    @pytest.mark.unit
+    def test_run_produces_report(self):
+        """Test a small run reports cached and uncached verification"""
+        args = build_parser().parse_args(
+            ["--requests", "50", "--users", "5", "--backends", "jose"]
+        )
+
+        report = run(args)
+
+        assert report["benchmark"] == "auth_overhead"
+        for design in ("jose.uncached", "jose.cached"):
+            assert report["results"][design]["count"] == 50
+        assert len(AuthService._token_cache) == 0
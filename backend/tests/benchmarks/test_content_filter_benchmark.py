@@ -0,0 +1,117 @@
+import argparse
+import json
+
+import pytest
+from benchmarks.content_filter import build_parser, run
+from benchmarks.corpus import CATEGORIES, LONG_CONVERSATION, generate_corpus
+from benchmarks.fake_llm import FakeLLMProvider, FakeLLMProviderError
+from benchmarks.stats import compare_reports, percentile, summarize, write_report
+
+
+class TestStats:
+    """Test cases for benchmark statistics helpers"""
+
+    @pytest.mark.unit
+    def test_percentile_interpolates(self):
+        """Test percentile uses linear interpolation"""
+        samples = [1.0, 2.0, 3.0, 4.0]
+        assert percentile(samples, 0) == 1.0
+        assert percentile(samples, 50) == 2.5
+        assert percentile(samples, 100) == 4.0
+        assert percentile([], 50) == 0.0
+
+    @pytest.mark.unit
+    def test_summarize_uses_wall_time_for_throughput(self):
+        """Test summarize derives throughput from wall time when given"""
+        summary = summarize([0.1, 0.1, 0.1, 0.1], wall_time=0.1)
+        assert summary["count"] == 4
+        assert summary["p50_ms"] == 100.0
+        assert summary["messages_per_sec"] == 40.0
+
+    @pytest.mark.unit
+    def test_compare_reports(self):
+        """Test comparing two reports reports slowdowns as positive changes"""
+        baseline = {"results": {"stage": {"p50_ms": 10.0, "messages_per_sec": 100}}}
+        candidate = {"results": {"stage": {"p50_ms": 15.0, "messages_per_sec": 50}}}
+
+        rows = {row["metric"]: row for row in compare_reports(baseline, candidate)}
+
+        assert rows["p50_ms"]["change_pct"] == 50.0
+        assert rows["messages_per_sec"]["change_pct"] == 50.0
+
+
+class TestCorpus:
+    """Test cases for the synthetic chat corpus"""
+
+    @pytest.mark.unit
+    def test_corpus_is_deterministic(self):
+        """Test the same seed produces the same corpus"""
+        first = generate_corpus(50, seed=7)
+        second = generate_corpus(50, seed=7)
+        assert [m.as_filter_input() for m in first] == [
+            m.as_filter_input() for m in second
+        ]
+
+    @pytest.mark.unit
+    def test_corpus_categories(self):
+        """Test the corpus covers every category"""
+        corpus = generate_corpus(500, seed=1)
+        assert {m.category for m in corpus} == set(CATEGORIES)
+        for message in corpus:
+            if message.category == LONG_CONVERSATION:
+                assert len(message.history) == 20
+
+
+class TestFakeLLMProvider:
+    """Test cases for the fake LLM provider"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_fake_provider_returns_parsed_result(self):
+        """Test the fake provider returns a filter result dict"""
+        provider = FakeLLMProvider("fake", latency_ms=0, jitter_ms=0, pii_rate=1.0)
+
+        result = await provider("Meet me at the usual place", 0.7)
+
+        assert result["filtered"] is True
+        assert result["provider"] == "fake"
+        assert provider.calls == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_fake_provider_failures(self):
+        """Test the fake provider simulates failures and parse errors"""
+        failing = FakeLLMProvider("fake", latency_ms=0, jitter_ms=0, failure_rate=1.0)
+        with pytest.raises(FakeLLMProviderError):
+            await failing("message", 0.7)
+
+        unparseable = FakeLLMProvider(
+            "fake", latency_ms=0, jitter_ms=0, parse_failure_rate=1.0
+        )
+        result = await unparseable("message", 0.7)
+        assert result["reasoning"] == "Failed to parse LLM output."
+
+
+class TestContentFilterBenchmark:
+    """Test cases for the content filter benchmark runner"""
+
+    @pytest.mark.unit
+    def test_run_produces_report(self, tmp_path):
+        """Test a small run reports every stage and can be written as JSON"""
+        args = build_parser().parse_args(
+            ["--messages", "40", "--latency-ms", "0", "--jitter-ms", "0"]
+        )
+        assert isinstance(args, argparse.Namespace)
+
+        report = run(args)
+
+        assert report["benchmark"] == "content_filter"
+        assert report["config"]["messages"] == 40
+        for stage in ("manual_filter", "social_shares", "llm_path"):
+            summary = report["results"][stage]
+            assert summary["count"] == 40
+            assert {"p50_ms", "p99_ms", "messages_per_sec"} <= summary.keys()
+
+        path = write_report(report, str(tmp_path / "report.json"))
+        with open(path) as f:
+            assert json.load(f)["results"].keys() == report["results"].keys()
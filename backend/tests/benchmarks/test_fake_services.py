@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+from unittest.mock import patch
+
+import boto3
+import botocore.exceptions
+import pytest
+from api.config import settings
+from api.logic.payment_logic import stripe
+from api.services.content_filter_service import ContentFilterService
+from api.services.email_service import GmailEmailService
+from benchmarks.fake_services import SERVICES, FakeServices, parse_latencies
+
+
+@pytest.fixture
+def fakes():
+    services = FakeServices(latency_ms={service: 1 for service in SERVICES}).start()
+    yield services
+    services.stop()
+
+
+class TestFakeServices:
+    """Test cases for the local fakes of the external services"""
+
+    @pytest.mark.unit
+    def test_parse_latencies(self):
+        """Test per-service latencies are parsed and unknown services rejected"""
+        assert parse_latencies("stripe=300,llm=12.5") == {"stripe": 300, "llm": 12.5}
+        assert parse_latencies("") == {}
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_latencies("paypal=100")
+
+    @pytest.mark.unit
+    def test_env_points_every_service_at_the_fakes(self, fakes):
+        """Test the environment sends every outbound call to the fake server"""
+        env = fakes.env()
+
+        assert env["GOOGLE_TOKEN_URL"] == f"{fakes.url}/token"
+        for name in ("R2_ENDPOINT", "GMAIL_API_URL", "STRIPE_API_BASE"):
+            assert env[name] == fakes.url
+        for name in ("GROQ", "GEMINI", "HF", "MISTRAL"):
+            assert env[f"{name}_BASE_URL"] == fakes.url
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "provider",
+        [
+            "_groq_provider",
+            "_gemini_provider",
+            "_huggingface_provider",
+            "_mistral_provider",
+        ],
+    )
+    def test_llm_sdks_reach_the_fakes(self, fakes, provider):
+        """Test each LLM provider's SDK talks to the fake when its base URL is set"""
+        with patch.multiple(
+            settings,
+            groq_base_url=fakes.url,
+            gemini_base_url=fakes.url,
+            hf_base_url=fakes.url,
+            mistral_base_url=fakes.url,
+        ):
+            service = ContentFilterService()
+            result = asyncio.run(getattr(service, provider)("See you at 5pm", 0.7))
+
+        assert result["reasoning"] != "Failed to parse LLM output."
+        assert fakes.calls["llm"] == 1
+
+    @pytest.mark.unit
+    def test_gmail_sends_through_the_fakes(self, fakes):
+        """Test the Gmail client refreshes its token and sends via the fakes"""
+        GmailEmailService.clear_cache()
+        try:
+            with patch.multiple(
+                settings,
+                gmail_api_url=fakes.url,
+                google_token_url=f"{fakes.url}/token",
+            ):
+                credentials = GmailEmailService._get_credentials(
+                    "refresh-token", "client-id", "client-secret"
+                )
+                service = GmailEmailService._get_gmail_service(credentials)
+                sent = (
+                    service.users()
+                    .messages()
+                    .send(userId="me", body={"raw": "aGk="})
+                    .execute()
+                )
+        finally:
+            GmailEmailService.clear_cache()
+
+        assert sent["id"].startswith("fake-message-")
+        assert fakes.calls["google"] == 1
+        assert fakes.calls["gmail"] == 1
+
+    @pytest.mark.unit
+    def test_s3_objects_round_trip(self, fakes):
+        """Test objects put to the fake S3 can be read back and misses are 404s"""
+        s3 = boto3.client(
+            "s3",
+            endpoint_url=fakes.url,
+            aws_access_key_id="fake",
+            aws_secret_access_key="fake",
+            region_name="auto",
+        )
+
+        s3.put_object(Bucket="fake-bucket", Key="photos/1.png", Body=b"png")
+
+        assert (
+            s3.head_object(Bucket="fake-bucket", Key="photos/1.png")["ContentLength"]
+            == 3
+        )
+        body = s3.get_object(Bucket="fake-bucket", Key="photos/1.png")["Body"]
+        assert body.read() == b"png"
+        with pytest.raises(botocore.exceptions.ClientError):
+            s3.head_object(Bucket="fake-bucket", Key="photos/missing.png")
+
+    @pytest.mark.unit
+    def test_stripe_checkout_honours_idempotency_key(self, fakes):
+        """Test Stripe checkout sessions are created once per idempotency key"""
+        with (
+            patch.object(stripe, "api_key", "sk_test_fake"),
+            patch.object(stripe, "api_base", fakes.url),
+        ):
+            params = dict(
+                mode="payment",
+                success_url="http://localhost:3000/payment/success",
+                line_items=[{"price": "price_fake", "quantity": 1}],
+            )
+            first = stripe.checkout.Session.create(**params, idempotency_key="k1")
+            retry = stripe.checkout.Session.create(**params, idempotency_key="k1")
+            other = stripe.checkout.Session.create(**params, idempotency_key="k2")
+
+        assert first.id == retry.id
+        assert other.id != first.id
+        assert first.url.startswith(fakes.url)
+        assert fakes.calls["stripe"] == 3
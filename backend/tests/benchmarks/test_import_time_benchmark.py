@@ -0,0 +1,38 @@
+import pytest
+from benchmarks.import_time import build_parser, parse_importtime, run
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   jose.utils
+import time:       300 |        400 | jose
+import time:       200 |        200 |     stripe._error
+import time:       500 |        700 |   stripe
+import time:        50 |        750 | api
+"""
+
+
+class TestImportTimeBenchmark:
+    """Test cases for the import time benchmark runner"""
+
+    @pytest.mark.unit
+    def test_parse_importtime(self):
+        """Test totals only count top-level imports and self time is per package"""
+        total, packages, modules = parse_importtime(IMPORTTIME_OUTPUT)
+
+        assert total == pytest.approx(0.00115)
+        assert packages == pytest.approx(
+            {"jose": 0.0004, "stripe": 0.0007, "api": 0.00005}
+        )
+        assert modules == ["jose.utils", "jose", "stripe._error", "stripe", "api"]
+
+    @pytest.mark.unit
+    def test_app_import_skips_heavy_sdks(self):
+        """Test importing the app does not import any SDK eagerly"""
+        args = build_parser().parse_args(["--modules", "api.index", "--runs", "1"])
+
+        report = run(args)
+
+        assert report["benchmark"] == "import_time"
+        assert report["results"]["api.index.process"]["count"] == 1
+        assert report["results"]["api.index.top_packages_ms"]
+        assert report["results"]["api.index.sdks_loaded"] == []
@@ -0,0 +1,197 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from api.services.content_filter_service import ContentFilterService
+from benchmarks.corpus import BENIGN, PII, CorpusMessage
+from benchmarks.llm_replay import (
+    Cassette,
+    CassetteMissError,
+    Recording,
+    ReplayProvider,
+    VirtualClock,
+    capture,
+    prompt_hash,
+    replay,
+)
+
+BENIGN_MESSAGE = "Can we do the lessons on Monday afternoons instead?"
+PII_MESSAGE = "We stay at Blk 123 Bishan Ave 4 #05-123"
+
+
+def _content(has_pii: bool, confidence: float) -> str:
+    return json.dumps(
+        {
+            "has_pii": has_pii,
+            "detected_types": ["ADDRESS"] if has_pii else [],
+            "confidence": confidence,
+            "filtered_message": "[ADDRESS]" if has_pii else "",
+            "reasoning": "Recorded response.",
+        }
+    )
+
+
+def _recording(provider, message, latency_ms, expected_pii, **kwargs) -> Recording:
+    return Recording(
+        provider=provider,
+        message=message,
+        prompt_hash=prompt_hash(ContentFilterService()._build_prompt(message)),
+        latency_ms=latency_ms,
+        category=PII if expected_pii else BENIGN,
+        expected_pii=expected_pii,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def cassette():
+    """Two providers: a slow, accurate one and a fast, failing one"""
+    return Cassette(
+        [
+            _recording(
+                "slow", BENIGN_MESSAGE, 400, False, content=_content(False, 0.1)
+            ),
+            _recording("slow", PII_MESSAGE, 400, True, content=_content(True, 0.8)),
+            _recording("fast", BENIGN_MESSAGE, 100, False, error="503 Unavailable"),
+            _recording("fast", PII_MESSAGE, 100, True, content="not json"),
+        ]
+    )
+
+
+@pytest.fixture
+def service():
+    """Content filter with the manual filter disabled, so every message hits the LLMs"""
+    service = ContentFilterService()
+    with patch.object(
+        service,
+        "_manual_filter",
+        return_value={"filtered": False, "message": "", "provider": "manual_filter"},
+    ):
+        yield service
+
+
+class TestCassette:
+    """Test cases for cassette storage"""
+
+    @pytest.mark.unit
+    def test_save_and_load_round_trip(self, cassette, tmp_path):
+        """Test a cassette survives a JSON lines round trip"""
+        path = str(tmp_path / "cassette.jsonl")
+        cassette.save(path)
+
+        loaded = Cassette.load(path)
+
+        assert loaded.providers == ["slow", "fast"]
+        assert len(loaded.messages) == 2
+        assert loaded.get("fast", BENIGN_MESSAGE).error == "503 Unavailable"
+
+    @pytest.mark.unit
+    def test_get_missing_recording(self, cassette):
+        """Test looking up an unrecorded message raises CassetteMissError"""
+        with pytest.raises(CassetteMissError):
+            cassette.get("slow", "never recorded")
+
+
+class TestCapture:
+    """Test cases for recording provider responses"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_capture_records_content_and_errors(self):
+        """Test capture records raw content, errors and latency per provider"""
+        service = ContentFilterService()
+        corpus = [CorpusMessage(PII, PII_MESSAGE, expected_pii=True)]
+        responses = {"good-model": _content(True, 0.9)}
+
+        def fake_complete(client, prompt, model):
+            if model not in responses:
+                raise Exception("rate limited")
+            return responses[model]
+
+        def provider(model):
+            async def call(message, threshold):
+                return service._get_llm_response(
+                    None, message, model, threshold, message
+                )
+
+            call.__name__ = model
+            return call
+
+        with patch.object(service, "_complete", side_effect=fake_complete):
+            cassette = await capture(
+                service, corpus, [provider("good-model"), provider("bad-model")]
+            )
+
+        good = cassette.get("good-model", PII_MESSAGE)
+        assert good.content == responses["good-model"]
+        assert good.expected_pii is True
+        assert good.latency_ms >= 0
+        assert good.prompt_hash == prompt_hash(service._build_prompt(PII_MESSAGE))
+        assert cassette.get("bad-model", PII_MESSAGE).error == "rate limited"
+
+
+class TestReplay:
+    """Test cases for replaying a cassette"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_replay_provider_advances_virtual_clock(self, cassette):
+        """Test replayed calls add their recorded latency to the virtual clock"""
+        clock = VirtualClock()
+        provider = ReplayProvider("slow", cassette, clock, ContentFilterService())
+
+        result = await provider(PII_MESSAGE, 0.7)
+
+        assert result["filtered"] is True
+        assert clock.elapsed_ms == 400
+        assert provider.prompt_mismatches == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_fastest_first_scores_and_latency(self, cassette, service):
+        """Test fastest-first falls back past failures and simulates latency"""
+        summary = await replay(service, cassette, "fastest_first", 0.7)
+
+        # "fast" errors or fails to parse, so every message falls back to "slow"
+        assert summary["served_by"] == {"slow": 2}
+        assert summary["accuracy"] == 1.0
+        assert summary["recall"] == 1.0
+        assert summary["llm_calls_per_message"] == 2.0
+        assert summary["provider_error_rate"] == 0.25
+        assert summary["parse_failure_rate"] == 0.25
+        assert summary["p50_ms"] >= 500
+        assert summary["cassette_misses"] == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_threshold_changes_outcome(self, cassette, service):
+        """Test thresholds are re-applied to recorded confidences"""
+        summary = await replay(service, cassette, "fixed", 0.9)
+
+        assert summary["false_negatives"] == 1
+        assert summary["recall"] == 0.0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_replay_is_deterministic_and_restores_service(
+        self, cassette, service
+    ):
+        """Test seeded random replays match and the service is left untouched"""
+        original_providers = service.llm_providers
+
+        first = await replay(service, cassette, "random", 0.7, seed=3)
+        second = await replay(service, cassette, "random", 0.7, seed=3)
+
+        assert first["served_by"] == second["served_by"]
+        assert first["llm_calls"] == second["llm_calls"]
+        assert service.llm_providers is original_providers
+        assert "_order_providers" not in vars(service)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_prompt_drift_detected(self, cassette, service):
+        """Test replay flags recordings made with a different prompt"""
+        with patch.object(service, "_build_prompt", return_value="new prompt"):
+            summary = await replay(service, cassette, "fixed", 0.7)
+
+        assert summary["prompt_mismatches"] > 0
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import boto3
+import httpx
+import pytest
+from api.auth.password_hasher import PasswordHasher
+from api.config import settings
+from api.index import app
+from api.logic import auth_logic, user_logic
+from api.logic.payment_logic import stripe
+from api.storage.models import Base
+from api.storage.storage_service import StorageService
+from api.storage.synthetic_data import SyntheticDataConfig, SyntheticDataGenerator
+from benchmarks.fake_services import SERVICES, FakeServices
+from benchmarks.load_test import build_parser, load_accounts, run
+from sqlalchemy import create_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'load_test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    SyntheticDataGenerator(
+        engine, SyntheticDataConfig(users=60, assignments=40, chats=40, messages=200)
+    ).generate()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def fakes():
+    services = FakeServices(latency_ms={service: 1 for service in SERVICES}).start()
+    yield services
+    services.stop()
+
+
+class TestLoadTestBenchmark:
+    """Test cases for the end-to-end load test harness"""
+
+    @pytest.mark.unit
+    def test_load_accounts(self, engine):
+        """Test parents with pending requests and tutors are picked to log in as"""
+        accounts = load_accounts(engine, 3, 3, "synthetic.example.com")
+
+        parents = [account for account in accounts if not account.is_tutor]
+        tutors = [account for account in accounts if account.is_tutor]
+        assert len(parents) == 3
+        assert len(tutors) == 3
+        assert all(parent.pending_requests for parent in parents)
+
+    @pytest.mark.unit
+    def test_journeys_against_the_app(self, engine, fakes):
+        """Test scripted journeys run against the app with no server errors"""
+        s3 = boto3.client(
+            "s3",
+            endpoint_url=fakes.url,
+            aws_access_key_id="fake",
+            aws_secret_access_key="fake",
+            region_name="auto",
+        )
+        args = build_parser().parse_args(
+            [
+                "--base-url",
+                "http://testserver",
+                "--users",
+                "4",
+                "--iterations",
+                "1",
+                "--ramp-up",
+                "0",
+                "--think-ms",
+                "0",
+            ]
+        )
+
+        with (
+            patch.object(auth_logic, "password_hasher", PasswordHasher(workers=0)),
+            patch.object(StorageService, "engine", engine),
+            patch.object(user_logic, "s3_client", s3),
+            patch.object(stripe, "api_base", fakes.url),
+            patch.multiple(
+                settings,
+                groq_base_url=fakes.url,
+                gemini_base_url=fakes.url,
+                hf_base_url=fakes.url,
+                mistral_base_url=fakes.url,
+            ),
+        ):
+            report = run(args, engine=engine, transport=httpx.ASGITransport(app=app))
+
+        results = report["results"]
+        assert report["benchmark"] == "load_test"
+        assert report["config"]["accounts"] == 4
+        assert results["POST /api/auth/login"]["status_codes"] == {"200": 4}
+        assert results["GET /api/assignments"]["status_codes"] == {"200": 4}
+        assert results["POST /api/payment/create-checkout-session"]["status_codes"] == {
+            "200": 2
+        }
+        for endpoint, summary in results.items():
+            codes = summary.get("status_codes", {})
+            assert not any(code.startswith("5") for code in codes), endpoint
+        assert fakes.calls["stripe"] == 2
@@ -0,0 +1,20 @@
+import pytest
+from benchmarks.password_hashing import build_parser, run
+
+
+class TestPasswordHashingBenchmark:
+    """Test cases for the password hashing benchmark runner"""
+
+    @pytest.mark.unit
+    def test_run_produces_report(self):
+        """Test a small run reports login and chat latency for every design"""
+        args = build_parser().parse_args(
+            ["--logins", "3", "--bursts", "1", "--rounds", "4", "--workers", "1"]
+        )
+
+        report = run(args)
+
+        assert report["benchmark"] == "password_hashing"
+        for design in ("inline", "threads", "processes"):
+            assert report["results"][f"{design}.login"]["count"] == 3
+            assert report["results"][f"{design}.chat_delivery"]["count"] > 0
@@ -0,0 +1,35 @@
+import pytest
+from api.services.connection_registry import connection_registry
+from benchmarks.websocket_fanout import build_parser, run
+
+
+class TestWebSocketFanoutBenchmark:
+    """Test cases for the websocket fan-out benchmark runner"""
+
+    @pytest.mark.unit
+    def test_run_produces_report(self):
+        """Test a small run reports every design and leaves the manager empty"""
+        args = build_parser().parse_args(
+            [
+                "--sockets",
+                "200",
+                "--users",
+                "150",
+                "--broadcasts",
+                "2",
+                "--slow-latency-ms",
+                "5",
+                "--slow-fraction",
+                "0.05",
+            ]
+        )
+
+        report = run(args)
+
+        assert report["benchmark"] == "websocket_fanout"
+        for design in ("serial", "queued"):
+            for stage in ("broadcast_call", "fast_client_delivery"):
+                summary = report["results"][f"{design}.{stage}"]
+                assert {"p50_ms", "p99_ms"} <= summary.keys()
+            assert report["results"][f"{design}.personal_notification"]["count"] == 2
+        assert connection_registry.connections == {}
@@ -0,0 +1,43 @@
+import sys
+from unittest.mock import Mock
+
+import pytest
+from api.common.lazy_import import LazyProxy, lazy_module
+
+
+class TestLazyProxy:
+    """Test cases for LazyProxy and lazy_module"""
+
+    @pytest.mark.unit
+    def test_target_is_created_on_first_use(self):
+        """Test the factory runs once, on first attribute access"""
+        factory = Mock(return_value=Mock(value=42))
+        proxy = LazyProxy(factory)
+
+        factory.assert_not_called()
+        assert proxy.value == 42
+        assert proxy.value == 42
+        factory.assert_called_once()
+
+    @pytest.mark.unit
+    def test_attribute_writes_reach_the_target(self):
+        """Test setting and deleting attributes goes through to the target"""
+        target = Mock()
+        proxy = LazyProxy(lambda: target)
+
+        proxy.api_key = "secret"
+        assert target.api_key == "secret"
+        del proxy.api_key
+        assert "api_key" not in target.__dict__
+
+    @pytest.mark.unit
+    def test_lazy_module_imports_and_configures_once(self):
+        """Test the module is imported on first use and configured once"""
+        sys.modules.pop("colorsys", None)
+        on_import = Mock()
+        colorsys = lazy_module("colorsys", on_import=on_import)
+
+        assert "colorsys" not in sys.modules
+        assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        colorsys.hsv_to_rgb(0.0, 1.0, 1.0)
+        on_import.assert_called_once_with(sys.modules["colorsys"])
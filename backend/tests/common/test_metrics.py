@@ -0,0 +1,118 @@
+import pytest
+from api.common.metrics import (
+    MetricsRegistry,
+    external_call_duration,
+    metrics,
+    observe_external_call,
+)
+
+
+class TestMetricsRegistry:
+    """Test cases for the Prometheus metrics registry"""
+
+    @pytest.mark.unit
+    def test_counter_and_gauge_render(self):
+        """Test counters get a _total suffix and unlabelled metrics start at zero"""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests", "Requests.", ["method"])
+        in_flight = registry.gauge("in_flight", "In flight.")
+
+        requests.labels(method="GET").inc()
+        requests.labels("GET").inc(2)
+        before = registry.render()
+        in_flight.inc()
+
+        assert "# TYPE requests counter" in before
+        assert 'requests_total{method="GET"} 3.0' in before
+        assert "in_flight 0.0" in before
+        assert "in_flight 1.0" in registry.render()
+
+    @pytest.mark.unit
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets count every observation at or below their bound"""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency", "Latency.", ["route"], [0.1, 1.0])
+
+        for value in (0.05, 0.5, 0.5, 5.0):
+            latency.labels(route="/api/ping").observe(value)
+        text = registry.render()
+
+        assert 'latency_bucket{route="/api/ping",le="0.1"} 1' in text
+        assert 'latency_bucket{route="/api/ping",le="1.0"} 3' in text
+        assert 'latency_bucket{route="/api/ping",le="+Inf"} 4' in text
+        assert 'latency_count{route="/api/ping"} 4' in text
+        assert 'latency_sum{route="/api/ping"} 6.05' in text
+
+    @pytest.mark.unit
+    def test_label_values_are_escaped(self):
+        """Test quotes, backslashes and newlines in label values are escaped"""
+        registry = MetricsRegistry()
+        registry.counter("errors", "Errors.", ["reason"]).labels('a "b"\\\n').inc()
+
+        assert 'errors_total{reason="a \\"b\\"\\\\\\n"} 1.0' in registry.render()
+
+    @pytest.mark.unit
+    def test_gauge_callback_is_read_at_scrape_time(self):
+        """Test callback gauges report the callback's current values"""
+        registry = MetricsRegistry()
+        counts = {"chat": 2}
+        registry.gauge_callback(
+            "sockets", "Sockets.", lambda: dict(counts), ["channel"]
+        )
+
+        assert 'sockets{channel="chat"} 2' in registry.render()
+        counts["chat"] = 5
+        assert 'sockets{channel="chat"} 5' in registry.render()
+
+    @pytest.mark.unit
+    def test_failing_callback_does_not_break_render(self):
+        """Test a callback that raises is skipped and the other metrics still render"""
+        registry = MetricsRegistry()
+        registry.gauge_callback("broken", "Broken.", lambda: 1 / 0)
+        registry.gauge("working", "Working.").set(3)
+
+        text = registry.render()
+
+        assert "# broken failed" in text
+        assert "working 3.0" in text
+
+    @pytest.mark.unit
+    def test_duplicate_names_are_rejected(self):
+        """Test registering two metrics with the same name fails"""
+        registry = MetricsRegistry()
+        registry.counter("requests", "Requests.")
+
+        with pytest.raises(ValueError):
+            registry.gauge("requests", "Requests.")
+
+    @pytest.mark.unit
+    def test_wrong_labels_are_rejected(self):
+        """Test a metric refuses label values that don't match its label names"""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests", "Requests.", ["method", "route"])
+
+        with pytest.raises(ValueError):
+            requests.labels("GET")
+
+
+class TestObserveExternalCall:
+    """Test cases for timing calls to external services"""
+
+    @pytest.mark.unit
+    def test_records_outcome(self):
+        """Test calls are recorded as ok, or as error when they raise"""
+        ok = external_call_duration.labels(service="test", operation="ok", outcome="ok")
+        error = external_call_duration.labels(
+            service="test", operation="fail", outcome="error"
+        )
+        ok_before, error_before = ok.count, error.count
+
+        with observe_external_call("test", "ok"):
+            pass
+        with pytest.raises(RuntimeError):
+            with observe_external_call("test", "fail"):
+                raise RuntimeError("vendor down")
+
+        assert ok.count == ok_before + 1
+        assert error.count == error_before + 1
+        assert 'service="test",operation="fail",outcome="error"' in metrics.render()
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+from api.common.profiler import OFF_LOOP, SamplingProfiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler:
+    """Test cases for the per-request sampling profiler"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_samples_on_and_off_the_loop(self):
+        """Test sync work is sampled with its stack and waiting counts as off-loop"""
+        profiler = SamplingProfiler(interval=0.002)
+
+        async def handler():
+            _busy(0.1)
+            await asyncio.sleep(0.1)
+
+        with profiler.profile("GET /api/assignments") as profile:
+            await asyncio.create_task(handler())
+
+        busy = sum(
+            seconds
+            for stack, seconds in profile.samples.items()
+            if stack and stack[-1][0] == "_busy"
+        )
+        assert busy == pytest.approx(0.1, abs=0.03)
+        assert profile.samples[OFF_LOOP] == pytest.approx(0.1, abs=0.03)
+        assert any(
+            frame[0] == "handler" for stack in profile.samples for frame in stack
+        )
+        assert profiler.get(profile.id) is profile
+        assert profile.duration >= 0.2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_other_tasks_are_not_credited(self):
+        """Test work from requests that are not being profiled is left out"""
+        profiler = SamplingProfiler(interval=0.002)
+
+        async def other_request():
+            await asyncio.sleep(0.01)
+            _busy(0.1)
+
+        other = asyncio.create_task(other_request())
+        with profiler.profile("GET /api/ping") as profile:
+            await asyncio.sleep(0.15)
+        await other
+
+        assert set(profile.samples) == {OFF_LOOP}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_exports(self):
+        """Test profiles export as speedscope files and folded stacks"""
+        profiler = SamplingProfiler(interval=0.002)
+
+        with profiler.profile("GET /api/ping") as profile:
+            _busy(0.05)
+
+        speedscope = profile.speedscope()
+        (sampled,) = speedscope["profiles"]
+        frames = speedscope["shared"]["frames"]
+        assert sampled["type"] == "sampled"
+        assert len(sampled["samples"]) == len(sampled["weights"])
+        assert all(index < len(frames) for s in sampled["samples"] for index in s)
+        assert sampled["endValue"] == pytest.approx(sum(profile.samples.values()))
+        assert sampled["endValue"] == pytest.approx(0.05, abs=0.01)
+        for line in profile.collapsed().splitlines():
+            stack, weight = line.rsplit(" ", 1)
+            assert stack and int(weight) > 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sampler_recovers_from_errors(self):
+        """Test a failing sample stops only the current sampler thread"""
+        profiler = SamplingProfiler(interval=0.002)
+        loop = asyncio.get_running_loop()
+        factory = loop.get_task_factory()
+        tick = profiler._tick
+        profiler._tick = Mock(side_effect=RuntimeError("boom"))
+
+        with profiler.profile("GET /api/ping"):
+            await asyncio.sleep(0.02)
+        assert profiler._thread is None
+
+        profiler._tick = tick
+        with profiler.profile("GET /api/ping") as profile:
+            await asyncio.create_task(asyncio.sleep(0.02))
+
+        assert profile.samples
+        assert loop.get_task_factory() is factory
+
+    @pytest.mark.unit
+    def test_sample_rate(self):
+        """Test requests are sampled according to the configured share"""
+        assert not SamplingProfiler(sample_rate=0.0).should_sample()
+        assert SamplingProfiler(sample_rate=1.0).should_sample()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from api.common.tracing import (
+    CLIENT,
+    ConsoleSpanExporter,
+    OtlpHttpSpanExporter,
+    SpanContext,
+    Tracer,
+    traced_class,
+    tracer,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class TestSpanContext:
+    """Test cases for W3C traceparent headers"""
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        """Test a traceparent header is parsed and formatted back unchanged"""
+        header = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+        context = SpanContext.parse(header)
+
+        assert context == SpanContext(TRACE_ID, PARENT_ID, True)
+        assert context.traceparent == header
+        assert not SpanContext.parse(f"00-{TRACE_ID}-{PARENT_ID}-00").sampled
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "header",
+        [
+            None,
+            "",
+            "garbage",
+            f"00-{TRACE_ID}-short-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'z' * 16}-01",
+        ],
+    )
+    def test_invalid_headers_are_ignored(self, header):
+        """Test malformed or all-zero traceparent headers start a new trace"""
+        assert SpanContext.parse(header) is None
+
+
+class TestTracer:
+    """Test cases for spans, context propagation and exporters"""
+
+    @pytest.mark.unit
+    def test_disabled_tracer_records_nothing(self):
+        """Test spans are no-ops when no exporter is configured"""
+        disabled = Tracer()
+
+        with disabled.start_as_current_span("request") as span:
+            span.set_attribute("ignored", True)
+
+        assert not span.is_recording
+        assert disabled.inject({}) == {}
+
+    @pytest.mark.unit
+    def test_nested_spans_share_the_trace(self, span_exporter):
+        """Test child spans get the parent's trace id and link to its span id"""
+        with tracer.start_as_current_span("parent") as parent:
+            with tracer.start_as_current_span("child", CLIENT) as child:
+                child.set_attribute("db.operation", "SELECT")
+
+        spans = span_exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["child", "parent"]
+        assert child.context.trace_id == parent.context.trace_id
+        assert child.parent_id == parent.context.span_id
+        assert parent.parent_id is None
+        assert child.kind == CLIENT
+        assert child.attributes == {"db.operation": "SELECT"}
+
+    @pytest.mark.unit
+    def test_remote_parent_is_continued(self, span_exporter):
+        """Test a span started from a traceparent joins the caller's trace"""
+        parent = tracer.extract({"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+        with tracer.start_as_current_span("request", parent=parent) as span:
+            carrier = tracer.inject({})
+
+        assert span.context.trace_id == TRACE_ID
+        assert span.parent_id == PARENT_ID
+        assert carrier["traceparent"] == f"00-{TRACE_ID}-{span.context.span_id}-01"
+
+    @pytest.mark.unit
+    def test_exceptions_are_recorded(self, span_exporter):
+        """Test an exception escaping a span marks it as an error"""
+        with pytest.raises(ValueError):
+            with tracer.start_as_current_span("failing"):
+                raise ValueError("bad input")
+
+        (span,) = span_exporter.get_finished_spans()
+        assert span.status == "error"
+        assert span.events[0]["attributes"] == {
+            "exception.type": "ValueError",
+            "exception.message": "bad input",
+        }
+
+    @pytest.mark.unit
+    def test_unsampled_traces_stay_unsampled(self, span_exporter):
+        """Test nothing is recorded for a trace the sampler dropped"""
+        tracer.sample_rate = 0.0
+
+        with tracer.start_as_current_span("request") as root:
+            with tracer.start_as_current_span("child") as child:
+                pass
+
+        assert not root.is_recording
+        assert not child.is_recording
+        assert child.context.trace_id == root.context.trace_id
+        assert span_exporter.get_finished_spans() == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_context_follows_tasks_and_threads(self, span_exporter):
+        """Test spans started in tasks and threads are children of the current span"""
+
+        def in_thread():
+            with tracer.start_as_current_span("thread"):
+                pass
+
+        async def in_task():
+            with tracer.start_as_current_span("task"):
+                await asyncio.sleep(0)
+
+        with tracer.start_as_current_span("request") as request:
+            await asyncio.to_thread(in_thread)
+            await asyncio.create_task(in_task())
+
+        spans = {span.name: span for span in span_exporter.get_finished_spans()}
+        assert spans["thread"].parent_id == request.context.span_id
+        assert spans["task"].parent_id == request.context.span_id
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_traced_class_wraps_static_methods(self, span_exporter):
+        """Test every static method of a traced class runs in its own span"""
+
+        @traced_class
+        class ExampleLogic:
+            @staticmethod
+            def add(a, b):
+                return a + b
+
+            @staticmethod
+            async def fetch(value):
+                return ExampleLogic.add(value, 1)
+
+        assert await ExampleLogic.fetch(1) == 2
+        assert asyncio.iscoroutinefunction(ExampleLogic.fetch)
+
+        add, fetch = span_exporter.get_finished_spans()
+        assert fetch.name.endswith("ExampleLogic.fetch")
+        assert add.name.endswith("ExampleLogic.add")
+        assert add.parent_id == fetch.context.span_id
+
+    @pytest.mark.unit
+    def test_console_exporter(self, capsys):
+        """Test the console exporter prints one line per span"""
+        console = Tracer(ConsoleSpanExporter())
+
+        with console.start_as_current_span("GET /api/ping") as span:
+            span.set_attribute("http.status_code", 200)
+
+        output = capsys.readouterr().out
+        assert f"[trace {span.context.trace_id[:8]}] GET /api/ping" in output
+        assert "'http.status_code': 200" in output
+
+    @pytest.mark.unit
+    def test_otlp_exporter_posts_batches(self):
+        """Test spans are posted to the collector as OTLP/JSON"""
+        received = []
+
+        class Collector(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                received.append((self.path, json.loads(self.rfile.read(length))))
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Collector)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            exporter = OtlpHttpSpanExporter(
+                f"http://127.0.0.1:{server.server_address[1]}",
+                "test-service",
+                interval=0.05,
+            )
+            otlp = Tracer(exporter)
+            with otlp.start_as_current_span("parent"):
+                with otlp.start_as_current_span("child", CLIENT):
+                    pass
+            exporter.shutdown()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        path, body = received[0]
+        resource_spans = body["resourceSpans"][0]
+        spans = resource_spans["scopeSpans"][0]["spans"]
+        assert path == "/v1/traces"
+        assert {"key": "service.name", "value": {"stringValue": "test-service"}} in (
+            resource_spans["resource"]["attributes"]
+        )
+        assert [span["name"] for span in spans] == ["child", "parent"]
+        assert spans[0]["kind"] == 3
+        assert spans[0]["parentSpanId"] == spans[1]["spanId"]
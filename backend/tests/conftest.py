@@ -3,6 +3,7 @@ from unittest.mock import Mock, patch
 import pytest
 from api.auth.auth_service import AuthService
 from api.auth.models import TokenData
+from api.common.tracing import InMemorySpanExporter, tracer
 from api.index import app
 from api.storage.models import Base, EmailVerificationStatus, User
 from fastapi.testclient import TestClient
@@ -181,3 +182,13 @@ def mock_settings():
         mock_settings.access_token_expire_minutes = 30
         mock_settings.refresh_token_expire_days = 7
         yield mock_settings
+
+
+@pytest.fixture
+def span_exporter():
+    """Record spans in memory for the duration of the test"""
+    exporter = InMemorySpanExporter()
+    previous = tracer.exporter, tracer.sample_rate
+    tracer.configure(exporter)
+    yield exporter
+    tracer.exporter, tracer.sample_rate = previous
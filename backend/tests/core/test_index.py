@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -26,11 +28,69 @@ class TestIndexCore:
         """Test application lifespan startup"""
         mock_app = Mock(spec=FastAPI)
 
-        with patch("api.index.send_startup_notification_email") as mock_startup_email:
+        sent = threading.Event()
+        with (
+            patch("api.index.StorageService.init_db") as mock_init_db,
+            patch(
+                "api.index.send_startup_notification_email",
+                side_effect=lambda: sent.set(),
+            ) as mock_startup_email,
+        ):
             async with lifespan(mock_app):
-                # Startup should call send_startup_notification_email
+                # The database check and startup email run in the background
+                assert await asyncio.to_thread(sent.wait, 5)
+                mock_init_db.assert_called_once()
                 mock_startup_email.assert_called_once()
 
+    @pytest.mark.unit
+    @pytest.mark.core
+    @pytest.mark.asyncio
+    async def test_lifespan_startup_does_not_wait_for_checks(self):
+        """Test startup completes while the database check is still running"""
+        mock_app = Mock(spec=FastAPI)
+        release = threading.Event()
+
+        with (
+            patch(
+                "api.index.StorageService.init_db",
+                side_effect=lambda: release.wait(5),
+            ),
+            patch("api.index.send_startup_notification_email") as mock_startup_email,
+        ):
+            async with lifespan(mock_app):
+                mock_startup_email.assert_not_called()
+                release.set()
+
+    @pytest.mark.unit
+    @pytest.mark.core
+    @pytest.mark.asyncio
+    async def test_pollers_start_after_database_check(self):
+        """Test the job queue and notification scheduler wait for init_db"""
+        mock_app = Mock(spec=FastAPI)
+        release = threading.Event()
+        sent = threading.Event()
+
+        with (
+            patch(
+                "api.index.StorageService.init_db",
+                side_effect=lambda: release.wait(5),
+            ),
+            patch(
+                "api.index.send_startup_notification_email",
+                side_effect=lambda: sent.set(),
+            ),
+            patch("api.index.job_queue.start") as mock_job_queue_start,
+            patch("api.index.notification_scheduler.start") as mock_scheduler_start,
+        ):
+            async with lifespan(mock_app):
+                await asyncio.sleep(0.01)
+                mock_job_queue_start.assert_not_called()
+                mock_scheduler_start.assert_not_called()
+                release.set()
+                assert await asyncio.to_thread(sent.wait, 5)
+                mock_job_queue_start.assert_called_once()
+                mock_scheduler_start.assert_called_once()
+
     @pytest.mark.unit
     @pytest.mark.core
     @pytest.mark.asyncio
@@ -89,12 +149,79 @@ class TestIndexCore:
         assert process_time is not None
         assert float(process_time) > 0
 
+    @pytest.mark.unit
+    @pytest.mark.core
+    def test_metrics_endpoint(self):
+        """Test /metrics reports request latency by route template"""
+        self.client.get("/api/ping")
+        self.client.get("/api/no-such-route")
+
+        response = self.client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert (
+            'http_request_duration_seconds_count{method="GET",route="/api/ping",status="200"}'
+            in response.text
+        )
+        assert 'route="unmatched",status="404"' in response.text
+        assert "db_pool_checkout_seconds_count" in response.text
+        assert "background_jobs_running" in response.text
+
+    @pytest.mark.unit
+    @pytest.mark.core
+    def test_metrics_endpoint_requires_token_when_set(self):
+        """Test /metrics needs the bearer token when METRICS_TOKEN is set"""
+        with patch("api.index.settings.metrics_token", "scrape-secret"):
+            missing = self.client.get("/metrics")
+            wrong = self.client.get(
+                "/metrics", headers={"Authorization": "Bearer wrong"}
+            )
+            allowed = self.client.get(
+                "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+            )
+
+        assert missing.status_code == 401
+        assert wrong.status_code == 401
+        assert allowed.status_code == 200
+
+    @pytest.mark.unit
+    @pytest.mark.core
+    def test_metrics_endpoint_closed_without_token_in_production(self):
+        """Test /metrics is only open without a token in local and test"""
+        with (
+            patch("api.index.settings.metrics_token", ""),
+            patch("api.config.ENV", "production"),
+        ):
+            response = self.client.get("/metrics")
+
+        assert response.status_code == 403
+
+    @pytest.mark.unit
+    @pytest.mark.core
+    def test_request_span_continues_callers_trace(self, span_exporter):
+        """Test each request gets a server span named after its route template"""
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        self.client.get(
+            "/api/ping", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+
+        (span,) = [
+            span for span in span_exporter.get_finished_spans() if span.kind == "server"
+        ]
+        assert span.name == "GET /api/ping"
+        assert span.context.trace_id == trace_id
+        assert span.parent_id == "00f067aa0ba902b7"
+        assert span.attributes["http.status_code"] == 200
+
     @pytest.mark.unit
     @pytest.mark.core
     @pytest.mark.asyncio
     async def test_add_process_time_header_middleware(self):
         """Test process time middleware function directly"""
         mock_request = Mock()
+        mock_request.headers = {}
+        mock_request.query_params = {}
         mock_call_next = AsyncMock()
         mock_response = Mock()
         mock_response.headers = {}
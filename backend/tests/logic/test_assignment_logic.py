@@ -302,9 +302,7 @@ class TestAssignmentLogic:
             mock_session.flush.return_value = None
             mock_session.commit.return_value = None
 
-            with patch(
-                "api.logic.assignment_logic.GmailEmailService.notify_new_assignment_request"
-            ) as mock_email:
+            with patch("api.logic.assignment_logic.job_queue.enqueue") as mock_enqueue:
                 # Test assignment request
                 AssignmentLogic.request_assignment(
                     assignment_request_data, tutor_id, origin
@@ -312,7 +310,55 @@ class TestAssignmentLogic:
 
                 mock_session.add.assert_called()
                 mock_session.commit.assert_called_once()
-                mock_email.assert_called_once()
+                # The owner is emailed from a job committed with the request
+                mock_enqueue.assert_called_once_with(
+                    "assignment_request_email",
+                    {"assignment_id": 1, "origin": origin},
+                    session=mock_session,
+                )
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_send_assignment_request_email(self):
+        """Test the job handler emails the assignment owner"""
+        with patch("api.logic.assignment_logic.Session") as mock_session_class:
+            mock_session = Mock()
+            mock_session_class.return_value.__enter__.return_value = mock_session
+
+            mock_assignment = Mock()
+            mock_assignment.owner.email = "owner@test.com"
+            mock_session.query.return_value.filter_by.return_value.options.return_value.first.return_value = mock_assignment
+
+            with patch(
+                "api.logic.assignment_logic.GmailEmailService.notify_new_assignment_request",
+                return_value={"success": True},
+            ) as mock_email:
+                AssignmentLogic.send_assignment_request_email(
+                    {"assignment_id": 1, "origin": "https://a.test"}
+                )
+
+            mock_email.assert_called_once_with(
+                recipient_email="owner@test.com",
+                assignment=mock_assignment,
+                origin="https://a.test",
+            )
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_send_assignment_request_email_failure_is_retried(self):
+        """Test a failed send raises so the job queue retries it"""
+        with patch("api.logic.assignment_logic.Session") as mock_session_class:
+            mock_session = Mock()
+            mock_session_class.return_value.__enter__.return_value = mock_session
+
+            with patch(
+                "api.logic.assignment_logic.GmailEmailService.notify_new_assignment_request",
+                return_value={"success": False, "error": "quota exceeded"},
+            ):
+                with pytest.raises(RuntimeError, match="quota exceeded"):
+                    AssignmentLogic.send_assignment_request_email(
+                        {"assignment_id": 1, "origin": "https://a.test"}
+                    )
 
     @pytest.mark.unit
     @pytest.mark.logic
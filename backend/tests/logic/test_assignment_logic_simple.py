@@ -672,3 +672,44 @@ class TestAssignmentLogicSimple:
                 result = AssignmentLogic.get_request_hourly_rate(1)
 
                 assert result == 50
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_get_payment_details(self):
+        """Test owner, duration and rate are fetched in a single query"""
+        with patch("api.logic.assignment_logic.Session") as mock_session_class:
+            # Mock session
+            mock_session = Mock()
+            mock_session_class.return_value.__enter__.return_value = mock_session
+
+            # Mock query returning one joined row
+            mock_query = Mock()
+            mock_session.query.return_value = mock_query
+            mock_query.select_from.return_value = mock_query
+            mock_query.join.return_value = mock_query
+            mock_query.filter.return_value = mock_query
+            mock_query.first.return_value = (123, 90, 50)
+
+            result = AssignmentLogic.get_payment_details(1)
+
+            assert result == (123, 90, 50)
+            mock_session.query.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_get_payment_details_request_not_found(self):
+        """Test payment details for a missing assignment request"""
+        with patch("api.logic.assignment_logic.Session") as mock_session_class:
+            mock_session = Mock()
+            mock_session_class.return_value.__enter__.return_value = mock_session
+            mock_query = Mock()
+            mock_session.query.return_value = mock_query
+            mock_query.select_from.return_value = mock_query
+            mock_query.join.return_value = mock_query
+            mock_query.filter.return_value = mock_query
+            mock_query.first.return_value = None
+
+            with pytest.raises(HTTPException) as exc_info:
+                AssignmentLogic.get_payment_details(999)
+
+            assert exc_info.value.status_code == 404
@@ -15,15 +15,29 @@ from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
 
 
+@pytest.fixture
+def mock_password_hasher():
+    with patch("api.logic.auth_logic.password_hasher") as mock_hasher:
+        mock_hasher.verify = AsyncMock(return_value=True)
+        mock_hasher.hash = AsyncMock(return_value="hashed_password")
+        mock_hasher.needs_rehash.return_value = False
+        yield mock_hasher
+
+
 class TestLogic:
     """Test cases for Logic class"""
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_login_success(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_login_success(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test successful login"""
         # Mock the database session
@@ -45,7 +59,7 @@ class TestLogic:
             )
 
             # Mock password verification
-            mock_auth_service.verify_password.return_value = True
+            mock_password_hasher.verify.return_value = True
 
             # Mock token creation
             mock_token_pair = Mock()
@@ -57,19 +71,24 @@ class TestLogic:
             )
 
             # Test the method
-            result = AuthLogic.handle_login(login_request)
+            result = await AuthLogic.handle_login(login_request)
 
             assert result == mock_token_pair
-            mock_auth_service.verify_password.assert_called_once_with(
+            mock_password_hasher.verify.assert_awaited_once_with(
                 sample_user_data["password"], "hashed_password"
             )
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_login_user_not_found(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_login_user_not_found(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test login with non-existent user"""
         # Mock the database session
@@ -88,17 +107,22 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_login(login_request)
+                await AuthLogic.handle_login(login_request)
 
             assert exc_info.value.status_code == 401
             assert "Incorrect email or password" in str(exc_info.value.detail)
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_login_wrong_password(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_login_wrong_password(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test login with wrong password"""
         # Mock the database session
@@ -120,7 +144,7 @@ class TestLogic:
             )
 
             # Mock password verification to return False
-            mock_auth_service.verify_password.return_value = False
+            mock_password_hasher.verify.return_value = False
 
             # Create login request
             login_request = LoginRequest(
@@ -129,17 +153,22 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_login(login_request)
+                await AuthLogic.handle_login(login_request)
 
             assert exc_info.value.status_code == 401
             assert "Incorrect email or password" in str(exc_info.value.detail)
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_login_pending_verification(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_login_pending_verification(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test login with pending email verification"""
         # Mock the database session
@@ -161,7 +190,7 @@ class TestLogic:
             )
 
             # Mock password verification
-            mock_auth_service.verify_password.return_value = True
+            mock_password_hasher.verify.return_value = True
 
             # Create login request
             login_request = LoginRequest(
@@ -170,17 +199,22 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_login(login_request)
+                await AuthLogic.handle_login(login_request)
 
             assert exc_info.value.status_code == 403
             assert "EMAIL_NOT_VERIFIED" in str(exc_info.value.detail)
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_login_waitlisted(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_login_waitlisted(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test login with waitlisted user"""
         # Mock the database session
@@ -202,7 +236,7 @@ class TestLogic:
             )
 
             # Mock password verification
-            mock_auth_service.verify_password.return_value = True
+            mock_password_hasher.verify.return_value = True
 
             # Create login request
             login_request = LoginRequest(
@@ -211,22 +245,24 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_login(login_request)
+                await AuthLogic.handle_login(login_request)
 
             assert exc_info.value.status_code == 403
             assert "USER_WAITLISTED" in str(exc_info.value.detail)
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
     @patch("api.logic.auth_logic.GmailEmailService")
-    def test_handle_signup_success_pending_verification(
+    async def test_handle_signup_success_pending_verification(
         self,
         mock_email_service,
         mock_auth_service,
         mock_storage_service,
         sample_user_data,
+        mock_password_hasher,
     ):
         """Test successful signup with pending verification"""
         # Mock the database session
@@ -239,7 +275,7 @@ class TestLogic:
             mock_session.execute.return_value.scalar_one_or_none.return_value = None
 
             # Mock password hashing
-            mock_auth_service.hash_password.return_value = "hashed_password"
+            mock_password_hasher.hash.return_value = "hashed_password"
 
             # Mock email confirmation token creation
             mock_auth_service.create_email_confirmation_token.return_value = (
@@ -262,17 +298,24 @@ class TestLogic:
             )
 
             # Test the method
-            result = AuthLogic.handle_signup(signup_request, "http://localhost:3000")
+            result = await AuthLogic.handle_signup(
+                signup_request, "http://localhost:3000"
+            )
 
             assert result["status"] == "pending_verification"
             assert "Account created successfully" in result["message"]
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_signup_user_already_exists(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_signup_user_already_exists(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test signup with existing user"""
         # Mock the database session
@@ -301,17 +344,22 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_signup(signup_request, "http://localhost:3000")
+                await AuthLogic.handle_signup(signup_request, "http://localhost:3000")
 
             assert exc_info.value.status_code == 409
             assert "User already exists" in str(exc_info.value.detail)
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_handle_signup_integrity_error(
-        self, mock_auth_service, mock_storage_service, sample_user_data
+    async def test_handle_signup_integrity_error(
+        self,
+        mock_auth_service,
+        mock_storage_service,
+        sample_user_data,
+        mock_password_hasher,
     ):
         """Test signup with database integrity error"""
         # Mock the database session
@@ -325,7 +373,7 @@ class TestLogic:
             mock_session.add.side_effect = IntegrityError("", "", "")
 
             # Mock password hashing
-            mock_auth_service.hash_password.return_value = "hashed_password"
+            mock_password_hasher.hash.return_value = "hashed_password"
 
             # Create signup request
             signup_request = SignupRequest(
@@ -338,7 +386,7 @@ class TestLogic:
 
             # Test the method
             with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_signup(signup_request, "http://localhost:3000")
+                await AuthLogic.handle_signup(signup_request, "http://localhost:3000")
 
             assert exc_info.value.status_code == 409
             assert "User already exists" in str(exc_info.value.detail)
@@ -534,9 +582,12 @@ class TestLogic:
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_reset_password_success(self, mock_auth_service, mock_storage_service):
+    async def test_reset_password_success(
+        self, mock_auth_service, mock_storage_service, mock_password_hasher
+    ):
         """Test successful password reset"""
         # Mock the database session
         mock_session = Mock()
@@ -565,7 +616,7 @@ class TestLogic:
             )
 
             # Mock password hashing
-            mock_auth_service.hash_password.return_value = "new_hashed_password"
+            mock_password_hasher.hash.return_value = "new_hashed_password"
 
             # Create reset password request with valid token
             reset_password_request = ResetPasswordRequest(
@@ -574,17 +625,18 @@ class TestLogic:
             )
 
             # Test the method
-            result = AuthLogic.reset_password(reset_password_request)
+            result = await AuthLogic.reset_password(reset_password_request)
 
             assert "message" in result
             assert "Password successfully updated" in result["message"]
 
     @pytest.mark.unit
     @pytest.mark.logic
+    @pytest.mark.asyncio
     @patch("api.logic.auth_logic.StorageService")
     @patch("api.logic.auth_logic.AuthService")
-    def test_reset_password_invalid_token(
-        self, mock_auth_service, mock_storage_service
+    async def test_reset_password_invalid_token(
+        self, mock_auth_service, mock_storage_service, mock_password_hasher
     ):
         """Test password reset with invalid token"""
         # Mock token verification to raise exception
@@ -600,7 +652,7 @@ class TestLogic:
 
         # Test the method
         with pytest.raises(HTTPException) as exc_info:
-            AuthLogic.reset_password(reset_password_request)
+            await AuthLogic.reset_password(reset_password_request)
 
         assert exc_info.value.status_code == 400
         assert "Invalid reset token" in str(exc_info.value.detail)
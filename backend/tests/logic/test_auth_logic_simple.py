@@ -1,4 +1,4 @@
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from api.logic.auth_logic import AuthLogic
@@ -36,7 +36,8 @@ class TestAuthLogicSimple:
 
     @pytest.mark.unit
     @pytest.mark.logic
-    def test_handle_login_user_not_found(self):
+    @pytest.mark.asyncio
+    async def test_handle_login_user_not_found(self):
         """Test login with non-existent user (with mocked password verification)"""
         login_data = LoginRequest(
             email="nonexistent@example.com", password="password123"
@@ -50,19 +51,21 @@ class TestAuthLogicSimple:
 
             # Mock password verification to avoid bcrypt issues
             with patch(
-                "api.logic.auth_logic.AuthService.verify_password"
+                "api.logic.auth_logic.password_hasher.verify",
+                new_callable=AsyncMock,
             ) as mock_verify:
                 mock_verify.return_value = False
 
                 with pytest.raises(HTTPException) as exc_info:
-                    AuthLogic.handle_login(login_data)
+                    await AuthLogic.handle_login(login_data)
 
                 assert exc_info.value.status_code == 401
                 assert "Incorrect email or password" in exc_info.value.detail
 
     @pytest.mark.unit
     @pytest.mark.logic
-    def test_handle_signup_user_already_exists(self):
+    @pytest.mark.asyncio
+    async def test_handle_signup_user_already_exists(self):
         """Test signup with existing user"""
         signup_data = SignupRequest(
             email="existing@example.com",
@@ -84,8 +87,15 @@ class TestAuthLogicSimple:
             )
             mock_engine.return_value = mock_session
 
-            with pytest.raises(HTTPException) as exc_info:
-                AuthLogic.handle_signup(signup_data, "https://example.com")
+            with (
+                patch(
+                    "api.logic.auth_logic.password_hasher.hash",
+                    new_callable=AsyncMock,
+                    return_value="hashed_password",
+                ),
+                pytest.raises(HTTPException) as exc_info,
+            ):
+                await AuthLogic.handle_signup(signup_data, "https://example.com")
 
             assert exc_info.value.status_code == 409
             assert exc_info.value.detail == "User already exists"
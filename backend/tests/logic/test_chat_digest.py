@@ -0,0 +1,218 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from api.logic.chat_logic import ChatLogic
+from api.storage.models import (
+    ChatMessage,
+    ChatNotificationTracker,
+    ChatReadStatus,
+    PendingChatNotification,
+    PrivateChat,
+    User,
+)
+from api.storage.storage_service import StorageService
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def inbox(test_engine):
+    """
+    A receiver with four chats: two unread and under the limit, one unread but
+    already notified twice today, and one already read.
+    """
+    with Session(test_engine, expire_on_commit=False) as session:
+        users = [
+            User(name=f"Digest {i}", email=f"digest{i}@test.com") for i in range(5)
+        ]
+        session.add_all(users)
+        session.flush()
+        receiver, alice, bob, carol, dave = users
+
+        def chat_with(other, is_read, messages, is_locked=True):
+            chat = PrivateChat(
+                user1_id=min(receiver.id, other.id),
+                user2_id=max(receiver.id, other.id),
+                is_locked=is_locked,
+            )
+            session.add(chat)
+            session.flush()
+            session.add(
+                ChatReadStatus(chat_id=chat.id, user_id=receiver.id, is_read=is_read)
+            )
+            for sender, content, is_flagged in messages:
+                session.add(
+                    ChatMessage(
+                        chat_id=chat.id,
+                        sender_id=sender.id,
+                        content=content,
+                        filtered_content="[PHONE_NUMBER]" if is_flagged else None,
+                        is_flagged=is_flagged,
+                    )
+                )
+                session.flush()
+            return chat
+
+        alice_chat = chat_with(
+            alice,
+            False,
+            [
+                (alice, "first", False),
+                (alice, "second", False),
+                (receiver, "hi", False),
+            ],
+        )
+        bob_chat = chat_with(bob, False, [(bob, "limited", False)])
+        chat_with(carol, True, [(carol, "already read", False)])
+        dave_chat = chat_with(
+            dave,
+            False,
+            [(dave, "visible", False), (dave, "call 91234567", True)],
+            is_locked=False,
+        )
+        session.add(
+            ChatNotificationTracker(
+                chat_id=bob_chat.id,
+                notification_count=2,
+                last_notification_timestamp=datetime.now(timezone.utc),
+            )
+        )
+        session.add(
+            PendingChatNotification(
+                chat_id=bob_chat.id,
+                receiver_id=receiver.id,
+                origin="https://a.test",
+                due_at=datetime.now(timezone.utc),
+            )
+        )
+        session.commit()
+
+    yield {
+        "receiver": receiver,
+        "alice_chat": alice_chat,
+        "bob_chat": bob_chat,
+        "dave_chat": dave_chat,
+    }
+
+    with Session(test_engine) as session:
+        user_ids = [user.id for user in users]
+        chats = session.query(PrivateChat).filter(PrivateChat.user2_id.in_(user_ids))
+        chat_ids = [chat.id for chat in chats]
+        for table in (ChatMessage, ChatReadStatus, ChatNotificationTracker):
+            session.query(table).filter(table.chat_id.in_(chat_ids)).delete()
+        session.query(PendingChatNotification).filter(
+            PendingChatNotification.receiver_id.in_(user_ids)
+        ).delete()
+        session.query(PrivateChat).filter(PrivateChat.id.in_(chat_ids)).delete()
+        session.query(User).filter(User.id.in_(user_ids)).delete()
+        session.commit()
+
+
+class TestUnreadDigest:
+    """Test cases for the per-user unread message digest"""
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_get_unread_chat_summaries(self, inbox, test_engine):
+        """Test one query returns the latest incoming message of each unread chat"""
+        with Session(test_engine) as session:
+            rows = ChatLogic.get_unread_chat_summaries(session, inbox["receiver"].id)
+
+        summaries = {chat_id: (name, preview) for chat_id, name, preview, _ in rows}
+        assert summaries == {
+            inbox["alice_chat"].id: ("Digest 1", "second"),
+            inbox["bob_chat"].id: ("Digest 2", "limited"),
+            inbox["dave_chat"].id: ("Digest 4", "[PHONE_NUMBER]"),
+        }
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_digest_sends_one_email_within_limits(self, inbox, test_engine):
+        """Test a single email covers every chat under its daily limit"""
+        receiver = inbox["receiver"]
+        with (
+            patch.object(StorageService, "engine", test_engine),
+            patch(
+                "api.logic.chat_logic.GmailEmailService.send_unread_digest_email"
+            ) as mock_send,
+        ):
+            await ChatLogic.check_and_send_unread_digest(
+                inbox["alice_chat"].id, receiver.id, "https://a.test"
+            )
+
+        mock_send.assert_called_once()
+        assert mock_send.call_args.kwargs["recipient_email"] == receiver.email
+        assert mock_send.call_args.kwargs["chats"] == [
+            {
+                "sender_name": "Digest 1",
+                "message_preview": "second",
+                "chat_url": f"https://a.test/chat?chatId={inbox['alice_chat'].id}",
+            },
+            {
+                "sender_name": "Digest 4",
+                "message_preview": "[PHONE_NUMBER]",
+                "chat_url": f"https://a.test/chat?chatId={inbox['dave_chat'].id}",
+            },
+        ]
+
+        with Session(test_engine) as session:
+            counts = {
+                tracker.chat_id: tracker.notification_count
+                for tracker in session.query(ChatNotificationTracker)
+            }
+            pending = (
+                session.query(PendingChatNotification)
+                .filter_by(receiver_id=receiver.id)
+                .count()
+            )
+        assert counts[inbox["alice_chat"].id] == 1
+        assert counts[inbox["bob_chat"].id] == 2
+        assert counts[inbox["dave_chat"].id] == 1
+        assert pending == 0
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_failed_digest_keeps_other_checks(self, inbox, test_engine):
+        """Test the receiver's pending checks survive a digest that was not sent"""
+        receiver = inbox["receiver"]
+        with (
+            patch.object(StorageService, "engine", test_engine),
+            patch(
+                "api.logic.chat_logic.GmailEmailService.send_unread_digest_email",
+                side_effect=RuntimeError("gmail down"),
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            await ChatLogic.check_and_send_unread_digest(
+                inbox["alice_chat"].id, receiver.id, "https://a.test"
+            )
+
+        with Session(test_engine) as session:
+            pending = (
+                session.query(PendingChatNotification)
+                .filter_by(receiver_id=receiver.id)
+                .count()
+            )
+        assert pending == 1
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_notify_unread_uses_configured_mode(self):
+        """Test the scheduler handler picks per-chat or digest emails from settings"""
+        with (
+            patch("api.logic.chat_logic.settings") as mock_settings,
+            patch.object(ChatLogic, "check_and_send_unread_digest") as mock_digest,
+            patch.object(
+                ChatLogic, "check_and_send_delayed_notification"
+            ) as mock_per_chat,
+        ):
+            mock_settings.chat_notification_mode = "digest"
+            await ChatLogic.notify_unread(1, 2, "https://a.test")
+            mock_settings.chat_notification_mode = "per_chat"
+            await ChatLogic.notify_unread(3, 4, "https://a.test")
+
+        mock_digest.assert_called_once_with(1, 2, "https://a.test")
+        mock_per_chat.assert_called_once_with(3, 4, "https://a.test")
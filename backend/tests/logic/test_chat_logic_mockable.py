@@ -1,3 +1,4 @@
+import asyncio
 import json
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, Mock, patch
@@ -5,6 +6,7 @@ from unittest.mock import AsyncMock, Mock, patch
 import pytest
 from api.logic.chat_logic import ChatLogic
 from api.router.models import ChatPreview, NewChatMessage
+from api.services.connection_registry import connection_registry
 from api.storage.models import (
     ChatMessage,
     ChatMessageType,
@@ -631,13 +633,19 @@ class TestChatLogicMockable:
         mock_message.sender_id = 1
         mock_message.is_flagged = False
         mock_message.chat.is_locked = False
+        mock_message.chat_id = 1
+        mock_message.content = "Test message"
+        mock_message.message_type = ChatMessageType.TEXT_MESSAGE
+        mock_message.created_at = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        mock_message.sender.name = "Test User"
 
         # Create mock WebSocket connections
         mock_receiver_ws = AsyncMock()
         mock_sender_ws = AsyncMock()
 
         # Mock active connections
-        ChatLogic.active_connections = {1: mock_sender_ws, 2: mock_receiver_ws}
+        await connection_registry.connect(mock_sender_ws, 1, ["chat"])
+        await connection_registry.connect(mock_receiver_ws, 2, ["chat"])
 
         # Mock get_convert_message
         with patch.object(ChatLogic, "get_convert_message") as mock_convert:
@@ -645,13 +653,14 @@ class TestChatLogicMockable:
 
             # Test the method
             await ChatLogic.send_private_message(mock_message)
+            await connection_registry.flush()
 
             # Verify messages were sent
             mock_receiver_ws.send_text.assert_called_once()
             mock_sender_ws.send_text.assert_called_once()
 
         # Clean up
-        ChatLogic.active_connections.clear()
+        connection_registry.clear()
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -670,7 +679,8 @@ class TestChatLogicMockable:
         mock_sender_ws = AsyncMock()
 
         # Mock active connections
-        ChatLogic.active_connections = {1: mock_sender_ws, 2: mock_receiver_ws}
+        await connection_registry.connect(mock_sender_ws, 1, ["chat"])
+        await connection_registry.connect(mock_receiver_ws, 2, ["chat"])
 
         # Mock get_convert_message
         with patch.object(ChatLogic, "get_convert_message") as mock_convert:
@@ -678,19 +688,20 @@ class TestChatLogicMockable:
 
             # Test the method
             await ChatLogic.send_private_message(mock_message)
+            await connection_registry.flush()
 
             # Verify only sender gets message (receiver shouldn't get flagged message in locked chat)
             mock_receiver_ws.send_text.assert_not_called()
             mock_sender_ws.send_text.assert_called_once()
 
         # Clean up
-        ChatLogic.active_connections.clear()
+        connection_registry.clear()
 
     @pytest.mark.unit
     @pytest.mark.logic
     @pytest.mark.asyncio
     async def test_send_private_message_receiver_not_connected(self):
-        """Test send_private_message when receiver is not connected"""
+        """Test a receiver outside the chat gets a notification instead"""
         # Create mock message with proper attributes
         mock_message = Mock()
         mock_message.receiver_id = 2
@@ -700,64 +711,114 @@ class TestChatLogicMockable:
         mock_message.content = "Test message"
         mock_message.message_type = ChatMessageType.TEXT_MESSAGE
         mock_message.created_at = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        mock_message.sender.name = "Test User"
 
         # Create mock chat
         mock_chat = Mock()
         mock_chat.is_locked = False
         mock_message.chat = mock_chat
 
-        # Create mock WebSocket connection only for sender
+        # The sender is in the chat; the receiver only has a notification socket
         mock_sender_ws = AsyncMock()
-
-        # Mock active connections (receiver not connected)
-        ChatLogic.active_connections = {1: mock_sender_ws}
+        mock_receiver_ws = AsyncMock()
+        await connection_registry.connect(mock_sender_ws, 1, ["chat"])
+        await connection_registry.connect(mock_receiver_ws, 2, ["notifications"])
 
         # Mock get_convert_message
         with patch.object(ChatLogic, "get_convert_message") as mock_convert:
             mock_convert.return_value = lambda msg: {"id": 1, "content": "test"}
 
-            # Mock send_notification_to_user
-            with patch.object(ChatLogic, "send_notification_to_user") as mock_notify:
-                mock_notify.return_value = None
+            # Test the method
+            await ChatLogic.send_private_message(mock_message)
+            await connection_registry.flush()
 
-                # Mock the database session and queries
-                with patch("api.logic.chat_logic.Session") as mock_session_class:
-                    mock_session = Mock()
-                    mock_session_class.return_value.__enter__.return_value = (
-                        mock_session
-                    )
-                    mock_session_class.return_value.__exit__.return_value = None
+            # Verify sender gets message and notification is sent to receiver
+            mock_sender_ws.send_text.assert_called_once()
+            (notification,) = mock_receiver_ws.send_text.call_args.args
+            assert json.loads(notification)["type"] == "new_message"
+            assert json.loads(notification)["sender_name"] == "Test User"
+
+        # Clean up
+        connection_registry.clear()
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_send_private_message_publishes_for_other_workers(self):
+        """Test the message is published to the bus for sockets on other workers"""
+        mock_message = Mock()
+        mock_message.receiver_id = 2
+        mock_message.sender_id = 1
+        mock_message.is_flagged = False
+        mock_message.chat.is_locked = False
+        mock_message.chat_id = 1
+        mock_message.content = "Test message"
+        mock_message.message_type = ChatMessageType.TEXT_MESSAGE
+        mock_message.created_at = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        mock_message.sender.name = "Test User"
+
+        await connection_registry.connect(AsyncMock(), 1, ["chat"])
 
-                    # Mock chat query
-                    mock_chat_query = Mock()
-                    mock_chat_query.filter.return_value.first.return_value = mock_chat
+        with (
+            patch.object(ChatLogic, "get_convert_message") as mock_convert,
+            patch.object(ChatLogic, "send_notification_to_user", AsyncMock()),
+            patch("api.logic.chat_logic.Session"),
+            patch("api.logic.chat_logic.message_bus") as mock_bus,
+        ):
+            mock_convert.return_value = lambda msg: {"id": 1, "content": "test"}
+            mock_bus.publish = AsyncMock()
 
-                    # Mock user query
-                    mock_user = Mock()
-                    mock_user.name = "Test User"
-                    mock_user_query = Mock()
-                    mock_user_query.filter.return_value.first.return_value = mock_user
+            await ChatLogic.send_private_message(mock_message)
 
-                    # Set up session.query to return different mocks
-                    def mock_query_side_effect(model):
-                        if model == PrivateChat:
-                            return mock_chat_query
-                        elif model == User:
-                            return mock_user_query
-                        else:
-                            return Mock()
+            mock_bus.publish.assert_any_call(
+                "chat",
+                {
+                    "user_id": 2,
+                    "message": json.dumps({"id": 1, "content": "test"}),
+                    "notification": json.dumps(
+                        ChatLogic._new_message_notification(mock_message)
+                    ),
+                },
+            )
 
-                    mock_session.query.side_effect = mock_query_side_effect
+        connection_registry.clear()
 
-                    # Test the method
-                    await ChatLogic.send_private_message(mock_message)
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_deliver_chat_message(self):
+        """Test chat messages from other workers reach local sockets only"""
+        mock_ws = AsyncMock()
+        await connection_registry.connect(mock_ws, 2, ["chat"])
 
-                    # Verify sender gets message and notification is sent to receiver
-                    mock_sender_ws.send_text.assert_called_once()
-                    mock_notify.assert_called_once()
+        await ChatLogic.deliver_chat_message({"user_id": 2, "message": "hello"})
+        await ChatLogic.deliver_chat_message({"user_id": 3, "message": "elsewhere"})
+        await connection_registry.flush()
 
-        # Clean up
-        ChatLogic.active_connections.clear()
+        mock_ws.send_text.assert_called_once_with("hello")
+
+        connection_registry.clear()
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @pytest.mark.asyncio
+    async def test_deliver_chat_message_notifies_receivers_outside_the_chat(self):
+        """Test the worker holding the receiver's sockets picks chat or notification"""
+        in_chat = AsyncMock()
+        elsewhere = AsyncMock()
+        await connection_registry.connect(in_chat, 2, ["chat", "notifications"])
+        await connection_registry.connect(elsewhere, 3, ["notifications"])
+
+        for user_id in (2, 3):
+            await ChatLogic.deliver_chat_message(
+                {"user_id": user_id, "message": "hello", "notification": "new"}
+            )
+        await connection_registry.flush()
+
+        in_chat.send_text.assert_called_once_with("hello")
+        elsewhere.send_text.assert_called_once_with("new")
+
+        connection_registry.clear()
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -779,6 +840,8 @@ class TestChatLogicMockable:
         mock_chat.is_locked = False
         mock_message.chat = mock_chat
 
+        mock_message.sender.name = "Test User"
+
         # Create mock WebSocket connections that raise RuntimeError
         mock_receiver_ws = AsyncMock()
         mock_receiver_ws.send_text.side_effect = RuntimeError("Connection closed")
@@ -786,7 +849,8 @@ class TestChatLogicMockable:
         mock_sender_ws.send_text.side_effect = RuntimeError("Connection closed")
 
         # Mock active connections
-        ChatLogic.active_connections = {1: mock_sender_ws, 2: mock_receiver_ws}
+        await connection_registry.connect(mock_sender_ws, 1, ["chat"])
+        await connection_registry.connect(mock_receiver_ws, 2, ["chat"])
 
         # Mock get_convert_message
         with patch.object(ChatLogic, "get_convert_message") as mock_convert:
@@ -821,13 +885,15 @@ class TestChatLogicMockable:
 
                 # Test the method
                 await ChatLogic.send_private_message(mock_message)
+                await connection_registry.flush()
+                await asyncio.sleep(0)
 
-                # Verify connections were removed from active_connections
-                assert 1 not in ChatLogic.active_connections
-                assert 2 not in ChatLogic.active_connections
+                # Verify the failed connections were evicted from the registry
+                assert 1 not in connection_registry.connections
+                assert 2 not in connection_registry.connections
 
         # Clean up
-        ChatLogic.active_connections.clear()
+        connection_registry.clear()
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -0,0 +1,161 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs
+
+import pytest
+from api.logic.payment_logic import PaymentLogic, stripe
+from api.router.models import PaymentRequest
+
+
+class FakeStripe(BaseHTTPRequestHandler):
+    """
+    Just enough of the Stripe API to create checkout sessions, honouring
+    idempotency keys the way Stripe does.
+    """
+
+    requests: list[dict] = []
+    sessions: dict[str, dict] = {}
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        key = self.headers.get("Idempotency-Key")
+        FakeStripe.requests.append({"key": key, "params": parse_qs(body)})
+        if key not in FakeStripe.sessions:
+            session_id = f"cs_test_{len(FakeStripe.sessions) + 1}"
+            FakeStripe.sessions[key] = {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+            }
+        response = json.dumps(FakeStripe.sessions[key]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_stripe():
+    FakeStripe.requests = []
+    FakeStripe.sessions = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStripe)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    PaymentLogic.clear_checkout_cache()
+    with (
+        patch.object(stripe, "api_base", f"http://127.0.0.1:{server.server_port}"),
+        patch.object(stripe, "api_key", "sk_test_fake"),
+        patch(
+            "api.logic.payment_logic.AssignmentLogic.get_payment_details",
+            return_value=(1, 90, 40),  # owner_id, minutes, dollars per hour
+        ),
+    ):
+        yield FakeStripe
+    PaymentLogic.clear_checkout_cache()
+    server.shutdown()
+    server.server_close()
+
+
+def make_payment_request(**overrides) -> PaymentRequest:
+    fields = {
+        "mode": "payment",
+        "success_url": "https://example.com/success",
+        "cancel_url": "https://example.com/cancel",
+        "assignment_request_id": 7,
+        "tutor_id": 2,
+        "chat_id": 3,
+    }
+    fields.update(overrides)
+    return PaymentRequest(**fields)
+
+
+class TestCheckoutSessionReuse:
+    """Test cases for reusing Stripe checkout sessions across clicks"""
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_repeated_clicks_reuse_the_session(self, fake_stripe):
+        """Test only the first click for an assignment request calls Stripe"""
+        first = PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+        second = PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+
+        assert first == second
+        assert len(fake_stripe.requests) == 1
+        params = fake_stripe.requests[0]["params"]
+        assert params["line_items[0][price_data][unit_amount]"] == ["6000"]
+        assert fake_stripe.requests[0]["key"].startswith("checkout-7-")
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_other_workers_get_the_same_session(self, fake_stripe):
+        """Test the idempotency key makes Stripe return the existing session"""
+        first = PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+        PaymentLogic.clear_checkout_cache()  # As if served by another process
+        second = PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+
+        assert first == second
+        assert len(fake_stripe.requests) == 2
+        assert fake_stripe.requests[0]["key"] == fake_stripe.requests[1]["key"]
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_different_checkouts_get_different_sessions(self, fake_stripe):
+        """Test other requests or redirect URLs are not given a cached session"""
+        first = PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+        other_request = PaymentLogic.handle_payment_request(
+            make_payment_request(assignment_request_id=8), Mock()
+        )
+        other_chat = PaymentLogic.handle_payment_request(
+            make_payment_request(chat_id=4), Mock()
+        )
+
+        assert len({first["session_id"], other_request["session_id"]}) == 2
+        assert other_chat["session_id"] not in (
+            first["session_id"],
+            other_request["session_id"],
+        )
+        assert len(fake_stripe.requests) == 3
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_unauthorized_user_never_reaches_stripe(self, fake_stripe):
+        """Test the ownership check runs before any cached session is returned"""
+        PaymentLogic.handle_payment_request(make_payment_request(), Mock())
+
+        with pytest.raises(PermissionError):
+            PaymentLogic.handle_payment_request(
+                make_payment_request(), Mock(side_effect=PermissionError)
+            )
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_idempotency_key_changes_per_window(self):
+        """Test a new session is created once the reuse window has passed"""
+        payment_request = make_payment_request()
+        with patch("api.logic.payment_logic.settings") as mock_settings:
+            mock_settings.stripe_checkout_session_ttl = 3600
+
+            key, expires_at = PaymentLogic.checkout_idempotency_key(
+                payment_request, 6000, now=7200.0
+            )
+            same_key, _ = PaymentLogic.checkout_idempotency_key(
+                payment_request, 6000, now=10799.0
+            )
+            next_key, _ = PaymentLogic.checkout_idempotency_key(
+                payment_request, 6000, now=10800.0
+            )
+            other_fee_key, _ = PaymentLogic.checkout_idempotency_key(
+                payment_request, 6500, now=7200.0
+            )
+
+        assert key == same_key
+        assert next_key != key
+        assert other_fee_key != key
+        # Still valid for a full window after the last click that can reuse it
+        assert expires_at == 14400
@@ -9,6 +9,9 @@ from fastapi import HTTPException
 class TestPaymentLogic:
     """Test cases for PaymentLogic class"""
 
+    def setup_method(self):
+        PaymentLogic.clear_checkout_cache()
+
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe")
@@ -16,9 +19,8 @@ class TestPaymentLogic:
     def test_handle_payment_request_success(self, mock_assignment_logic, mock_stripe):
         """Test successful payment request handling"""
         # Mock assignment logic responses
-        mock_assignment_logic.get_assignment_owner_id.return_value = 1
-        mock_assignment_logic.get_lesson_duration.return_value = 60  # 60 minutes
-        mock_assignment_logic.get_request_hourly_rate.return_value = 50  # $50/hour
+        # owner_id, 60 minutes, $50/hour
+        mock_assignment_logic.get_payment_details.return_value = (1, 60, 50)
 
         # Mock stripe checkout session
         mock_checkout_session = {
@@ -57,9 +59,7 @@ class TestPaymentLogic:
     ):
         """Test payment request handling with Stripe error"""
         # Mock assignment logic responses
-        mock_assignment_logic.get_assignment_owner_id.return_value = 1
-        mock_assignment_logic.get_lesson_duration.return_value = 60
-        mock_assignment_logic.get_request_hourly_rate.return_value = 50
+        mock_assignment_logic.get_payment_details.return_value = (1, 60, 50)
 
         # Mock stripe error
         mock_stripe_error = Exception("Stripe error")
@@ -90,21 +90,18 @@ class TestPaymentLogic:
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe")
-    @patch("api.logic.payment_logic.AssignmentLogic")
-    @patch("api.logic.payment_logic.ChatLogic")
-    @patch("api.logic.payment_logic.StorageService")
-    @patch("api.logic.payment_logic.GmailEmailService")
+    @patch("api.logic.payment_logic.Session")
+    @patch("api.logic.payment_logic.job_queue")
     def test_handle_stripe_webhook_success(
         self,
-        mock_email_service,
-        mock_storage_service,
-        mock_chat_logic,
-        mock_assignment_logic,
+        mock_job_queue,
+        mock_session,
         mock_stripe,
     ):
         """Test successful Stripe webhook handling"""
         # Mock webhook event
         mock_event = {
+            "id": "evt_123",
             "type": "payment_intent.succeeded",
             "data": {"object": {"metadata": {"assignment_request_id": "123"}}},
         }
@@ -112,49 +109,43 @@ class TestPaymentLogic:
         # Mock stripe webhook construction
         mock_stripe.Webhook.construct_event.return_value = mock_event
 
-        # Mock assignment logic
-        mock_assignment_logic.accept_assignment_request.return_value = (
-            1,
-            2,
-        )  # owner_id, requester_id
-
-        # Mock chat logic
-        mock_chat_preview = Mock()
-        mock_chat_preview.id = 1
-        mock_chat_logic.get_or_create_private_chat.return_value = mock_chat_preview
-
-        # Mock storage service
-        mock_storage_service.engine = Mock()
-
-        # Mock session and database objects
-        mock_session = Mock()
-        mock_tutor = Mock()
-        mock_tutor.user.email = "tutor@example.com"
-        mock_assignment_request = Mock()
-        mock_assignment = Mock()
-        mock_assignment.title = "Test Assignment"
-        mock_assignment_request.assignment = mock_assignment
-        mock_assignment_request.requested_rate_hourly = 50
-        mock_assignment_request.requested_duration = 60
-
-        # Mock session context manager
-        with patch("api.logic.payment_logic.Session") as mock_session_class:
-            mock_session_class.return_value.__enter__.return_value = mock_session
-            mock_session.query.return_value.filter_by.return_value.first.side_effect = [
-                mock_tutor,
-                mock_assignment_request,
-            ]
-
-            # Test the method
-            result = PaymentLogic.handle_stripe_webhook(
-                b"test_payload", "test_signature"
-            )
-
-            assert result["status"] == "success"
-            mock_stripe.Webhook.construct_event.assert_called_once()
-            mock_assignment_logic.accept_assignment_request.assert_called_once_with(123)
-            mock_chat_logic.get_or_create_private_chat.assert_called_once_with(1, 2)
-            mock_chat_logic.unlock_chat.assert_called_once_with(1, 1)
+        # Mock session; the event has not been seen before
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_session_instance.get.return_value = None
+
+        # Test the method
+        result = PaymentLogic.handle_stripe_webhook(b'{"id": "evt_123"}', "sig")
+
+        assert result["status"] == "success"
+        mock_stripe.Webhook.construct_event.assert_called_once()
+        # The event is processed by a background job, not inline
+        mock_job_queue.enqueue.assert_called_once_with(
+            "stripe_event", {"event_id": "evt_123"}, session=mock_session_instance
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @patch("api.logic.payment_logic.stripe")
+    @patch("api.logic.payment_logic.Session")
+    @patch("api.logic.payment_logic.job_queue")
+    def test_handle_stripe_webhook_duplicate_event(
+        self, mock_job_queue, mock_session, mock_stripe
+    ):
+        """Test a redelivered event is acknowledged without being queued again"""
+        mock_stripe.Webhook.construct_event.return_value = {
+            "id": "evt_123",
+            "type": "payment_intent.succeeded",
+        }
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_session_instance.get.return_value = Mock()  # Already stored
+
+        result = PaymentLogic.handle_stripe_webhook(b'{"id": "evt_123"}', "sig")
+
+        assert result == {"status": "success"}
+        mock_session_instance.add.assert_not_called()
+        mock_job_queue.enqueue.assert_not_called()
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -192,18 +183,24 @@ class TestPaymentLogic:
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe")
-    def test_handle_stripe_webhook_other_event_type(self, mock_stripe):
+    @patch("api.logic.payment_logic.Session")
+    @patch("api.logic.payment_logic.job_queue")
+    def test_handle_stripe_webhook_other_event_type(
+        self, mock_job_queue, mock_session, mock_stripe
+    ):
         """Test Stripe webhook handling with non-payment event"""
         # Mock webhook event with different type
-        mock_event = {"type": "customer.created", "data": {"object": {}}}
+        mock_event = {"id": "evt_456", "type": "customer.created"}
 
         # Mock stripe webhook construction
         mock_stripe.Webhook.construct_event.return_value = mock_event
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_session_instance.get.return_value = None
 
         # Test the method
-        result = PaymentLogic.handle_stripe_webhook(b"test_payload", "test_signature")
+        result = PaymentLogic.handle_stripe_webhook(b'{"id": "evt_456"}', "sig")
 
-        # Should return success even for non-payment events
-        assert (
-            result is None
-        )  # The method doesn't return anything for non-payment events
+        # Should return success even for non-payment events, without a job
+        assert result == {"status": "success"}
+        mock_job_queue.enqueue.assert_not_called()
@@ -9,20 +9,20 @@ from fastapi import HTTPException
 class TestPaymentLogicExtended:
     """Extended test cases for PaymentLogic"""
 
+    def setup_method(self):
+        PaymentLogic.clear_checkout_cache()
+
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe.checkout.Session.create")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_request_hourly_rate")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_lesson_duration")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_assignment_owner_id")
+    @patch("api.logic.payment_logic.AssignmentLogic.get_payment_details")
     def test_handle_payment_request_success(
-        self, mock_get_owner_id, mock_get_duration, mock_get_rate, mock_create_session
+        self, mock_get_details, mock_create_session
     ):
         """Test successful payment request handling"""
         # Mock assignment logic responses
-        mock_get_owner_id.return_value = 123
-        mock_get_duration.return_value = 120  # 2 hours in minutes
-        mock_get_rate.return_value = 50  # $50 per hour
+        # owner_id, 2 hours in minutes, $50 per hour
+        mock_get_details.return_value = (123, 120, 50)
 
         # Mock stripe session creation - return a dict-like object
         mock_session = {"id": "cs_test_123", "url": "https://checkout.stripe.com/test"}
@@ -48,9 +48,7 @@ class TestPaymentLogicExtended:
         mock_authorize.assert_called_once_with(123)
 
         # Verify assignment logic calls
-        mock_get_owner_id.assert_called_once_with(456)
-        mock_get_duration.assert_called_once_with(456)
-        mock_get_rate.assert_called_once_with(456)
+        mock_get_details.assert_called_once_with(456)
 
         # Verify stripe session creation
         mock_create_session.assert_called_once()
@@ -83,11 +81,11 @@ class TestPaymentLogicExtended:
 
     @pytest.mark.unit
     @pytest.mark.logic
-    @patch("api.logic.payment_logic.AssignmentLogic.get_assignment_owner_id")
-    def test_handle_payment_request_unauthorized(self, mock_get_owner_id):
+    @patch("api.logic.payment_logic.AssignmentLogic.get_payment_details")
+    def test_handle_payment_request_unauthorized(self, mock_get_details):
         """Test payment request with unauthorized user"""
         # Mock assignment owner
-        mock_get_owner_id.return_value = 123
+        mock_get_details.return_value = (123, 60, 50)
 
         # Mock authorization function that raises exception
         def mock_authorize(user_id):
@@ -113,17 +111,14 @@ class TestPaymentLogicExtended:
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe.checkout.Session.create")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_request_hourly_rate")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_lesson_duration")
-    @patch("api.logic.payment_logic.AssignmentLogic.get_assignment_owner_id")
+    @patch("api.logic.payment_logic.AssignmentLogic.get_payment_details")
     def test_handle_payment_request_stripe_error(
-        self, mock_get_owner_id, mock_get_duration, mock_get_rate, mock_create_session
+        self, mock_get_details, mock_create_session
     ):
         """Test payment request with Stripe error"""
         # Mock assignment logic responses
-        mock_get_owner_id.return_value = 123
-        mock_get_duration.return_value = 60  # 1 hour
-        mock_get_rate.return_value = 30  # $30 per hour
+        # owner_id, 1 hour, $30 per hour
+        mock_get_details.return_value = (123, 60, 30)
 
         # Mock authorization function
         mock_authorize = Mock()
@@ -155,39 +150,57 @@ class TestPaymentLogicExtended:
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe.Webhook.construct_event")
-    @patch("api.logic.payment_logic.AssignmentLogic.accept_assignment_request")
-    @patch("api.logic.payment_logic.ChatLogic.get_or_create_private_chat")
-    @patch("api.logic.payment_logic.ChatLogic.unlock_chat")
-    @patch("api.logic.payment_logic.GmailEmailService.send_email")
     @patch("api.logic.payment_logic.Session")
+    @patch("api.logic.payment_logic.job_queue.enqueue")
     def test_handle_stripe_webhook_success(
-        self,
-        mock_session,
-        mock_send_email,
-        mock_unlock_chat,
-        mock_get_chat,
-        mock_accept_request,
-        mock_construct_event,
+        self, mock_enqueue, mock_session, mock_construct_event
     ):
-        """Test successful stripe webhook handling"""
+        """Test a payment event is stored and queued, not processed inline"""
         # Mock webhook event construction
         mock_event = {
+            "id": "evt_456",
             "type": "payment_intent.succeeded",
             "data": {"object": {"metadata": {"assignment_request_id": "456"}}},
         }
         mock_construct_event.return_value = mock_event
 
-        # Mock assignment acceptance
-        mock_accept_request.return_value = (123, 789)  # owner_id, requester_id
+        # Mock session context manager; the event has not been seen before
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_session_instance.get.return_value = None
+
+        # Call function
+        result = PaymentLogic.handle_stripe_webhook(
+            b'{"id": "evt_456"}', "test_signature"
+        )
 
-        # Mock chat creation
-        mock_chat = Mock()
-        mock_chat.id = 101
-        mock_get_chat.return_value = mock_chat
+        # Verify webhook construction
+        mock_construct_event.assert_called_once_with(
+            b'{"id": "evt_456"}', "test_signature", ANY
+        )  # settings.stripe_webhook_secret
+
+        # The event is stored unprocessed and handed to a background job
+        stored_event = mock_session_instance.add.call_args[0][0]
+        assert stored_event.id == "evt_456"
+        assert stored_event.processed_at is None
+        mock_enqueue.assert_called_once_with(
+            "stripe_event", {"event_id": "evt_456"}, session=mock_session_instance
+        )
+        mock_session_instance.commit.assert_called_once()
+
+        # Verify result
+        assert result == {"status": "success"}
 
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @patch("api.logic.payment_logic.GmailEmailService.send_email")
+    @patch("api.logic.payment_logic.Session")
+    def test_send_payment_accepted_email(self, mock_session, mock_send_email):
+        """Test the job handler emails the tutor about the accepted request"""
         # Mock session context manager
         mock_session_instance = Mock()
         mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_send_email.return_value = {"success": True}
 
         # Mock tutor and assignment data
         mock_tutor = Mock()
@@ -207,20 +220,9 @@ class TestPaymentLogicExtended:
             mock_assignment_request,  # Second call returns assignment request
         ]
 
-        # Call function
-        result = PaymentLogic.handle_stripe_webhook(b"test_payload", "test_signature")
-
-        # Verify webhook construction
-        mock_construct_event.assert_called_once_with(
-            b"test_payload", "test_signature", ANY
-        )  # settings.stripe_webhook_secret
-
-        # Verify assignment acceptance
-        mock_accept_request.assert_called_once_with(456)
-
-        # Verify chat operations
-        mock_get_chat.assert_called_once_with(123, 789)
-        mock_unlock_chat.assert_called_once_with(101, 123)
+        PaymentLogic.send_payment_accepted_email(
+            {"assignment_request_id": 456, "tutor_id": 789}
+        )
 
         # Verify email sending
         mock_send_email.assert_called_once()
@@ -231,8 +233,22 @@ class TestPaymentLogicExtended:
         assert "$50" in call_args["content"]
         assert "120 minutes" in call_args["content"]
 
-        # Verify result
-        assert result == {"status": "success"}
+    @pytest.mark.unit
+    @pytest.mark.logic
+    @patch("api.logic.payment_logic.GmailEmailService.send_email")
+    @patch("api.logic.payment_logic.Session")
+    def test_send_payment_accepted_email_failure_is_retried(
+        self, mock_session, mock_send_email
+    ):
+        """Test a failed send raises so the job queue retries it"""
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_send_email.return_value = {"success": False, "error": "quota exceeded"}
+
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            PaymentLogic.send_payment_accepted_email(
+                {"assignment_request_id": 456, "tutor_id": 789}
+            )
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -273,59 +289,53 @@ class TestPaymentLogicExtended:
     @pytest.mark.unit
     @pytest.mark.logic
     @patch("api.logic.payment_logic.stripe.Webhook.construct_event")
-    def test_handle_stripe_webhook_other_event_type(self, mock_construct_event):
+    @patch("api.logic.payment_logic.Session")
+    @patch("api.logic.payment_logic.job_queue.enqueue")
+    def test_handle_stripe_webhook_other_event_type(
+        self, mock_enqueue, mock_session, mock_construct_event
+    ):
         """Test webhook handling with non-payment event"""
         # Mock webhook event for different event type
-        mock_event = {"type": "customer.created", "data": {"object": {}}}
+        mock_event = {"id": "evt_789", "type": "customer.created"}
         mock_construct_event.return_value = mock_event
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_session_instance.get.return_value = None
 
         # Call function - should not process payment logic
-        result = PaymentLogic.handle_stripe_webhook(b"test_payload", "test_signature")
+        result = PaymentLogic.handle_stripe_webhook(
+            b'{"id": "evt_789"}', "test_signature"
+        )
 
-        # Should return None or empty result for non-payment events
-        assert result is None
+        # The event is only recorded, as already processed
+        assert result == {"status": "success"}
+        assert mock_session_instance.add.call_args[0][0].processed_at is not None
+        mock_enqueue.assert_not_called()
 
     @pytest.mark.unit
     @pytest.mark.logic
-    @patch("api.logic.payment_logic.stripe.Webhook.construct_event")
-    @patch("api.logic.payment_logic.AssignmentLogic.accept_assignment_request")
-    @patch("api.logic.payment_logic.ChatLogic.get_or_create_private_chat")
-    @patch("api.logic.payment_logic.ChatLogic.unlock_chat")
     @patch("api.logic.payment_logic.Session")
-    def test_handle_stripe_webhook_missing_metadata(
-        self,
-        mock_session,
-        mock_unlock_chat,
-        mock_get_chat,
-        mock_accept_request,
-        mock_construct_event,
-    ):
-        """Test webhook handling with missing metadata"""
-        # Mock webhook event without metadata
-        mock_event = {
+    def test_process_stripe_event_missing_metadata(self, mock_session):
+        """Test a payment event without metadata fails the job, unprocessed"""
+        # Mock session context manager holding a stored event without metadata
+        mock_session_instance = Mock()
+        mock_session.return_value.__enter__.return_value = mock_session_instance
+        mock_stored_event = Mock()
+        mock_stored_event.processed_at = None
+        mock_stored_event.type = "payment_intent.succeeded"
+        mock_stored_event.payload = {
+            "id": "evt_456",
             "type": "payment_intent.succeeded",
             "data": {"object": {"metadata": {}}},
         }
-        mock_construct_event.return_value = mock_event
-
-        # Mock assignment acceptance to raise KeyError
-        mock_accept_request.side_effect = KeyError("assignment_request_id")
-
-        # Mock chat creation
-        mock_chat = Mock()
-        mock_chat.id = 101
-        mock_get_chat.return_value = mock_chat
+        mock_session_instance.get.return_value = mock_stored_event
 
-        # Mock session context manager
-        mock_session_instance = Mock()
-        mock_session.return_value.__enter__.return_value = mock_session_instance
-
-        # Mock empty tutor data
-        mock_session_instance.query.return_value.filter_by.return_value.first.return_value = None
-
-        # Call function - should handle missing metadata gracefully
+        # The job raises so the queue retries it, and nothing is committed
         with pytest.raises(KeyError):
-            PaymentLogic.handle_stripe_webhook(b"test_payload", "test_signature")
+            PaymentLogic.process_stripe_event({"event_id": "evt_456"})
+
+        assert mock_stored_event.processed_at is None
+        mock_session_instance.commit.assert_not_called()
 
     @pytest.mark.unit
     @pytest.mark.logic
@@ -351,8 +361,8 @@ class TestPaymentLogicExtended:
     @pytest.mark.unit
     @pytest.mark.logic
     def test_stripe_api_key_configured(self):
-        """Test that Stripe API key is configured"""
-        import stripe
+        """Test that Stripe API key is configured when Stripe is first used"""
+        from api.logic.payment_logic import stripe
 
         assert stripe.api_key is not None
         assert len(stripe.api_key) > 0
@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from api.config import settings
+from api.logic.payment_logic import PaymentLogic
+from api.storage.models import (
+    Assignment,
+    AssignmentRequest,
+    AssignmentRequestStatus,
+    AssignmentStatus,
+    Job,
+    Level,
+    Location,
+    PrivateChat,
+    StripeEvent,
+    Tutor,
+    User,
+)
+from api.storage.storage_service import StorageService
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+
+def signed_event(event: dict, secret: str = None) -> tuple[bytes, str]:
+    """
+    Build a webhook body and Stripe-Signature header the way Stripe signs them.
+    """
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(
+        (secret or settings.stripe_webhook_secret).encode(),
+        f"{timestamp}.{payload}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return payload.encode(), f"t={timestamp},v1={signature}"
+
+
+def payment_succeeded(event_id: str, assignment_request_id: int) -> dict:
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": "payment_intent.succeeded",
+        "data": {
+            "object": {
+                "id": "pi_test",
+                "object": "payment_intent",
+                "metadata": {"assignment_request_id": str(assignment_request_id)},
+            }
+        },
+    }
+
+
+@pytest.fixture
+def paid_request(test_engine):
+    """
+    An open assignment with a pending request from a tutor, in the test database.
+    """
+    with (
+        patch.object(StorageService, "engine", test_engine),
+        Session(test_engine, expire_on_commit=False) as session,
+    ):
+        owner = User(name="Owner", email="stripe-owner@test.com")
+        tutor_user = User(name="Tutor", email="stripe-tutor@test.com")
+        session.add_all([owner, tutor_user])
+        session.flush()
+        level = Level(name="Stripe Level", sort_order=0)
+        location = Location(name="Stripe Location")
+        session.add_all([Tutor(id=tutor_user.id), level, location])
+        session.flush()
+        assignment = Assignment(
+            title="Math Tutoring",
+            owner_id=owner.id,
+            level_id=level.id,
+            location_id=location.id,
+            estimated_rate_hourly=50,
+            lesson_duration=60,
+            weekly_frequency=1,
+        )
+        session.add(assignment)
+        session.flush()
+        assignment_request = AssignmentRequest(
+            assignment_id=assignment.id,
+            tutor_id=tutor_user.id,
+            requested_rate_hourly=50,
+            requested_duration=60,
+        )
+        session.add(assignment_request)
+        session.commit()
+
+        yield assignment_request
+
+        session.rollback()
+        for table in (Job, StripeEvent):
+            session.query(table).delete()
+        session.query(PrivateChat).filter(
+            PrivateChat.user1_id.in_([owner.id, tutor_user.id])
+        ).delete()
+        session.query(AssignmentRequest).filter_by(id=assignment_request.id).delete()
+        session.query(Assignment).filter_by(id=assignment.id).delete()
+        session.query(Level).filter_by(id=level.id).delete()
+        session.query(Location).filter_by(id=location.id).delete()
+        session.query(Tutor).filter_by(id=tutor_user.id).delete()
+        session.query(User).filter(User.id.in_([owner.id, tutor_user.id])).delete()
+        session.commit()
+
+
+def jobs(engine, kind: str) -> list[dict]:
+    with Session(engine) as session:
+        return [job.payload for job in session.query(Job).filter_by(kind=kind)]
+
+
+class TestStripeWebhook:
+    """Test cases for storing and processing Stripe webhook events"""
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_event_is_stored_and_queued_once(self, paid_request, test_engine):
+        """Test redelivered events are acknowledged without being queued again"""
+        payload, signature = signed_event(
+            payment_succeeded("evt_once", paid_request.id)
+        )
+
+        first = PaymentLogic.handle_stripe_webhook(payload, signature)
+        second = PaymentLogic.handle_stripe_webhook(payload, signature)
+
+        assert first == second == {"status": "success"}
+        assert jobs(test_engine, "stripe_event") == [{"event_id": "evt_once"}]
+        with Session(test_engine) as session:
+            event = session.get(StripeEvent, "evt_once")
+            assert event.type == "payment_intent.succeeded"
+            assert event.processed_at is None
+            # Nothing is processed inside the webhook request
+            request = session.get(AssignmentRequest, paid_request.id)
+            assert request.status == AssignmentRequestStatus.PENDING
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_unhandled_event_is_only_recorded(self, paid_request, test_engine):
+        """Test events we don't act on are stored as processed with no job"""
+        payload, signature = signed_event(
+            {"id": "evt_other", "object": "event", "type": "customer.created"}
+        )
+
+        assert PaymentLogic.handle_stripe_webhook(payload, signature) == {
+            "status": "success"
+        }
+
+        assert jobs(test_engine, "stripe_event") == []
+        with Session(test_engine) as session:
+            assert session.get(StripeEvent, "evt_other").processed_at is not None
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_bad_signature_is_rejected(self, paid_request, test_engine):
+        """Test events signed with another secret are rejected and not stored"""
+        payload, signature = signed_event(
+            payment_succeeded("evt_forged", paid_request.id), secret="whsec_other"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            PaymentLogic.handle_stripe_webhook(payload, signature)
+
+        assert exc_info.value.status_code == 400
+        with Session(test_engine) as session:
+            assert session.get(StripeEvent, "evt_forged") is None
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_processing_accepts_request_once(self, paid_request, test_engine):
+        """Test the job accepts the request, unlocks the chat and is idempotent"""
+        payload, signature = signed_event(
+            payment_succeeded("evt_paid", paid_request.id)
+        )
+        PaymentLogic.handle_stripe_webhook(payload, signature)
+
+        PaymentLogic.process_stripe_event({"event_id": "evt_paid"})
+        PaymentLogic.process_stripe_event({"event_id": "evt_paid"})
+
+        with Session(test_engine) as session:
+            request = session.get(AssignmentRequest, paid_request.id)
+            assert request.status == AssignmentRequestStatus.ACCEPTED
+            assert request.assignment.status == AssignmentStatus.FILLED
+            assert request.assignment.tutor_id == request.tutor_id
+            chat = (
+                session.query(PrivateChat)
+                .filter(PrivateChat.user2_id == request.tutor_id)
+                .one()
+            )
+            assert chat.is_locked is False
+            assert session.get(StripeEvent, "evt_paid").processed_at is not None
+        assert jobs(test_engine, "payment_accepted_email") == [
+            {"assignment_request_id": paid_request.id, "tutor_id": request.tutor_id}
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_second_payment_event_does_not_email_again(self, paid_request, test_engine):
+        """Test a different event for an accepted request sends no second email"""
+        for event_id in ("evt_first", "evt_second"):
+            payload, signature = signed_event(
+                payment_succeeded(event_id, paid_request.id)
+            )
+            PaymentLogic.handle_stripe_webhook(payload, signature)
+            PaymentLogic.process_stripe_event({"event_id": event_id})
+
+        assert len(jobs(test_engine, "payment_accepted_email")) == 1
+
+    @pytest.mark.unit
+    @pytest.mark.logic
+    def test_payment_evicts_cached_checkout_sessions(self, paid_request):
+        """Test a paid request's cached checkout session is not reused"""
+        paid_key = f"checkout-{paid_request.id}-1-abc"
+        other_key = f"checkout-{paid_request.id + 1}-1-abc"
+        PaymentLogic._checkout_sessions[paid_key] = ("cs_paid", "https://pay", 0)
+        PaymentLogic._checkout_sessions[other_key] = ("cs_other", "https://pay", 0)
+        payload, signature = signed_event(
+            payment_succeeded("evt_evict", paid_request.id)
+        )
+        PaymentLogic.handle_stripe_webhook(payload, signature)
+
+        try:
+            PaymentLogic.process_stripe_event({"event_id": "evt_evict"})
+
+            assert paid_key not in PaymentLogic._checkout_sessions
+            assert other_key in PaymentLogic._checkout_sessions
+        finally:
+            PaymentLogic.clear_checkout_cache()
@@ -0,0 +1,144 @@
+from unittest.mock import patch
+
+import pytest
+from api.config import settings
+from api.common.profiler import profiler
+from api.router.auth_utils import RouterAuthUtils
+from api.services.loop_watchdog import loop_watchdog
+from api.storage.models import User
+from api.storage.query_stats import query_stats
+
+
+class TestAdminRouter:
+    """Test cases for the admin endpoints"""
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_query_stats_require_an_admin(self, client):
+        """Test users not listed in admin_emails are refused"""
+        user = User(id=1, name="Test User", email="user@example.com")
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=user):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                response = client.get("/api/admin/query-stats")
+
+        assert response.status_code == 403
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_query_stats_top_and_reset(self, client):
+        """Test an admin can read the slowest statements and reset the table"""
+        admin = User(id=1, name="Admin", email="Admin@Example.com")
+        query_stats.reset()
+        query_stats.record("SELECT * FROM users WHERE id = 7", 0.25, "UserLogic.get")
+        query_stats.record("SELECT 1", 0.001)
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=admin):
+            with patch.object(settings, "admin_emails", " admin@example.com, other@x"):
+                response = client.get(
+                    "/api/admin/query-stats", params={"limit": 1, "order_by": "max"}
+                )
+                reset = client.delete("/api/admin/query-stats")
+
+        assert response.status_code == 200
+        (row,) = response.json()
+        assert row["fingerprint"] == "SELECT * FROM users WHERE id = ?"
+        assert row["max_ms"] == 250.0
+        assert row["origins"] == ["UserLogic.get"]
+        assert reset.status_code == 200
+        assert query_stats.top() == []
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_loop_stalls(self, client):
+        """Test an admin can read the call sites that blocked the event loop"""
+        admin = User(id=1, name="Admin", email="admin@example.com")
+        loop_watchdog.reset()
+        loop_watchdog._record("api/logic/auth_logic.py:42 in login", "", "", 0.5)
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=admin):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                response = client.get("/api/admin/loop-stalls")
+
+        assert response.status_code == 200
+        assert response.json()[0]["site"] == "api/logic/auth_logic.py:42 in login"
+        assert response.json()[0]["max_ms"] == 500.0
+        loop_watchdog.reset()
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_profile_a_request(self, client):
+        """Test an admin's flagged request is profiled and its profile downloadable"""
+        admin = User(id=1, name="Admin", email="admin@example.com")
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=admin):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                response = client.get("/api/ping", headers={"X-Profile": "1"})
+                profile_id = response.headers["X-Profile-Id"]
+                profiles = client.get("/api/admin/profiles").json()
+                speedscope = client.get(f"/api/admin/profiles/{profile_id}")
+                collapsed = client.get(
+                    f"/api/admin/profiles/{profile_id}", params={"format": "collapsed"}
+                )
+                missing = client.get("/api/admin/profiles/unknown")
+
+        assert response.json() == {"message": "pong"}
+        assert profiles[0]["id"] == profile_id
+        assert profiles[0]["name"] == "GET /api/ping"
+        assert profiles[0]["status"] == 200
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+        assert "attachment" in speedscope.headers["Content-Disposition"]
+        assert collapsed.headers["Content-Type"].startswith("text/plain")
+        assert missing.status_code == 404
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_profiling_requires_an_admin(self, client):
+        """Test a profiling flag from a non-admin is refused"""
+        user = User(id=1, name="Test User", email="user@example.com")
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=user):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                response = client.get("/api/ping", params={"__profile": "1"})
+
+        assert response.status_code == 403
+        assert "X-Profile-Id" not in response.headers
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_sample_rate_can_be_changed(self, client):
+        """Test an admin can change the share of requests profiled at runtime"""
+        admin = User(id=1, name="Admin", email="admin@example.com")
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=admin):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                with patch.object(profiler, "sample_rate", 0.0):
+                    updated = client.put(
+                        "/api/admin/profiler", json={"sample_rate": 1.0}
+                    )
+                    sampled = client.get("/api/ping")
+                    invalid = client.put(
+                        "/api/admin/profiler", json={"sample_rate": 2.0}
+                    )
+
+        assert updated.json() == {"sample_rate": 1.0}
+        assert "X-Profile-Id" in sampled.headers
+        assert invalid.status_code == 422
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    def test_memory_snapshot(self, client):
+        """Test an admin can start memory tracing and take snapshots"""
+        admin = User(id=1, name="Admin", email="admin@example.com")
+
+        with patch.object(RouterAuthUtils, "get_current_user", return_value=admin):
+            with patch.object(settings, "admin_emails", "admin@example.com"):
+                started = client.post("/api/admin/memory/tracing", params={"frames": 1})
+                snapshot = client.get("/api/admin/memory", params={"limit": 3})
+                stopped = client.delete("/api/admin/memory/tracing")
+
+        assert started.status_code == 200
+        assert snapshot.json()["tracing"] is True
+        assert len(snapshot.json()["top"]) == 3
+        assert "websocket_users" in snapshot.json()["objects"]
+        assert stopped.status_code == 200
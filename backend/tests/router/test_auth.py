@@ -20,6 +20,7 @@ class TestAuthRouter:
         mock_token_pair = Mock()
         mock_token_pair.access_token = "access_token"
         mock_token_pair.refresh_token = "refresh_token"
+        mock_logic.handle_login = AsyncMock()
         mock_logic.handle_login.return_value = mock_token_pair
 
         # Mock the auth utils
@@ -33,7 +34,7 @@ class TestAuthRouter:
 
         assert response.status_code == 200
         assert response.json()["message"] == "Logged in successfully"
-        mock_logic.handle_login.assert_called_once()
+        mock_logic.handle_login.assert_awaited_once()
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -42,6 +43,7 @@ class TestAuthRouter:
     def test_login_failure(self, mock_auth_utils, mock_logic, client):
         """Test login endpoint with invalid credentials"""
         # Mock the logic layer to raise exception
+        mock_logic.handle_login = AsyncMock()
         mock_logic.handle_login.side_effect = HTTPException(
             status_code=401, detail="Invalid credentials"
         )
@@ -68,6 +70,7 @@ class TestAuthRouter:
     ):
         """Test successful signup with pending verification"""
         # Mock the logic layer
+        mock_logic.handle_signup = AsyncMock()
         mock_logic.handle_signup.return_value = {
             "message": "Please check your email to verify your account"
         }
@@ -90,7 +93,7 @@ class TestAuthRouter:
         )
 
         # Verify logic was called
-        mock_logic.handle_signup.assert_called_once()
+        mock_logic.handle_signup.assert_awaited_once()
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -102,6 +105,7 @@ class TestAuthRouter:
         mock_token_pair = TokenPair(
             access_token="access_token", refresh_token="refresh_token"
         )
+        mock_logic.handle_signup = AsyncMock()
         mock_logic.handle_signup.return_value = mock_token_pair
 
         # Mock the auth utils
@@ -122,7 +126,7 @@ class TestAuthRouter:
         assert response.json()["message"] == "Signed up successfully"
 
         # Verify logic was called
-        mock_logic.handle_signup.assert_called_once()
+        mock_logic.handle_signup.assert_awaited_once()
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -131,6 +135,7 @@ class TestAuthRouter:
     def test_signup_user_already_exists(self, mock_auth_utils, mock_logic, client):
         """Test signup with existing user"""
         # Mock the logic layer to raise exception
+        mock_logic.handle_signup = AsyncMock()
         mock_logic.handle_signup.side_effect = HTTPException(
             status_code=400, detail="User already exists"
         )
@@ -364,6 +369,7 @@ class TestAuthRouter:
     def test_reset_password_success(self, mock_auth_utils, mock_logic, client):
         """Test successful password reset"""
         # Mock the logic layer
+        mock_logic.reset_password = AsyncMock()
         mock_logic.reset_password.return_value = {
             "message": "Password reset successfully"
         }
@@ -381,7 +387,7 @@ class TestAuthRouter:
         assert response.json()["message"] == "Password reset successfully"
 
         # Verify logic was called
-        mock_logic.reset_password.assert_called_once()
+        mock_logic.reset_password.assert_awaited_once()
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -127,75 +127,56 @@ class TestChatRouter:
         mock_websocket.receive_text = AsyncMock()
         mock_websocket.send_text = AsyncMock()
 
-        # Create a simple context manager mock that doesn't use AsyncMock
-        class MockMutex:
-            async def __aenter__(self):
-                return self
-
-            async def __aexit__(self, exc_type, exc_val, exc_tb):
-                return None
-
-        mock_mutex = MockMutex()
-
-        # Mock ChatLogic.mutex and active_connections
-        with patch("api.router.chat.ChatLogic.mutex", mock_mutex):
-            with patch("api.router.chat.ChatLogic.active_connections", {}):
-                # Make handle_private_message an async function that raises ConsecutiveMessageError
-                async def mock_handle_side_effect(*args, **kwargs):
-                    raise ConsecutiveMessageError()
-
-                mock_handle_private_message.side_effect = mock_handle_side_effect
-
-                # Import the function
-                from api.router.chat import websocket_endpoint
-                from fastapi import WebSocketDisconnect
-
-                # Mock WebSocketDisconnect to be raised on second receive_text call
-                mock_websocket.receive_text.side_effect = [
-                    json.dumps({"chat_id": 1, "content": "test message"}),
-                    WebSocketDisconnect(),
-                ]
-
-                # Call the websocket endpoint
-                try:
-                    await websocket_endpoint(mock_websocket, "some_token")
-                except WebSocketDisconnect:
-                    pass  # Expected when websocket disconnects
-
-                # Verify that an error message was sent
-                expected_error = {
-                    "id": -1,
-                    "chat_id": 1,
-                    "sender": "System",
-                    "content": "You cannot send more than 3 consecutive messages in a locked chat.",
-                    "message_type": "text_message",
-                    "created_at": mock_websocket.send_text.call_args[0][
-                        0
-                    ],  # We'll check this dynamically
-                    "updated_at": mock_websocket.send_text.call_args[0][
-                        0
-                    ],  # We'll check this dynamically
-                    "sent_by_user": False,
-                    "is_flagged": False,
-                    "is_error": True,
-                }
-
-                # Get the actual call and parse the JSON
-                actual_call = mock_websocket.send_text.call_args[0][0]
-                actual_error = json.loads(actual_call)
-
-                # Check that the error message has the correct structure
-                assert actual_error["id"] == -1
-                assert actual_error["chat_id"] == 1
-                assert actual_error["sender"] == "System"
-                assert (
-                    actual_error["content"]
-                    == "You cannot send more than 3 consecutive messages in a locked chat."
-                )
-                assert actual_error["message_type"] == "text_message"
-                assert actual_error["sent_by_user"] == False
-                assert actual_error["is_flagged"] == False
-                assert actual_error["is_error"] == True
-                # Check that timestamps are present and valid
-                assert "created_at" in actual_error
-                assert "updated_at" in actual_error
+        # Mock the connection registry so replies can be inspected
+        with patch("api.router.chat.connection_registry") as mock_registry:
+            mock_registry.connect = AsyncMock()
+            mock_registry.disconnect = AsyncMock()
+
+            # Make handle_private_message an async function that raises ConsecutiveMessageError
+            async def mock_handle_side_effect(*args, **kwargs):
+                raise ConsecutiveMessageError()
+
+            mock_handle_private_message.side_effect = mock_handle_side_effect
+
+            # Import the function
+            from api.router.chat import websocket_endpoint
+            from fastapi import WebSocketDisconnect
+
+            # Mock WebSocketDisconnect to be raised on second receive_text call
+            mock_websocket.receive_text.side_effect = [
+                json.dumps({"chat_id": 1, "content": "test message"}),
+                WebSocketDisconnect(),
+            ]
+
+            # Call the websocket endpoint
+            try:
+                await websocket_endpoint(mock_websocket, "some_token")
+            except WebSocketDisconnect:
+                pass  # Expected when websocket disconnects
+
+            # The error reply is queued for the sending socket only
+            mock_registry.connect.assert_called_once_with(mock_websocket, 123, ["chat"])
+            websocket, user_id, channel, actual_call = mock_registry.send_to.call_args[
+                0
+            ]
+            assert websocket is mock_websocket
+            assert user_id == 123
+            assert channel == "chat"
+            actual_error = json.loads(actual_call)
+
+            # Check that the error message has the correct structure
+            assert actual_error["id"] == -1
+            assert actual_error["chat_id"] == 1
+            assert actual_error["sender"] == "System"
+            assert (
+                actual_error["content"]
+                == "You cannot send more than 3 consecutive messages in a locked chat."
+            )
+            assert actual_error["message_type"] == "text_message"
+            assert actual_error["sent_by_user"] == False
+            assert actual_error["is_flagged"] == False
+            assert actual_error["is_error"] == True
+            # Check that timestamps are present and valid
+            assert "created_at" in actual_error
+            assert "updated_at" in actual_error
+            mock_registry.disconnect.assert_called_once_with(mock_websocket, 123)
@@ -1,7 +1,20 @@
-from unittest.mock import AsyncMock
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+import pytest_asyncio
+from fastapi import WebSocketDisconnect
 from api.router.websocket import WebSocketManager
+from api.services.connection_registry import connection_registry
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_manager():
+    """Start every test with an empty registry and stop writers afterwards"""
+    connection_registry.clear()
+    yield
+    connection_registry.clear()
 
 
 class TestWebSocketManager:
@@ -18,8 +31,8 @@ class TestWebSocketManager:
         await WebSocketManager.connect(mock_websocket, user_id)
 
         mock_websocket.accept.assert_called_once()
-        assert user_id in WebSocketManager.active_connections
-        assert mock_websocket in WebSocketManager.active_connections[user_id]
+        assert user_id in connection_registry.connections
+        assert mock_websocket in connection_registry.sockets(user_id)
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -36,10 +49,10 @@ class TestWebSocketManager:
         # Connect second websocket
         await WebSocketManager.connect(mock_websocket2, user_id)
 
-        assert user_id in WebSocketManager.active_connections
-        assert len(WebSocketManager.active_connections[user_id]) == 2
-        assert mock_websocket1 in WebSocketManager.active_connections[user_id]
-        assert mock_websocket2 in WebSocketManager.active_connections[user_id]
+        assert user_id in connection_registry.connections
+        assert len(connection_registry.sockets(user_id)) == 2
+        assert mock_websocket1 in connection_registry.sockets(user_id)
+        assert mock_websocket2 in connection_registry.sockets(user_id)
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -51,11 +64,11 @@ class TestWebSocketManager:
 
         # Connect first
         await WebSocketManager.connect(mock_websocket, user_id)
-        assert user_id in WebSocketManager.active_connections
+        assert user_id in connection_registry.connections
 
         # Disconnect
         await WebSocketManager.disconnect(mock_websocket, user_id)
-        assert user_id not in WebSocketManager.active_connections
+        assert user_id not in connection_registry.connections
 
     @pytest.mark.unit
     @pytest.mark.router
@@ -82,6 +95,7 @@ class TestWebSocketManager:
         # Send notification
         message = "Test notification"
         await WebSocketManager.send_personal_notification(user_id, message)
+        await WebSocketManager.flush()
 
         mock_websocket.send_text.assert_called_once_with(message)
 
@@ -111,6 +125,7 @@ class TestWebSocketManager:
         # Broadcast message
         message = "Broadcast message"
         await WebSocketManager.broadcast_notification(message)
+        await WebSocketManager.flush()
 
         mock_websocket1.send_text.assert_called_once_with(message)
         mock_websocket2.send_text.assert_called_once_with(message)
@@ -124,3 +139,157 @@ class TestWebSocketManager:
 
         # Should not raise an error
         await WebSocketManager.broadcast_notification(message)
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @pytest.mark.asyncio
+    async def test_slow_connection_does_not_block_others(self):
+        """Test a stalled client does not delay notifications to other clients"""
+        stalled = asyncio.Event()
+
+        async def stall(message):
+            await stalled.wait()
+
+        slow_websocket = AsyncMock()
+        slow_websocket.send_text.side_effect = stall
+        fast_websocket = AsyncMock()
+
+        await WebSocketManager.connect(slow_websocket, 1)
+        await WebSocketManager.connect(fast_websocket, 2)
+
+        await WebSocketManager.broadcast_notification("first")
+        await WebSocketManager.broadcast_notification("second")
+        await asyncio.wait_for(
+            connection_registry.connections[2][0].queue.join(), timeout=1
+        )
+
+        assert fast_websocket.send_text.call_count == 2
+        assert slow_websocket.send_text.call_count == 1
+        stalled.set()
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self):
+        """Test the oldest queued message is dropped when a queue is full"""
+        websocket = AsyncMock()
+        with patch("api.services.connection_registry.settings") as mock_settings:
+            mock_settings.websocket_send_queue_size = 2
+            mock_settings.websocket_send_timeout = 1.0
+            mock_settings.websocket_slow_consumer_policy = "drop_oldest"
+            await WebSocketManager.connect(websocket, 1)
+
+            # Queue three messages before the writer gets a chance to run
+            for message in ("one", "two", "three"):
+                await WebSocketManager.send_personal_notification(1, message)
+            await WebSocketManager.flush()
+
+        sent = [call.args[0] for call in websocket.send_text.call_args_list]
+        assert sent == ["two", "three"]
+        assert connection_registry.connections[1][0].dropped == 1
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @pytest.mark.asyncio
+    async def test_full_queue_disconnect_policy_evicts(self):
+        """Test a slow consumer is evicted under the disconnect policy"""
+        websocket = AsyncMock()
+        with patch("api.services.connection_registry.settings") as mock_settings:
+            mock_settings.websocket_send_queue_size = 1
+            mock_settings.websocket_send_timeout = 1.0
+            mock_settings.websocket_slow_consumer_policy = "disconnect"
+            await WebSocketManager.connect(websocket, 1)
+
+            await WebSocketManager.send_personal_notification(1, "one")
+            await WebSocketManager.send_personal_notification(1, "two")
+            await asyncio.sleep(0)
+
+        assert 1 not in connection_registry.connections
+        websocket.close.assert_called_once_with(code=1013)
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @pytest.mark.asyncio
+    async def test_failed_send_evicts_connection(self):
+        """Test a connection whose send fails is removed from the registry"""
+        websocket = AsyncMock()
+        websocket.send_text.side_effect = RuntimeError("connection reset")
+
+        await WebSocketManager.connect(websocket, 1)
+        await WebSocketManager.send_personal_notification(1, "message")
+        await WebSocketManager.flush()
+        await asyncio.sleep(0)
+
+        assert 1 not in connection_registry.connections
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @pytest.mark.asyncio
+    async def test_deliver_notification_from_bus(self):
+        """Test notifications published by other workers reach local sockets"""
+        websocket1 = AsyncMock()
+        websocket2 = AsyncMock()
+        await WebSocketManager.connect(websocket1, 1)
+        await WebSocketManager.connect(websocket2, 2)
+
+        await WebSocketManager.deliver_notification({"user_id": 1, "message": "hi"})
+        await WebSocketManager.deliver_notification({"user_id": None, "message": "all"})
+        await WebSocketManager.flush()
+
+        assert [c.args[0] for c in websocket1.send_text.call_args_list] == ["hi", "all"]
+        assert [c.args[0] for c in websocket2.send_text.call_args_list] == ["all"]
+
+
+class TestMultiplexedWebSocket:
+    """Test cases for frames received on websockets"""
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @patch("api.router.websocket.RouterAuthUtils.get_user_from_jwt")
+    def test_malformed_frames_get_error_replies(self, mock_get_user, client):
+        """Test invalid frames are answered with errors and the socket is cleaned up"""
+        mock_get_user.return_value = Mock(id=42)
+
+        with client.websocket_connect("/ws/connect?access_token=t") as websocket:
+            for frame in ("not json", "[1]", json.dumps({"channel": "unknown"})):
+                websocket.send_text(frame)
+                assert websocket.receive_json()["channel"] == "error"
+            websocket.send_text(json.dumps({"channel": "chat", "data": ["content"]}))
+            reply = websocket.receive_json()
+            assert reply["channel"] == "chat"
+            assert reply["data"]["is_error"]
+            websocket.send_text(
+                json.dumps({"channel": "chat", "data": {"content": "no chat"}})
+            )
+            assert websocket.receive_json()["data"]["is_error"]
+
+        assert 42 not in connection_registry.connections
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @patch("api.router.websocket.RouterAuthUtils.get_user_from_jwt")
+    def test_subscription_without_valid_channels_is_rejected(
+        self, mock_get_user, client
+    ):
+        """Test a socket asking only for unknown channels is closed"""
+        mock_get_user.return_value = Mock(id=42)
+
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            with client.websocket_connect("/ws/connect?channels=unknown"):
+                pass
+
+        assert disconnect.value.code == 1008
+        assert 42 not in connection_registry.connections
+
+    @pytest.mark.unit
+    @pytest.mark.router
+    @patch("api.router.chat.RouterAuthUtils.get_user_from_jwt")
+    def test_chat_socket_survives_invalid_json(self, mock_get_user, client):
+        """Test a non-JSON chat frame gets an error reply instead of a crash"""
+        mock_get_user.return_value = Mock(id=42)
+
+        with client.websocket_connect("/ws/chat?access_token=t") as websocket:
+            websocket.send_text("not json")
+            assert websocket.receive_json()["is_error"]
+
+        assert 42 not in connection_registry.connections
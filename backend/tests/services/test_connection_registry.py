@@ -0,0 +1,124 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from api.common.tracing import tracer
+from api.services.connection_registry import ConnectionRegistry
+
+
+@pytest_asyncio.fixture
+async def registry():
+    registry = ConnectionRegistry()
+    yield registry
+    registry.clear()
+
+
+class TestConnectionRegistry:
+    """Test cases for the shared websocket connection registry"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_send_only_reaches_subscribed_sockets(self, registry):
+        """Test messages are only queued for sockets subscribed to the channel"""
+        chat_socket = AsyncMock()
+        notification_socket = AsyncMock()
+        await registry.connect(chat_socket, 1, ["chat"])
+        await registry.connect(notification_socket, 1, ["notifications"])
+
+        sent = registry.send(1, "chat", '{"content": "hi"}')
+        await registry.flush()
+
+        assert sent == 1
+        chat_socket.send_text.assert_called_once_with('{"content": "hi"}')
+        notification_socket.send_text.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_multiplexed_socket_receives_channel_frames(self, registry):
+        """Test a multiplexed socket receives both channels wrapped in frames"""
+        websocket = AsyncMock()
+        await registry.connect(websocket, 1, ["chat", "notifications"], True)
+
+        registry.send(1, "chat", '{"content": "hi"}')
+        registry.broadcast("notifications", "maintenance tonight")
+        await registry.flush()
+
+        frames = [json.loads(c.args[0]) for c in websocket.send_text.call_args_list]
+        assert frames == [
+            {"channel": "chat", "data": {"content": "hi"}},
+            {"channel": "notifications", "data": "maintenance tonight"},
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_send_to_targets_one_socket(self, registry):
+        """Test replies only go to the socket they are addressed to"""
+        websocket1 = AsyncMock()
+        websocket2 = AsyncMock()
+        await registry.connect(websocket1, 1, ["chat"])
+        await registry.connect(websocket2, 1, ["chat"])
+
+        registry.send_to(websocket2, 1, "chat", "error")
+        await registry.flush()
+
+        websocket1.send_text.assert_not_called()
+        websocket2.send_text.assert_called_once_with("error")
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_is_connected_tracks_channels(self, registry):
+        """Test is_connected reflects the channels of the user's open sockets"""
+        websocket = AsyncMock()
+        await registry.connect(websocket, 1, ["notifications"])
+
+        assert registry.is_connected(1, "notifications")
+        assert not registry.is_connected(1, "chat")
+
+        await registry.disconnect(websocket, 1)
+
+        assert not registry.is_connected(1, "notifications")
+        assert registry.connections == {}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_disconnect_keeps_other_sockets(self, registry):
+        """Test disconnecting one socket leaves the user's other sockets registered"""
+        websocket1 = AsyncMock()
+        websocket2 = AsyncMock()
+        await registry.connect(websocket1, 1, ["chat"])
+        await registry.connect(websocket2, 1, ["chat", "notifications"], True)
+
+        await registry.disconnect(websocket1, 1)
+
+        assert registry.sockets(1) == [websocket2]
+        assert registry.sockets(1, "notifications") == [websocket2]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_counts_per_channel(self, registry):
+        """Test open connections are counted once per subscribed channel"""
+        await registry.connect(AsyncMock(), 1, ["chat"])
+        await registry.connect(AsyncMock(), 1, ["chat", "notifications"], True)
+        await registry.connect(AsyncMock(), 2, ["notifications"])
+
+        assert registry.counts() == {"chat": 2, "notifications": 2}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sends_are_traced_in_the_senders_trace(self, registry, span_exporter):
+        """Test a queued message is sent in a span of the trace that queued it"""
+        await registry.connect(AsyncMock(), 1, ["chat"])
+
+        with tracer.start_as_current_span("request") as request:
+            registry.send(1, "chat", "hi")
+        registry.send(1, "chat", "untraced")
+        await registry.flush()
+
+        (send,) = [
+            span
+            for span in span_exporter.get_finished_spans()
+            if span.name == "websocket send"
+        ]
+        assert send.parent_id == request.context.span_id
+        assert send.attributes["messaging.destination"] == "chat"
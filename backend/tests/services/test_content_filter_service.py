@@ -1,3 +1,4 @@
+import json
 from unittest.mock import patch
 
 import pytest
@@ -313,9 +314,7 @@ class TestContentFilterService:
         )
 
         assert result["filtered"] is True
-        assert (
-            result["content"] == "Message filtered due to potential PII: EMAIL_ADDRESS"
-        )
+        assert result["content"] == "Contact me at [EMAIL_ADDRESS]"
         assert result["detected"] == ["EMAIL_ADDRESS"]
         assert result["confidence"] == 1.0
         assert result["reasoning"] == "Message flagged by manual filter."
@@ -337,3 +336,62 @@ class TestContentFilterService:
         # Test with only whitespace
         result = service._manual_filter("   ")
         assert result["filtered"] is False
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_filter_message_redacts_only_new_message(self):
+        """Test only the offending substring of the new message is masked"""
+        service = ContentFilterService()
+
+        result = await service.filter_message(
+            "Sure, call me at 9123 4567 after 6pm",
+            history=["Can we do Monday instead?", "Is the rate negotiable?"],
+        )
+
+        assert result["filtered"] is True
+        assert result["content"] == "Sure, call me at [PHONE_NUMBER] after 6pm"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_filter_message_placeholder_when_pii_spans_history(self):
+        """Test a placeholder is used when the PII only appears across messages"""
+        service = ContentFilterService()
+
+        result = await service.filter_message("Call me at 9123", history=["4567"])
+
+        assert result["filtered"] is True
+        assert (
+            result["content"] == "Message filtered due to potential PII: PHONE_NUMBER"
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_filter_message_uses_llm_span_hints(self):
+        """Test substrings reported by the LLM are masked in the new message"""
+        service = ContentFilterService()
+
+        async def mock_provider(message, threshold):
+            return service._parse_llm_output(
+                json.dumps(
+                    {
+                        "has_pii": True,
+                        "detected_types": ["ADDRESS"],
+                        "confidence": 0.9,
+                        "pii_spans": ["near Bishan MRT exit A"],
+                        "reasoning": "Meeting location",
+                    }
+                ),
+                message,
+                "mock-model",
+                threshold,
+            )
+
+        with patch.object(service, "llm_providers", [mock_provider]):
+            result = await service.filter_message(
+                "Let's meet near Bishan MRT exit A",
+                history=["Can we do Monday instead?"],
+            )
+
+        assert result["filtered"] is True
+        assert result["content"] == "Let's meet [ADDRESS]"
+        assert "pii_spans" not in result
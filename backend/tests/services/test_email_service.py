@@ -1,3 +1,7 @@
+import base64
+import threading
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -108,6 +112,42 @@ class TestEmailService:
         assert "message_id" in result
         assert "thread_id" in result
 
+    @pytest.mark.unit
+    @pytest.mark.services
+    @patch("api.services.email_service.GmailEmailService._get_gmail_service")
+    @patch("api.services.email_service.GmailEmailService._get_credentials")
+    def test_send_unread_digest_email(self, mock_get_creds, mock_get_service):
+        """Test sending one digest email for several unread chats"""
+        # Mock the Gmail service
+        mock_service = MagicMock()
+        mock_get_service.return_value = mock_service
+        mock_service.users().messages().send().execute.return_value = {
+            "id": "123",
+            "threadId": "456",
+        }
+
+        result = GmailEmailService.send_unread_digest_email(
+            recipient_email="test@example.com",
+            chats=[
+                {
+                    "sender_name": "John Doe",
+                    "message_preview": "Hello!",
+                    "chat_url": "https://example.com/chat?chatId=1",
+                },
+                {
+                    "sender_name": "Jane Doe",
+                    "message_preview": "Are you free on Monday?",
+                    "chat_url": "https://example.com/chat?chatId=2",
+                },
+            ],
+        )
+
+        assert result["success"] is True
+        assert mock_get_creds.call_count == 1
+        raw = mock_service.users().messages().send.call_args.kwargs["body"]["raw"]
+        email = base64.urlsafe_b64decode(raw).decode("utf-8")
+        assert "You have unread messages in 2 chats" in email
+
     @pytest.mark.unit
     @pytest.mark.services
     @patch("api.services.email_service.GmailEmailService._read_template")
@@ -222,3 +262,126 @@ class TestEmailService:
 
         # Test that the token is properly encoded in the URL
         assert confirmation_token in link
+
+
+class TestGmailClientCache:
+    """Test cases for the cached Gmail credentials and service"""
+
+    def setup_method(self):
+        GmailEmailService.clear_cache()
+
+    def teardown_method(self):
+        GmailEmailService.clear_cache()
+
+    @staticmethod
+    def fake_refresh(lifetime: timedelta):
+        def refresh(credentials, request):
+            credentials.token = "access-token"
+            credentials.expiry = (
+                datetime.now(timezone.utc).replace(tzinfo=None) + lifetime
+            )
+
+        return refresh
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_credentials_refreshed_once_while_valid(self):
+        """Test the access token is reused until it is close to expiry"""
+        with patch(
+            "google.oauth2.credentials.Credentials.refresh",
+            autospec=True,
+            side_effect=self.fake_refresh(timedelta(hours=1)),
+        ) as mock_refresh:
+            first = GmailEmailService._get_credentials("token", "id", "secret")
+            second = GmailEmailService._get_credentials("token", "id", "secret")
+
+        assert first is second
+        assert mock_refresh.call_count == 1
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_credentials_refreshed_near_expiry(self):
+        """Test a token inside the refresh margin is refreshed before use"""
+        with patch(
+            "google.oauth2.credentials.Credentials.refresh",
+            autospec=True,
+            side_effect=self.fake_refresh(timedelta(minutes=1)),
+        ) as mock_refresh:
+            GmailEmailService._get_credentials("token", "id", "secret")
+            GmailEmailService._get_credentials("token", "id", "secret")
+
+        assert mock_refresh.call_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_credentials_cached_per_refresh_token(self):
+        """Test different accounts do not share credentials"""
+        with patch(
+            "google.oauth2.credentials.Credentials.refresh",
+            autospec=True,
+            side_effect=self.fake_refresh(timedelta(hours=1)),
+        ):
+            first = GmailEmailService._get_credentials("token-a", "id", "secret")
+            second = GmailEmailService._get_credentials("token-b", "id", "secret")
+
+        assert first is not second
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @patch("api.services.email_service.build")
+    def test_service_built_once_per_thread(self, mock_build):
+        """Test the discovery client is reused within a thread but not shared"""
+        credentials = MagicMock()
+        mock_build.side_effect = lambda *args, **kwargs: MagicMock()
+
+        first = GmailEmailService._get_gmail_service(credentials)
+        second = GmailEmailService._get_gmail_service(credentials)
+        other_thread = []
+        thread = threading.Thread(
+            target=lambda: other_thread.append(
+                GmailEmailService._get_gmail_service(credentials)
+            )
+        )
+        thread.start()
+        thread.join()
+
+        assert first is second
+        assert other_thread[0] is not first
+        assert mock_build.call_count == 2
+
+
+class TestEmailAssetCache:
+    """Test cases for the cached email templates and banner image"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_template_compiled_once(self):
+        """Test repeated lookups reuse the compiled template"""
+        first = GmailEmailService._read_template("unread_message.html")
+        second = GmailEmailService._read_template("unread_message.html")
+
+        assert first is second
+        assert "Alice" in first.render(
+            sender_name="Alice", message_preview="Hi", chat_url="https://a.test"
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_banner_read_once_and_attached_to_each_message(self):
+        """Test the banner is loaded from disk once and attached as a copy"""
+        GmailEmailService._banner_part = None
+        try:
+            with patch("builtins.open", wraps=open) as mock_open:
+                first = MIMEMultipart("related")
+                second = MIMEMultipart("related")
+                GmailEmailService._attach_banner_image(first)
+                GmailEmailService._attach_banner_image(second)
+
+            assert mock_open.call_count == 1
+            first_banner = first.get_payload()[0]
+            second_banner = second.get_payload()[0]
+            assert first_banner is not second_banner
+            assert first_banner["Content-ID"] == "<banner>"
+            assert first_banner.get_payload() == second_banner.get_payload()
+        finally:
+            GmailEmailService._banner_part = None
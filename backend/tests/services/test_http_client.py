@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from api.auth.auth_service import AuthService
+from api.auth.models import TokenPair
+from api.services.http_client import HttpClient
+from api.storage.models import User
+
+
+class StubGoogle(BaseHTTPRequestHandler):
+    """
+    Stands in for Google's token and userinfo endpoints and records which
+    client connection each request arrived on.
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    connections: list[int] = []
+
+    def _reply(self, body: dict):
+        StubGoogle.connections.append(self.client_address[1])
+        response = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self._reply({"access_token": "stub-access-token"})
+
+    def do_GET(self):
+        assert self.headers["Authorization"] == "Bearer stub-access-token"
+        self._reply({"sub": "google-123", "email": "stub@gmail.com", "name": "Stub"})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_google():
+    StubGoogle.connections = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGoogle)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpClient:
+    """Test cases for the shared outbound HTTP client"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_client_is_shared_until_stopped(self):
+        """Test the same pooled client is returned until the app shuts down"""
+        http_client = HttpClient()
+        await http_client.start()
+        client = http_client.client
+
+        assert http_client.client is client
+        assert client.timeout.connect == 5.0
+
+        await http_client.stop()
+        assert client.is_closed
+        assert http_client.client is not client
+        await http_client.stop()
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_google_login_reuses_one_connection(self, stub_google):
+        """Test token exchange and userinfo share a kept-alive connection"""
+        http_client = HttpClient()
+        await http_client.start()
+        with (
+            patch("api.auth.auth_service.http_client", http_client),
+            patch("api.auth.auth_service.GOOGLE_TOKEN_URL", f"{stub_google}/token"),
+            patch(
+                "api.auth.auth_service.GOOGLE_USER_INFO_URL",
+                f"{stub_google}/userinfo",
+            ),
+            patch("api.auth.auth_service.StorageService") as mock_storage,
+        ):
+            mock_storage.get_user_by_google_id.return_value = User(
+                email="stub@gmail.com", token_version=0
+            )
+
+            for _ in range(2):
+                token_pair = await AuthService.authenticate_google_user("code")
+
+        await http_client.stop()
+
+        assert isinstance(token_pair, TokenPair)
+        assert len(StubGoogle.connections) == 4
+        assert len(set(StubGoogle.connections)) == 1
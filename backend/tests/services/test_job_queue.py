@@ -0,0 +1,248 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+from api.common.tracing import tracer
+from api.config import settings
+from api.services.job_queue import JobQueue
+from api.storage.models import Job, JobStatus
+from sqlalchemy.orm import Session
+
+
+@pytest_asyncio.fixture
+async def queue(test_engine):
+    queue = JobQueue(test_engine)
+    yield queue
+    await queue.drain()
+    with Session(test_engine) as session:
+        session.query(Job).delete()
+        session.commit()
+
+
+def get_job(engine, job_id: int) -> Job:
+    with Session(engine) as session:
+        return session.get(Job, job_id)
+
+
+class TestJobQueue:
+    """Test cases for the durable background job queue"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_runs_sync_and_async_handlers(self, queue, test_engine):
+        """Test due jobs are claimed, run and marked done"""
+        sync_handler = Mock()
+        async_handler = AsyncMock()
+        queue.register("sync", sync_handler)
+        queue.register("async", async_handler)
+        sync_job = queue.enqueue("sync", {"n": 1})
+        async_job = queue.enqueue("async", {"n": 2})
+
+        assert await queue.run_once() == 2
+        await queue.drain()
+
+        sync_handler.assert_called_once_with({"n": 1})
+        async_handler.assert_called_once_with({"n": 2})
+        assert get_job(test_engine, sync_job.id).status == JobStatus.DONE
+        assert get_job(test_engine, async_job.id).status == JobStatus.DONE
+        assert await queue.run_once() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_failed_job_is_retried_with_backoff(self, queue, test_engine):
+        """Test a failing job goes back to pending with an exponential delay"""
+        queue.register("flaky", Mock(side_effect=RuntimeError("smtp down")))
+        job = queue.enqueue("flaky", {})
+
+        await queue.run_once()
+        await queue.drain()
+
+        failed = get_job(test_engine, job.id)
+        assert failed.status == JobStatus.PENDING
+        assert failed.attempts == 1
+        assert "smtp down" in failed.last_error
+        run_at = failed.run_at.replace(tzinfo=timezone.utc)
+        assert run_at > datetime.now(timezone.utc) + timedelta(seconds=5)
+        # Not due yet, so it is not claimed again
+        assert await queue.run_once() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_backoff_doubles_up_to_the_limit(self):
+        """Test retry delays double per attempt and are capped"""
+        assert JobQueue.backoff(1) == timedelta(seconds=10)
+        assert JobQueue.backoff(2) == timedelta(seconds=20)
+        assert JobQueue.backoff(3) == timedelta(seconds=40)
+        assert JobQueue.backoff(100) == timedelta(seconds=3600)
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_job_fails_after_max_attempts(self, queue, test_engine):
+        """Test a job that keeps failing is eventually marked failed"""
+        handler = Mock(side_effect=RuntimeError("bad address"))
+        queue.register("doomed", handler)
+        job = queue.enqueue("doomed", {}, max_attempts=1)
+
+        await queue.run_once()
+        await queue.drain()
+
+        assert get_job(test_engine, job.id).status == JobStatus.FAILED
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_enqueue_in_session_is_rolled_back_with_it(self, queue, test_engine):
+        """Test a job added to the caller's session is discarded on rollback"""
+        with Session(test_engine) as session:
+            queue.enqueue("email", {}, session=session)
+            session.rollback()
+
+        with Session(test_engine) as session:
+            assert session.query(Job).count() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_stale_running_job_is_reclaimed(self, queue, test_engine):
+        """Test a job left running by a crashed worker is run again"""
+        handler = Mock()
+        queue.register("email", handler)
+        job = queue.enqueue("email", {})
+        with Session(test_engine) as session:
+            crashed = session.get(Job, job.id)
+            crashed.status = JobStatus.RUNNING
+            crashed.attempts = 1
+            crashed.locked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+            session.commit()
+
+        assert await queue.run_once() == 1
+        await queue.drain()
+
+        handler.assert_called_once()
+        assert get_job(test_engine, job.id).attempts == 2
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_per_kind_concurrency_limit(self, queue, test_engine):
+        """Test jobs of a kind are only claimed while the kind has a free slot"""
+        running = 0
+        peak = 0
+
+        async def handler(payload):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        queue.register("email", handler, concurrency=1)
+        queue.register("other", AsyncMock())
+        jobs = [queue.enqueue("email", {}) for _ in range(3)]
+        queue.enqueue("other", {})
+
+        assert await queue.run_once() == 2
+        assert await queue.run_once() == 0
+        # Jobs waiting for a slot stay pending, so their lock can never expire
+        assert get_job(test_engine, jobs[1].id).status == JobStatus.PENDING
+        await queue.drain()
+        for _ in range(2):
+            assert await queue.run_once() == 1
+            await queue.drain()
+
+        assert peak == 1
+        assert all(
+            get_job(test_engine, job.id).status == JobStatus.DONE for job in jobs
+        )
+        assert queue.active == {"email": 0, "other": 0}
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_unknown_kind_is_recorded_as_failure(self, queue, test_engine):
+        """Test a job without a handler fails instead of crashing the worker"""
+        job = queue.enqueue("missing", {}, max_attempts=1)
+
+        await queue.run_once()
+        await queue.drain()
+
+        failed = get_job(test_engine, job.id)
+        assert failed.status == JobStatus.FAILED
+        assert "No handler registered" in failed.last_error
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_job_continues_the_enqueuing_trace(
+        self, queue, test_engine, span_exporter
+    ):
+        """Test a job runs in a span of the trace that enqueued it"""
+        handler = Mock()
+        queue.register("traced", handler)
+        with tracer.start_as_current_span("request") as request:
+            queue.enqueue("traced", {"n": 1})
+
+        await queue.run_once()
+        await queue.drain()
+
+        handler.assert_called_once_with({"n": 1})
+        (job,) = [
+            span
+            for span in span_exporter.get_finished_spans()
+            if span.name == "job traced"
+        ]
+        assert job.context.trace_id == request.context.trace_id
+        assert job.parent_id == request.context.span_id
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_running_job_keeps_its_lock(self, queue, test_engine, monkeypatch):
+        """Test a slow job's lock is refreshed so it is not reclaimed as stale"""
+        monkeypatch.setattr(settings, "job_lock_timeout", 0.09)
+        release = asyncio.Event()
+
+        async def handler(payload):
+            await release.wait()
+
+        queue.register("slow", handler)
+        job = queue.enqueue("slow", {})
+        await queue.run_once()
+        claimed_at = get_job(test_engine, job.id).locked_at
+
+        await asyncio.sleep(0.15)
+
+        assert get_job(test_engine, job.id).locked_at > claimed_at
+        assert await queue.run_once() == 0
+        release.set()
+        await queue.drain()
+        assert get_job(test_engine, job.id).status == JobStatus.DONE
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_stop_requeues_jobs_that_outlive_the_drain_timeout(
+        self, queue, test_engine, monkeypatch
+    ):
+        """Test shutdown waits a bounded time, then puts unfinished jobs back"""
+        monkeypatch.setattr(settings, "job_drain_timeout", 0.01)
+
+        async def handler(payload):
+            await asyncio.Event().wait()
+
+        queue.register("stuck", handler)
+        job = queue.enqueue("stuck", {})
+        await queue.run_once()
+
+        await asyncio.wait_for(queue.stop(), timeout=1)
+
+        requeued = get_job(test_engine, job.id)
+        assert requeued.status == JobStatus.PENDING
+        assert requeued.locked_at is None
+        assert requeued.attempts == 0
+        assert not queue.running
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from api.services.loop_watchdog import LoopWatchdog
+
+
+def _blocking_call():
+    time.sleep(0.3)
+
+
+class TestLoopWatchdog:
+    """Test cases for detecting code that blocks the event loop"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_attributed_to_its_call_site(self, caplog):
+        """Test a sync call inside a coroutine is logged and aggregated by call site"""
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.01)
+
+        async def handler():
+            _blocking_call()
+
+        with caplog.at_level(logging.WARNING):
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            await asyncio.create_task(handler(), name="slow-handler")
+            await asyncio.sleep(0.05)
+            await watchdog.stop()
+
+        (stall,) = watchdog.stalls()
+        assert stall["site"].startswith("tests/services/test_loop_watchdog.py:")
+        assert stall["site"].endswith("in _blocking_call")
+        assert stall["count"] == 1
+        assert 200 <= stall["max_ms"] <= 400
+        assert stall["task"].startswith("slow-handler")
+        assert "in handler" in stall["stack"]
+        assert "Event loop blocked for" in caplog.text
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_short_pauses_are_ignored(self):
+        """Test nothing is recorded while the loop keeps up"""
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.01)
+
+        watchdog.start()
+        time.sleep(0.02)
+        await asyncio.sleep(0.1)
+        await watchdog.stop()
+
+        assert watchdog.stalls() == []
@@ -0,0 +1,57 @@
+import tracemalloc
+
+import pytest
+from api.services.memory_diagnostics import MemoryDiagnostics
+from api.storage.models import User
+
+
+@pytest.fixture
+def diagnostics():
+    diagnostics = MemoryDiagnostics()
+    yield diagnostics
+    if tracemalloc.is_tracing():
+        diagnostics.stop()
+
+
+class TestMemoryDiagnostics:
+    """Test cases for tracemalloc snapshots"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_growth_between_snapshots_is_attributed(self, diagnostics):
+        """Test comparing snapshots points at the line that allocated the growth"""
+        diagnostics.start(frames=5)
+        diagnostics.snapshot()
+
+        retained = [bytes(1024) for _ in range(2000)]
+        result = diagnostics.snapshot(limit=5, compare=True)
+
+        assert result["tracing"] and result["compared"]
+        assert result["traced_kb"] > 0
+        top = result["top"][0]
+        assert "test_memory_diagnostics.py" in top["location"]
+        assert top["size_diff_kb"] >= 2000
+        assert top["count_diff"] >= 2000
+        assert len(retained) == 2000
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_object_counts_without_tracing(self, diagnostics):
+        """Test live ORM objects are counted even when tracing is off"""
+        users = [
+            User(id=i, name=f"User {i}", email=f"{i}@example.com") for i in range(3)
+        ]
+
+        result = diagnostics.snapshot()
+
+        assert not result["tracing"]
+        assert result["top"] == []
+        assert result["objects"]["orm:User"] >= len(users)
+        assert "websocket_connections" in result["objects"]
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_unknown_grouping_is_rejected(self, diagnostics):
+        """Test snapshot() refuses groupings tracemalloc does not support"""
+        with pytest.raises(ValueError):
+            diagnostics.snapshot(group_by="module")
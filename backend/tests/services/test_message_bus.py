@@ -0,0 +1,272 @@
+import asyncio
+import json
+import socket
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from api.services.message_bus import (
+    InMemoryMessageBus,
+    MessageBus,
+    PostgresMessageBus,
+    RedisMessageBus,
+    create_message_bus,
+)
+
+
+def envelope(payload: dict) -> str:
+    return json.dumps({"origin": "other-worker", "payload": payload})
+
+
+class FakePubSub:
+    """Redis pub/sub that yields the given messages, then fails or blocks"""
+
+    def __init__(self, messages=(), error=None, subscribe_error=None):
+        self.messages = messages
+        self.error = error
+        self.subscribe_error = subscribe_error
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        if self.subscribe_error:
+            raise self.subscribe_error
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        if self.error:
+            raise self.error
+        await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeListenConnection:
+    """psycopg2 connection whose socket is one end of a socketpair"""
+
+    def __init__(self, notifies=(), error=None):
+        self.sock, self.peer = socket.socketpair()
+        self.notifies = list(notifies)
+        self.error = error
+        self.closed = False
+
+    def cursor(self):
+        cursor = Mock()
+        cursor.__enter__ = Mock(return_value=cursor)
+        cursor.__exit__ = Mock(return_value=False)
+        return cursor
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def poll(self):
+        self.sock.recv(1)
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+        self.peer.close()
+
+
+async def wait_for_call(mock, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not mock.called:
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+class TestInMemoryMessageBus:
+    """Test cases for the in-memory message bus"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_delivers_to_other_workers_only(self):
+        """Test envelopes reach other buses on the broker but not the publisher"""
+        broker = []
+        worker1 = InMemoryMessageBus(broker)
+        worker2 = InMemoryMessageBus(broker)
+        handler1 = AsyncMock()
+        handler2 = AsyncMock()
+        worker1.subscribe("chat", handler1)
+        worker2.subscribe("chat", handler2)
+        await worker1.start()
+        await worker2.start()
+
+        await worker1.publish("chat", {"user_id": 2, "message": "hello"})
+
+        handler1.assert_not_called()
+        handler2.assert_called_once_with({"user_id": 2, "message": "hello"})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_subscribing_twice_delivers_once(self):
+        """Test re-subscribing the same handler does not duplicate delivery"""
+        broker = []
+        publisher = InMemoryMessageBus(broker)
+        subscriber = InMemoryMessageBus(broker)
+        handler = AsyncMock()
+        subscriber.subscribe("chat", handler)
+        subscriber.subscribe("chat", handler)
+        await subscriber.start()
+
+        await publisher.publish("chat", {"user_id": 2, "message": "hello"})
+
+        handler.assert_awaited_once_with({"user_id": 2, "message": "hello"})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_handler_errors_are_isolated(self):
+        """Test a failing handler does not stop other handlers or the publisher"""
+        broker = []
+        publisher = InMemoryMessageBus(broker)
+        subscriber = InMemoryMessageBus(broker)
+        failing = AsyncMock(side_effect=RuntimeError("socket closed"))
+        working = AsyncMock()
+        subscriber.subscribe("notifications", failing)
+        subscriber.subscribe("notifications", working)
+        await subscriber.start()
+
+        await publisher.publish("notifications", {"user_id": None, "message": "hi"})
+
+        working.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stopped_bus_receives_nothing(self):
+        """Test a stopped bus is removed from the broker"""
+        broker = []
+        publisher = InMemoryMessageBus(broker)
+        subscriber = InMemoryMessageBus(broker)
+        handler = AsyncMock()
+        subscriber.subscribe("chat", handler)
+        await subscriber.start()
+        await subscriber.stop()
+
+        await publisher.publish("chat", {"user_id": 1, "message": "hi"})
+
+        handler.assert_not_called()
+
+
+class TestMessageBusBackends:
+    """Test cases for backend selection and the networked backends"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "backend, bus_class",
+        [
+            ("memory", InMemoryMessageBus),
+            ("redis", RedisMessageBus),
+            ("postgres", PostgresMessageBus),
+        ],
+    )
+    def test_create_message_bus(self, backend, bus_class):
+        """Test the backend is chosen from settings"""
+        with patch("api.services.message_bus.settings") as mock_settings:
+            mock_settings.message_bus_backend = backend
+            mock_settings.message_bus_url = ""
+            mock_settings.database_url = "postgresql://user:pw@localhost/db"
+            assert isinstance(create_message_bus(), bus_class)
+
+    @pytest.mark.unit
+    def test_create_message_bus_unknown_backend(self):
+        """Test an unknown backend is rejected"""
+        with patch("api.services.message_bus.settings") as mock_settings:
+            mock_settings.message_bus_backend = "carrier-pigeon"
+            with pytest.raises(ValueError):
+                create_message_bus()
+
+    @pytest.mark.unit
+    def test_backends_must_implement_send(self):
+        """Test a bus without a transport cannot be created"""
+
+        class NoTransportBus(MessageBus):
+            pass
+
+        with pytest.raises(TypeError):
+            NoTransportBus()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_redis_requires_package(self):
+        """Test a clear error is raised when redis is not installed"""
+        bus = RedisMessageBus("redis://localhost:6379/0")
+        with patch.dict(sys.modules, {"redis": None, "redis.asyncio": None}):
+            with pytest.raises(RuntimeError, match="redis"):
+                await bus.start()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_postgres_skips_oversized_payloads(self):
+        """Test payloads over the NOTIFY limit are not sent"""
+        bus = PostgresMessageBus("postgresql+psycopg2://user:pw@localhost/db")
+        assert bus.dsn == "postgresql://user:pw@localhost/db"
+
+        with patch.object(bus, "_notify") as mock_notify:
+            await bus.publish("chat", {"user_id": 1, "message": "x" * 9000})
+            mock_notify.assert_not_called()
+
+            await bus.publish("chat", {"user_id": 1, "message": "short"})
+            mock_notify.assert_called_once()
+
+
+class TestMessageBusReconnect:
+    """Test cases for recovering from a lost subscription"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    @patch("api.services.message_bus.RECONNECT_MIN_DELAY", 0.01)
+    async def test_redis_resubscribes_after_connection_loss(self):
+        """Test the reader logs the failure, backs off and resubscribes"""
+        message = {
+            "type": "message",
+            "channel": b"bus_chat",
+            "data": envelope({"user_id": 1, "message": "hi"}).encode(),
+        }
+        lost = FakePubSub(error=ConnectionError("connection reset"))
+        refused = FakePubSub(subscribe_error=ConnectionError("connection refused"))
+        restored = FakePubSub([message])
+        bus = RedisMessageBus("redis://localhost:6379/0")
+        handler = AsyncMock()
+        bus.subscribe("chat", handler)
+        bus.client = Mock(pubsub=Mock(side_effect=[lost, refused, restored]))
+
+        await bus._subscribe()
+        with patch("api.services.message_bus.logging.error") as log_error:
+            bus.reader = asyncio.create_task(bus._read())
+            await wait_for_call(handler)
+        bus.reader.cancel()
+
+        handler.assert_called_once_with({"user_id": 1, "message": "hi"})
+        assert lost.closed and refused.closed
+        assert bus.pubsub is restored
+        assert log_error.call_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    @patch("api.services.message_bus.RECONNECT_MIN_DELAY", 0.01)
+    async def test_postgres_listens_again_after_connection_loss(self):
+        """Test a broken LISTEN connection is replaced by a new one"""
+        notify = SimpleNamespace(
+            channel="bus_chat", payload=envelope({"user_id": 1, "message": "hi"})
+        )
+        lost = FakeListenConnection(error=RuntimeError("server closed the connection"))
+        restored = FakeListenConnection([notify])
+        bus = PostgresMessageBus("postgresql://user:pw@localhost/db")
+        handler = AsyncMock()
+        bus.subscribe("chat", handler)
+
+        with patch.object(bus, "_connect", side_effect=[lost, restored]):
+            await bus.start()
+            lost.peer.send(b"x")
+            while bus.listen_connection is not restored:
+                await asyncio.sleep(0.01)
+            restored.peer.send(b"x")
+            await wait_for_call(handler)
+        await bus.stop()
+
+        handler.assert_called_once_with({"user_id": 1, "message": "hi"})
+        assert lost.closed and restored.closed
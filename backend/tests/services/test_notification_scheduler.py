@@ -0,0 +1,141 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import ANY, AsyncMock
+
+import pytest
+from api.config import settings
+from api.services.notification_scheduler import NotificationScheduler
+from api.storage.models import PendingChatNotification
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def scheduler(test_engine):
+    scheduler = NotificationScheduler(test_engine)
+    yield scheduler
+    with Session(test_engine) as session:
+        session.query(PendingChatNotification).delete()
+        session.commit()
+
+
+def pending(engine):
+    with Session(engine) as session:
+        return [
+            (row.chat_id, row.receiver_id, row.origin)
+            for row in session.query(PendingChatNotification).all()
+        ]
+
+
+class TestNotificationScheduler:
+    """Test cases for the delayed unread-message email scheduler"""
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_schedule_coalesces_per_chat_and_receiver(self, scheduler, test_engine):
+        """Test repeated messages keep a single pending check per pair"""
+        assert scheduler.schedule(1, 2, "https://a.test")
+        assert not scheduler.schedule(1, 2, "https://a.test")
+        assert scheduler.schedule(1, 3, "https://a.test")
+
+        assert sorted(pending(test_engine)) == [
+            (1, 2, "https://a.test"),
+            (1, 3, "https://a.test"),
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_sweep_runs_only_due_checks_once(self, scheduler, test_engine):
+        """Test due checks are run and removed while later ones stay pending"""
+        handler = AsyncMock()
+        scheduler.handler = handler
+        scheduler.schedule(1, 2, "https://a.test", delay=-1)
+        scheduler.schedule(4, 5, "https://a.test", delay=3600)
+
+        assert await scheduler.sweep() == 1
+        assert await scheduler.sweep() == 0
+
+        handler.assert_called_once_with(1, 2, "https://a.test")
+        assert pending(test_engine) == [(4, 5, "https://a.test")]
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_pending_checks_survive_restart(self, test_engine):
+        """Test a check scheduled by one process is run by the next one"""
+        NotificationScheduler(test_engine).schedule(1, 2, "https://a.test", delay=-1)
+
+        restarted = NotificationScheduler(test_engine)
+        restarted.handler = AsyncMock()
+        try:
+            assert await restarted.sweep() == 1
+            restarted.handler.assert_called_once_with(1, 2, "https://a.test")
+        finally:
+            with Session(test_engine) as session:
+                session.query(PendingChatNotification).delete()
+                session.commit()
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_handler_errors_do_not_stop_sweep(self, scheduler):
+        """Test a failing check does not prevent the remaining due checks"""
+        scheduler.handler = AsyncMock(side_effect=[RuntimeError("smtp down"), None])
+        scheduler.schedule(1, 2, "https://a.test", delay=-2)
+        scheduler.schedule(3, 4, "https://a.test", delay=-1)
+
+        assert await scheduler.sweep() == 2
+        assert scheduler.handler.call_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_checks_run_off_the_event_loop(self, scheduler):
+        """Test blocking checks do not run on the server's event loop thread"""
+        threads = []
+
+        async def handler(chat_id, receiver_id, origin):
+            threads.append(threading.get_ident())
+
+        scheduler.handler = handler
+        scheduler.schedule(1, 2, "https://a.test", delay=-1)
+
+        assert await scheduler.sweep() == 1
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    def test_schedule_uses_configured_delay(self, scheduler, test_engine):
+        """Test the due time defaults to settings.chat_notification_delay"""
+        before = datetime.now(timezone.utc)
+        scheduler.schedule(1, 2, "https://a.test")
+
+        with Session(test_engine) as session:
+            due_at = session.query(PendingChatNotification).one().due_at
+        if due_at.tzinfo is None:
+            due_at = due_at.replace(tzinfo=timezone.utc)
+        assert due_at >= before + timedelta(seconds=1800)
+
+    @pytest.mark.unit
+    @pytest.mark.services
+    @pytest.mark.asyncio
+    async def test_check_claimed_by_crashed_worker_is_retried(
+        self, scheduler, test_engine
+    ):
+        """Test a claimed check stays pending and is run again once its lease expires"""
+        scheduler.schedule(1, 2, "https://a.test", delay=-1)
+        now = datetime.now(timezone.utc)
+        # The claiming worker dies before running the check
+        assert scheduler._claim_due(now) == [
+            (ANY, 1, 2, "https://a.test"),
+        ]
+
+        restarted = NotificationScheduler(test_engine)
+        restarted.handler = AsyncMock()
+        assert await restarted.sweep() == 0
+        assert pending(test_engine) == [(1, 2, "https://a.test")]
+
+        lease_expired = now + timedelta(seconds=settings.chat_notification_lease + 1)
+        assert [row[1:] for row in restarted._claim_due(lease_expired)] == [
+            (1, 2, "https://a.test")
+        ]
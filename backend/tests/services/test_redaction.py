@@ -0,0 +1,68 @@
+import pytest
+from api.services.redaction import (
+    Span,
+    find_pii_spans,
+    locate_spans,
+    merge_spans,
+    redact,
+)
+
+
+class TestRedaction:
+    """Test cases for local span-level PII redaction"""
+
+    @pytest.mark.unit
+    def test_redact_email(self):
+        """Test an email address is replaced by a placeholder"""
+        text = "Email me at jia.tan@gmail.com thanks"
+        assert (
+            redact(text, find_pii_spans(text)) == "Email me at [EMAIL_ADDRESS] thanks"
+        )
+
+    @pytest.mark.unit
+    def test_redact_spaced_phone_number(self):
+        """Test phone numbers split by whitespace are masked as a single span"""
+        text = "My number is 9123 4567 thanks"
+        assert (
+            redact(text, find_pii_spans(text)) == "My number is [PHONE_NUMBER] thanks"
+        )
+
+    @pytest.mark.unit
+    def test_redact_address_clause(self):
+        """Test the clause containing an address keyword and number is masked"""
+        text = "Lessons at my place, Blk 123 Bishan St 12, from next week"
+        assert (
+            redact(text, find_pii_spans(text))
+            == "Lessons at my place, [ADDRESS], from next week"
+        )
+
+    @pytest.mark.unit
+    def test_redact_social_handle(self):
+        """Test social handles are masked but platform words are kept"""
+        text = "add me on insta: @jia_tutor12"
+        assert (
+            redact(text, find_pii_spans(text))
+            == "add me on insta: [SOCIAL_MEDIA_SHARE]"
+        )
+
+    @pytest.mark.unit
+    def test_no_pii(self):
+        """Test benign text has no spans and is unchanged"""
+        text = "Can we do the lessons on Monday afternoons instead?"
+        assert find_pii_spans(text) == []
+        assert redact(text, []) == text
+
+    @pytest.mark.unit
+    def test_locate_spans_ignores_case_and_whitespace(self):
+        """Test hints are found regardless of case and spacing"""
+        spans = locate_spans("Meet at Bishan  MRT", ["bishan mrt"], "ADDRESS")
+        assert spans == [Span(8, 19, "ADDRESS")]
+        assert locate_spans("Meet at Bishan", ["Tampines"], "ADDRESS") == []
+
+    @pytest.mark.unit
+    def test_merge_overlapping_spans(self):
+        """Test overlapping spans are merged, keeping the first span's kind"""
+        merged = merge_spans(
+            [Span(5, 10, "POSTAL_CODE"), Span(3, 8, "PHONE_NUMBER"), Span(12, 14, "X")]
+        )
+        assert merged == [Span(3, 10, "PHONE_NUMBER"), Span(12, 14, "X")]
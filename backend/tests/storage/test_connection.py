@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+from api.common.metrics import metrics
+from api.common.tracing import tracer
+from api.storage.connection import (
+    TimedQueuePool,
+    pool_checkout_duration,
+    pool_checkout_timeouts,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+class TestTimedQueuePool:
+    """Test cases for the connection pool that times checkouts"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_checkouts_and_timeouts_are_recorded(self, tmp_path):
+        """Test every checkout is timed and exhausted-pool timeouts are counted"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        checkouts = pool_checkout_duration.labels(engine="default").count
+        timeouts = pool_checkout_timeouts.labels(engine="default").value
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        engine.dispose()
+
+        assert pool_checkout_duration.labels(engine="default").count == checkouts + 2
+        assert pool_checkout_timeouts.labels(engine="default").value == timeouts + 1
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_every_pool_is_reported(self, tmp_path):
+        """Test pool gauges cover the primary and each replica, by engine name"""
+        replica = create_engine(
+            f"sqlite:///{tmp_path / 'replica.db'}",
+            poolclass=TimedQueuePool,
+            pool_logging_name="replica-1",
+        )
+
+        with patch("api.storage.connection.replica_engines", [replica]):
+            with replica.connect():
+                rendered = metrics.render()
+        replica.dispose()
+
+        assert 'db_pool_size{engine="primary"}' in rendered
+        assert 'db_pool_size{engine="replica-1"} 5.0' in rendered
+        assert (
+            'db_pool_connections{engine="replica-1",state="checked_out"} 1.0'
+            in rendered
+        )
+        assert 'db_pool_checkout_seconds_count{engine="replica-1"} 1.0' in rendered
+
+
+class TestStatementSpans:
+    """Test cases for tracing SQL statements"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_statements_are_traced(self, tmp_path, span_exporter):
+        """Test each statement gets a span under the current one, failures included"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'traced.db'}")
+
+        with tracer.start_as_current_span("request") as request:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                with pytest.raises(Exception):
+                    connection.execute(text("SELECT * FROM missing_table"))
+        engine.dispose()
+
+        select, failed = [
+            span for span in span_exporter.get_finished_spans() if span.kind == "client"
+        ]
+        assert select.name == "SELECT"
+        assert select.parent_id == request.context.span_id
+        assert select.attributes["db.system"] == "sqlite"
+        assert select.attributes["db.statement"] == "SELECT 1"
+        assert failed.status == "error"
@@ -0,0 +1,128 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from api.common.tracing import traced_class
+from api.config import settings
+from api.storage.query_stats import (
+    OVERFLOW_FINGERPRINT,
+    QueryStats,
+    fingerprint,
+    query_stats,
+)
+from sqlalchemy import create_engine, text
+
+
+class TestFingerprint:
+    """Test cases for reducing statements to their shape"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    @pytest.mark.parametrize(
+        "statement, expected",
+        [
+            (
+                "SELECT * FROM users WHERE id = 42 AND name = 'O''Brien'",
+                "SELECT * FROM users WHERE id = ? AND name = ?",
+            ),
+            (
+                "SELECT users.id FROM users WHERE users.id IN (%(id_1_1)s, %(id_1_2)s)",
+                "SELECT users.id FROM users WHERE users.id IN (...)",
+            ),
+            (
+                "INSERT INTO tags (a, b) VALUES (?, ?), (?, ?), (?, ?)",
+                "INSERT INTO tags (a, b) VALUES (?, ?), ...",
+            ),
+            (
+                "SELECT users_1.id\n  FROM users AS users_1 LIMIT :param_1 -- page",
+                "SELECT users_1.id FROM users AS users_1 LIMIT ?",
+            ),
+            ("SELECT $1::int", "SELECT ?::int"),
+        ],
+    )
+    def test_values_and_list_lengths_are_normalised(self, statement, expected):
+        """Test literals, placeholders, IN lists and VALUES rows collapse to one shape"""
+        assert fingerprint(statement) == expected
+
+
+class TestQueryStats:
+    """Test cases for per-fingerprint statement statistics"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_statements_are_aggregated_by_fingerprint(self):
+        """Test count, total, max and origins are kept per fingerprint"""
+        stats = QueryStats()
+
+        stats.record("SELECT * FROM users WHERE id = 1", 0.010, "UserLogic.get")
+        stats.record("SELECT * FROM users WHERE id = 2", 0.030, "ChatLogic.send")
+        stats.record("SELECT * FROM tutors", 0.005)
+
+        users, tutors = stats.top()
+        assert users == {
+            "fingerprint": "SELECT * FROM users WHERE id = ?",
+            "count": 2,
+            "total_ms": 40.0,
+            "mean_ms": 20.0,
+            "max_ms": 30.0,
+            "origins": ["UserLogic.get", "ChatLogic.send"],
+            "sample": "SELECT * FROM users WHERE id = 2",
+        }
+        assert tutors["origins"] == []
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_ordering_and_limit(self):
+        """Test top() ranks by the requested measure and rejects unknown ones"""
+        stats = QueryStats()
+        for _ in range(3):
+            stats.record("SELECT 1", 0.001)
+        stats.record("SELECT * FROM users", 0.5)
+
+        assert stats.top(1, "count")[0]["fingerprint"] == "SELECT ?"
+        assert stats.top(1, "max")[0]["fingerprint"] == "SELECT * FROM users"
+        with pytest.raises(ValueError):
+            stats.top(order_by="rows")
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_new_fingerprints_overflow_once_full(self):
+        """Test the table stops growing and counts further shapes together"""
+        stats = QueryStats(max_fingerprints=1)
+
+        stats.record("SELECT * FROM users", 0.001)
+        stats.record("SELECT * FROM tutors", 0.001)
+        stats.record("SELECT * FROM chats", 0.001)
+        stats.record("SELECT * FROM users", 0.001)
+
+        counts = {row["fingerprint"]: row["count"] for row in stats.top()}
+        assert counts == {"SELECT * FROM users": 2, OVERFLOW_FINGERPRINT: 2}
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_engine_statements_are_recorded_and_slow_ones_logged(
+        self, tmp_path, caplog
+    ):
+        """Test statements run through an engine are timed and logged with their logic method"""
+
+        @traced_class
+        class ReportLogic:
+            @staticmethod
+            def run(connection):
+                connection.execute(text("SELECT 12345 AS slow_marker"))
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+        query_stats.reset()
+
+        with patch.object(settings, "slow_query_threshold_ms", 0.0):
+            with caplog.at_level(logging.WARNING):
+                with engine.connect() as connection:
+                    ReportLogic.run(connection)
+        engine.dispose()
+
+        (row,) = [
+            row for row in query_stats.top(500) if "slow_marker" in row["fingerprint"]
+        ]
+        assert row["fingerprint"] == "SELECT ? AS slow_marker"
+        assert row["origins"][0].endswith("ReportLogic.run")
+        assert "ReportLogic.run: SELECT 12345 AS slow_marker" in caplog.text
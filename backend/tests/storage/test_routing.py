@@ -0,0 +1,138 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from api.exceptions import ReadOnlySessionError
+from api.index import app
+from api.logic.user_logic import UserLogic
+from api.router.auth_utils import RouterAuthUtils
+from api.storage.models import Base, User
+from api.storage.routing import (
+    PIN_COOKIE,
+    READ_ONLY,
+    pinned_to_primary,
+    recent_writers,
+    track_request,
+)
+from api.storage.storage_service import StorageService
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """
+    A primary and a replica that lags behind it: user 1 was renamed on the
+    primary and the change has not reached the replica yet.
+    """
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, name in ((primary, "New Name"), (replica, "Old Name")):
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(id=1, name=name, email="user@example.com"))
+            session.commit()
+    recent_writers.clear()
+    with (
+        patch.object(StorageService, "engine", primary),
+        patch.object(StorageService, "replica_engines", [replica]),
+        patch.object(UserLogic, "get_profile_photo_url", return_value=""),
+    ):
+        yield primary, replica
+    recent_writers.clear()
+    primary.dispose()
+    replica.dispose()
+
+
+def rename(user_id: int, name: str) -> None:
+    with Session(StorageService.engine) as session:
+        session.execute(update(User).where(User.id == user_id).values(name=name))
+        session.commit()
+
+
+class TestReplicaRouting:
+    """Test cases for sending read-only sessions to replicas"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_replicas_are_used_in_turn(self, databases):
+        """Test reads rotate over the replicas, and use the primary without any"""
+        primary, replica = databases
+        other = create_engine("sqlite://")
+
+        with patch.object(StorageService, "replica_engines", [replica, other]):
+            engines = [StorageService.read_engine() for _ in range(4)]
+        with patch.object(StorageService, "replica_engines", []):
+            assert StorageService.read_engine() is primary
+
+        assert {engines[0], engines[1]} == {replica, other}
+        assert engines[2:] == engines[:2]
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_read_only_logic_reads_the_replica(self, databases):
+        """Test read-only logic methods are served by the replica"""
+        assert UserLogic.get_user_by_id(1).name == "Old Name"
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_read_only_sessions_refuse_writes(self, databases):
+        """Test a read-only session fails instead of writing"""
+        primary, _ = databases
+
+        with Session(primary, info=READ_ONLY) as session:
+            session.get(User, 1).name = "Changed"
+            with pytest.raises(ReadOnlySessionError):
+                session.flush()
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_writers_read_their_own_writes(self, databases):
+        """Test a user's reads move to the primary after they write, and only theirs"""
+        with track_request(user_id=1) as state:
+            assert UserLogic.get_user_by_id(1).name == "Old Name"
+            rename(1, "Newest Name")
+            assert state.wrote
+            assert UserLogic.get_user_by_id(1).name == "Newest Name"
+
+        with track_request(user_id=1):
+            assert pinned_to_primary()
+        with track_request(user_id=2):
+            assert UserLogic.get_user_by_id(1).name == "Old Name"
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    @pytest.mark.parametrize(
+        "offset, pinned",
+        [(60, True), (-1, False), (None, False)],
+    )
+    def test_pin_cookie(self, offset, pinned):
+        """Test only an unexpired pin cookie keeps reads on the primary"""
+        # A cookie that is not a timestamp is ignored
+        cookie = "x" if offset is None else str(time.time() + offset)
+        with track_request(pin_cookie=cookie):
+            assert pinned_to_primary() is pinned
+        assert not pinned_to_primary()
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_requests_that_write_pin_the_client(self, databases, client):
+        """Test a request that writes sets the pin cookie, so the next read sees it"""
+        user = User(id=1, name="New Name", email="user@example.com")
+
+        with (
+            patch.object(RouterAuthUtils, "get_user_from_jwt", return_value=user),
+            patch(
+                "api.router.chat.ChatLogic.mark_chat_as_read",
+                side_effect=lambda chat_id, user_id: rename(user_id, "Newest Name"),
+            ),
+        ):
+            written = client.post("/api/chat/5/read")
+        recent_writers.clear()
+        pinned = client.get("/api/user/1")
+        unpinned = TestClient(app).get("/api/user/1")
+
+        assert PIN_COOKIE in written.cookies
+        assert pinned.json()["user"]["name"] == "Newest Name"
+        assert unpinned.json()["user"]["name"] == "Old Name"
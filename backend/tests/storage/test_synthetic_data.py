@@ -0,0 +1,134 @@
+import datetime
+
+import pytest
+from api.storage.models import (
+    AssignmentRequestStatus,
+    Base,
+    ChatMessage,
+    Gender,
+    PrivateChat,
+)
+from api.storage.synthetic_data import (
+    CsvStream,
+    SyntheticDataConfig,
+    SyntheticDataGenerator,
+)
+from sqlalchemy import create_engine, select, text
+
+NOW = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+CONFIG = SyntheticDataConfig(
+    users=200, assignments=100, chats=150, messages=2000, batch_size=64
+)
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class TestSyntheticData:
+    """Test cases for the bulk synthetic data generator"""
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_generates_requested_volumes(self, tmp_path):
+        """Test every table is filled and the requested counts are met"""
+        engine = make_engine(tmp_path / "synthetic.db")
+
+        counts = SyntheticDataGenerator(engine, CONFIG, now=NOW).generate()
+
+        assert counts["User"] == 200
+        assert counts["Assignment"] == 100
+        assert counts["PrivateChat"] == 150
+        assert counts["ChatMessage"] == 2000
+        assert counts["ChatReadStatus"] == 300
+        for table in ("Tutor", "TutorSubject", "AssignmentSlot", "AssignmentRequest"):
+            assert counts[table] > 0
+        with engine.connect() as connection:
+            for table, count in counts.items():
+                assert (
+                    connection.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+                    == count
+                )
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_data_is_consistent(self, tmp_path):
+        """Test generated rows respect the constraints the app relies on"""
+        engine = make_engine(tmp_path / "synthetic.db")
+        SyntheticDataGenerator(engine, CONFIG, now=NOW).generate()
+
+        with engine.connect() as connection:
+            # Messages are sent by a member of the chat, after it was opened
+            assert not connection.execute(
+                text(
+                    'SELECT COUNT(*) FROM "ChatMessage" m JOIN "PrivateChat" c '
+                    "ON c.id = m.chat_id WHERE m.sender_id NOT IN (c.user1_id, c.user2_id) "
+                    "OR m.created_at < c.created_at"
+                )
+            ).scalar()
+            # Filled assignments have exactly one accepted request, from their tutor
+            accepted = connection.execute(
+                text(
+                    'SELECT a.tutor_id, r.tutor_id FROM "Assignment" a JOIN '
+                    '"AssignmentRequest" r ON r.assignment_id = a.id '
+                    f"WHERE r.status = '{AssignmentRequestStatus.ACCEPTED.name}'"
+                )
+            ).all()
+            assert accepted and all(a == r for a, r in accepted)
+            pairs = connection.execute(
+                select(PrivateChat.user1_id, PrivateChat.user2_id)
+            ).all()
+            assert all(user1 < user2 for user1, user2 in pairs)
+            message_ids = (
+                connection.execute(
+                    select(ChatMessage.id).order_by(ChatMessage.created_at)
+                )
+                .scalars()
+                .all()
+            )
+            assert message_ids == sorted(message_ids)
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_same_seed_same_data(self, tmp_path):
+        """Test the output only depends on the seed"""
+
+        def messages(path, seed):
+            engine = make_engine(path)
+            config = SyntheticDataConfig(
+                users=50, assignments=20, chats=30, messages=200, seed=seed
+            )
+            SyntheticDataGenerator(engine, config, now=NOW).generate()
+            with engine.connect() as connection:
+                return connection.execute(
+                    select(
+                        ChatMessage.chat_id, ChatMessage.sender_id, ChatMessage.content
+                    ).order_by(ChatMessage.id)
+                ).all()
+
+        first = messages(tmp_path / "a.db", seed=1)
+        assert first == messages(tmp_path / "b.db", seed=1)
+        assert first != messages(tmp_path / "c.db", seed=2)
+
+    @pytest.mark.unit
+    @pytest.mark.storage
+    def test_csv_stream_formats_rows_for_copy(self):
+        """Test rows are rendered the way PostgreSQL's COPY CSV expects"""
+        at = datetime.datetime(2025, 1, 1, 9, 30, tzinfo=datetime.timezone.utc)
+        stream = CsvStream(
+            iter(
+                [(1, Gender.FEMALE, True, None, at), (2, "Hi, there", False, 4.5, at)]
+            ),
+            chunk_rows=1,
+        )
+
+        first = stream.read(10)
+        rest = stream.read()
+
+        assert first + rest == (
+            "1,FEMALE,t,,2025-01-01T09:30:00+00:00\n"
+            '2,"Hi, there",f,4.5,2025-01-01T09:30:00+00:00\n'
+        )
+        assert stream.read() == ""